@@ -0,0 +1,95 @@
+"""
+Benchmark of the per-point datasaving overhead of the MeasurementControl.
+
+Compares the access pattern of `MC.measurement_function` (resize by one row,
+read back the old values for soft averaging, write one row) on a plain h5py
+dataset with the same pattern on an `h5d.BufferedDataset`.
+Also times a full soft sweep through the MC using the `Dummy_Detector_Soft`.
+
+Usage:
+    python MC_datasaving_benchmark.py
+"""
+import os
+import time
+import tempfile
+import h5py
+import numpy as np
+
+from pycqed.measurement import hdf5_data as h5d
+from pycqed.measurement import measurement_control
+from pycqed.measurement.sweep_functions import None_Sweep
+import pycqed.measurement.detector_functions as det
+
+
+def soft_sweep_io_pattern(dset, nr_points: int, soft_iteration: int = 0):
+    """
+    Mimics the dataset access of `MC.measurement_function`.
+    """
+    ncols = dset.shape[1]
+    for i in range(nr_points):
+        dset.resize((max(dset.shape[0], i + 1), ncols))
+        new_data = np.full(ncols, i, dtype=np.float64)
+        old_vals = dset[i : i + 1, :]
+        new_vals = (new_data + old_vals * soft_iteration) / (1 + soft_iteration)
+        dset[i : i + 1, :] = new_vals
+
+
+def time_h5py_dataset(nr_points: int, ncols: int = 3):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with h5py.File(os.path.join(tmpdir, "bench.hdf5"), "w") as f:
+            dset = f.create_dataset(
+                "Data", (0, ncols), maxshape=(None, ncols), dtype="float64"
+            )
+            t0 = time.perf_counter()
+            soft_sweep_io_pattern(dset, nr_points)
+            return time.perf_counter() - t0
+
+
+def time_buffered_dataset(nr_points: int, ncols: int = 3):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with h5py.File(os.path.join(tmpdir, "bench.hdf5"), "w") as f:
+            t0 = time.perf_counter()
+            dset = h5d.BufferedDataset(f, "Data", ncols=ncols)
+            soft_sweep_io_pattern(dset, nr_points)
+            dset.flush()
+            return time.perf_counter() - t0
+
+
+def time_MC_soft_sweep(MC, nr_points: int):
+    MC.set_sweep_function(None_Sweep())
+    MC.set_sweep_points(np.arange(nr_points))
+    MC.set_detector_function(det.Dummy_Detector_Soft())
+    t0 = time.perf_counter()
+    MC.run("MC_datasaving_benchmark", disable_snapshot_metadata=True)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    # The plain h5py path is very slow beyond 1e5 points, increase with care
+    nr_points_list = [int(1e3), int(1e4), int(1e5)]
+    nr_points_list_buffered = nr_points_list + [int(1e6)]
+
+    print("Dataset access pattern of MC.measurement_function")
+    print("{:>10} {:>22} {:>22}".format("points", "h5py [us/pt]", "buffered [us/pt]"))
+    for nr_points in nr_points_list_buffered:
+        t_buf = time_buffered_dataset(nr_points)
+        if nr_points in nr_points_list:
+            t_h5 = "{:.2f}".format(time_h5py_dataset(nr_points) / nr_points * 1e6)
+        else:
+            t_h5 = "-"
+        print(
+            "{:>10} {:>22} {:>22.2f}".format(
+                nr_points, t_h5, t_buf / nr_points * 1e6
+            )
+        )
+
+    with tempfile.TemporaryDirectory() as datadir:
+        MC = measurement_control.MeasurementControl(
+            "MC_bench", datadir=datadir, live_plot_enabled=False, verbose=False
+        )
+        print("\nFull MC soft sweep using Dummy_Detector_Soft")
+        print("{:>10} {:>22}".format("points", "MC [us/pt]"))
+        for nr_points in nr_points_list:
+            t_mc = time_MC_soft_sweep(MC, nr_points)
+            print("{:>10} {:>22.2f}".format(nr_points, t_mc / nr_points * 1e6))
+        MC.close()
@@ -0,0 +1,89 @@
+"""
+Benchmark of the batch adaptive mode of the MeasurementControl
+("batch_size" in the adaptive function parameters), sampling a 2D
+parabola with `adaptive.Learner2D` to `n_points` points.
+
+The instrument is simulated by a detector that takes `overhead` seconds per
+acquisition (upload, triggering and data transfer) plus `t_point` seconds
+per measured point. Point by point every point pays the overhead, in batch
+mode it is paid once per batch of points measured in a single hard sweep.
+
+Usage:
+    python adaptive_batch_benchmark.py [n_points] [overhead] [t_point]
+"""
+import sys
+import time
+import tempfile
+
+import numpy as np
+import adaptive
+
+from pycqed.measurement import measurement_control
+from pycqed.measurement import detector_functions as det
+from pycqed.measurement.sweep_functions import None_Sweep
+
+
+class Parabola_Soft(det.Soft_Detector):
+    def __init__(self, MC, overhead, t_point):
+        super().__init__()
+        self.name = "parabola"
+        self.value_names = ["parabola"]
+        self.value_units = ["a.u."]
+        self.MC, self.overhead, self.t_point = MC, overhead, t_point
+
+    def acquire_data_point(self):
+        time.sleep(self.overhead + self.t_point)
+        return np.sum(np.array(self.MC.last_sweep_pts) ** 2)
+
+
+class Parabola_Hard(det.Hard_Detector):
+    def __init__(self, overhead, t_point):
+        super().__init__()
+        self.name = "parabola"
+        self.value_names = ["parabola"]
+        self.value_units = ["a.u."]
+        self.overhead, self.t_point = overhead, t_point
+
+    def prepare(self, sweep_points):
+        self.sweep_points = np.array(sweep_points)
+
+    def get_values(self):
+        time.sleep(self.overhead + self.t_point * len(self.sweep_points))
+        return np.sum(self.sweep_points ** 2, axis=1)
+
+
+def run(MC, n_points, batch_size, overhead, t_point):
+    control = "soft" if batch_size is None else "hard"
+    MC.set_sweep_functions([None_Sweep(sweep_control=control),
+                            None_Sweep(sweep_control=control)])
+    if batch_size is None:
+        MC.set_detector_function(Parabola_Soft(MC, overhead, t_point))
+    else:
+        MC.set_detector_function(Parabola_Hard(overhead, t_point))
+    MC.set_adaptive_function_parameters({
+        "adaptive_function": adaptive.Learner2D,
+        "goal": lambda l: l.npoints >= n_points,
+        "bounds": ((-50, 50), (-20, 30)),
+        "batch_size": batch_size})
+    t0 = time.perf_counter()
+    MC.run("adaptive_batch_benchmark", mode="adaptive",
+           disable_snapshot_metadata=True)
+    return time.perf_counter() - t0, MC.learner.loss()
+
+
+if __name__ == "__main__":
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    overhead = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    t_point = float(sys.argv[3]) if len(sys.argv) > 3 else 0.001
+    MC = measurement_control.MeasurementControl(
+        "MC", live_plot_enabled=False, verbose=False)
+    MC.datadir(tempfile.mkdtemp())
+
+    print("{} points, {} s per acquisition + {} s per point".format(
+        n_points, overhead, t_point))
+    print("{:>22} {:>10} {:>10}".format("", "time", "loss"))
+    for batch_size in [None, 5, 20, 50]:
+        t, loss = run(MC, n_points, batch_size, overhead, t_point)
+        label = ("point by point" if batch_size is None
+                 else "batches of {}".format(batch_size))
+        print("{:>22} {:>8.2f} s {:>10.4f}".format(label, t, loss))
@@ -0,0 +1,58 @@
+"""
+Benchmark of the time it takes to import
+`pycqed.analysis_v2.measurement_analysis` in a new process.
+
+Compares importing pycqed and the analysis toolbox (the part that is
+always imported), importing measurement_analysis, accessing a single
+analysis class and accessing all analysis modules, which is what
+importing measurement_analysis did before the modules were loaded lazily.
+Every case is timed in `n_repeat` fresh interpreters and the median is
+reported.
+
+Usage:
+    python analysis_v2_import_benchmark.py [n_repeat]
+"""
+import sys
+import subprocess
+import statistics
+
+cases = {
+    'analysis toolbox': "from pycqed.analysis import analysis_toolbox",
+    'measurement_analysis':
+        "from pycqed.analysis_v2 import measurement_analysis as ma2",
+    'one analysis':
+        "from pycqed.analysis_v2 import measurement_analysis as ma2\n"
+        "ma2.Singleshot_Readout_Analysis",
+    # modules that cannot be imported in the current environment (missing
+    # optional dependencies) are skipped
+    'all analysis modules':
+        "from pycqed.analysis_v2 import measurement_analysis as ma2\n"
+        "for module in set(ma2._lazy_modules.values()) | "
+        "set(ma2._lazy_attributes):\n"
+        "    try:\n"
+        "        importlib.import_module('pycqed.analysis_v2.' + module)\n"
+        "    except ImportError:\n"
+        "        pass",
+}
+
+template = """
+import time
+import importlib
+t0 = time.perf_counter()
+{}
+print(time.perf_counter() - t0)
+"""
+
+
+def time_import(code):
+    res = subprocess.run([sys.executable, '-c', template.format(code)],
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         check=True)
+    return float(res.stdout.decode().strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    n_repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, code in cases.items():
+        times = [time_import(code) for i in range(n_repeat)]
+        print("{:>24} {:>8.2f} s".format(name, statistics.median(times)))
@@ -0,0 +1,86 @@
+"""
+Benchmark of the background publishing of the plot monitor and instrument
+monitor updates of the MeasurementControl (`publish_in_background`) during
+a soft sweep of `nr_points` points with a detector that takes `delay`
+seconds per point.
+
+The instrument monitor takes a snapshot of a station with `nr_instruments`
+dummy instruments at every update, as the InstrumentMonitor does, but
+without its update_interval. Reports
+the `run_timing` of the MeasurementControl for the updates in the
+measurement loop and in the background.
+
+Usage:
+    python background_publishing_benchmark.py [nr_points] [delay] [nr_instruments]
+"""
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+from pycqed.measurement import measurement_control
+from pycqed.measurement import detector_functions as det
+from pycqed.measurement.sweep_functions import None_Sweep
+from pycqed.instrument_drivers.physical_instruments.dummy_instruments import (
+    DummyParHolder,
+)
+from qcodes import station
+from qcodes.instrument.base import Instrument
+
+
+class SnapshotMonitor(Instrument):
+    """
+    Stand-in for the InstrumentMonitor without the remote GUI.
+    """
+
+    def __init__(self, name, station, **kw):
+        super().__init__(name, **kw)
+        self.station = station
+        self.nr_updates = 0
+
+    def update(self):
+        self.snapshot = self.station.snapshot(update=False)
+        self.nr_updates += 1
+
+
+def run(MC, inst_mon, nr_points, delay, in_background):
+    MC.publish_in_background(in_background)
+    inst_mon.nr_updates = 0
+    MC.set_sweep_function(None_Sweep())
+    MC.set_sweep_points(np.arange(nr_points))
+    MC.set_detector_function(det.Dummy_Detector_Soft(delay=delay))
+    MC.run("background_publishing_benchmark", disable_snapshot_metadata=True)
+    return MC.run_timing, inst_mon.nr_updates
+
+
+if __name__ == "__main__":
+    nr_points = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+    nr_instruments = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    st = station.Station()
+    for i in range(nr_instruments):
+        st.add_component(DummyParHolder("dummy_{}".format(i)))
+    inst_mon = SnapshotMonitor("snapshot_monitor", st)
+    MC = measurement_control.MeasurementControl(
+        "MC", live_plot_enabled=True, verbose=False, plotting_interval=0.2)
+    MC.persist_mode(False)
+    MC.datadir(tempfile.mkdtemp())
+    MC.instrument_monitor(inst_mon.name)
+
+    t0 = time.perf_counter()
+    st.snapshot(update=False)
+    t_snapshot = time.perf_counter() - t0
+    print("{} points, {} s per point, snapshot of {} instruments {:.3f} s".format(
+        nr_points, delay, nr_instruments, t_snapshot))
+    print("{:>14} {:>9} {:>11} {:>9} {:>9} {:>9} {:>8}".format(
+        "", "total", "acquisition", "overhead", "live plot", "publisher",
+        "updates"))
+    for label, in_background in [("in the loop", False),
+                                 ("in background", True)]:
+        timing, nr_updates = run(MC, inst_mon, nr_points, delay, in_background)
+        print("{:>14} {:>7.2f} s {:>9.2f} s {:>7.2f} s {:>7.2f} s {:>7.2f} s "
+              "{:>8}".format(label, timing["total"], timing["acquisition"],
+                             timing["overhead"], timing["live_plot"],
+                             timing["publisher"], nr_updates))
@@ -0,0 +1,97 @@
+"""
+Benchmark of the Clifford calculus used to generate RB sequences.
+
+Compares the table based net-clifford and recovery calculation of
+`rb.calculate_net_clifford` with the reference method of multiplying the
+pauli transfer matrices and looking up the result in the hash table read
+from disk (the implementation used before the tables were introduced).
+
+Also compares generating two qubit RB sequences for many seeds and lengths
+one at a time using `rb.randomized_benchmarking_sequence` with the batch
+generator `rb.randomized_benchmarking_sequences`.
+
+Usage:
+    python clifford_benchmark.py
+"""
+import time
+import numpy as np
+from zlib import crc32
+
+import pycqed.measurement.randomized_benchmarking.randomized_benchmarking as rb
+import pycqed.measurement.randomized_benchmarking.two_qubit_clifford_group as tqc
+
+
+def reference_get_clifford_id(pauli_transfer_matrix):
+    unique_hash = crc32(pauli_transfer_matrix.astype(int))
+    if np.array_equal(np.shape(pauli_transfer_matrix), (4, 4)):
+        hash_table = tqc.get_single_qubit_clifford_hash_table.__wrapped__()
+    else:
+        hash_table = tqc.get_two_qubit_clifford_hash_table.__wrapped__()
+    return hash_table.index(unique_hash)
+
+
+def reference_net_clifford(rb_clifford_indices, Clifford):
+    net_ptm = Clifford(0).pauli_transfer_matrix
+    for idx in rb_clifford_indices:
+        net_op = np.dot(Clifford(idx).pauli_transfer_matrix, net_ptm)
+        net_ptm = Clifford(reference_get_clifford_id(net_op)).pauli_transfer_matrix
+    net_idx = reference_get_clifford_id(net_ptm)
+    recovery_idx = reference_get_clifford_id(
+        np.linalg.inv(net_ptm).round().astype(int))
+    return net_idx, recovery_idx
+
+
+def single_rb_sequences(seeds, nr_cliffords):
+    for seed in seeds:
+        for n_cl in nr_cliffords:
+            rb.randomized_benchmarking_sequence(
+                n_cl, number_of_qubits=2, seed=seed)
+
+
+def batch_rb_sequences(seeds, nr_cliffords):
+    rb.randomized_benchmarking_sequences(
+        seeds, max_n_cl=max(nr_cliffords), number_of_qubits=2)
+
+
+def table_net_clifford(rb_clifford_indices, Clifford):
+    net_clifford = rb.calculate_net_clifford(rb_clifford_indices, Clifford)
+    return net_clifford.idx, net_clifford.get_inverse().idx
+
+
+if __name__ == "__main__":
+    # make sure the tables are loaded before timing
+    table_net_clifford([0], tqc.TwoQubitClifford)
+
+    rng = np.random.RandomState(0)
+    print("{:>8} {:>8} {:>16} {:>16}".format(
+        "qubits", "length", "reference [ms]", "tables [ms]"))
+    for Clifford, group_size in [(tqc.SingleQubitClifford, 24),
+                                 (tqc.TwoQubitClifford, 11520)]:
+        for length in [100, 1000, 10000]:
+            seq = rng.randint(0, group_size, length)
+            t0 = time.perf_counter()
+            if length <= 1000 or Clifford is tqc.SingleQubitClifford:
+                ref = reference_net_clifford(seq, Clifford)
+                t_ref = "{:.1f}".format((time.perf_counter() - t0) * 1e3)
+            else:
+                # too slow, several minutes
+                ref, t_ref = None, "-"
+            t0 = time.perf_counter()
+            res = table_net_clifford(seq, Clifford)
+            t_tab = (time.perf_counter() - t0) * 1e3
+            assert ref is None or ref == res
+            print("{:>8} {:>8} {:>16} {:>16.2f}".format(
+                Clifford.number_of_qubits, length, t_ref, t_tab))
+
+    nr_cliffords = [2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+    print("\n{:>8} {:>16} {:>16}".format(
+        "seeds", "one by one [s]", "batch [s]"))
+    for nr_seeds in [10, 100, 300]:
+        seeds = np.arange(nr_seeds)
+        t0 = time.perf_counter()
+        single_rb_sequences(seeds, nr_cliffords)
+        t_single = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        batch_rb_sequences(seeds, nr_cliffords)
+        t_batch = time.perf_counter() - t0
+        print("{:>8} {:>16.3f} {:>16.3f}".format(nr_seeds, t_single, t_batch))
@@ -0,0 +1,109 @@
+"""
+Benchmark of a CZ simulation landscape on an n x n grid of theta_f and
+lambda_2 (50 x 50 by default).
+
+Compares evaluating the points in the way of
+`cz_main.f_to_parallelize_new`, i.e., creating the flux lutmans and the
+SimControlCZ instruments and a MeasurementControl for a work item, with the
+instrument free `czl.simulate_landscape` running in a single process and
+in a pool of worker processes.
+
+The reference is only timed on the first `n_reference` points and the time
+of the full grid is extrapolated.
+
+Usage:
+    python cz_landscape_benchmark.py [n] [n_processes]
+"""
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+from pycqed.instrument_drivers.meta_instrument.LutMans import flux_lutman as flm
+from pycqed.instrument_drivers.virtual_instruments import sim_control_CZ as scCZ
+from pycqed.measurement import measurement_control as mc
+from pycqed.simulations import cz_superoperator_simulation_new2 as cz_main
+from pycqed.simulations import cz_superoperator_simulation_landscape as czl
+from qcodes import station
+
+n_reference = 4
+
+flux_pars = czl.FluxLutmanParameters(
+    q_polycoeffs_freq_01_det=np.array([-2.5e9, 0, 0]),
+    q_freq_10=5.0e9, bus_freq=8.5e9, cz_length=40e-9)
+static_pars = czl.StaticLutmanParameters(
+    q_polycoeffs_anharm=np.array([0, 0, -320e6]))
+sim_pars = czl.SimControlParameters(
+    w_q0_sweetspot=6.0e9, w_q1_sweetspot=5.0e9, T1_q0=30e-6, T1_q1=30e-6)
+
+
+def reference_work_item(number, theta_f, lambda_2):
+    """
+    Evaluates a single point with instruments created for the work item,
+    as done in `f_to_parallelize_new`.
+    """
+    MC = mc.MeasurementControl('MC{}'.format(number), live_plot_enabled=False)
+    st = station.Station()
+    st.add_component(MC)
+    fluxlutman = flm.HDAWG_Flux_LutMan('fluxlutman{}'.format(number))
+    fluxlutman_static = flm.HDAWG_Flux_LutMan('fluxlutman_static{}'.format(number))
+    sim_control_CZ = scCZ.SimControlCZ('sim_control_CZ{}'.format(number))
+    for instr in [fluxlutman, fluxlutman_static, sim_control_CZ]:
+        st.add_component(instr)
+
+    # as czf.return_instrument_from_arglist
+    for name, value in flux_pars.instrument_parameters().items():
+        fluxlutman.set(name, value)
+    for name, value in static_pars.instrument_parameters().items():
+        fluxlutman_static.set(name, value)
+    for name, value in sim_pars.as_dict().items():
+        if value is not None or name != 'cost_func':
+            sim_control_CZ.set(name, value)
+    fluxlutman.cz_theta_f_NE(theta_f)
+    fluxlutman.cz_lambda_2_NE(lambda_2)
+
+    d = cz_main.CZ_trajectory_superoperator(
+        fluxlutman=fluxlutman, sim_control_CZ=sim_control_CZ,
+        fluxlutman_static=fluxlutman_static)
+    values = d.acquire_data_point()
+
+    for instr in [fluxlutman, fluxlutman_static, sim_control_CZ, MC]:
+        instr.close()
+    return values
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    theta_f = np.linspace(40, 140, n)
+    lambda_2 = np.linspace(-0.4, 0.4, n)
+    datadir = tempfile.mkdtemp()
+
+    t0 = time.perf_counter()
+    for i in range(n_reference):
+        reference_work_item(i, theta_f[i], lambda_2[0])
+    t_ref = (time.perf_counter() - t0) / n_reference
+
+    t0 = time.perf_counter()
+    czl.simulate_landscape(flux_pars, static_pars, sim_pars,
+                           theta_f[:n_reference], lambda_2[:1],
+                           n_processes=1, datadir=datadir)
+    t_single = (time.perf_counter() - t0) / n_reference
+
+    t0 = time.perf_counter()
+    res = czl.simulate_landscape(flux_pars, static_pars, sim_pars,
+                                 theta_f, lambda_2,
+                                 n_processes=n_processes, datadir=datadir)
+    t_pool = time.perf_counter() - t0
+
+    nr_points = n * n
+    print("{} x {} grid, {} points".format(n, n, nr_points))
+    print("{:>32} {:>12} {:>14}".format("", "per point [s]", "grid [s]"))
+    print("{:>32} {:>12.3f} {:>14.1f}".format(
+        "instruments per work item", t_ref, t_ref * nr_points))
+    print("{:>32} {:>12.3f} {:>14.1f}".format(
+        "simulate_landscape, 1 process", t_single, t_single * nr_points))
+    print("{:>32} {:>12.3f} {:>14.1f}".format(
+        "simulate_landscape, pool", t_pool / nr_points, t_pool))
+    print("datafile: {}".format(res['filepath']))
@@ -0,0 +1,82 @@
+"""
+Benchmark of the propagator calculation of the CZ superoperator simulation.
+
+Compares the NumPy engine of `czf_v2.time_evolution_new` (batched
+exponentiation of the Liouvillian blocks, tree product of the propagators)
+with the reference QuTiP engine (one `expm` per time step) for the standard
+3x3-level two-transmon case, with and without decoherence.
+
+Usage:
+    python cz_propagator_benchmark.py
+"""
+import time
+import numpy as np
+
+from pycqed.simulations import cz_superoperator_simulation_functions_v2 as czf_v2
+from pycqed.instrument_drivers.meta_instrument.LutMans import flux_lutman_vcz as flm
+from pycqed.instrument_drivers.virtual_instruments import sim_control_CZ_v2 as scCZ_v2
+
+
+def setup_instruments():
+    fluxlutman = flm.HDAWG_Flux_LutMan("fluxlutman_bench")
+    fluxlutman_static = flm.HDAWG_Flux_LutMan("fluxlutman_static_bench")
+    sim_control_CZ = scCZ_v2.SimControlCZ_v2("sim_control_CZ_bench")
+
+    fluxlutman.q_polycoeffs_freq_01_det(np.array([-2.5e9, 0, 0]))
+    fluxlutman.q_polycoeffs_anharm(np.array([0, 0, -300e6]))
+    fluxlutman.q_freq_01(6.0e9)
+    fluxlutman.q_freq_10_NE(5.0e9)
+    fluxlutman.q_J2_NE(15e6)
+    fluxlutman.bus_freq_NE(8.5e9)
+    fluxlutman_static.q_polycoeffs_anharm(np.array([0, 0, -320e6]))
+    sim_control_CZ.w_q0_sweetspot(6.0e9)
+    sim_control_CZ.w_q1_sweetspot(5.0e9)
+    return fluxlutman, fluxlutman_static, sim_control_CZ
+
+
+def time_engine(engine, amp, sim_step, fluxlutman, fluxlutman_static, sim_control_CZ):
+    c_ops = czf_v2.return_jump_operators(sim_control_CZ, amp, fluxlutman)
+    t0 = time.perf_counter()
+    U = czf_v2.time_evolution_new(
+        c_ops,
+        sim_control_CZ,
+        fluxlutman,
+        fluxlutman_static,
+        fluxbias_q1=0,
+        amp=amp,
+        sim_step=sim_step,
+        engine=engine,
+    )
+    return time.perf_counter() - t0, U
+
+
+if __name__ == "__main__":
+    fluxlutman, fluxlutman_static, sim_control_CZ = setup_instruments()
+
+    # 60 ns pulse through the 11-02 interaction point, 0.1 ns time steps
+    sim_step = 0.1e-9
+    amp_max = np.sqrt((6.0e9 - 5.0e9 + 300e6) / 2.5e9)
+    t = np.arange(0, 60e-9, sim_step)
+    amp = amp_max * np.sin(np.pi * t / t[-1])
+
+    print("{:>16} {:>12} {:>12} {:>10} {:>12}".format(
+        "case", "qutip [s]", "numpy [s]", "speed-up", "max diff"))
+    for case, T1_q0, T1_q1, T2_q1, T2_q0 in [
+            ("unitary", 0, 0, 0, [-1, -1]),
+            ("superoperator", 60e-6, 30e-6, 40e-6, [3e4, 2e4])]:
+        sim_control_CZ.T1_q0(T1_q0)
+        sim_control_CZ.T1_q1(T1_q1)
+        sim_control_CZ.T2_q1(T2_q1)
+        sim_control_CZ.T2_q0_amplitude_dependent(np.array(T2_q0))
+
+        t_qutip, U_qutip = time_engine(
+            "qutip", amp, sim_step, fluxlutman, fluxlutman_static, sim_control_CZ)
+        t_numpy, U_numpy = time_engine(
+            "numpy", amp, sim_step, fluxlutman, fluxlutman_static, sim_control_CZ)
+        max_diff = np.max(np.abs(U_qutip.full() - U_numpy.full()))
+        print("{:>16} {:>12.3f} {:>12.3f} {:>10.1f} {:>12.1e}".format(
+            case, t_qutip, t_numpy, t_qutip / t_numpy, max_diff))
+
+    fluxlutman.close()
+    fluxlutman_static.close()
+    sim_control_CZ.close()
@@ -0,0 +1,106 @@
+"""
+Benchmark of the compiled distortion correction filter of the
+LinDistortionKernel for the `nr_waveforms` waveforms of a flux LutMap of
+`length` samples (cfg_max_wf_length of 5 us at 2.4 GSa/s).
+
+Compares applying the filter models one after the other to every waveform,
+as `distort_waveform` did, with the sample by sample simulation of the
+bounce correction that `kf.first_order_bounce_corr` used and with the
+vectorized one, to the compiled filter
+(`LinDistortionKernel.get_compiled_filter`) applied to all waveforms as a
+single batch by `distort_waveforms`, and reports the largest difference.
+
+Usage:
+    python distortion_filter_benchmark.py [nr_waveforms] [length]
+"""
+import sys
+import time
+
+import numpy as np
+from scipy import signal
+
+from pycqed.measurement import kernel_functions_ZI as kf
+from pycqed.instrument_drivers.meta_instrument import lfilt_kernel_object as lko
+
+
+def first_order_bounce_corr_loop(sig, delay, amp, awg_sample_rate):
+    """
+    The sample by sample simulation of the shift register of the real-time
+    bounce correction.
+    """
+    shift_reg = np.zeros(int(round(awg_sample_rate * delay)))
+    amp_hw = kf.coef_round(amp, force_bshift=0)
+    sigout = np.zeros(len(sig))
+    for i, s in enumerate(sig):
+        sigout[i] = s + amp_hw * shift_reg[-1]
+        shift_reg[1:] = shift_reg[:-1]
+        shift_reg[:1] = s * np.ones(1)
+    return sigout
+
+
+def distort_sequentially(k, waveform, length_samples, bounce_corr):
+    y_sig = np.zeros(length_samples)
+    y_sig[: len(waveform)] = waveform
+    fs = k.cfg_sampling_rate()
+    for filt_id in range(k._num_models):
+        filt = k.get("filter_model_{:02}".format(filt_id))
+        if not filt:
+            continue
+        if filt["model"] == "high-pass":
+            y_sig = kf.bias_tee_correction(y_sig, sampling_rate=fs, **filt["params"])
+        elif filt["model"] == "exponential":
+            y_sig = kf.exponential_decay_correction(
+                y_sig, sampling_rate=fs, **filt["params"]
+            )
+        elif filt["model"] == "bounce":
+            y_sig = bounce_corr(
+                y_sig, filt["params"]["tau"], filt["params"]["amp"], 2.4e9
+            )
+        elif filt["model"] == "FIR":
+            y_sig = signal.lfilter(filt["params"]["weights"], 1, y_sig)
+    return y_sig * k.cfg_gain_correction()
+
+
+if __name__ == "__main__":
+    nr_waveforms = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 12288
+    rng = np.random.default_rng(0)
+
+    k = lko.LinDistortionKernel("k0")
+    k.cfg_sampling_rate(2.4e9)
+    fir = np.zeros(40)
+    fir[:4] = [1.05, -0.02, -0.02, -0.01]
+    models = [
+        {"model": "high-pass", "params": {"tau": 4.07e-05}},
+        {"model": "exponential", "params": {"amp": -0.08, "tau": 1e-8}},
+        {"model": "exponential", "params": {"amp": -0.01, "tau": 6e-9}},
+        {"model": "exponential", "params": {"amp": -0.1, "tau": 1.8e-9}},
+        {"model": "bounce", "params": {"tau": 10e-9, "amp": 0.05}},
+        {"model": "FIR", "params": {"weights": fir}},
+    ]
+    for i, model in enumerate(models):
+        model["real-time"] = False
+        k.set("filter_model_{:02}".format(i), model)
+    waveforms = [rng.normal(size=length // 4) for _ in range(nr_waveforms)]
+
+    print("{} waveforms of {} samples, {} filter models".format(
+        nr_waveforms, length, len(models)))
+    for label, bounce_corr in [
+        ("bounce sample by sample", first_order_bounce_corr_loop),
+        ("vectorized bounce", kf.first_order_bounce_corr),
+    ]:
+        t0 = time.perf_counter()
+        expected = [
+            distort_sequentially(k, wf, length, bounce_corr) for wf in waveforms
+        ]
+        t_seq = time.perf_counter() - t0
+        print("{:>24} {:>8.1f} ms".format(label, 1e3 * t_seq))
+
+    # the first call compiles the filter
+    for label in ["compiled, batch", "cached, batch"]:
+        t0 = time.perf_counter()
+        distorted = k.distort_waveforms(waveforms, length_samples=length)
+        t_batch = time.perf_counter() - t0
+        print("{:>24} {:>8.1f} ms".format(label, 1e3 * t_batch))
+    max_diff = max(np.max(np.abs(a - b)) for a, b in zip(expected, distorted))
+    print("largest difference {:.1e}".format(max_diff))
@@ -0,0 +1,90 @@
+"""
+Benchmark of `a_tools.get_data_from_timestamp_list` on `n_files` copies of
+a datafile from the test data, as done in trend plots over many
+measurements. The datadir contains `n_days` further day folders with
+measurements, as a datadir after years of measurements.
+
+Compares creating a MeasurementAnalysis object per timestamp with the
+read-only MeasurementDataReader, reading the files sequentially, in a pool
+of threads and from the cache, both for instrument settings only and for
+instrument settings and measured values.
+
+Usage:
+    python extract_data_benchmark.py [n_files] [n_threads] [n_days]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import pycqed as pq
+from pycqed.analysis import analysis_toolbox as a_tools
+from pycqed.analysis import measurement_analysis as ma
+
+source_folder = os.path.join(pq.__path__[0], 'tests', 'test_data',
+                             '20170607', '152324_T1_QL')
+
+
+def make_datadir(n_files, n_days):
+    datadir = tempfile.mkdtemp()
+    for i in range(n_days):
+        for j in range(20):
+            os.makedirs(os.path.join(datadir, '2016{:04d}'.format(i),
+                                     '1200{:02d}_Rabi'.format(j)))
+    timestamps = []
+    for i in range(n_files):
+        daystamp = '201706{:02d}'.format(1 + i // 100)
+        tstamp = '1200{:02d}'.format(i % 100)
+        folder = os.path.join(datadir, daystamp, tstamp + '_T1_QL')
+        os.makedirs(folder)
+        shutil.copy(os.path.join(source_folder, '152324_T1_QL.hdf5'),
+                    os.path.join(folder, tstamp + '_T1_QL.hdf5'))
+        timestamps.append(daystamp + '_' + tstamp)
+    return datadir, timestamps
+
+
+def timeit(f, *args, **kw):
+    t0 = time.perf_counter()
+    f(*args, **kw)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    n_days = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    datadir, timestamps = make_datadir(n_files, n_days)
+    a_tools.datadir = datadir
+
+    params = {
+        'settings': {'T1': 'Instrument settings.QL.T1',
+                     'f_qubit': 'Instrument settings.QL.f_qubit',
+                     'folder': 'folder'},
+        'settings and values': {'T1': 'Instrument settings.QL.T1',
+                                'sweep_points': 'sweep_points',
+                                'measured_values': 'measured_values',
+                                'folder': 'folder'}}
+
+    print("{} files, {} day folders".format(n_files, n_days))
+    print("{:>22} {:>14} {:>14} {:>14} {:>14}".format(
+        "", "ma per file", "reader", "reader, {} thr".format(n_threads),
+        "reader, cache"))
+    for name, params_dict in params.items():
+        # the extraction as done before the MeasurementDataReader
+        t_ma = timeit(a_tools._extract_data_from_timestamps_ma, timestamps,
+                      list(params_dict.values()),
+                      ma_func=ma.MeasurementAnalysis, TwoD=False,
+                      filter_no_analysis=False)
+        t_reader = timeit(a_tools.get_data_from_timestamp_list,
+                          list(timestamps), params_dict, use_cache=False)
+        t_threads = timeit(a_tools.get_data_from_timestamp_list,
+                           list(timestamps), params_dict,
+                           n_threads=n_threads, use_cache=False)
+        a_tools.get_data_from_timestamp_list(list(timestamps), params_dict)
+        t_cache = timeit(a_tools.get_data_from_timestamp_list,
+                         list(timestamps), params_dict)
+        print("{:>22} {:>12.3f} s {:>12.3f} s {:>12.3f} s {:>12.3f} s".format(
+            name, t_ma, t_reader, t_threads, t_cache))
+
+    shutil.rmtree(datadir)
@@ -0,0 +1,68 @@
+"""
+Benchmark of the live plotting of the MeasurementControl during a soft
+sweep of `nr_points` points, with the plot monitor refreshed every
+`plotting_interval` seconds.
+
+Compares plotting all points at every refresh (plotting_decimation_pts=0,
+plotting_max_pts raised above nr_points) with the min/max decimation of
+the plotted points (measurement_control_helpers.MinMaxDecimator), for
+which a refresh only processes the new points. Reports the total time of
+the measurement and the time spent in `update_plotmon`.
+
+Usage:
+    python live_plot_benchmark.py [nr_points] [plotting_interval]
+"""
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+from pycqed.measurement import measurement_control
+from pycqed.measurement import detector_functions as det
+from pycqed.measurement.sweep_functions import None_Sweep
+
+
+def run(MC, nr_points, decimation_pts):
+    MC.plotting_decimation_pts(decimation_pts)
+    MC.plotting_max_pts(10 * nr_points)
+    MC.set_sweep_function(None_Sweep())
+    MC.set_sweep_points(np.arange(nr_points))
+    MC.set_detector_function(det.Dummy_Detector_Soft())
+
+    t_plot = [0]
+    update_plotmon = MC.update_plotmon
+
+    def timed_update_plotmon(*args, **kw):
+        t0 = time.perf_counter()
+        update_plotmon(*args, **kw)
+        t_plot[0] += time.perf_counter() - t0
+
+    MC.update_plotmon = timed_update_plotmon
+    t0 = time.perf_counter()
+    try:
+        MC.run("live_plot_benchmark", disable_snapshot_metadata=True)
+    finally:
+        del MC.update_plotmon
+    return time.perf_counter() - t0, t_plot[0], len(MC.curves[0]["config"]["x"])
+
+
+if __name__ == "__main__":
+    nr_points = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    plotting_interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    MC = measurement_control.MeasurementControl(
+        "MC", live_plot_enabled=True, verbose=False,
+        plotting_interval=plotting_interval)
+    # the persistent curve of the previous run would be redrawn as well
+    MC.persist_mode(False)
+    MC.datadir(tempfile.mkdtemp())
+
+    print("{} points, plotting interval {} s".format(
+        nr_points, plotting_interval))
+    print("{:>22} {:>10} {:>12} {:>14}".format(
+        "", "total", "plotmon", "plotted points"))
+    for label, decimation_pts in [("all points", 0),
+                                  ("min/max decimation", 2000)]:
+        t, t_plot, n = run(MC, nr_points, decimation_pts)
+        print("{:>22} {:>8.2f} s {:>10.2f} s {:>14}".format(
+            label, t, t_plot, n))
@@ -0,0 +1,75 @@
+"""
+Benchmark of the lookup of measurements by label and timestamp in a
+datadir with `n_days` day folders containing `n_meas` measurements each.
+
+Compares listing the folders (`a_tools.use_measurement_catalogue = False`)
+with the measurement catalogue, both the first lookup, which builds the
+catalogue ("cold"), and subsequent lookups ("warm").
+
+Usage:
+    python measurement_catalogue_benchmark.py [n_days] [n_meas]
+"""
+import os
+import sys
+import time
+import shutil
+import datetime
+import tempfile
+
+from pycqed.analysis import analysis_toolbox as a_tools
+from pycqed.utilities import measurement_catalogue as mcat
+
+
+def make_datadir(n_days, n_meas):
+    datadir = tempfile.mkdtemp()
+    day = datetime.date(2018, 1, 1)
+    for i in range(n_days):
+        daystamp = (day + datetime.timedelta(days=i)).strftime('%Y%m%d')
+        for j in range(n_meas):
+            # a "rare" measurement on the first day only
+            name = 'T1_q0' if (i == 0 and j == 0) else 'Rabi_q{}'.format(j % 7)
+            os.makedirs(os.path.join(
+                datadir, daystamp,
+                '{:02d}{:02d}{:02d}_{}'.format(j // 3600 % 24, j // 60 % 60,
+                                                j % 60, name)))
+        # only the folder of today is modified while measuring
+        os.utime(os.path.join(datadir, daystamp), (1e9, 1e9))
+    return datadir, daystamp
+
+
+def lookups(last_day):
+    a_tools.latest_data('T1_q0')
+    a_tools.return_last_n_timestamps(20, contains='Rabi_q3')
+    a_tools.get_timestamps_in_range(
+        last_day[:-1] + '0_000000', last_day + '_235959', label='Rabi_q3')
+
+
+def timeit(f, *args, repeat=3):
+    t0 = time.perf_counter()
+    for i in range(repeat):
+        f(*args)
+    return (time.perf_counter() - t0) / repeat
+
+
+if __name__ == "__main__":
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_meas = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    datadir, last_day = make_datadir(n_days, n_meas)
+    mcat.catalogue_dir = tempfile.mkdtemp()
+    a_tools.datadir = datadir
+
+    a_tools.use_measurement_catalogue = False
+    t_scan = timeit(lookups, last_day)
+
+    a_tools.use_measurement_catalogue = True
+    t_cold = timeit(lookups, last_day, repeat=1)
+    t_warm = timeit(lookups, last_day)
+
+    print("{} days x {} measurements".format(n_days, n_meas))
+    print("latest_data, return_last_n_timestamps and get_timestamps_in_range")
+    print("{:>24} {:>10.4f} s".format("listing folders", t_scan))
+    print("{:>24} {:>10.4f} s".format("catalogue, cold", t_cold))
+    print("{:>24} {:>10.4f} s".format("catalogue, warm", t_warm))
+
+    shutil.rmtree(datadir)
+    shutil.rmtree(mcat.catalogue_dir)
@@ -0,0 +1,60 @@
+"""
+Benchmark of `Multiplexed_Readout_Analysis.process_data` on simulated
+single shots of `nr_qubits` qubits, with `nr_rounds` shots per prepared
+combination, with and without post selection.
+
+Usage:
+    python mux_readout_benchmark.py [nr_qubits] [nr_rounds]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+import pycqed as pq
+from pycqed.analysis import analysis_toolbox as a_tools
+from pycqed.analysis_v2 import multiplexed_readout_analysis as mra
+
+
+def simulated_raw_data(nr_qubits, nr_rounds, post_selection, seed=0):
+    """
+    Shots at -1 (|0>) and +1 (|1>) with gaussian noise, the
+    pre-measurement finds 10% of the qubits in |1>.
+    """
+    rng = np.random.default_rng(seed)
+    nr_combinations = 2**nr_qubits
+    # the first qubit is the most significant bit of the combination
+    bits = (np.arange(nr_combinations)[:, None]
+            >> np.arange(nr_qubits)[::-1]) & 1
+    means = np.tile(2. * bits - 1, (nr_rounds, 1))
+    if post_selection:
+        pre_means = np.where(rng.random(means.shape) < 0.1, 1., -1.)
+        means = np.stack([pre_means, means], axis=1).reshape(-1, nr_qubits)
+    shots = means + 0.6 * rng.standard_normal(means.shape)
+    value_names = np.array(['UHFQC w{0} q{0}'.format(q).encode()
+                            for q in range(nr_qubits)])
+    return {'data': np.column_stack([np.arange(len(shots)), shots]),
+            'value_names': value_names}
+
+
+if __name__ == "__main__":
+    nr_qubits = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    nr_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    # only needed to initialize the analysis
+    a_tools.datadir = os.path.join(pq.__path__[0], 'tests', 'test_data')
+
+    print("{} qubits, {} combinations, {} shots per combination".format(
+        nr_qubits, 2**nr_qubits, nr_rounds))
+    for post_selection in [False, True]:
+        a = mra.Multiplexed_Readout_Analysis(
+            nr_qubits=nr_qubits, t_start='20170607_152324', auto=False,
+            post_selection=post_selection,
+            post_selec_thresholds=[0.] * nr_qubits)
+        a.raw_data_dict = simulated_raw_data(nr_qubits, nr_rounds,
+                                             post_selection)
+        t0 = time.perf_counter()
+        a.process_data()
+        print("{:>20} {:>8.2f} s".format(
+            "post selection" if post_selection else "no post selection",
+            time.perf_counter() - t0))
@@ -0,0 +1,59 @@
+"""
+Benchmark of `parallel_analysis.run_analyses`, running the single shot
+readout analysis of `n_jobs` (copies of a) test dataset sequentially in
+this process and in a pool of `processes` worker processes.
+
+The datasets are copied to a temporary datadir such that the analyses do
+not write to the same file. The speedup is limited by the number of CPUs
+and the start of the worker processes (importing pycqed takes a few
+seconds with the spawn start method).
+
+Usage:
+    python parallel_analysis_benchmark.py [n_jobs] [processes]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import pycqed as pq
+from pycqed.analysis_v2 import parallel_analysis as pa
+from pycqed.analysis_v2 import measurement_analysis as ma2
+
+src = os.path.join(pq.__path__[0], 'tests', 'test_data', '20171016',
+                   '135112_Measure_SSRO_QL')
+
+
+def make_datadir(datadir, n_jobs):
+    timestamps = []
+    for i in range(n_jobs):
+        hhmmss = '{:06d}'.format(100000 + i)
+        name = hhmmss + '_Measure_SSRO_QL'
+        folder = os.path.join(datadir, '20171016', name)
+        os.makedirs(folder)
+        shutil.copy(os.path.join(src, '135112_Measure_SSRO_QL.hdf5'),
+                    os.path.join(folder, name + '.hdf5'))
+        timestamps.append('20171016_' + hhmmss)
+    return timestamps
+
+
+if __name__ == "__main__":
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as datadir:
+        ma2.a_tools.datadir = datadir
+        timestamps = make_datadir(datadir, n_jobs)
+        jobs = [('Singleshot_Readout_Analysis', {'t_start': ts})
+                for ts in timestamps]
+
+        print("{} analyses, {} CPUs".format(n_jobs, os.cpu_count()))
+        for label, p in [('sequential', 0),
+                         ('pool of {}'.format(processes), processes)]:
+            t0 = time.perf_counter()
+            results = pa.run_analyses(jobs, processes=p)
+            t = time.perf_counter() - t0
+            n_failed = sum(not res['success'] for res in results)
+            print("{:>36} {:>10.2f} s {} failed".format(label, t, n_failed))
+        print(pa.timing_report(results))
@@ -0,0 +1,86 @@
+"""
+Benchmark of generating and programming single qubit sequences on a
+virtual AWG5014 through the Pulsar: an AllXY sequence with double points
+and a Rabi sequence with repeated calibration points.
+
+Usage:
+    python pulsar_upload_benchmark.py [nr_repetitions]
+"""
+import sys
+import time
+
+import numpy as np
+
+from pycqed.instrument_drivers.virtual_instruments.virtual_awg5014 import \
+    VirtualAWG5014
+from pycqed.measurement.waveform_control import element
+import pycqed.measurement.waveform_control.pulsar as ps
+import pycqed.measurement.pulse_sequences.single_qubit_tek_seq_elts as sqs
+import qcodes as qc
+
+pulse_pars = {
+    'I_channel': 'ch1', 'Q_channel': 'ch2', 'amplitude': 0.25,
+    'amp90_scale': 0.5, 'sigma': 10e-9, 'nr_sigma': 4, 'motzoi': 0,
+    'mod_frequency': -100e6, 'pulse_delay': 0, 'phi_skew': 0, 'alpha': 1,
+    'phase': 0, 'operation_type': 'MW', 'target_qubit': 'qubit1',
+    'pulse_type': 'SSB_DRAG_pulse'}
+
+RO_pars = {
+    'I_channel': 'ch3', 'Q_channel': 'ch4',
+    'RO_pulse_marker_channel': 'ch3_marker1', 'amplitude': 0.5,
+    'length': 500e-9, 'pulse_delay': 0, 'mod_frequency': 25e6,
+    'acq_marker_delay': 0, 'acq_marker_channel': 'ch4_marker2', 'phase': 0,
+    'operation_type': 'RO', 'target_qubit': 'qubit1',
+    'pulse_type': 'Gated_MW_RO_pulse'}
+
+sequencer_config = {
+    'RO_fixed_point': 1e-6, 'Buffer_Flux_Flux': 0, 'Buffer_Flux_MW': 0,
+    'Buffer_Flux_RO': 0, 'Buffer_MW_Flux': 0, 'Buffer_MW_MW': 0,
+    'Buffer_MW_RO': 0, 'Buffer_RO_Flux': 0, 'Buffer_RO_MW': 0,
+    'Buffer_RO_RO': 0, 'Flux_comp_dead_time': 3e-6,
+    'slave_AWG_trig_channels': []}
+
+
+def setup_station():
+    station = qc.Station()
+    station.sequencer_config = sequencer_config
+    sqs.station = station
+    AWG = VirtualAWG5014('AWG')
+    station.add_component(AWG)
+    station.pulsar = ps.Pulsar('Pulsar', default_AWG=AWG.name)
+    for i in range(4):
+        station.pulsar.define_channel(
+            id='ch{}'.format(i+1), name='ch{}'.format(i+1), type='analog',
+            high=1., low=-1., offset=0.0, delay=0, active=True)
+        for m in [1, 2]:
+            station.pulsar.define_channel(
+                id='ch{}_marker{}'.format(i+1, m),
+                name='ch{}_marker{}'.format(i+1, m), type='marker',
+                high=2, low=0, offset=0., delay=0, active=True)
+    return station, AWG
+
+
+def timeit(f, *args, repeat=1, **kw):
+    t0 = time.perf_counter()
+    for i in range(repeat):
+        f(*args, **kw)
+    return (time.perf_counter() - t0) / repeat
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    station, AWG = setup_station()
+    # 100 amplitudes and 4 x 10 repeated calibration points
+    amps = np.concatenate([np.linspace(0, 0.5, 100)] +
+                          [[0] * 10, [0.5] * 10] * 2)
+
+    for name, f, args in [
+            ('AllXY (42 elements)', sqs.AllXY_seq,
+             (pulse_pars, RO_pars)),
+            ('Rabi (140 elements)', sqs.Rabi_seq,
+             (amps, pulse_pars, RO_pars))]:
+        kw = {'double_points': True} if f is sqs.AllXY_seq else {}
+        element.clear_waveform_cache()
+        t = timeit(f, *args, repeat=repeat, **kw)
+        print('{:>22} {:>8.3f} s, {} uploaded waveforms'.format(
+            name, t, len(AWG.file['p_wfs'])))
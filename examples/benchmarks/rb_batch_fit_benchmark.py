@@ -0,0 +1,118 @@
+"""
+Benchmark of the batched fits of randomized benchmarking decays
+(`fit_leak_decays` and `fit_rb_decays` of randomized_benchmarking_analysis)
+for bootstrap confidence intervals over the seeds of `n_qubits` simulated
+single qubit RB experiments.
+
+Compares the time of the batched fits of all bootstrap samples of all
+qubits with the lmfit models of `RandomizedBenchmarking_SingleQubit_Analysis`
+(leakage decay, full and simple RB decay) on a subset of the samples, and
+the agreement of the infidelities of the two.
+
+Usage:
+    python rb_batch_fit_benchmark.py [n_qubits] [n_boot] [n_seeds]
+"""
+import sys
+import time
+import warnings
+
+import numpy as np
+import lmfit
+
+from pycqed.analysis_v2 import randomized_benchmarking_analysis as rba
+
+ncl = np.array([0, 2, 4, 8, 16, 32, 64, 128, 256, 512])
+
+
+def simulate(n_qubits, n_seeds, rng):
+    # populations per seed of RB experiments with leakage
+    lambda_1 = 1 - rng.uniform(2e-5, 2e-4, n_qubits)[:, None]
+    lambda_2 = 1 - 2 * rng.uniform(1e-3, 5e-3, n_qubits)[:, None]
+    P2 = 0.05 * (1 - lambda_1 ** ncl)
+    M0 = (1 - P2) / 2 + 0.48 * lambda_2 ** ncl
+    M0 = M0[..., None] + rng.normal(0, 0.02, (n_qubits, len(ncl), n_seeds))
+    X1 = 1 - P2[..., None] + rng.normal(0, 0.002, M0.shape)
+    return M0, X1
+
+
+def lmfit_fits(M0, X1):
+    # the lmfit models of the single qubit analysis
+    leak_mod = lmfit.Model(rba.leak_decay, independent_vars="m")
+    leak_mod.set_param_hint("A", value=0.95, min=0, vary=True)
+    leak_mod.set_param_hint("B", value=0.1, min=0, vary=True)
+    leak_mod.set_param_hint("lambda_1", value=0.99, vary=True)
+    leak_mod.set_param_hint("L1", expr="(1-A)*(1-lambda_1)")
+    fr = leak_mod.fit(data=X1, m=ncl, params=leak_mod.make_params())
+    lambda_1 = fr.best_values["lambda_1"]
+    L1 = fr.params["L1"].value
+
+    eps = []
+    for simple in [False, True]:
+        rb_mod = lmfit.Model(rba.full_rb_decay, independent_vars="m")
+        rb_mod.set_param_hint("A", value=0.5, min=0, vary=True)
+        if simple:
+            rb_mod.set_param_hint("B", value=0, vary=False)
+        else:
+            rb_mod.set_param_hint("B", value=0.1, min=0, vary=True)
+        rb_mod.set_param_hint("C", value=0.4, min=0, max=1, vary=True)
+        rb_mod.set_param_hint(
+            "lambda_1", value=1 if simple else lambda_1, vary=False
+        )
+        rb_mod.set_param_hint("lambda_2", value=0.95, vary=True)
+        fr = rb_mod.fit(data=M0, m=ncl, params=rb_mod.make_params())
+        eps.append(1 - ((2 - 1) * fr.best_values["lambda_2"] + 1
+                        - (0 if simple else L1)) / 2)
+    return eps
+
+
+def batch_fits(M0, X1):
+    leak = rba.fit_leak_decays(ncl, X1)
+    rb = rba.fit_rb_decays(
+        ncl, M0, lambda_1=leak["lambda_1"], L1=leak["L1"], d1=2
+    )
+    rb_simple = rba.fit_rb_decays(ncl, M0, d1=2, simple=True)
+    return rb["eps"], rb_simple["eps"]
+
+
+if __name__ == "__main__":
+    n_qubits = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_boot = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    n_seeds = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    rng = np.random.default_rng(0)
+    M0_seeds, X1_seeds = simulate(n_qubits, n_seeds, rng)
+
+    t0 = time.perf_counter()
+    counts = rba.bootstrap_seed_counts(n_seeds, n_boot, rng)
+    # shape (n_boot, n_qubits, len(ncl))
+    M0 = rba.resampled_seed_means(M0_seeds, counts)
+    X1 = rba.resampled_seed_means(X1_seeds, counts)
+    t_resample = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    eps_X1, eps_simple = batch_fits(M0, X1)
+    ci = rba.confidence_interval(eps_X1)
+    t_batch = time.perf_counter() - t0
+
+    n_lmfit = min(50, n_boot)
+    t0 = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        eps_lmfit = np.array([lmfit_fits(M0[i, 0], X1[i, 0])
+                              for i in range(n_lmfit)])
+    t_lmfit = (time.perf_counter() - t0) / n_lmfit
+
+    n_curves = n_qubits * n_boot
+    print("{} qubits x {} bootstrap samples, {} seeds".format(
+        n_qubits, n_boot, n_seeds))
+    print("{:>36} {:>10.3f} s".format("resampling", t_resample))
+    print("{:>36} {:>10.3f} s".format("batched fits", t_batch))
+    print("{:>36} {:>10.3f} s".format(
+        "lmfit fits (extrapolated)", t_lmfit * n_curves))
+    print("{:>36} {:>10.2e}".format(
+        "median |eps_X1 lmfit - batched|",
+        np.median(np.abs(eps_lmfit[:, 0] - eps_X1[:n_lmfit, 0]))))
+    print("{:>36} {:>10.2e}".format(
+        "max |eps_simple lmfit - batched|",
+        np.max(np.abs(eps_lmfit[:, 1] - eps_simple[:n_lmfit, 0]))))
+    print("{:>36} [{:.5f}, {:.5f}]".format(
+        "eps_X1 95% CI of the first qubit", ci[0, 0], ci[1, 0]))
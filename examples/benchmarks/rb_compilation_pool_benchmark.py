@@ -0,0 +1,76 @@
+"""
+Benchmark of the end-to-end compilation time of two qubit RB sequences for
+100 seeds, as done by `DeviceCCL.measure_two_qubit_randomized_benchmarking`.
+
+Compares creating a new `multiprocessing.Pool(maxtasksperchild=...)` for
+every measurement (the implementation used before the persistent pool was
+introduced) with reusing a single `cl_oql.CompilationPool`.
+
+Requires OpenQL.
+
+Usage:
+    python rb_compilation_pool_benchmark.py
+"""
+import os
+import time
+import multiprocessing
+
+import pycqed as pq
+from pycqed.measurement.openql_experiments import clifford_rb_oql as cl_oql
+
+config_fn = os.path.join(pq.__path__[0], "tests", "openql", "test_cfg_cc.json")
+nr_seeds = 100
+nr_measurements = 3
+nr_cliffords = [1, 3, 5, 7, 9, 11, 15, 20, 25, 30, 40, 50]
+
+
+def rb_tasks_inputs(measurement_idx: int):
+    return [
+        dict(
+            qubits=[2, 0],
+            nr_cliffords=nr_cliffords,
+            nr_seeds=1,
+            platf_cfg=config_fn,
+            program_name="RB_bench_m{}_s{}".format(measurement_idx, i),
+            interleaving_cliffords=[None],
+            net_cliffords=[0, 3 * 24 + 3],
+            cal_points=False,
+            recompile=True,
+        )
+        for i in range(nr_seeds)
+    ]
+
+
+def time_new_pool_per_measurement():
+    times = []
+    for m in range(nr_measurements):
+        t0 = time.perf_counter()
+        with multiprocessing.Pool(
+            maxtasksperchild=cl_oql.maxtasksperchild
+        ) as pool:
+            rb_tasks = pool.map_async(cl_oql.parallel_friendly_rb, rb_tasks_inputs(m))
+            rb_tasks.get()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def time_reused_pool():
+    times = []
+    with cl_oql.CompilationPool() as pool:
+        for m in range(nr_measurements):
+            t0 = time.perf_counter()
+            rb_tasks = pool.map_async(cl_oql.parallel_friendly_rb, rb_tasks_inputs(m))
+            rb_tasks.get()
+            times.append(time.perf_counter() - t0)
+        print("worker processes started: {}".format(pool.nr_worker_starts))
+    return times
+
+
+if __name__ == "__main__":
+    print("Two qubit RB, {} seeds, {} measurements".format(nr_seeds, nr_measurements))
+    t_new = time_new_pool_per_measurement()
+    t_reused = time_reused_pool()
+    print("{:>12} {:>16} {:>16}".format("measurement", "new pool [s]", "reused pool [s]"))
+    for m in range(nr_measurements):
+        print("{:>12} {:>16.2f} {:>16.2f}".format(m, t_new[m], t_reused[m]))
+    print("{:>12} {:>16.2f} {:>16.2f}".format("total", sum(t_new), sum(t_reused)))
@@ -0,0 +1,93 @@
+"""
+Benchmark of loading the settings of `nr_instruments` dummy instruments
+from the snapshot of a data file, of which `nr_changes` parameters differ
+from the current values.
+
+Compares `gen.load_settings_onto_instrument_v2` per instrument, which opens
+the file for every instrument and sets all parameters, with
+`gen.load_settings_onto_instruments`, which reads only the snapshots of the
+requested instruments in one file open and sets only the changed
+parameters. Each parameter set takes `set_delay` seconds, as for a
+parameter that is sent to a physical instrument.
+
+Usage:
+    python settings_loader_benchmark.py [nr_instruments] [nr_changes] [set_delay]
+"""
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+import pycqed.utilities.general as gen
+from pycqed.measurement import hdf5_data as h5d
+from pycqed.measurement import measurement_control
+from pycqed.instrument_drivers.physical_instruments.dummy_instruments import (
+    DummyParHolder,
+)
+from qcodes import station
+
+
+class SlowParHolder(DummyParHolder):
+    """
+    DummyParHolder of which setting a parameter takes set_delay seconds.
+    """
+
+    set_delay = 0
+
+    def set(self, param_name, value):
+        time.sleep(self.set_delay)
+        super().set(param_name, value)
+
+
+def change_settings(instruments, nr_changes, rng):
+    for ins in rng.choice(instruments, nr_changes):
+        ins.x(rng.normal())
+
+
+if __name__ == "__main__":
+    nr_instruments = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    nr_changes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    SlowParHolder.set_delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.002
+    rng = np.random.default_rng(0)
+
+    st = station.Station()
+    instruments = [SlowParHolder("dummy_{}".format(i))
+                   for i in range(nr_instruments)]
+    # a station of many instruments of which only some are loaded
+    others = [DummyParHolder("other_{}".format(i))
+              for i in range(4 * nr_instruments)]
+    for ins in instruments + others:
+        st.add_component(ins)
+    for ins in instruments:
+        ins.array_like(np.linspace(0, 1, 101))
+        ins.dict_like({"a": {"b": [2, 3, 5]}})
+    MC = measurement_control.MeasurementControl(
+        "MC", live_plot_enabled=False, verbose=False)
+    MC.station = st
+    MC.datadir(tempfile.mkdtemp())
+    MC.save_legacy_snapshot = False
+    with h5d.Data(name="settings_benchmark", datadir=MC.datadir()) as data:
+        MC.save_instrument_settings(data)
+    filepath = data.filepath
+
+    print("{} of {} instruments, {} parameters changed, {} s per set".format(
+        nr_instruments, len(instruments) + len(others), nr_changes,
+        SlowParHolder.set_delay))
+    change_settings(instruments, nr_changes, rng)
+    t0 = time.perf_counter()
+    for ins in instruments:
+        gen.load_settings_onto_instrument_v2(ins, filepath=filepath)
+    t_v2 = time.perf_counter() - t0
+    print("{:>22} {:>7.2f} s".format("per instrument (v2)", t_v2))
+
+    change_settings(instruments, nr_changes, rng)
+    report = gen.load_settings_onto_instruments(instruments, filepath=filepath)
+    timing = report["timing"]
+    nr_set = sum(len(r["set"]) for r in report["instruments"].values())
+    nr_unchanged = sum(len(r["unchanged"])
+                       for r in report["instruments"].values())
+    print("{:>22} {:>7.2f} s (read {:.2f} s, {} set, {} unchanged, "
+          "~{:.2f} s saved)".format(
+              "bulk, only changed", timing["read"] + timing["set"],
+              timing["read"], nr_set, nr_unchanged, timing["saved"]))
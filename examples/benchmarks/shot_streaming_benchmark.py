@@ -0,0 +1,49 @@
+"""
+Benchmark of a single-shot measurement of `nr_shots` shots with the
+MeasurementControl, storing every shot in the datafile versus streaming
+the shots into statistics (see measurement_control_helpers.ShotStatistics),
+with and without archiving the raw shots.
+
+Usage:
+    python shot_streaming_benchmark.py [nr_shots]
+"""
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+from pycqed.measurement import measurement_control
+from pycqed.measurement import measurement_control_helpers as mch
+from pycqed.measurement import detector_functions as det
+from pycqed.measurement.sweep_functions import None_Sweep
+
+
+def run(MC, nr_shots, shot_stream=None):
+    MC.set_sweep_function(None_Sweep(sweep_control="hard"))
+    # 16 prepared states with a noisy readout signal
+    MC.set_sweep_points(np.arange(nr_shots) % 16
+                        + np.random.randn(nr_shots) * 0.3)
+    d = det.Dummy_Shots_Detector(max_shots=4095)
+    d.shot_stream = shot_stream
+    MC.set_detector_function(d)
+    t0 = time.perf_counter()
+    MC.run("shot_streaming_benchmark", disable_snapshot_metadata=True)
+    return time.perf_counter() - t0, os.path.getsize(MC.data_object.filepath)
+
+
+if __name__ == "__main__":
+    nr_shots = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    MC = measurement_control.MeasurementControl(
+        "MC", live_plot_enabled=False, verbose=False)
+    MC.datadir(tempfile.mkdtemp())
+
+    print("{} shots".format(nr_shots))
+    for label, shot_stream in [
+            ("stored in dataset", None),
+            ("streaming", mch.ShotStatistics(thresholds=[7.5], nr_segments=16)),
+            ("streaming + archive", mch.ShotStatistics(
+                thresholds=[7.5], nr_segments=16, archive_raw_shots=True))]:
+        t, size = run(MC, nr_shots, shot_stream)
+        print("{:>22} {:>8.2f} s {:>10.2f} MB".format(label, t, size / 1e6))
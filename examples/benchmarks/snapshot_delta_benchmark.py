@@ -0,0 +1,97 @@
+"""
+Benchmark of the delta-encoded instrument snapshots of the
+MeasurementControl (`MC.snapshot_store`, see `hdf5_data.SnapshotStore`)
+for a station of `nr_instruments` dummy instruments.
+
+Compares `save_instrument_settings` writing the full snapshot to every
+data file with writing only the parameters that changed since the base
+snapshot, `nr_changes` parameters per measurement, and the time to read
+the (reconstructed) snapshot back with `read_dict_from_hdf5`.
+
+Usage:
+    python snapshot_delta_benchmark.py [nr_instruments] [nr_files] [nr_changes]
+"""
+import os
+import sys
+import time
+import tempfile
+
+import h5py
+import numpy as np
+
+from pycqed.measurement import hdf5_data as h5d
+from pycqed.measurement import measurement_control
+from pycqed.instrument_drivers.physical_instruments.dummy_instruments import (
+    DummyParHolder,
+)
+from qcodes import station
+
+
+def save_snapshots(MC, instruments, nr_files, nr_changes, rng):
+    t_save = 0
+    size = 0
+    filepaths = []
+    for i in range(nr_files):
+        for ins in rng.choice(instruments, nr_changes):
+            ins.x(rng.normal())
+        with h5d.Data(name="snapshot_benchmark", datadir=MC.datadir()) as data:
+            t0 = time.perf_counter()
+            MC.save_instrument_settings(data)
+            t_save += time.perf_counter() - t0
+        size += os.path.getsize(data.filepath)
+        filepaths.append(data.filepath)
+    return t_save / nr_files, size / nr_files, filepaths
+
+
+def read_snapshot(filepath):
+    t0 = time.perf_counter()
+    with h5py.File(filepath, "r") as f:
+        snapshot = h5d.read_dict_from_hdf5({}, f["Snapshot"])
+    return snapshot, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    nr_instruments = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    nr_files = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    nr_changes = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    rng = np.random.default_rng(0)
+
+    st = station.Station()
+    instruments = [DummyParHolder("dummy_{}".format(i))
+                   for i in range(nr_instruments)]
+    for ins in instruments:
+        st.add_component(ins)
+    MC = measurement_control.MeasurementControl(
+        "MC", live_plot_enabled=False, verbose=False)
+    MC.station = st
+    MC.datadir(tempfile.mkdtemp())
+    # Only the snapshot is compared
+    MC.save_legacy_snapshot = False
+
+    print("{} instruments, {} parameters changed per file".format(
+        nr_instruments, nr_changes))
+    print("{:>16} {:>10} {:>12} {:>10}".format(
+        "", "save", "file size", "read"))
+    results = {}
+    for label, store in [("full snapshot", None),
+                         ("delta snapshot",
+                          os.path.join(MC.datadir(), "snapshot_store"))]:
+        MC.snapshot_store(store)
+        t_save, size, filepaths = save_snapshots(
+            MC, instruments, nr_files, nr_changes, rng)
+        # the first read includes reading the base snapshot
+        read_snapshot(filepaths[-2])
+        snapshot, t_read = read_snapshot(filepaths[-1])
+        results[label] = snapshot
+        print("{:>16} {:>8.1f} ms {:>9.1f} kB {:>7.1f} ms".format(
+            label, 1e3 * t_save, size / 1e3, 1e3 * t_read))
+    store_size = sum(os.path.getsize(os.path.join(root, name))
+                     for root, _, names in os.walk(MC.snapshot_store())
+                     for name in names)
+    print("{:>16} {:>21.1f} kB".format("snapshot store", store_size / 1e3))
+
+    # the last snapshots are identical but for the values of the parameters
+    # that changed
+    full, delta = results["full snapshot"], results["delta snapshot"]
+    assert full.keys() == delta.keys()
+    assert full["instruments"].keys() == delta["instruments"].keys()
@@ -0,0 +1,167 @@
+"""
+Benchmark of the in-process maximum likelihood tomography solver
+`pytomo.mle_state`/`mle_process` (`tomo_options={'solver': 'numpy'}`) on
+`n_datasets` simulated datasets of thresholded single shot counts.
+
+Compares the time per dataset and the trace distance to the prepared
+state or process with the linear (pseudo-inverse) reconstruction, which
+is not always physical. When available, the SDPA solver `csdp` is run on
+the same datasets, as is `TomoAnalysis.execute_mle_T_matrix_tomo`
+(requires qutip).
+
+Usage:
+    python tomography_mle_benchmark.py [n_datasets] [n_shots]
+"""
+import sys
+import time
+import shutil
+import itertools
+
+import numpy as np
+
+from pycqed.analysis_v2 import pytomo
+
+# eigenstates of the Pauli operators
+kets = [np.array([1, 0]), np.array([0, 1]),
+        np.array([1, 1])/np.sqrt(2), np.array([1, -1])/np.sqrt(2),
+        np.array([1, 1j])/np.sqrt(2), np.array([1, -1j])/np.sqrt(2)]
+projectors = [np.outer(k, k.conj()) for k in kets]
+# input states of the process tomography
+input_states = [projectors[i] for i in [0, 1, 2, 4]]
+
+
+def tensor(operators):
+    out = operators[0]
+    for op in operators[1:]:
+        out = np.kron(out, op)
+    return out
+
+
+def random_unitary(d, rng):
+    U, _ = np.linalg.qr(rng.normal(size=(d, d)) + 1j*rng.normal(size=(d, d)))
+    return U
+
+
+def trace_distance(a, b):
+    a = a/np.trace(a, axis1=-2, axis2=-1)[..., None, None]
+    b = b/np.trace(b, axis1=-2, axis2=-1)[..., None, None]
+    return 0.5*np.abs(np.linalg.eigvalsh(a - b)).sum(axis=-1)
+
+
+def pseudo_inverse(rows, data, weights, dim):
+    # linear inversion, rows such that the data are weights*rows . vec(rho)
+    rho = (data/weights) @ np.linalg.pinv(rows).T
+    rho = rho.reshape(rho.shape[:-1] + (dim, dim))
+    return (rho + np.swapaxes(rho, -1, -2).conj())/2
+
+
+def simulate_state(n_qubits, n_datasets, n_shots, rng):
+    d = 2**n_qubits
+    observables = np.array([tensor(ops) for ops in
+                            itertools.product(projectors, repeat=n_qubits)])
+    psi = random_unitary(d, rng)[:, 0]
+    rho = 0.95*np.outer(psi, psi.conj()) + 0.05*np.eye(d)/d
+    p = np.real(np.einsum('kij,ji->k', observables, rho))
+    data = rng.binomial(n_shots, np.clip(p, 0, 1),
+                        size=(n_datasets, len(p))).astype(float)
+    rows = np.swapaxes(observables, -1, -2).reshape(len(observables), -1)
+    return rho, observables, data, rows
+
+
+def simulate_process(n_qubits, n_datasets, n_shots, rng):
+    d = 2**n_qubits
+    inputs, observables = map(np.array, zip(*itertools.product(
+        [tensor(ops) for ops in
+         itertools.product(input_states, repeat=n_qubits)],
+        [tensor(ops) for ops in
+         itertools.product(projectors, repeat=n_qubits)])))
+    U = random_unitary(d, rng)
+    chi = sum(np.kron(np.outer(a, b), U @ np.outer(a, b) @ U.conj().T)
+              for a in np.eye(d) for b in np.eye(d))/d
+    p = np.real(np.einsum('kij,kji->k', observables,
+                          U @ inputs @ U.conj().T))
+    data = rng.binomial(n_shots, np.clip(p, 0, 1),
+                        size=(n_datasets, len(p))).astype(float)
+    rows = d*np.einsum('kab,kij->kajbi', inputs,
+                       observables).reshape(len(p), -1)
+    return chi, inputs, observables, data, rows
+
+
+def timeit(f, *args, **kw):
+    t0 = time.perf_counter()
+    res = f(*args, **kw)
+    return res, time.perf_counter() - t0
+
+
+def report(label, n, t, dist):
+    print("{:>36} {:>10.4f} s {:>10.4f}".format(
+        label, t/n, np.mean(dist)))
+
+
+def mle_T_matrix(observables, data, n_shots):
+    # the fmin_powell optimisation of the TomoAnalysis on expectation values
+    from pycqed.analysis_v2 import tomography_V2
+    ta = tomography_V2.TomoAnalysis(2)
+    ta.measurement_vector_numpy = observables
+    ta.measurements_tomo = data/n_shots
+    ta.weights = np.ones(len(data))
+    t0 = np.ones(16)
+    t_opt = tomography_V2.scipy.optimize.fmin_powell(
+        ta._max_likelihood_optimization_function, t0, maxiter=100,
+        ftol=0.01, xtol=0.001, disp=False)
+    return ta.build_rho_from_triangular_params(t_opt)
+
+
+if __name__ == "__main__":
+    n_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    n_shots = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rng = np.random.default_rng(0)
+    csdp = shutil.which('csdp') is not None
+
+    print("{} datasets, {} shots per setting".format(n_datasets, n_shots))
+    print("{:>36} {:>12} {:>10}".format(
+        "", "per dataset", "distance"))
+    for n_qubits in [1, 2, 3, 4]:
+        n = n_datasets if n_qubits < 4 else max(n_datasets//20, 1)
+        rho, E, data, rows = simulate_state(n_qubits, n, n_shots, rng)
+        print("State tomography, {} qubit(s), {} datasets".format(
+            n_qubits, n))
+        rho_li, t = timeit(pseudo_inverse, rows, data, n_shots, 2**n_qubits)
+        report("pseudo-inverse", n, t, trace_distance(rho_li, rho))
+        print("{:>36} {:>10.1f} %".format(
+            "unphysical", 100*np.mean(np.linalg.eigvalsh(rho_li)[:, 0] < 0)))
+        rho_mle, t = timeit(pytomo.mle_state, data, E, n_shots)
+        report("numpy MLE, batch", n, t, trace_distance(rho_mle, rho))
+        if csdp and n_qubits < 4:
+            rho_sdpa, t = timeit(lambda: np.array([
+                pytomo.tomo_state(d, E, n_shots) for d in data]))
+            report("csdp", n, t, trace_distance(rho_sdpa, rho))
+            print("{:>36} {:>12.2e}".format(
+                "max |csdp - numpy|/N", np.max(np.abs(
+                    rho_sdpa - rho_mle)/n_shots)))
+        if n_qubits == 2:
+            try:
+                m = min(n, 5)
+                rho_T, t = timeit(lambda: np.array(
+                    [mle_T_matrix(E, d, n_shots) for d in data[:m]]))
+                report("TomoAnalysis T matrix MLE", m, t,
+                       trace_distance(rho_T, rho))
+            except (ImportError, AttributeError) as e:
+                print("{:>36} {}".format("TomoAnalysis T matrix MLE",
+                                         "skipped ({})".format(e)))
+
+    for n_qubits in [1, 2]:
+        n = n_datasets if n_qubits < 2 else max(n_datasets//10, 1)
+        chi, R, E, data, rows = simulate_process(n_qubits, n, n_shots, rng)
+        print("Process tomography, {} qubit(s), {} datasets".format(
+            n_qubits, n))
+        chi_li, t = timeit(pseudo_inverse, rows, data, n_shots, 4**n_qubits)
+        report("pseudo-inverse", n, t, trace_distance(chi_li, chi))
+        print("{:>36} {:>10.1f} %".format(
+            "unphysical", 100*np.mean(np.linalg.eigvalsh(chi_li)[:, 0] < 0)))
+        chi_mle, t = timeit(pytomo.mle_process, data, R, E, n_shots)
+        report("numpy MLE, batch", n, t, trace_distance(chi_mle, chi))
+        if csdp:
+            chi_sdpa, t = timeit(lambda: np.array([
+                pytomo.tomo_process(d, R, E, n_shots) for d in data]))
+            report("csdp", n, t, trace_distance(chi_sdpa, chi))
@@ -4,6 +4,7 @@ import datetime
 import warnings
 import h5py
 import logging
+import threading
 
 import pandas as pd
 import colorsys as colors
@@ -13,12 +14,14 @@ import colorsys as colors
 
 from copy import deepcopy
 from collections import OrderedDict as od
+from concurrent.futures import ThreadPoolExecutor
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from scipy.interpolate import griddata
 from scipy.signal import argrelextrema
 from scipy import optimize
 
 from pycqed.utilities.get_default_datadir import get_default_datadir
+from pycqed.utilities import measurement_catalogue as mcat
 from pycqed.analysis import composite_analysis as RA
 from .tools.plotting import *
 
@@ -31,6 +34,11 @@ from pycqed.analysis.tools.plotting import (set_xlabel, set_ylabel, set_cbarlabe
 datadir = get_default_datadir()
 print('Data directory set to:', datadir)
 
+# If True, the lookup of measurements by label and timestamp
+# (`latest_data`, `return_last_n_timestamps`, `get_timestamps_in_range`)
+# uses the measurement catalogue instead of listing the day folders
+use_measurement_catalogue = True
+
 
 ######################################################################
 #     Filehandling tools
@@ -97,6 +105,27 @@ def is_equal(ts0, ts1, or_equal=False):
 
 
 def return_last_n_timestamps(n, contains=''):
+    """
+    Returns the timestamps ("YYYYMMDDhhmmss") of the last `n` measurements
+    with <contains> in their name, the latest first.
+    """
+    catalogue = _get_measurement_catalogue(datadir)
+    if catalogue is not None:
+        timestamps = []
+        older_than = None
+        while len(timestamps) < n:
+            rows = catalogue.find(contains=contains, older_than=older_than,
+                                  limit=n - len(timestamps), refresh=False)
+            if len(rows) == 0:
+                raise Exception('No data found.')
+            for timestamp, _, _ in rows:
+                timestamp = timestamp.replace('_', '')
+                # measurements with the same timestamp are returned once
+                if timestamp not in timestamps:
+                    timestamps.append(timestamp)
+            older_than = timestamps[-1]
+        return timestamps
+
     timestamps = []
     for i in range(n):
         if i == 0:
@@ -110,6 +139,24 @@ def return_last_n_timestamps(n, contains=''):
     return timestamps
 
 
+def _get_measurement_catalogue(folder):
+    """
+    Returns the measurement catalogue of `folder` or None if the catalogue
+    is disabled or cannot be used, in which case the folders are listed.
+    The catalogue is only an index, any error falls back to listing.
+    """
+    if not use_measurement_catalogue:
+        return None
+    try:
+        catalogue = mcat.get_catalogue(folder)
+        catalogue.refresh()
+    except Exception as e:
+        logging.warning('Measurement catalogue not available, listing the '
+                        'data folders instead: {}'.format(e))
+        return None
+    return catalogue
+
+
 def latest_data(contains='', older_than=None, newer_than=None, or_equal=False,
                 return_timestamp=False, raise_exc=True,
                 folder=None, return_all=False):
@@ -133,6 +180,14 @@ def latest_data(contains='', older_than=None, newer_than=None, or_equal=False,
     else:
         search_dir = folder
 
+    catalogue = _get_measurement_catalogue(search_dir)
+    if catalogue is not None:
+        return _latest_data_from_catalogue(
+            catalogue, search_dir, contains=contains, older_than=older_than,
+            newer_than=newer_than, or_equal=or_equal,
+            return_timestamp=return_timestamp, raise_exc=raise_exc,
+            return_all=return_all)
+
     daydirs = os.listdir(search_dir)
 
     if len(daydirs) == 0:
@@ -190,6 +245,37 @@ def latest_data(contains='', older_than=None, newer_than=None, or_equal=False,
                 search_dir, daydir, measdir)
 
 
+def _latest_data_from_catalogue(catalogue, search_dir, contains, older_than,
+                                newer_than, or_equal, return_timestamp,
+                                raise_exc, return_all):
+    """
+    Implementation of `latest_data` using the measurement catalogue.
+    """
+    rows = catalogue.find(contains=contains, older_than=older_than,
+                          newer_than=newer_than, or_equal=or_equal,
+                          limit=1, refresh=False)
+    if len(rows) == 0:
+        if len(os.listdir(search_dir)) == 0:
+            logging.warning('No data found in datadir')
+            return None
+        if raise_exc is True:
+            raise Exception('No data found.')
+        else:
+            return False
+
+    _, daydir, measdir = rows[0]
+    if return_all:
+        rows = catalogue.find(contains=contains, older_than=older_than,
+                              newer_than=newer_than, or_equal=or_equal,
+                              daystamp=daydir, ascending=True, refresh=False)
+        return search_dir, daydir, [d for _, _, d in rows]
+    if return_timestamp is False:
+        return os.path.join(search_dir, daydir, measdir)
+    else:
+        return str(daydir) + str(measdir[:6]), os.path.join(
+            search_dir, daydir, measdir)
+
+
 def get_datafilepath_from_timestamp(timestamp):
     """
     Return the full filepath of a datafile designated by a timestamp.
@@ -440,27 +526,25 @@ def get_data_from_ma_v2(ma, param_names, numeric_params=None):
                 data[param] = ma.measured_values[special_output[param]]
             elif param in dir(ma):
                 data[param] = getattr(ma, param)
-            elif param in list(
-                    ma.data_file.get('Experimental Data', {}).keys()):
+            elif param in ma.data_file.get('Experimental Data', {}):
                 data[param] = np.double(
                     ma.data_file['Experimental Data'][param])
-            elif param in list(ma.data_file.get('Analysis', {}).keys()):
+            elif param in ma.data_file.get('Analysis', {}):
                 data[param] = np.double(ma.data_file['Analysis'][param])
             else:
                 warnings.warn(
                     'The data file attribute %s does not exist or hasn\'t '
                     'been coded for extraction.' % (param))
         else:
-            if param.split('.')[0] in list(
-                    ma.data_file.get('Instrument settings', {}).keys()):
+            if param.split('.')[0] in ma.data_file.get(
+                    'Instrument settings', {}):
                 data[param] = ma.data_file['Instrument settings'][
                     param.split('.')[0]].attrs[param.split('.')[1]]
             else:
                 extract_param = True
-                if param.split('.')[0] in list(
-                        ma.data_file.get('Analysis', {}).keys()):
+                if param.split('.')[0] in ma.data_file.get('Analysis', {}):
                     temp = ma.data_file['Analysis']
-                elif param.split('.')[0] in list(ma.data_file.keys()):
+                elif param.split('.')[0] in ma.data_file:
                     temp = ma.data_file
                 else:
                     extract_param = False
@@ -472,9 +556,9 @@ def get_data_from_ma_v2(ma, param_names, numeric_params=None):
                     for ii in range(len(param.split('.')) - 1):
                         temp = temp[param.split('.')[ii]]
                     param_end = param.split('.')[-1]
-                    if param_end in list(temp.attrs.keys()):
+                    if param_end in temp.attrs:
                         data[param] = temp.attrs[param_end]
-                    elif param_end in list(temp.keys()):
+                    elif param_end in temp:
                         data[param] = temp[param_end].value
         if numeric_params is not None:
             if param in numeric_params:
@@ -536,6 +620,19 @@ def append_data_from_ma(ma, param_names, data, data_version=2,
             data[param].append(new_data[param])
 
 
+# Attributes of MeasurementAnalysis set when opening the datafile, the
+# data does not have to be loaded to extract these
+_datafile_attributes = {'folder', 'h5filepath', 'name', 'measurementstring',
+                        'timestamp', 'timestamp_string', 'default_plot_title'}
+
+# Data extracted by `get_data_from_timestamp_list` using the
+# MeasurementDataReader, keyed by the datafile, its modification time and
+# the extraction arguments
+_extracted_data_cache = od()
+_extracted_data_cache_lock = threading.Lock()
+extracted_data_cache_size = 1000
+
+
 def get_data_from_timestamp_list(timestamps,
                                  param_names,
                                  TwoD=False,
@@ -543,13 +640,30 @@ def get_data_from_timestamp_list(timestamps,
                                  filter_no_analysis=False,
                                  numeric_params=None,
                                  filter_dict=None,
-                                 ma_type='MeasurementAnalysis'):
+                                 ma_type='MeasurementAnalysis',
+                                 n_threads=None,
+                                 use_cache=True):
+    """
+    Extracts the parameters `param_names` from the datafiles of the
+    measurements with the given timestamps.
+
+    For the default ma_type, the datafiles are opened read-only using a
+    MeasurementDataReader and the sweep points and measured values are only
+    loaded if a requested parameter needs them. Other ma_types create the
+    analysis object for every timestamp.
+
+    Args:
+        n_threads (int): number of threads used to read the files
+            (MeasurementDataReader only), by default the files are read
+            sequentially.
+        use_cache (bool): reuse data extracted from a file before if the
+            file was not modified since (MeasurementDataReader only).
+    """
     # dirty import inside this function to prevent circular import
     # FIXME: this function is at the base of the analysis v2 but relies
     # on the old analysis in the most dirty way. Also not completely clear
     # how the data extraction works here
     from pycqed.analysis import measurement_analysis as ma
-    ma_func = getattr(ma, ma_type)
 
     if type(timestamps) is str:
         timestamps = [timestamps]
@@ -568,72 +682,40 @@ def get_data_from_timestamp_list(timestamps,
     else:
         get_timestamps = timestamps
 
+    if type(param_names) is dict:
+        param_values = list(param_names.values())
+    else:
+        param_values = list(param_names)
+    if filter_dict is not None:
+        param_names_filter = param_values + list(filter_dict.keys())
+    else:
+        param_names_filter = param_values
+
+    if ma_type == 'MeasurementAnalysis':
+        extract = _extract_data_from_timestamps
+    else:
+        extract = _extract_data_from_timestamps_ma
+    results = extract(get_timestamps, param_names_filter, ma_func=getattr(
+        ma, ma_type), TwoD=TwoD, filter_no_analysis=filter_no_analysis,
+        n_threads=n_threads, use_cache=use_cache)
+
     remove_timestamps = []
-    for timestamp in get_timestamps:
-        try:
-            ana = ma_func(timestamp=timestamp, auto=False, close_file=False)
-        except Exception as e:
-            try:
-                ana.finish()
-                del ana
-            except Exception:
-                pass
-            logging.warning(e)
+    for timestamp, (status, new_data) in zip(get_timestamps, results):
+        if status == 'removed':
             remove_timestamps.append(timestamp)
-        else:
-            try:
-                do_analysis = True
-                if filter_no_analysis:
-                    if 'Analysis' in ana.data_file.keys():
-                        do_analysis = True
-                    else:
-                        do_analysis = False
-
-                if do_analysis:
-                    if TwoD:
-                        ana.get_naming_and_values_2D()
-                    else:
-                        ana.get_naming_and_values()
-
-                    if 'datasaving_format' in ana.data_file[
-                            'Experimental Data'].attrs:
-                        datasaving_format = ana.get_key('datasaving_format')
-                    else:
-                        print(
-                            'Using legacy data loading, assuming old formatting')
-                        datasaving_format = 'Version 1'
-
-                    if datasaving_format == 'Version 1':
-                        if single_timestamp:
-                            data = get_data_from_ma(ana, param_names.values(),
-                                                    data_version=1)
-                        else:
-                            append_data_from_ma(ana, param_names.values(), data,
-                                                data_version=1, filter_dict=filter_dict)
-
-                    elif datasaving_format == 'Version 2':
-                        if single_timestamp:
-                            data = get_data_from_ma(ana, param_names.values(),
-                                                    data_version=2)
-                        else:
-                            append_data_from_ma(
-                                ana, param_names.values(), data, data_version=2,
-                                filter_dict=filter_dict)
-
+        elif status == 'extracted':
+            if single_timestamp:
+                data = od([(param, new_data[param]) for param in param_values])
+            elif filter_dict is not None:
+                for k, v in filter_dict.items():
+                    if new_data[k] != str(v):
+                        break
                 else:
-                    remove_timestamps.append(timestamp)
-                    do_analysis = True
-                ana.finish()
-            except KeyError as e:
-
-                logging.warning('KeyError "%s" when processing timestamp %s' %
-                                (e, timestamp))
-                logging.warning(e)
-
-            except Exception as e:
-                logging.warning('Error "%s" when processing timestamp %s' %
-                                (e, timestamp))
-                raise(e)
+                    for param in param_values:
+                        data[param].append(new_data[param])
+            else:
+                for param in param_values:
+                    data[param].append(new_data[param])
 
     if len(remove_timestamps) > 0:
         for timestamp in remove_timestamps:
@@ -659,6 +741,158 @@ def get_data_from_timestamp_list(timestamps,
     return out_data
 
 
+def _extract_data_from_ma(ana, param_names, TwoD, filter_no_analysis,
+                          get_naming_and_values=True):
+    """
+    Extracts `param_names` from an (opened) analysis object.
+
+    Returns:
+        status (str): 'extracted', 'removed' if the file is filtered out
+            or 'failed' if the data could not be extracted.
+        data (dict): the extracted data if the status is 'extracted'.
+    """
+    try:
+        if filter_no_analysis and 'Analysis' not in ana.data_file.keys():
+            return 'removed', None
+
+        if get_naming_and_values:
+            if TwoD:
+                ana.get_naming_and_values_2D()
+            else:
+                ana.get_naming_and_values()
+
+        if 'datasaving_format' in ana.data_file['Experimental Data'].attrs:
+            datasaving_format = ana.get_key('datasaving_format')
+        else:
+            print('Using legacy data loading, assuming old formatting')
+            datasaving_format = 'Version 1'
+
+        if datasaving_format == 'Version 1':
+            return 'extracted', get_data_from_ma(ana, param_names,
+                                                 data_version=1)
+        elif datasaving_format == 'Version 2':
+            return 'extracted', get_data_from_ma(ana, param_names,
+                                                 data_version=2)
+        return 'failed', None
+    except KeyError as e:
+        logging.warning('KeyError "%s" when processing folder %s' %
+                        (e, ana.folder))
+        return 'failed', None
+    except Exception as e:
+        logging.warning('Error "%s" when processing folder %s' %
+                        (e, ana.folder))
+        raise e
+
+
+def _extract_data_from_timestamps_ma(timestamps, param_names, ma_func,
+                                     TwoD, filter_no_analysis, **kw):
+    """
+    Extracts the data by creating an analysis object of type `ma_func` for
+    every timestamp.
+    """
+    results = []
+    for timestamp in timestamps:
+        try:
+            ana = ma_func(timestamp=timestamp, auto=False, close_file=False)
+        except Exception as e:
+            logging.warning(e)
+            results.append(('removed', None))
+            continue
+        results.append(_extract_data_from_ma(ana, param_names, TwoD,
+                                             filter_no_analysis))
+        ana.finish()
+    return results
+
+
+def _extract_data_from_timestamps(timestamps, param_names, TwoD,
+                                  filter_no_analysis, n_threads=None,
+                                  use_cache=True, **kw):
+    """
+    Extracts the data from the datafiles using a MeasurementDataReader.
+
+    The folders are resolved listing every day folder only once and the
+    files are optionally read using a pool of `n_threads` threads.
+    """
+    from pycqed.analysis import measurement_analysis as ma
+
+    day_listings = {}
+    folders = []
+    for timestamp in timestamps:
+        try:
+            folders.append(_folder_from_timestamp(timestamp, day_listings))
+        except Exception as e:
+            logging.warning(e)
+            folders.append(None)
+
+    get_naming_and_values = any(
+        '.' not in param and param not in _datafile_attributes
+        for param in param_names)
+    cache_args = (tuple(param_names), TwoD, filter_no_analysis)
+
+    def extract(folder):
+        if folder is None:
+            return 'removed', None
+        if use_cache:
+            h5filepath = measurement_filename(folder)
+            if h5filepath is None:
+                return 'removed', None
+            stat = os.stat(h5filepath)
+            key = (h5filepath, stat.st_mtime_ns, stat.st_size) + cache_args
+            with _extracted_data_cache_lock:
+                result = _extracted_data_cache.get(key)
+            if result is not None:
+                return deepcopy(result)
+        try:
+            ana = ma.MeasurementDataReader(folder)
+        except Exception as e:
+            logging.warning(e)
+            return 'removed', None
+        try:
+            result = _extract_data_from_ma(
+                ana, param_names, TwoD, filter_no_analysis,
+                get_naming_and_values=get_naming_and_values)
+        finally:
+            ana.finish()
+        if use_cache:
+            with _extracted_data_cache_lock:
+                _extracted_data_cache[key] = result
+                while len(_extracted_data_cache) > extracted_data_cache_size:
+                    _extracted_data_cache.popitem(last=False)
+            result = deepcopy(result)
+        return result
+
+    if n_threads is None or n_threads <= 1:
+        return [extract(folder) for folder in folders]
+    with ThreadPoolExecutor(n_threads) as executor:
+        return list(executor.map(extract, folders))
+
+
+def _folder_from_timestamp(timestamp, day_listings):
+    """
+    Returns the folder of the measurement with the given timestamp, as
+    `data_from_time`, using and updating the day folder listings in
+    `day_listings`.
+    """
+    daystamp, tstamp = verify_timestamp(timestamp)
+    if daystamp not in day_listings:
+        try:
+            day_listings[daystamp] = os.listdir(os.path.join(datadir,
+                                                             daystamp))
+        except FileNotFoundError:
+            day_listings[daystamp] = None
+    if day_listings[daystamp] is None:
+        raise KeyError("Requested day '%s' not found" % daystamp)
+
+    measdirs = [d for d in day_listings[daystamp] if d[:6] == tstamp]
+    if len(measdirs) == 0:
+        raise KeyError("Requested data '%s_%s' not found"
+                       % (daystamp, tstamp))
+    elif len(measdirs) == 1:
+        return os.path.join(datadir, daystamp, measdirs[0])
+    else:
+        raise NameError('Timestamp is not unique: %s ' % (measdirs))
+
+
 def convert_instr_str_list_to_numeric_array(string_list):
     return np.double(string_list[:])
 
@@ -812,6 +1046,18 @@ def get_timestamps_in_range(timestamp_start, timestamp_end=None,
         datetime_end = datetime.datetime.today()
     else:
         datetime_end = datetime_from_timestamp(timestamp_end)
+
+    catalogue = _get_measurement_catalogue(folder)
+    if catalogue is not None:
+        rows = catalogue.find(
+            contains=label, exact_label_match=exact_label_match,
+            newer_than=timestamp_from_datetime(datetime_start),
+            older_than=timestamp_from_datetime(datetime_end), or_equal=True,
+            ascending=True, refresh=False)
+        if len(rows) == 0:
+            raise ValueError(
+                'No matching timestamps found for label "{}"'.format(label))
+        return [timestamp for timestamp, _, _ in rows]
     days_delta = (datetime_end.date() - datetime_start.date()).days
     all_timestamps = []
     for day in reversed(list(range(days_delta + 1))):
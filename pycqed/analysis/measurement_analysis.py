@@ -35,7 +35,7 @@ import math
 from math import erfc
 from scipy.signal import argrelmax, argrelmin
 from scipy.constants import *
-from copy import deepcopy
+from copy import copy, deepcopy
 from pycqed.analysis.fit_toolbox import functions as func
 from pprint import pprint
 
@@ -926,6 +926,29 @@ class MeasurementAnalysis(object):
             return best_fit_results
 
 
+class MeasurementDataReader(MeasurementAnalysis):
+    """
+    Read-only access to the datafile of a measurement, used to extract data
+    from many files (see `a_tools.get_data_from_timestamp_list`).
+
+    Opens the datafile in read mode and provides the naming and values
+    methods of MeasurementAnalysis, without resolving the folder from a
+    timestamp and without any plotting or analysis state.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.load_hdf5data(h5mode='r')
+        self._keys = {}
+
+    def get_key(self, key):
+        # The file is opened read-only, so the attributes can be cached.
+        # The naming and values methods request the same keys repeatedly
+        if key not in self._keys:
+            self._keys[key] = super().get_key(key)
+        return copy(self._keys[key])
+
+
 class OptimizationAnalysis_v2(MeasurementAnalysis):
 
     def run_default_analysis(self, close_file=True, **kw):
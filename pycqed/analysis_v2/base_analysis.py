@@ -25,9 +25,6 @@ import h5py
 from pycqed.measurement.hdf5_data import write_dict_to_hdf5
 from collections.abc import Iterable
 
-import importlib
-importlib.reload(a_tools)
-
 
 class BaseDataAnalysis(object):
     """
@@ -137,6 +134,9 @@ class BaseDataAnalysis(object):
                                     dictionary of parameter names as keys and
                                     values as values. Only datasets with specified values
                                     of parameters will be extracted and used in analysis
+                                -'extract_n_threads'
+                                    number of threads used to read the data
+                                    files, see a_tools.get_data_from_timestamp_list
         :param extract_only: Should we also do the plots?
         :param do_fitting: Should the run_fitting method be executed?
         :param save_qois: Should the save save_quantities_of_interest method be executed?
@@ -330,7 +330,8 @@ class BaseDataAnalysis(object):
             ma_type=self.ma_type,
             TwoD=TwoD, numeric_params=self.numeric_params,
             filter_no_analysis=self.filter_no_analysis,
-            filter_dict=filter_dict)
+            filter_dict=filter_dict,
+            n_threads=self.options_dict.get('extract_n_threads', None))
 
         # Use timestamps to calculate datetimes and add to dictionary
         self.raw_data_dict['datetime'] = [a_tools.datetime_from_timestamp(
@@ -1,150 +1,159 @@
 """
 This file imports all the relevant classes for daily use.
-"""
 
-# This snippet ensures all submodules get reloaded properly as we like to
-# modify things when using it.
-from importlib import reload
+The analysis modules are imported when one of their classes or the module
+alias (e.g. `ma2.ra`) is accessed for the first time, such that importing
+this file is fast (see examples/benchmarks/analysis_v2_import_benchmark.py).
+When modifying analyses in a running kernel, use `reload_analysis_modules`.
+
+Module level __getattr__ (PEP 562) requires python 3.7, on older versions
+all modules are imported when this file is imported.
+"""
+import sys
+from importlib import import_module, reload
 
 # Do not comment this out as other modules rely on this import being present
 from pycqed.analysis import analysis_toolbox as a_tools
-reload(a_tools)
-import pycqed.analysis_v2.base_analysis as ba
-reload(ba)
-import pycqed.analysis_v2.simple_analysis as sa
-reload(sa)
-import pycqed.analysis_v2.timedomain_analysis as ta
-reload(ta)
-import pycqed.analysis_v2.readout_analysis as ra
-reload(ra)
-import pycqed.analysis_v2.syndrome_analysis as synda
-reload(sa)
-# only one of these two files should exist in the end
-import pycqed.analysis_v2.cryo_scope_analysis as csa
-# import pycqed.analysis_v2.cryo_scope_analysis_V2 as csa
-reload(csa)
-import pycqed.analysis_v2.cryo_spectrumanalyzer_analysis as csa
-reload(csa)
-# reload(csa_V2)
-import pycqed.analysis_v2.distortions_analysis as da
-
-import pycqed.analysis_v2.optimization_analysis as oa
-reload(da)
-import pycqed.analysis_v2.coherence_analysis as cs
-reload(cs)
-import pycqed.analysis_v2.spectroscopy_analysis as sa
-reload(sa)
-import pycqed.analysis_v2.dac_scan_analysis as da
-reload(da)
-import pycqed.analysis_v2.quantum_efficiency_analysis as qea
-reload(qea)
-import pycqed.analysis_v2.cross_dephasing_analysis as cda
-reload(cda)
-import pycqed.analysis_v2.randomized_benchmarking_analysis as rba
-reload(rba)
-
-import pycqed.analysis_v2.multiplexed_readout_analysis as mux
-reload(mux)
-
-import  pycqed.analysis_v2.parity_check_analysis as pca
-reload(pca)
-# import pycqed.analysis_v2.gate_set_tomography_analysis as gsa
-# reload(gsa)
-
-# import pycqed.analysis_v2.fluxing_analysis as fla
-# reload(fla)
-import pycqed.analysis_v2.multiplexed_readout_analysis as mra
-reload(mra)
-import pycqed.analysis_v2.Two_qubit_gate_analysis as tqg
-reload(tqg)
-
-import pycqed.analysis_v2.fluxing_analysis as fla
-reload(fla)
-
-import pycqed.analysis_v2.timing_cal_analysis as ta
-reload(ta)
-
-import pycqed.analysis_v2.multiplexed_readout_analysis as mra
-reload(mra)
-
-import pycqed.analysis_v2.cryoscope_v2_analysis as cv2
-reload(cv2)
-
-# from pycqed.analysis_v2.base_analysis import  # remove me if everything still works*
-from pycqed.analysis_v2.simple_analysis import (
-    Basic1DAnalysis, Basic1DBinnedAnalysis,
-    Basic2DAnalysis, Basic2DInterpolatedAnalysis)
-from pycqed.analysis_v2.timedomain_analysis import (
-    FlippingAnalysis, EFRabiAnalysis, DecoherenceAnalysis, Intersect_Analysis, #CZ_1QPhaseCal_Analysis,
-    Oscillation_Analysis, ComplexRamseyAnalysis, Crossing_Analysis,
-    Conditional_Oscillation_Analysis, Idling_Error_Rate_Analyisis,
-    Grovers_TwoQubitAllStates_Analysis)
-from pycqed.analysis_v2.readout_analysis import (
-    Singleshot_Readout_Analysis, RO_acquisition_delayAnalysis,
-    Dispersive_shift_Analysis, Readout_landspace_Analysis)
-
-from pycqed.analysis_v2.multiplexed_readout_analysis import \
-    Multiplexed_Readout_Analysis, Multiplexed_Transient_Analysis,\
-    Multiplexed_Weights_Analysis
-
-from pycqed.analysis_v2.parity_check_analysis import Parity_Check_Analysis
-
-from pycqed.analysis_v2.syndrome_analysis import (
-    Single_Qubit_RoundsToEvent_Analysis, One_Qubit_Paritycheck_Analysis)
-
-
-from pycqed.analysis_v2.cryo_scope_analysis import RamZFluxArc, \
-    SlidingPulses_Analysis, Cryoscope_Analysis
-
-from pycqed.analysis_v2.cryo_scope_analysis_V2 import RamZFluxArc, \
-    SlidingPulses_Analysis, Cryoscope_Analysis
-
-from pycqed.analysis_v2.cryo_spectrumanalyzer_analysis import Cryospec_Analysis
-from pycqed.analysis_v2.distortions_analysis import Scope_Trace_analysis
-
-from pycqed.analysis_v2.optimization_analysis import OptimizationAnalysis
-from pycqed.analysis_v2.timing_cal_analysis import Timing_Cal_Flux_Coarse, \
-    Timing_Cal_Flux_Fine
-
-from pycqed.analysis_v2.coherence_analysis import CoherenceAnalysis, \
-    CoherenceTimesAnalysisSingle, AliasedCoherenceTimesAnalysisSingle, \
-    CoherenceTimesAnalysis_old, CoherenceAnalysisDataExtractor
-from pycqed.analysis_v2.spectroscopy_analysis import Spectroscopy, \
-    ResonatorSpectroscopy, VNA_analysis, complex_spectroscopy, VNA_DAC_Analysis
-from pycqed.analysis_v2.dac_scan_analysis import FluxFrequency, \
-    Susceptibility_to_Flux_Bias, DACarcPolyFit
-from pycqed.analysis_v2.quantum_efficiency_analysis import \
-    QuantumEfficiencyAnalysis, DephasingAnalysisSingleScans, \
-    DephasingAnalysisSweep, SSROAnalysisSingleScans, SSROAnalysisSweep, \
-    QuantumEfficiencyAnalysisTWPA
-from pycqed.analysis_v2.cross_dephasing_analysis import CrossDephasingAnalysis
-from pycqed.analysis_v2.randomized_benchmarking_analysis import (
-    RandomizedBenchmarking_SingleQubit_Analysis,
-    RandomizedBenchmarking_TwoQubit_Analysis,
-    UnitarityBenchmarking_TwoQubit_Analysis,
-    InterleavedRandomizedBenchmarkingAnalysis,
-    CharacterBenchmarking_TwoQubit_Analysis,
-    InterleavedRandomizedBenchmarkingParkingAnalysis)
-from pycqed.analysis_v2.gate_set_tomography_analysis import \
-    GST_SingleQubit_DataExtraction, GST_TwoQubit_DataExtraction
-
-from pycqed.analysis_v2.fluxing_analysis import Chevron_Analysis,\
-    Conditional_Oscillation_Heatmap_Analysis, interp_to_1D_arr,\
-    Chevron_Alignment_Analysis
-
-from pycqed.analysis_v2.cryoscope_v2_analysis import Cryoscope_v2_Analysis
-
-import pycqed.analysis_v2.multi_analysis as mana 
-reload(mana)
-
-## Hiresh fix this there is an error in flipping
-# from pycqed.analysis_v2.multi_analysis import (Multi_AllXY_Analysis, plot_Multi_AllXY,
-#     Multi_Rabi_Analysis, plot_Multi_Rabi, Multi_Ramsey_Analysis, plot_Multi_Ramsey,
-#     Multi_T1_Analysis, plot_Multi_T1, Multi_Echo_Analysis, plot_Multi_Echo,
-#     Multi_Flipping_Analysis,plot_Multi_Flipping, Multi_Motzoi_Analysis)
-
-from pycqed.analysis_v2.multi_analysis import (Multi_AllXY_Analysis, plot_Multi_AllXY,
-    Multi_Rabi_Analysis, plot_Multi_Rabi, Multi_Ramsey_Analysis, plot_Multi_Ramsey,
-    Multi_T1_Analysis, plot_Multi_T1, Multi_Echo_Analysis, plot_Multi_Echo,
-    Multi_Flipping_Analysis, Multi_Motzoi_Analysis)
 
+_package = 'pycqed.analysis_v2'
+
+# Module aliases, N.B. "sa", "ta", "csa" and "da" were each bound to two
+# modules when all modules were imported at once, the last one is kept
+_lazy_modules = {
+    'ba': 'base_analysis',
+    'ra': 'readout_analysis',
+    'synda': 'syndrome_analysis',
+    'csa': 'cryo_spectrumanalyzer_analysis',
+    'oa': 'optimization_analysis',
+    'cs': 'coherence_analysis',
+    'sa': 'spectroscopy_analysis',
+    'da': 'dac_scan_analysis',
+    'qea': 'quantum_efficiency_analysis',
+    'cda': 'cross_dephasing_analysis',
+    'rba': 'randomized_benchmarking_analysis',
+    'mux': 'multiplexed_readout_analysis',
+    'pca': 'parity_check_analysis',
+    'mra': 'multiplexed_readout_analysis',
+    'tqg': 'Two_qubit_gate_analysis',
+    'fla': 'fluxing_analysis',
+    'ta': 'timing_cal_analysis',
+    'cv2': 'cryoscope_v2_analysis',
+    'mana': 'multi_analysis',
+}
+
+_lazy_attributes = {
+    'simple_analysis': [
+        'Basic1DAnalysis', 'Basic1DBinnedAnalysis',
+        'Basic2DAnalysis', 'Basic2DInterpolatedAnalysis'],
+    'timedomain_analysis': [
+        'FlippingAnalysis', 'EFRabiAnalysis', 'DecoherenceAnalysis',
+        'Intersect_Analysis', 'Oscillation_Analysis',
+        'ComplexRamseyAnalysis', 'Crossing_Analysis',
+        'Conditional_Oscillation_Analysis', 'Idling_Error_Rate_Analyisis',
+        'Grovers_TwoQubitAllStates_Analysis'],
+    'readout_analysis': [
+        'Singleshot_Readout_Analysis', 'RO_acquisition_delayAnalysis',
+        'Dispersive_shift_Analysis', 'Readout_landspace_Analysis'],
+    'multiplexed_readout_analysis': [
+        'Multiplexed_Readout_Analysis', 'Multiplexed_Transient_Analysis',
+        'Multiplexed_Weights_Analysis'],
+    'parity_check_analysis': ['Parity_Check_Analysis'],
+    'syndrome_analysis': [
+        'Single_Qubit_RoundsToEvent_Analysis',
+        'One_Qubit_Paritycheck_Analysis'],
+    'cryo_scope_analysis_V2': [
+        'RamZFluxArc', 'SlidingPulses_Analysis', 'Cryoscope_Analysis'],
+    'cryo_spectrumanalyzer_analysis': ['Cryospec_Analysis'],
+    'distortions_analysis': ['Scope_Trace_analysis'],
+    'optimization_analysis': ['OptimizationAnalysis'],
+    'timing_cal_analysis': ['Timing_Cal_Flux_Coarse', 'Timing_Cal_Flux_Fine'],
+    'coherence_analysis': [
+        'CoherenceAnalysis', 'CoherenceTimesAnalysisSingle',
+        'AliasedCoherenceTimesAnalysisSingle', 'CoherenceTimesAnalysis_old',
+        'CoherenceAnalysisDataExtractor'],
+    'spectroscopy_analysis': [
+        'Spectroscopy', 'ResonatorSpectroscopy', 'VNA_analysis',
+        'complex_spectroscopy', 'VNA_DAC_Analysis'],
+    'dac_scan_analysis': [
+        'FluxFrequency', 'Susceptibility_to_Flux_Bias', 'DACarcPolyFit'],
+    'quantum_efficiency_analysis': [
+        'QuantumEfficiencyAnalysis', 'DephasingAnalysisSingleScans',
+        'DephasingAnalysisSweep', 'SSROAnalysisSingleScans',
+        'SSROAnalysisSweep', 'QuantumEfficiencyAnalysisTWPA'],
+    'cross_dephasing_analysis': ['CrossDephasingAnalysis'],
+    'randomized_benchmarking_analysis': [
+        'RandomizedBenchmarking_SingleQubit_Analysis',
+        'RandomizedBenchmarking_TwoQubit_Analysis',
+        'UnitarityBenchmarking_TwoQubit_Analysis',
+        'InterleavedRandomizedBenchmarkingAnalysis',
+        'CharacterBenchmarking_TwoQubit_Analysis',
+        'InterleavedRandomizedBenchmarkingParkingAnalysis'],
+    'gate_set_tomography_analysis': [
+        'GST_SingleQubit_DataExtraction', 'GST_TwoQubit_DataExtraction'],
+    'fluxing_analysis': [
+        'Chevron_Analysis', 'Conditional_Oscillation_Heatmap_Analysis',
+        'interp_to_1D_arr', 'Chevron_Alignment_Analysis'],
+    'cryoscope_v2_analysis': ['Cryoscope_v2_Analysis'],
+    'multi_analysis': [
+        'Multi_AllXY_Analysis', 'plot_Multi_AllXY', 'Multi_Rabi_Analysis',
+        'plot_Multi_Rabi', 'Multi_Ramsey_Analysis', 'plot_Multi_Ramsey',
+        'Multi_T1_Analysis', 'plot_Multi_T1', 'Multi_Echo_Analysis',
+        'plot_Multi_Echo', 'Multi_Flipping_Analysis',
+        'Multi_Motzoi_Analysis'],
+}
+
+_attribute_modules = {name: module
+                      for module, names in _lazy_attributes.items()
+                      for name in names}
+
+__all__ = (['a_tools', 'reload', 'reload_analysis_modules']
+           + list(_lazy_modules) + list(_attribute_modules))
+
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        value = import_module('{}.{}'.format(_package, _lazy_modules[name]))
+    elif name in _attribute_modules:
+        module = import_module(
+            '{}.{}'.format(_package, _attribute_modules[name]))
+        value = getattr(module, name)
+    else:
+        raise AttributeError(
+            "module '{}' has no attribute '{}'".format(__name__, name))
+    # bind the name, such that __getattr__ is only called once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+def _import_all():
+    for name in list(_lazy_modules) + list(_attribute_modules):
+        __getattr__(name)
+
+
+def reload_analysis_modules():
+    """
+    Reloads the analysis toolbox and all analysis modules that have been
+    imported, for use when modifying analyses in a running kernel.
+
+    Analysis objects created before the reload keep using the old classes.
+    """
+    reload(a_tools)
+    modules = ['base_analysis'] + sorted(
+        set(_lazy_modules.values()) | set(_lazy_attributes))
+    for module in modules:
+        name = '{}.{}'.format(_package, module)
+        if name in sys.modules:
+            reload(sys.modules[name])
+    # unbind the names, they are looked up again on the next access
+    for name in list(_lazy_modules) + list(_attribute_modules):
+        globals().pop(name, None)
+    if sys.version_info < (3, 7):
+        _import_all()
+
+
+if sys.version_info < (3, 7):
+    _import_all()
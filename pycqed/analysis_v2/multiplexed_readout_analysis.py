@@ -10,7 +10,6 @@ from pycqed.analysis_v2.tools import matplotlib_utils as mpl_utils
 from pycqed.analysis.analysis_toolbox import get_datafilepath_from_timestamp
 from pycqed.analysis.tools.plotting import set_xlabel, set_ylabel, \
     cmap_to_alpha, cmap_first_to_alpha
-import pycqed.analysis.tools.data_manipulation as dm_tools
 from pycqed.utilities.general import int2base
 import pycqed.measurement.hdf5_data as h5d
 import copy
@@ -107,12 +106,29 @@ class Multiplexed_Readout_Analysis(ba.BaseDataAnalysis):
         post_selection = self.post_selection
         self.proc_data_dict['combinations'] = combinations
         self.proc_data_dict['qubit_labels'] = qubit_labels
+        # prepared state of every qubit (combination, qubit)
+        prepared_bits = combinations_to_bits(len(combinations), nr_qubits)
 
         #############################################
         # Sort post-selection from measurement shots
         #############################################
-        self.proc_data_dict['Shots'] = {ch : {} for ch in Channels}
+        # Shots of all qubits as (qubit, combination, shot) arrays, valid
+        # marks the shots that were acquired (combination, shot). With post
+        # selection the last pre-measurement can lack its measurement, so
+        # both measurements have their own mask.
+        if post_selection == True:
+            (pre_meas_shots, shots), (pre_valid, valid) = reshape_mux_shots(
+                raw_shots, len(combinations), nr_measurements=2)
+            # A shot is discarded if a single qubit fails post selection
+            thresholds = np.asarray(self.post_selec_thresholds,
+                                    dtype=float)[:, None, None]
+            post_selected = valid & ~np.any(pre_meas_shots > thresholds,
+                                            axis=0)
+        else:
+            (shots, ), (valid, ) = reshape_mux_shots(
+                raw_shots, len(combinations), nr_measurements=1)
 
+        self.proc_data_dict['Shots'] = {ch : {} for ch in Channels}
         if post_selection == True:
             # Post-selected shots
             self.proc_data_dict['Post_selected_shots'] =\
@@ -121,49 +137,14 @@ class Multiplexed_Readout_Analysis(ba.BaseDataAnalysis):
             self.proc_data_dict['Pre_measurement_shots'] =\
                 {ch : {} for ch in Channels}
 
-        # Loop over all qubits
         for i, ch in enumerate(Channels):
-            ch_shots = raw_shots[:, i]
-
-            # Loop over prepared states
             for j, comb in enumerate(combinations):
-                if post_selection == False:
-                    shots = ch_shots[j::len(combinations)]
-                    self.proc_data_dict['Shots'][ch][comb] = shots.copy()
-                else:
-                    pre_meas_shots = ch_shots[2*j::len(combinations)*2]
-                    shots = ch_shots[2*j+1::len(combinations)*2]
-                    self.proc_data_dict['Shots'][ch][comb] = shots.copy()
+                self.proc_data_dict['Shots'][ch][comb] = shots[i, j][valid[j]]
+                if post_selection == True:
                     self.proc_data_dict['Post_selected_shots'][ch][comb] =\
-                        shots.copy()
+                        shots[i, j][post_selected[j]]
                     self.proc_data_dict['Pre_measurement_shots'][ch][comb] =\
-                        pre_meas_shots.copy()
-
-        #########################
-        # Execute post_selection
-        #########################
-        if post_selection == True:
-            for comb in combinations: # Loop over prepared states
-                Idxs = []
-                # For each prepared state one needs to eliminate every shot
-                # if a single qubit fails post selection.
-                for i, ch in enumerate(Channels): # Loop over qubits
-                    # First, find all idxs for all qubits. This has to loop
-                    # over alll qubits before in pre-measurement.
-                    pre_meas_shots =\
-                        self.proc_data_dict['Pre_measurement_shots'][ch][comb]
-                    post_select_indices = dm_tools.get_post_select_indices(
-                        thresholds=[self.post_selec_thresholds[i]],
-                        init_measurements=[pre_meas_shots])
-                    Idxs += list(post_select_indices)
-
-                for i, ch in enumerate(Channels): # Loop over qubits
-                    # Now that we have all idxs, we can discard the shots that
-                    # failed in every qubit.
-                    shots = self.proc_data_dict['Post_selected_shots'][ch][comb]
-                    shots[Idxs] = np.nan # signal post_selection with nan
-                    shots = shots[~np.isnan(shots)] # discard post failed shots
-                    self.proc_data_dict['Post_selected_shots'][ch][comb] = shots
+                        pre_meas_shots[i, j][pre_valid[j]]
 
         ############################################
         # Histograms, thresholds and digitized data
@@ -171,149 +152,70 @@ class Multiplexed_Readout_Analysis(ba.BaseDataAnalysis):
         self.proc_data_dict['Histogram_data'] = {ch : {} for ch in Channels}
         self.proc_data_dict['PDF_data'] = {ch : {} for ch in Channels}
         self.proc_data_dict['CDF_data'] = {ch : {} for ch in Channels}
-        Shots_digitized = {ch : {} for ch in Channels}
+        Shots_digitized = np.zeros(shots.shape, dtype=bool)
         if post_selection == True:
             self.proc_data_dict['Post_Histogram_data'] = \
                 {ch : {} for ch in Channels}
             self.proc_data_dict['Post_PDF_data'] = {ch : {} for ch in Channels}
             self.proc_data_dict['Post_CDF_data'] = {ch : {} for ch in Channels}
-            Post_Shots_digitized = {ch : {} for ch in Channels}
+            Post_Shots_digitized = np.zeros(shots.shape, dtype=bool)
 
         for i, ch in enumerate(Channels):
             hist_range = (np.amin(raw_shots[:, i]), np.amax(raw_shots[:, i]))
-            Shots_0 = [] # used to store overall shots of a qubit
-            Shots_1 = []
-            if post_selection == True:
-                Post_Shots_0 = [] # used to store overall shots of a qubit
-                Post_Shots_1 = []
-
-            # Histograms
-            for comb in combinations:
-                if post_selection == True:
-                    shots = self.proc_data_dict['Post_selected_shots'][ch][comb]
-                    # Hitogram data of each prepared_state
-                    counts, bin_edges = np.histogram(shots, bins=100,
-                                                     range=hist_range)
-                    bin_centers = (bin_edges[1:] + bin_edges[:-1])/2
-                    self.proc_data_dict['Post_Histogram_data'][ch][comb]=\
-                        (counts, bin_centers)
-                    if comb[i] == '0':
-                        Post_Shots_0 = np.concatenate((Post_Shots_0, shots))
-                    else:
-                        Post_Shots_1 = np.concatenate((Post_Shots_1, shots))
-
-                shots = self.proc_data_dict['Shots'][ch][comb]
-                # Hitogram data of each prepared_state
-                counts, bin_edges = np.histogram(shots, bins=100,
-                                                 range=hist_range)
-                bin_centers = (bin_edges[1:] + bin_edges[:-1])/2
-                self.proc_data_dict['Histogram_data'][ch][comb] = \
-                    (counts, bin_centers)
+            # combinations in which the qubit is prepared in |0>
+            prep_0 = prepared_bits[:, i] == 0
 
-                if comb[i] == '0':
-                    Shots_0 = np.concatenate((Shots_0, shots))
-                else:
-                    Shots_1 = np.concatenate((Shots_1, shots))
-
-            # Cumulative sums
             if post_selection == True:
-                # bin data according to unique bins
-                ubins_0, ucounts_0 = np.unique(Post_Shots_0, return_counts=True)
-                ubins_1, ucounts_1 = np.unique(Post_Shots_1, return_counts=True)
-                ucumsum_0 = np.cumsum(ucounts_0)
-                ucumsum_1 = np.cumsum(ucounts_1)
-                # merge |0> and |1> shot bins
-                all_bins = np.unique(np.sort(np.concatenate((ubins_0, ubins_1))))
-                # interpolate cumsum for all bins
-                int_cumsum_0=np.interp(x=all_bins,xp=ubins_0,fp=ucumsum_0,left=0)
-                int_cumsum_1=np.interp(x=all_bins,xp=ubins_1,fp=ucumsum_1,left=0)
-                norm_cumsum_0 = int_cumsum_0/np.max(int_cumsum_0)
-                norm_cumsum_1 = int_cumsum_1/np.max(int_cumsum_1)
-                self.proc_data_dict['Post_CDF_data'][ch]['cumsum_x_ds']=all_bins
-                self.proc_data_dict['Post_CDF_data'][ch]['cumsum_y_ds'] = \
-                    [int_cumsum_0, int_cumsum_1]
-                self.proc_data_dict['Post_CDF_data'][ch]['cumsum_y_ds_n'] = \
-                    [norm_cumsum_0, norm_cumsum_1]
-                # Calculating threshold
-                F_vs_th = (1-(1-abs(norm_cumsum_0-norm_cumsum_1))/2)
-                opt_idxs = np.argwhere(F_vs_th == np.amax(F_vs_th))
-                opt_idx = int(round(np.average(opt_idxs)))
-                #opt_idx = np.argmin(np.abs(all_bins-self.post_selec_thresholds[i])) 
-                self.proc_data_dict['Post_PDF_data'][ch]['F_assignment_raw'] = \
-                    F_vs_th[opt_idx]
-                self.proc_data_dict['Post_PDF_data'][ch]['threshold_raw'] = \
-                    all_bins[opt_idx]
-            # bin data according to unique bins
-            ubins_0, ucounts_0 = np.unique(Shots_0, return_counts=True)
-            ubins_1, ucounts_1 = np.unique(Shots_1, return_counts=True)
-            ucumsum_0 = np.cumsum(ucounts_0)
-            ucumsum_1 = np.cumsum(ucounts_1)
-            # merge |0> and |1> shot bins
-            all_bins = np.unique(np.sort(np.concatenate((ubins_0, ubins_1))))
-            # interpolate cumsum for all bins
-            int_cumsum_0 = np.interp(x=all_bins,xp=ubins_0,fp=ucumsum_0,left=0)
-            int_cumsum_1 = np.interp(x=all_bins,xp=ubins_1,fp=ucumsum_1,left=0)
-            norm_cumsum_0 = int_cumsum_0/np.max(int_cumsum_0)
-            norm_cumsum_1 = int_cumsum_1/np.max(int_cumsum_1)
-            self.proc_data_dict['CDF_data'][ch]['cumsum_x_ds'] = all_bins
-            self.proc_data_dict['CDF_data'][ch]['cumsum_y_ds'] = \
-                [int_cumsum_0, int_cumsum_1]
-            self.proc_data_dict['CDF_data'][ch]['cumsum_y_ds_n'] = \
-                [norm_cumsum_0, norm_cumsum_1]
-            # Calculating threshold
-            F_vs_th = (1-(1-abs(norm_cumsum_0-norm_cumsum_1))/2)
-            opt_idxs = np.argwhere(F_vs_th == np.amax(F_vs_th))
-            opt_idx = int(round(np.average(opt_idxs)))
-            self.proc_data_dict['PDF_data'][ch]['F_assignment_raw'] = \
-                F_vs_th[opt_idx]
-            self.proc_data_dict['PDF_data'][ch]['threshold_raw'] = \
-                all_bins[opt_idx]
-
-            # Histogram of overall shots
-            if post_selection == True:
-                counts_0, bin_edges = np.histogram(Post_Shots_0, bins=100,
-                                                   range=hist_range)
-                counts_1, bin_edges = np.histogram(Post_Shots_1, bins=100,
-                                                   range=hist_range)
-                bin_centers = (bin_edges[1:] + bin_edges[:-1])/2
+                counts, bin_centers = histogram_per_combination(
+                    shots[i], post_selected, bins=100, range=hist_range)
+                for j, comb in enumerate(combinations):
+                    self.proc_data_dict['Post_Histogram_data'][ch][comb] = \
+                        (counts[j], bin_centers)
+                # overall shots of the qubit
+                Post_Shots_0 = shots[i][post_selected & prep_0[:, None]]
+                Post_Shots_1 = shots[i][post_selected & ~prep_0[:, None]]
+                self.proc_data_dict['Post_CDF_data'][ch], F, th = \
+                    _cumulative_histogram_threshold(Post_Shots_0,
+                                                    Post_Shots_1)
+                self.proc_data_dict['Post_PDF_data'][ch]['F_assignment_raw'] = F
+                self.proc_data_dict['Post_PDF_data'][ch]['threshold_raw'] = th
+                # Histogram of overall shots
                 self.proc_data_dict['Post_PDF_data'][ch]['0'] = \
-                    (counts_0, bin_centers)
+                    (counts[prep_0].sum(axis=0), bin_centers)
                 self.proc_data_dict['Post_PDF_data'][ch]['1'] = \
-                    (counts_1, bin_centers)
-            counts_0, bin_edges = np.histogram(Shots_0, bins=100,
-                                               range=hist_range)
-            counts_1, bin_edges = np.histogram(Shots_1, bins=100,
-                                               range=hist_range)
-            bin_centers = (bin_edges[1:] + bin_edges[:-1])/2
+                    (counts[~prep_0].sum(axis=0), bin_centers)
+                # Digitized data
+                Post_Shots_digitized[i] = shots[i] > th
+
+            counts, bin_centers = histogram_per_combination(
+                shots[i], valid, bins=100, range=hist_range)
+            for j, comb in enumerate(combinations):
+                self.proc_data_dict['Histogram_data'][ch][comb] = \
+                    (counts[j], bin_centers)
+            Shots_0 = shots[i][valid & prep_0[:, None]]
+            Shots_1 = shots[i][valid & ~prep_0[:, None]]
+            self.proc_data_dict['CDF_data'][ch], F, th = \
+                _cumulative_histogram_threshold(Shots_0, Shots_1)
+            self.proc_data_dict['PDF_data'][ch]['F_assignment_raw'] = F
+            self.proc_data_dict['PDF_data'][ch]['threshold_raw'] = th
             self.proc_data_dict['PDF_data'][ch]['0'] = \
-                (counts_0, bin_centers)
+                (counts[prep_0].sum(axis=0), bin_centers)
             self.proc_data_dict['PDF_data'][ch]['1'] = \
-                (counts_1, bin_centers)
-
-            # Digitized data
-            for comb in combinations:
-                if post_selection == True:
-                    shots = self.proc_data_dict['Post_selected_shots'][ch][comb]
-                    th = self.proc_data_dict['Post_PDF_data'][ch]['threshold_raw']
-                    Post_Shots_digitized[ch][comb] = \
-                        np.array(shots > th, dtype=int)
-                shots = self.proc_data_dict['Shots'][ch][comb]
-                th = self.proc_data_dict['PDF_data'][ch]['threshold_raw']
-                Shots_digitized[ch][comb] = \
-                    np.array(shots > th, dtype=int)
+                (counts[~prep_0].sum(axis=0), bin_centers)
+            Shots_digitized[i] = shots[i] > th
 
         ##########################################
         # Calculate assignment probability matrix
         ##########################################
         if post_selection == True:
-            ass_prob_matrix = calc_assignment_prob_matrix(combinations,
-                Post_Shots_digitized)
+            ass_prob_matrix = calc_assignment_prob_matrix_from_shots(
+                Post_Shots_digitized, post_selected)
             cross_fid_matrix = calc_cross_fidelity_matrix(combinations,
                 ass_prob_matrix)
             self.proc_data_dict['Post_assignment_prob_matrix'] = ass_prob_matrix
             self.proc_data_dict['Post_cross_fidelity_matrix'] = cross_fid_matrix
-        assignment_prob_matrix = calc_assignment_prob_matrix(combinations,
-            Shots_digitized)
+        assignment_prob_matrix = calc_assignment_prob_matrix_from_shots(
+            Shots_digitized, valid)
         cross_fidelity_matrix = calc_cross_fidelity_matrix(combinations,
             assignment_prob_matrix)
         self.proc_data_dict['assignment_prob_matrix'] = assignment_prob_matrix
@@ -1733,55 +1635,198 @@ class RTE_analysis(ba.BaseDataAnalysis):
 
 
 ######################################
-# Plotting functions
+# Shot classification
 ######################################
-def calc_assignment_prob_matrix(combinations, digitized_data):
+def combinations_to_bits(nr_combinations, nr_qubits):
+    """
+    Returns the prepared state of every qubit (combination, qubit) for the
+    combinations '{:0{nr_qubits}b}'.format(i), i.e., the first qubit
+    corresponds to the most significant bit.
+    """
+    return (np.arange(nr_combinations)[:, None]
+            >> np.arange(nr_qubits - 1, -1, -1)) & 1
 
-    assignment_prob_matrix = np.zeros((len(combinations), len(combinations)))
 
-    for i, input_state in enumerate(combinations):
-        for j, outcome in enumerate(combinations):
-            first_key = next(iter(digitized_data))
-            Check = np.ones(len(digitized_data[first_key][input_state]))
-            for k, ch in enumerate(digitized_data.keys()):
-                check = digitized_data[ch][input_state] == int(outcome[k])
-                Check *= check
+def reshape_mux_shots(raw_shots, nr_combinations, nr_measurements=1):
+    """
+    Sorts multiplexed single shots by prepared combination.
+
+    Args:
+        raw_shots (array): shots of all qubits (shot, qubit), acquired
+            cycling through the prepared combinations, with
+            nr_measurements consecutive measurements per combination
+            (e.g. 2 for a pre-measurement used for post selection).
+        nr_combinations (int): number of prepared combinations.
+        nr_measurements (int): number of measurements per combination.
+
+    Returns:
+        shots (list of arrays): for every measurement an array
+            (qubit, combination, shot), padded with nan if the last round
+            of combinations is incomplete.
+        valid (list of arrays): for every measurement a boolean array
+            (combination, shot) marking the shots that were acquired.
+    """
+    nr_shots, nr_qubits = np.shape(raw_shots)
+    period = nr_combinations * nr_measurements
+    nr_rounds = -(-nr_shots // period)
+    padded = np.full((nr_rounds * period, nr_qubits), np.nan)
+    padded[:nr_shots] = raw_shots
+    # (measurement, qubit, combination, shot)
+    shots = np.ascontiguousarray(padded.reshape(
+        nr_rounds, nr_combinations, nr_measurements, nr_qubits).transpose(
+        2, 3, 1, 0))
+    index = np.arange(nr_rounds * period).reshape(
+        nr_rounds, nr_combinations, nr_measurements).transpose(2, 1, 0)
+    valid = index < nr_shots
+    return list(shots), list(valid)
+
+
+def histogram_per_combination(shots, mask, bins=100, range=None):
+    """
+    Histograms of the shots of a qubit for every prepared combination.
+
+    Args:
+        shots (array): shots of a qubit (combination, shot).
+        mask (array): boolean array (combination, shot) of the shots to
+            include.
+        bins, range: as for np.histogram, the same bins are used for all
+            combinations.
+
+    Returns:
+        counts (array): (combination, bin), equal to
+            np.histogram(shots[j][mask[j]], bins, range) for every j.
+        bin_centers (array)
+    """
+    bin_edges = np.histogram_bin_edges(shots[mask], bins=bins, range=range)
+    nr_combinations = np.shape(shots)[0]
+    combination_idx = np.broadcast_to(
+        np.arange(nr_combinations)[:, None], np.shape(shots))[mask]
+    values = shots[mask]
+    # as np.histogram, the last bin includes the right edge
+    bin_idx = np.searchsorted(bin_edges, values, side='right') - 1
+    bin_idx[values == bin_edges[-1]] = bins - 1
+    inside = (bin_idx >= 0) & (bin_idx < bins)
+    counts = np.bincount(
+        combination_idx[inside] * bins + bin_idx[inside],
+        minlength=nr_combinations * bins).reshape(nr_combinations, bins)
+    bin_centers = (bin_edges[1:] + bin_edges[:-1])/2
+    return counts, bin_centers
+
+
+def _cumulative_histogram_threshold(shots_0, shots_1):
+    """
+    Cumulative histograms of the shots of a qubit prepared in |0> and in
+    |1> and the threshold maximizing the assignment fidelity.
+
+    Returns:
+        cdf_data (dict): cumulative histograms.
+        F_assignment_raw (float): assignment fidelity at the threshold.
+        threshold_raw (float)
+    """
+    # bin data according to unique bins
+    ubins_0, ucounts_0 = np.unique(shots_0, return_counts=True)
+    ubins_1, ucounts_1 = np.unique(shots_1, return_counts=True)
+    ucumsum_0 = np.cumsum(ucounts_0)
+    ucumsum_1 = np.cumsum(ucounts_1)
+    # merge |0> and |1> shot bins
+    all_bins = np.unique(np.sort(np.concatenate((ubins_0, ubins_1))))
+    # interpolate cumsum for all bins
+    int_cumsum_0 = np.interp(x=all_bins, xp=ubins_0, fp=ucumsum_0, left=0)
+    int_cumsum_1 = np.interp(x=all_bins, xp=ubins_1, fp=ucumsum_1, left=0)
+    norm_cumsum_0 = int_cumsum_0/np.max(int_cumsum_0)
+    norm_cumsum_1 = int_cumsum_1/np.max(int_cumsum_1)
+    cdf_data = {'cumsum_x_ds': all_bins,
+                'cumsum_y_ds': [int_cumsum_0, int_cumsum_1],
+                'cumsum_y_ds_n': [norm_cumsum_0, norm_cumsum_1]}
+    # Calculating threshold
+    F_vs_th = (1-(1-abs(norm_cumsum_0-norm_cumsum_1))/2)
+    opt_idxs = np.argwhere(F_vs_th == np.amax(F_vs_th))
+    opt_idx = int(round(np.average(opt_idxs)))
+    return cdf_data, F_vs_th[opt_idx], all_bins[opt_idx]
+
+
+def calc_assignment_prob_matrix_from_shots(digitized_shots, mask):
+    """
+    Assignment probability matrix from digitized multiplexed shots.
+
+    Args:
+        digitized_shots (array): boolean array (qubit, combination, shot),
+            True if the qubit is declared in |1>.
+        mask (array): boolean array (combination, shot) of the shots to
+            include.
+
+    Returns:
+        assignment_prob_matrix (array): (prepared, declared) combination,
+            the first qubit corresponds to the most significant bit.
+    """
+    nr_qubits, nr_combinations = np.shape(digitized_shots)[:2]
+    # declared combination of every shot as a packed bit-string
+    declared = np.zeros(np.shape(digitized_shots)[1:], dtype=np.int64)
+    for k in range(nr_qubits):
+        declared |= digitized_shots[k].astype(np.int64) << (nr_qubits-1-k)
+    prepared = np.broadcast_to(np.arange(nr_combinations)[:, None],
+                               np.shape(declared))
+    counts = np.bincount(
+        (prepared * nr_combinations + declared)[mask],
+        minlength=nr_combinations**2).reshape(nr_combinations,
+                                              nr_combinations)
+    return counts / counts.sum(axis=1, keepdims=True)
 
-            assignment_prob_matrix[i][j] = sum(Check)/len(Check)
 
+def calc_assignment_prob_matrix(combinations, digitized_data):
+    """
+    Assignment probability matrix from digitized shots
+    digitized_data[ch][combination].
+
+    Rows and columns follow the order of `combinations`, digit k of a
+    combination is the state of the k-th channel. Shots that match none of
+    the combinations are not counted in any column.
+    """
+    channels = list(digitized_data.keys())
+    nr_channels = len(channels)
+    outcomes = np.array([[int(comb[k]) for k in range(nr_channels)]
+                         for comb in combinations])
+    # declared combinations are looked up by their digits in base `base`
+    base = int(np.max(outcomes)) + 1
+    weights = base ** np.arange(nr_channels - 1, -1, -1)
+    lookup = np.full(base**nr_channels, -1)
+    lookup[outcomes @ weights] = np.arange(len(combinations))
+
+    assignment_prob_matrix = np.zeros((len(combinations), len(combinations)))
+    for i, input_state in enumerate(combinations):
+        shots = np.array([digitized_data[ch][input_state] for ch in channels])
+        valid = np.all((shots >= 0) & (shots < base) & (shots % 1 == 0),
+                       axis=0)
+        declared = lookup[weights @ shots[:, valid].astype(int)]
+        counts = np.bincount(declared[declared >= 0],
+                             minlength=len(combinations))
+        assignment_prob_matrix[i] = counts / np.shape(shots)[1]
     return assignment_prob_matrix
 
+
 def calc_cross_fidelity_matrix(combinations, assignment_prob_matrix):
 
     n = int(np.log2(len(combinations)))
-    crossFidMat = np.zeros((n, n))
-    for i in range(n):
-        for j in range(n):
-            P_eiIj = 0  # P(e_i|0_j)
-            P_giPj = 0  # P(g_i|pi_j)
-
-            # Loop over all entries in the Assignment probability matrix
-            for prep_idx, c_prep in enumerate(combinations):
-                for decl_idx, c_decl in enumerate(combinations):
-                    # Select all entries in the assignment matrix for ei|Ij
-                    if (c_decl[i]=='1') and (c_prep[j] == '0'):
-                        P_eiIj += assignment_prob_matrix[prep_idx, decl_idx]
-                    # Select all entries in the assignment matrix for ei|Ij
-                    elif (c_decl[i]=='0') and (c_prep[j] == '1'): # gi|Pj
-                        P_giPj += assignment_prob_matrix[prep_idx, decl_idx]
-
-            # Normalize probabilities
-            normalization_factor = (len(combinations)/2)
-
-            P_eiIj = P_eiIj/normalization_factor
-            P_giPj = P_giPj/normalization_factor
-
-            # Add entry to cross fidelity matrix
-            Fc = 1 - P_eiIj - P_giPj
-            crossFidMat[i,j] = Fc
-
+    # state of every qubit in the combinations (combination, qubit), in the
+    # order of the rows and columns of the assignment probability matrix
+    digits = np.array([[c[k] for k in range(n)] for c in combinations])
+    ones = (digits == '1').astype(float)
+    zeros = (digits == '0').astype(float)
+    # P(e_i|0_j) and P(g_i|pi_j) summed over all entries in the assignment
+    # probability matrix, indexed [j, i]
+    P_eIj = zeros.T @ assignment_prob_matrix @ ones
+    P_gPj = ones.T @ assignment_prob_matrix @ zeros
+
+    # Normalize probabilities
+    normalization_factor = (len(combinations)/2)
+
+    crossFidMat = 1 - (P_eIj + P_gPj).T / normalization_factor
     return crossFidMat
 
+
+######################################
+# Plotting functions
+######################################
 def plot_assignment_prob_matrix(assignment_prob_matrix,
                                 combinations, qubit_labels, ax=None,
                                 valid_combinations=None,
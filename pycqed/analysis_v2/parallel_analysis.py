@@ -0,0 +1,196 @@
+"""
+Runs analyses in parallel in a pool of processes, e.g. the analyses of all
+qubits of a device after a round of calibration measurements.
+
+    from pycqed.analysis_v2 import parallel_analysis as pa
+    from pycqed.analysis_v2 import measurement_analysis as ma2
+
+    results = pa.run_analyses([
+        (ma2.FlippingAnalysis, {'label': 'flipping_' + q})
+        for q in ['QL', 'QR']])
+    print(pa.timing_report(results))
+
+The figures are rendered with the non-interactive Agg backend and saved by
+the workers. Only results that can be pickled are returned: the quantities
+of interest, the fit results as they are saved in the data file and
+optionally entries of the proc_data_dict.
+
+N.B. the analyses save their fit results and quantities of interest in the
+data files, jobs that analyze the same data file can therefore not run at
+the same time and should be run in separate calls.
+"""
+import os
+import copy
+import time
+import pickle
+import logging
+import traceback
+import multiprocessing
+from collections import OrderedDict
+
+from pycqed.analysis import analysis_toolbox as a_tools
+
+log = logging.getLogger(__name__)
+
+# Steps of `BaseDataAnalysis.run_analysis` that are timed
+timed_steps = [
+    'extract_data', 'process_data', 'run_fitting', 'save_fit_results',
+    'save_quantities_of_interest', 'prepare_plots', 'plot', 'save_figures']
+
+
+def run_analyses(jobs: list, processes: int = None, proc_data_keys=(),
+                 start_method: str = None, maxtasksperchild: int = None):
+    """
+    Runs analyses in a pool of processes.
+
+    Args:
+        jobs (list): the analyses, tuples of (analysis, kwargs) or
+            (analysis, kwargs, name), where analysis is a class derived from
+            BaseDataAnalysis or the name of a class in
+            `analysis_v2.measurement_analysis`. The class has to accept the
+            `auto` keyword argument.
+        processes (int): number of processes, by default the number of
+            CPUs. If 0 the analyses are run sequentially in this process.
+        proc_data_keys (list): entries of the proc_data_dict that are
+            returned.
+        start_method (str): start method of the processes, see
+            `multiprocessing.get_context`, by default the default of the
+            platform.
+        maxtasksperchild (int): number of jobs after which a worker process
+            is replaced, see `multiprocessing.Pool`.
+
+    Returns:
+        list of dicts, one per job in the order of the jobs, with the keys
+            name, analysis, success, exception (the traceback if the
+            analysis failed), quantities_of_interest, fit_res, proc_data,
+            timestamps, folder, figures (the keys of the saved figures),
+            timing (OrderedDict of the time in seconds per step and in
+            total) and pid (of the worker process).
+    """
+    jobs = [_job_dict(i, job, proc_data_keys) for i, job in enumerate(jobs)]
+    if processes is None:
+        processes = min(len(jobs), os.cpu_count() or 1)
+
+    t0 = time.perf_counter()
+    if processes == 0:
+        results = [_run_job(job) for job in jobs]
+    else:
+        ctx = multiprocessing.get_context(start_method)
+        with ctx.Pool(processes, initializer=_init_worker,
+                      initargs=(a_tools.datadir,),
+                      maxtasksperchild=maxtasksperchild) as pool:
+            results = []
+            for res in pool.imap_unordered(_run_job, jobs):
+                log.info('Finished {} in {:.2f} s'.format(
+                    res['name'], res['timing']['total']))
+                results.append(res)
+        results.sort(key=lambda res: res['index'])
+
+    for res in results:
+        if not res['success']:
+            log.warning('Analysis {} failed:\n{}'.format(
+                res['name'], res['exception']))
+    log.info('Ran {} analyses in {:.2f} s'.format(
+        len(results), time.perf_counter() - t0))
+    return results
+
+
+def timing_report(results: list):
+    """
+    Formats the timing of the results of `run_analyses` as a table with a
+    row per job and a column per step.
+    """
+    steps = [step for step in timed_steps
+             if any(step in res['timing'] for res in results)]
+    width = max([len(res['name']) for res in results] + [4])
+    header = '{:<{w}} {:>8} {:>8}'.format('name', 'pid', 'total', w=width)
+    header += ''.join(' {:>10.10}'.format(step) for step in steps)
+    lines = [header]
+    for res in results:
+        line = '{:<{w}} {:>8} {:>8.2f}'.format(
+            res['name'], res['pid'], res['timing']['total'], w=width)
+        line += ''.join(' {:>10.2f}'.format(res['timing'].get(step, 0))
+                        for step in steps)
+        if not res['success']:
+            line += ' failed'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def _job_dict(index, job, proc_data_keys):
+    analysis, kwargs = job[:2]
+    if isinstance(analysis, str):
+        analysis_name = analysis
+    else:
+        analysis_name = analysis.__name__
+    if len(job) > 2:
+        name = job[2]
+    else:
+        name = '{}_{}'.format(index, analysis_name)
+    return {'index': index, 'name': name, 'analysis': analysis,
+            'analysis_name': analysis_name, 'kwargs': dict(kwargs),
+            'proc_data_keys': list(proc_data_keys)}
+
+
+def _init_worker(datadir):
+    # N.B. the datadir is not inherited by spawned processes
+    a_tools.datadir = datadir
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+
+
+def _timed(method, timing, step):
+    def timed_method(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timing[step] = timing.get(step, 0) + time.perf_counter() - t0
+    return timed_method
+
+
+def _run_job(job):
+    from pycqed.analysis_v2 import base_analysis as ba
+
+    timing = OrderedDict()
+    res = {'index': job['index'], 'name': job['name'],
+           'analysis': job['analysis_name'], 'success': False,
+           'exception': None, 'quantities_of_interest': {}, 'fit_res': {},
+           'proc_data': {}, 'timestamps': None, 'folder': None,
+           'figures': [], 'timing': timing, 'pid': os.getpid()}
+    t0 = time.perf_counter()
+    try:
+        analysis = job['analysis']
+        if isinstance(analysis, str):
+            from pycqed.analysis_v2 import measurement_analysis as ma2
+            analysis = getattr(ma2, analysis)
+        a = analysis(auto=False, **job['kwargs'])
+        for step in timed_steps:
+            setattr(a, step, _timed(getattr(a, step), timing, step))
+        a.run_analysis()
+
+        pdd = getattr(a, 'proc_data_dict', {})
+        res['quantities_of_interest'] = pdd.get('quantities_of_interest', {})
+        res['proc_data'] = {key: pdd[key] for key in job['proc_data_keys']
+                            if key in pdd}
+        res['fit_res'] = ba.BaseDataAnalysis._convert_dict_rec(
+            copy.deepcopy(getattr(a, 'fit_res', {})))
+        res['timestamps'] = getattr(a, 'timestamps', None)
+        rdd = getattr(a, 'raw_data_dict', None)
+        if isinstance(rdd, dict):
+            res['folder'] = rdd.get('folder')
+        if a.options_dict.get('save_figs', False):
+            res['figures'] = list(getattr(a, 'figs', {}))
+        if a.options_dict.get('close_figs', True):
+            import matplotlib.pyplot as plt
+            for fig in getattr(a, 'figs', {}).values():
+                plt.close(fig)
+        # the results are sent to the main process
+        pickle.dumps(res)
+        res['success'] = True
+    except Exception:
+        res['exception'] = traceback.format_exc()
+        for key in ['quantities_of_interest', 'fit_res', 'proc_data']:
+            res[key] = {}
+    timing['total'] = time.perf_counter() - t0
+    return res
@@ -8,6 +8,7 @@ import subprocess
 import string
 import getopt
 from numpy import zeros, eye
+import numpy as np
 import uuid
 
 i = j = 1j
@@ -16,6 +17,9 @@ File that prepares the input and reads the output from the .exe executable file.
 The executable contains a Convex semidefinite programming code, that is a faster version of MLE.
 This code was originally developed by NATHAN LANGFORD.
 
+The same problems can be solved in-process, without the executable, by
+passing tomo_options={'solver': 'numpy'} or using mle_state/mle_process,
+which also reconstruct batches of datasets at once.
 """
 
 #-------------------------------------------------------------------------
@@ -825,6 +829,9 @@ def tomo_state(data, observables, weights, filebase=None, fixedweight=True, tomo
         OPT[o] = a
     # default option defaults
 
+    if OPT['solver'] == 'numpy':
+        return mle_state(data, observables, weights, fixedweight, OPT)
+
     if filebase is None:
         filebase = 'temp' + str(uuid.uuid4())
 
@@ -898,6 +905,10 @@ def tomo_process(data, inputs, observables, weights, filebase=None, fixedweight=
         OPT[o] = a
     # default option defaults
 
+    if OPT['solver'] == 'numpy':
+        return mle_process(data, inputs, observables, weights,
+                           fixedweight, OPT)
+
     if filebase is None:
         filebase = 'temp' + str(uuid.uuid4())
 
@@ -962,3 +973,246 @@ def tomo_process(data, inputs, observables, weights, filebase=None, fixedweight=
     return rho
 
 #-------------------------------------------------------------------------
+
+
+MLE_OPTIONS = {'verbose': False, 'normalised': False, 'max_iter': 10000,
+               'max_newton_iter': 50, 'tol': 1e-9, 'min_variance': 1.0}
+
+
+def mle_state(data, observables, weights, fixedweight=True, tomo_options={}):
+    '''
+    Solves the state tomography problem of tomo_state in-process, using the
+    alternating direction method of multipliers instead of an SDPA solver.
+
+    The predicted data are weights[k]*trace(observables[k] rho) and rho is
+    positive semidefinite with a free normalisation. The least squares
+    objective is weighted by the data (fixedweight) or by the predictions.
+
+    data (and weights) can be 2D to reconstruct a batch of datasets, in
+    which case an array of density matrices is returned.
+    '''
+    OPT = dict(MLE_OPTIONS)
+    OPT.update(tomo_options)
+
+    E = np.asarray(observables, dtype=complex)
+    dim = E.shape[-1]
+    # rows such that trace(E rho) = row . vec(rho)
+    rows = np.swapaxes(E, -1, -2).reshape(len(E), -1)
+    return _mle_solve(rows, data, weights, fixedweight, dim, None, OPT)
+
+
+def mle_process(data, inputs, observables, weights, fixedweight=True,
+                tomo_options={}):
+    '''
+    Solves the process tomography problem of tomo_process in-process, using
+    the alternating direction method of multipliers instead of an SDPA
+    solver.
+
+    The predicted data are d*weights[mn]*trace((inputs[mn]^T x
+    observables[mn]) chi) and chi is positive semidefinite and trace
+    preserving (the partial trace over the output is proportional to the
+    identity) with a free normalisation.
+
+    data (and weights) can be 2D to reconstruct a batch of datasets, in
+    which case an array of process matrices is returned.
+    '''
+    OPT = dict(MLE_OPTIONS)
+    OPT.update(tomo_options)
+
+    E = np.asarray(observables, dtype=complex)
+    R = np.asarray(inputs, dtype=complex)
+    d = E.shape[-1]
+    # rows such that d*trace((R^T x E) chi) = row . vec(chi), using
+    # (R^T x E)^T = R x E^T
+    rows = d*np.einsum('kab,kij->kajbi', R, E).reshape(len(E), -1)
+
+    def project_tp(chi):
+        return _project_tp(chi, d)
+
+    return _mle_solve(rows, data, weights, fixedweight, d**2, project_tp,
+                      OPT)
+
+
+def _project_psd(rho):
+    '''
+    Closest positive semidefinite matrices to a stack of hermitian matrices
+    '''
+    vals, vecs = np.linalg.eigh(rho)
+    vals = np.clip(vals, 0, None)
+    return (vecs*vals[..., None, :]) @ np.swapaxes(vecs, -1, -2).conj()
+
+
+def _project_tp(chi, d):
+    '''
+    Closest matrices to a stack of process matrices whose partial trace over
+    the output is proportional to the identity, keeping the trace
+    '''
+    shape = chi.shape
+    T = np.einsum('...aibi->...ab', chi.reshape(shape[:-2]+(d, d, d, d)))
+    tr = np.trace(T, axis1=-2, axis2=-1)
+    A = (T - tr[..., None, None]*np.eye(d)/d)/d
+    # subtract A x identity
+    AI = A[..., :, None, :, None]*np.eye(d)[:, None, :]
+    return chi - AI.reshape(shape)
+
+
+def _mle_solve(rows, data, weights, fixedweight, dim, project_subspace,
+               OPT):
+    '''
+    Minimises the weighted least squares objective over the positive
+    semidefinite matrices (in a linear subspace) for a batch of datasets,
+    in the coefficients theta of an orthonormal basis of the hermitian
+    matrices.
+
+    The objective is quadratic for fixed weights and is minimised by ADMM.
+    Otherwise, ADMM minimises its second order expansion in the predicted
+    data, in damped Newton iterations.
+
+    rows: vec(E^T) of the observables, such that the predicted data are
+        weights*re(rows . vec(rho))
+    project_subspace: orthogonal projection of a stack of hermitian
+        matrices onto the linear subspace, None for all matrices
+    '''
+    data = np.asarray(data, dtype=float)
+    batch = data.ndim == 2
+    data = np.atleast_2d(data)
+    weights = np.broadcast_to(np.asarray(weights, dtype=float), data.shape)
+    n_sets = len(data)
+    n = dim**2
+
+    # orthonormal basis of the hermitian matrices: the diagonal, and the
+    # real and imaginary parts of the upper triangle times sqrt(2)
+    iu = np.triu_indices(dim, 1)
+    n_off = len(iu[0])
+    X = rows.reshape(-1, dim, dim)
+    # real coefficient matrix, M[k, mu] = trace(E_k B_mu)
+    M = np.ascontiguousarray(np.hstack([
+        np.real(np.diagonal(X, axis1=-2, axis2=-1)),
+        (X[:, iu[0], iu[1]].real + X[:, iu[1], iu[0]].real)/np.sqrt(2),
+        (X[:, iu[0], iu[1]].imag - X[:, iu[1], iu[0]].imag)/np.sqrt(2)]))
+
+    def to_matrix(theta):
+        rho = zeros(theta.shape[:-1]+(dim, dim), dtype=complex)
+        upper = (theta[..., dim:dim+n_off] - 1j*theta[..., dim+n_off:])
+        rho[..., iu[0], iu[1]] = upper/np.sqrt(2)
+        rho[..., iu[1], iu[0]] = upper.conj()/np.sqrt(2)
+        rho[..., range(dim), range(dim)] = theta[..., :dim]
+        return rho
+
+    def to_coefficients(rho):
+        upper = rho[..., iu[0], iu[1]]*np.sqrt(2)
+        return np.concatenate([
+            np.real(np.diagonal(rho, axis1=-2, axis2=-1)),
+            upper.real, -upper.imag], axis=-1)
+
+    def project_psd(theta):
+        return to_coefficients(_project_psd(to_matrix(theta)))
+
+    # orthonormal basis Q of the subspace
+    if project_subspace is None:
+        Q = np.eye(n)
+    else:
+        P = to_coefficients(project_subspace(to_matrix(np.eye(n))))
+        vals, vecs = np.linalg.eigh(P)
+        Q = vecs[:, vals > 0.5]
+
+    # zero counts are given a variance of one count (cf.
+    # correct_zero_count_bins of the TomoAnalysis)
+    floor = OPT['min_variance']
+    var_data = np.maximum(data, floor)
+
+    def objective(theta):
+        m = weights*(theta @ M.T)
+        var = var_data if fixedweight else np.maximum(m, floor)
+        return np.sum((m - data)**2/var, axis=-1), m
+
+    def quadratic_model(m):
+        '''
+        H and b of the quadratic theta.H.theta - 2 b.theta, equal to the
+        objective (up to a constant) for fixed weights or to its expansion
+        around the predictions m, sum_k h_k (m_k - target_k)^2
+        '''
+        if fixedweight:
+            h = 1/var_data
+            target = data
+        else:
+            var = np.maximum(m, floor)
+            # derivatives of (m - data)^2/m, where zero counts are taken to
+            # be one count for the curvature
+            dfdm = np.where(m > floor, 1 - data**2/var**2,
+                            2*(m - data)/floor)
+            h = np.where(m > floor, var_data**2/var**3, 1/floor)
+            target = m - dfdm/(2*h)
+        H = np.array([(M.T*(h_i*w_i**2)) @ M
+                      for h_i, w_i in zip(h, weights)])
+        return H, (h*weights*target) @ M
+
+    def admm(H, b, theta):
+        '''
+        Minimises theta.H.theta - 2 b.theta over the positive semidefinite
+        matrices in the subspace, starting from theta
+        '''
+        # the penalty parameter is the mean eigenvalue of 2 H
+        rho = np.trace(H, axis1=-2, axis2=-1)*2/n
+        # x = K (2 b + rho v) minimises the quadratic plus rho/2 |x - v|^2
+        # in the subspace
+        A = Q.T @ (2*H + rho[:, None, None]*np.eye(n)) @ Q
+        K = Q @ np.linalg.inv(A) @ Q.T
+        Kb = (K @ (2*b[:, :, None]))[:, :, 0]
+        z = theta.copy()
+        u = np.zeros_like(theta)
+        active = np.ones(len(theta), dtype=bool)
+        for it in range(OPT['max_iter']):
+            idx = np.flatnonzero(active)
+            if len(idx) == 0:
+                break
+            v = z[idx] - u[idx]
+            x = Kb[idx] + rho[idx, None]*(K[idx] @ v[:, :, None])[:, :, 0]
+            z_new = project_psd(x + u[idx])
+            u[idx] += x - z_new
+            # relative primal residual and relative change of z (the dual
+            # residual over rho)
+            tol = OPT['tol']*np.linalg.norm(z_new, axis=-1)
+            converged = ((np.linalg.norm(x - z_new, axis=-1) <= tol) &
+                         (np.linalg.norm(z_new - z[idx], axis=-1) <= tol))
+            z[idx] = z_new
+            active[idx[converged]] = False
+
+        if OPT['verbose']:
+            print("ADMM: %d iterations, %d of %d datasets not converged" % (
+                it, np.sum(active), len(theta)))
+        return z
+
+    # start from the pseudo-inverse
+    theta = ((data/np.where(weights == 0, 1, weights)) @ M) @ \
+        np.linalg.pinv(M.T @ M, hermitian=True)
+    theta = project_psd(theta @ Q @ Q.T)
+    f, m = objective(theta)
+    for ii in range(1 if fixedweight else OPT['max_newton_iter']):
+        H, b = quadratic_model(m)
+        theta_new = admm(H, b, theta)
+        if fixedweight:
+            theta = theta_new
+            break
+        # damped Newton step, both end points are physical
+        step = theta_new - theta
+        s = np.ones(n_sets)
+        for jj in range(30):
+            f_new, m_new = objective(theta + s[:, None]*step)
+            larger = f_new > f
+            if not np.any(larger):
+                break
+            s[larger] /= 2
+        s[larger] = 0
+        theta = theta + s[:, None]*step
+        f, m = objective(theta)
+        if np.all(s*np.linalg.norm(step, axis=-1) <=
+                  OPT['tol']*np.linalg.norm(theta, axis=-1)):
+            break
+
+    rho = to_matrix(theta)
+    if OPT['normalised']:
+        rho = rho/np.trace(rho, axis1=-2, axis2=-1)[:, None, None]
+    return rho if batch else rho[0]
+
+#-------------------------------------------------------------------------
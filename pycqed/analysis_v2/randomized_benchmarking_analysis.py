@@ -1,3 +1,4 @@
+import itertools
 import lmfit
 from uncertainties import ufloat
 import pandas as pd
@@ -58,6 +59,18 @@ class RandomizedBenchmarking_SingleQubit_Analysis(ba.BaseDataAnalysis):
                 points and instead makes the approximation that the f-state
                 looks the same as the e-state in readout. This is useful when
                 the ef-pulse is not calibrated.
+
+        Options (in options_dict):
+            weighted_fit (bool) : if True, the data points are weighted by
+                the inverse of their standard error over the seeds
+            n_bootstrap (int) : if > 0, confidence intervals of the
+                quantities of interest are determined from this number of
+                nonparametric bootstrap samples over the seeds, using the
+                batched fits `fit_leak_decays` and `fit_rb_decays`. They are
+                stored in the quantities of interest with the suffix "_ci"
+            bootstrap_confidence (float) : confidence level of the
+                intervals, 0.95 by default
+            bootstrap_seed (int) : seed of the bootstrap resampling
         """
         if options_dict is None:
             options_dict = dict()
@@ -306,6 +319,16 @@ class RandomizedBenchmarking_SingleQubit_Analysis(ba.BaseDataAnalysis):
             # Default value for single qubit RB analysis
             fit_input_tag = rdd["value_names"][self.rates_I_quad_ch_idx]
 
+        sigma = {"M0": None, "X1": None}
+        if self.options_dict.get("weighted_fit", False):
+            # Standard error of the mean over the seeds
+            n_seeds = self._n_seeds()
+            for key, vals in zip(
+                sigma, self._resampled_M0_X1(n_seeds * np.eye(n_seeds))
+            ):
+                sem_vals = np.ma.filled(sem(vals, axis=0, nan_policy="omit"), np.nan)
+                sigma[key] = np.maximum(sem_vals, 1e-3 * np.nanmax(sem_vals))
+
         leak_mod = lmfit.Model(leak_decay, independent_vars="m")
         leak_mod.set_param_hint("A", value=0.95, min=0, vary=True)
         leak_mod.set_param_hint("B", value=0.1, min=0, vary=True)
@@ -320,7 +343,10 @@ class RandomizedBenchmarking_SingleQubit_Analysis(ba.BaseDataAnalysis):
         params = leak_mod.make_params()
         try:
             fit_res_leak = leak_mod.fit(
-                data=pdd["X1"][fit_input_tag], m=pdd["ncl"], params=params,
+                data=pdd["X1"][fit_input_tag],
+                m=pdd["ncl"],
+                params=params,
+                weights=None if sigma["X1"] is None else 1 / sigma["X1"],
             )
             self.fit_res["leakage_decay_" + fit_input_tag] = fit_res_leak
             lambda_1 = fit_res_leak.best_values["lambda_1"]
@@ -333,11 +359,12 @@ class RandomizedBenchmarking_SingleQubit_Analysis(ba.BaseDataAnalysis):
             self.fit_res["leakage_decay_" + fit_input_tag] = {}
 
         fit_res_rb = self.fit_rb_decay(
-            fit_input_tag, lambda_1=lambda_1, L1=L1, simple=False
+            fit_input_tag, lambda_1=lambda_1, L1=L1, simple=False,
+            sigma=sigma["M0"],
         )
         self.fit_res["rb_decay_" + fit_input_tag] = fit_res_rb
         fit_res_rb_simple = self.fit_rb_decay(
-            fit_input_tag, lambda_1=1, L1=0, simple=True
+            fit_input_tag, lambda_1=1, L1=0, simple=True, sigma=sigma["M0"]
         )
         self.fit_res["rb_decay_simple_" + fit_input_tag] = fit_res_rb_simple
 
@@ -384,11 +411,102 @@ class RandomizedBenchmarking_SingleQubit_Analysis(ba.BaseDataAnalysis):
         qoi["L1_" + fit_input_tag] = ufloat(L1.value, L1.stderr or np.NaN)
         qoi["L2_" + fit_input_tag] = ufloat(L2.value, L2.stderr or np.NaN)
 
+        if self.options_dict.get("n_bootstrap", 0):
+            self.run_bootstrap(
+                fit_input_tag, sigma_M0=sigma["M0"], sigma_X1=sigma["X1"]
+            )
+
+    def run_bootstrap(self, fit_input_tag: str, sigma_M0=None, sigma_X1=None):
+        """
+        Determines percentile confidence intervals of the quantities of
+        interest by refitting nonparametric bootstrap samples over the seeds.
+        All samples are fitted at once using `fit_leak_decays` and
+        `fit_rb_decays`.
+
+        Args:
+            fit_input_tag (str): see `run_fitting`
+            sigma_M0, sigma_X1 (array): uncertainty of the data points for
+                weighted fits
+        """
+        pdd = self.proc_data_dict
+        counts = bootstrap_seed_counts(
+            self._n_seeds(),
+            self.options_dict["n_bootstrap"],
+            self.options_dict.get("bootstrap_seed", None),
+        )
+        M0, X1 = self._resampled_M0_X1(counts)
+
+        leak = fit_leak_decays(pdd["ncl"], X1, sigma=sigma_X1)
+        rb = fit_rb_decays(
+            pdd["ncl"], M0, lambda_1=leak["lambda_1"], L1=leak["L1"],
+            d1=self.d1, sigma=sigma_M0,
+        )
+        rb_simple = fit_rb_decays(
+            pdd["ncl"], M0, d1=self.d1, simple=True, sigma=sigma_M0
+        )
+
+        samples = {
+            "eps_simple_" + fit_input_tag: rb_simple["eps"],
+            "eps_X1_" + fit_input_tag: rb["eps"],
+            "L1_" + fit_input_tag: leak["L1"],
+            "L2_" + fit_input_tag: leak["L2"],
+        }
+        pdd["bootstrap_" + fit_input_tag] = samples
+
+        confidence = self.options_dict.get("bootstrap_confidence", 0.95)
+        qoi = pdd["quantities_of_interest"]
+        for name, vals in samples.items():
+            qoi[name + "_ci"] = confidence_interval(vals, confidence)
+
+    def _n_seeds(self):
+        rdd = self.raw_data_dict
+        val_name_I = rdd["value_names"][self.rates_I_quad_ch_idx]
+        return rdd["measured_values_I"][val_name_I].shape[1]
+
+    def _resampled_populations(self, counts):
+        """
+        Populations (P0, P1, P2) of the data averaged over resampled seeds,
+        each of shape (len(counts), len(ncl)), see `resampled_seed_means`.
+        Vectorized equivalent of `process_data`.
+        """
+        rdd = self.raw_data_dict
+        pdd = self.proc_data_dict
+        val_name_I = rdd["value_names"][self.rates_I_quad_ch_idx]
+        val_name_Q = rdd["value_names"][self.rates_Q_quad_ch_idx]
+
+        S = []
+        for key in ["measured_values_I", "measured_values_X"]:
+            S_I = resampled_seed_means(rdd[key][val_name_I], counts)
+            S_Q = resampled_seed_means(rdd[key][val_name_Q], counts)
+            S_I_corr, S_Q_corr = geo.constrain_to_triangle(
+                pdd["cal_triangle"], S_I.ravel(), S_Q.ravel()
+            )
+            S.append((S_I_corr + 1j * S_Q_corr).reshape(S_I.shape))
+
+        V2 = pdd["V2"][val_name_I] + 1j * pdd["V2"][val_name_Q]
+        M_inv = pdd["M_inv"][val_name_I]
+        P0 = np.real((S[0] - V2) * M_inv[0, 0] + (S[1] - V2) * M_inv[1, 0])
+        P1 = np.real((S[0] - V2) * M_inv[0, 1] + (S[1] - V2) * M_inv[1, 1])
+
+        return P0, P1, 1 - P0 - P1
+
+    def _resampled_M0_X1(self, counts):
+        P0, P1, P2 = self._resampled_populations(counts)
+        if self.classification_method == "rates":
+            return P0, 1 - P2
+        else:
+            raise NotImplementedError()
+
     def fit_rb_decay(
-        self, val_name: str, lambda_1: float, L1: float, simple: bool = False
+        self,
+        val_name: str,
+        lambda_1: float,
+        L1: float,
+        simple: bool = False,
+        sigma: np.ndarray = None,
     ):
         """
-        Fits the data
+        Fits the data, weighted by 1/sigma if sigma is specified
         """
         pdd = self.proc_data_dict
 
@@ -427,7 +545,10 @@ class RandomizedBenchmarking_SingleQubit_Analysis(ba.BaseDataAnalysis):
 
         try:
             fit_res_rb = fit_mod_rb.fit(
-                data=pdd["M0"][val_name], m=pdd["ncl"], params=params
+                data=pdd["M0"][val_name],
+                m=pdd["ncl"],
+                params=params,
+                weights=None if sigma is None else 1 / sigma,
             )
         except Exception as e:
             log.warning("Fitting failed!")
@@ -823,6 +944,20 @@ class RandomizedBenchmarking_TwoQubit_Analysis(
         fit_input_tag = "2Q"
         super().run_fitting(fit_input_tag=fit_input_tag)
 
+    def _n_seeds(self):
+        return self.raw_data_dict["analyses"]["q0"]._n_seeds()
+
+    def _resampled_M0_X1(self, counts):
+        # The same seeds are drawn for both qubits
+        a_q0 = self.raw_data_dict["analyses"]["q0"]
+        a_q1 = self.raw_data_dict["analyses"]["q1"]
+        P0_q0, _, P2_q0 = a_q0._resampled_populations(counts)
+        P0_q1, _, P2_q1 = a_q1._resampled_populations(counts)
+        if self.classification_method == "rates":
+            return P0_q0 * P0_q1, 1 - P2_q0 - P2_q1
+        else:
+            raise NotImplementedError()
+
     def prepare_plots(self):
         # Call the prepare plots of the class above
         fit_input_tag = "2Q"
@@ -1581,6 +1716,34 @@ class InterleavedRandomizedBenchmarkingAnalysis(ba.BaseDataAnalysis):
                 eps_base=qoi_base["L1_%s" % fit_tag],
             )
 
+        # Confidence intervals from the bootstrap samples of the datasets,
+        # see `RandomizedBenchmarking_SingleQubit_Analysis.run_bootstrap`
+        boot_tag = "bootstrap_%s" % fit_tag
+        boot_base = self.raw_data_dict["analyses"]["base"].proc_data_dict.get(
+            boot_tag
+        )
+        if boot_base is not None:
+            confidence = self.options_dict.get("bootstrap_confidence", 0.95)
+            int_keys = [("int", int_name)]
+            if self.include_idle:
+                int_keys.append(("int_idle", "idle"))
+            for a_key, name in int_keys:
+                boot_int = self.raw_data_dict["analyses"][a_key].proc_data_dict[
+                    boot_tag
+                ]
+                for qoi_name, key in [
+                    ("eps_%s_X1", "eps_X1_%s"),
+                    ("eps_%s_simple", "eps_simple_%s"),
+                    ("L1_%s", "L1_%s"),
+                ]:
+                    qoi[qoi_name % name + "_ci"] = confidence_interval(
+                        interleaved_error(
+                            eps_int=boot_int[key % fit_tag],
+                            eps_base=boot_base[key % fit_tag],
+                        ),
+                        confidence,
+                    )
+
         if int_name == "CZ":
             # This is the naive estimate, when all observed error is assigned
             # to the CZ gate
@@ -2622,3 +2785,350 @@ def depolarizing_par_to_eps(alpha, d):
 
     """
     return (1 - alpha) * (d - 1) / d
+
+
+def fit_leak_decays(ncl, X1, sigma=None, **kw):
+    """
+    Fits `leak_decay` to many curves at once, e.g. for all qubits or
+    bootstrap samples, see `fit_exponential_decays`. As in the lmfit model
+    of the analysis A and B are positive, pass `bounds=None` for an
+    unbounded fit.
+
+    Parameters
+    ----------
+    ncl (array):
+        number of Cliffords
+    X1 (array):
+        shape (..., len(ncl)), the computational subspace population
+    sigma (array):
+        uncertainty of the data points, broadcastable to the shape of X1,
+        for a weighted fit
+
+    Returns
+    -------
+        dict of arrays of shape X1.shape[:-1], the parameters of
+        `leak_decay` and L1 = (1-A)*(1-lambda_1), L2 = A*(1-lambda_1)
+    """
+    kw.setdefault("bounds", ([0, 0], [np.inf, np.inf]))
+    coefs, lambda_1, chisqr = fit_exponential_decays(ncl, X1, sigma=sigma, **kw)
+    A, B = coefs[..., 0], coefs[..., 1]
+    return {
+        "A": A,
+        "B": B,
+        "lambda_1": lambda_1,
+        "L1": (1 - A) * (1 - lambda_1),
+        "L2": A * (1 - lambda_1),
+        "chisqr": chisqr,
+    }
+
+
+def fit_rb_decays(
+    ncl, M0, lambda_1=1, L1=0, d1=2, simple=False, sigma=None, **kw
+):
+    """
+    Fits `full_rb_decay` to many curves at once, the batched equivalent of
+    `RandomizedBenchmarking_SingleQubit_Analysis.fit_rb_decay`, see
+    `fit_exponential_decays`. As in the lmfit model A and B are positive
+    and 0 <= C <= 1, pass `bounds=None` for an unbounded fit.
+
+    Parameters
+    ----------
+    ncl (array):
+        number of Cliffords
+    M0 (array):
+        shape (..., len(ncl)), the population of the ground state
+    lambda_1, L1 (float or array):
+        fixed leakage decay rate and leakage per Clifford, broadcastable to
+        M0.shape[:-1]
+    d1 (int):
+        dimension of the computational subspace
+    simple (bool):
+        if True B = 0, i.e. a single exponential decay is fitted
+    sigma (array):
+        uncertainty of the data points, broadcastable to the shape of M0,
+        for a weighted fit
+
+    Returns
+    -------
+        dict of arrays of shape M0.shape[:-1], the parameters of
+        `full_rb_decay` and the fidelity F and infidelity eps per Clifford
+    """
+    M0 = np.asarray(M0, dtype=float)
+    lambda_1 = np.broadcast_to(np.asarray(lambda_1, dtype=float), M0.shape[:-1])
+    L1 = np.broadcast_to(np.asarray(L1, dtype=float), M0.shape[:-1])
+    if simple:
+        kw.setdefault("bounds", ([0, 0], [np.inf, 1]))
+    else:
+        kw.setdefault("bounds", ([0, 0, 0], [np.inf, np.inf, 1]))
+    coefs, lambda_2, chisqr = fit_exponential_decays(
+        ncl, M0, fixed_rates=None if simple else lambda_1, sigma=sigma, **kw
+    )
+    F = 1 / d1 * ((d1 - 1) * lambda_2 + 1 - L1)
+    return {
+        "A": coefs[..., 0],
+        "B": np.zeros_like(lambda_2) if simple else coefs[..., 1],
+        "C": coefs[..., -1],
+        "lambda_1": np.ones_like(lambda_2) if simple else lambda_1,
+        "lambda_2": lambda_2,
+        "F": F,
+        "eps": 1 - F,
+        "chisqr": chisqr,
+    }
+
+
+def fit_exponential_decays(
+    m,
+    data,
+    fixed_rates=None,
+    sigma=None,
+    bounds=None,
+    max_iter: int = 100,
+    tol: float = 1e-12,
+    ftol: float = 1e-8,
+):
+    """
+    Least squares fit of
+
+        data = c_0 + c_1 * fixed_rates**m + c_2 * rate**m
+
+    to many curves at once (the second term is only present if
+    `fixed_rates` is given).
+
+    The fit is vectorized over all curves. For a given rate the
+    coefficients are the solution of a linear least squares problem, the
+    rate is found by Gauss-Newton iterations on the resulting one parameter
+    problem (variable projection), starting from a closed form log-linear
+    estimate from the slopes of the data or a grid of rates.
+
+    Parameters
+    ----------
+    m (array):
+        the independent variable, e.g. the number of Cliffords
+    data (array):
+        shape (..., len(m)), the curves to fit
+    fixed_rates (float or array):
+        broadcastable to data.shape[:-1]
+    sigma (array):
+        uncertainty of the data points, broadcastable to data.shape, for a
+        weighted fit
+    bounds (tuple):
+        (lower, upper) bounds of the coefficients c, e.g.
+        ([0, 0], [np.inf, 1]), by default the coefficients are unbounded
+    max_iter (int):
+        maximum number of Gauss-Newton iterations
+    tol, ftol (float):
+        the iterations of a curve stop when the rate changes less than tol
+        or the sum of squares decreases by less than a fraction ftol
+
+    Returns
+    -------
+    coefs (array):
+        shape (..., 2) or (..., 3), the coefficients c
+    rate (array):
+        shape data.shape[:-1]
+    chisqr (array):
+        shape data.shape[:-1], the (weighted) sum of squared residuals
+
+    Curves containing NaNs give NaN results.
+    """
+    m = np.asarray(m, dtype=float)
+    data = np.asarray(data, dtype=float)
+    shape = data.shape[:-1]
+    y = data.reshape(-1, len(m))
+    if sigma is None:
+        w = np.ones_like(y)
+    else:
+        w = 1 / np.broadcast_to(sigma, data.shape).reshape(y.shape)
+    yw = w * y
+
+    columns = [w]
+    if fixed_rates is not None:
+        fixed_rates = np.broadcast_to(fixed_rates, shape).reshape(-1)
+        columns.append(w * fixed_rates[:, None] ** m)
+    k = len(columns) + 1
+
+    if bounds is not None:
+        lower, upper = np.broadcast_to(bounds, (2, k))
+        # each coefficient either free (NaN) or at one of its bounds
+        faces = np.array(
+            list(
+                itertools.product(
+                    *[
+                        [np.nan] + [b for b in (lo, up) if np.isfinite(b)]
+                        for lo, up in zip(lower, upper)
+                    ]
+                )
+            )
+        )
+    eye = np.eye(k)
+
+    @np.errstate(over="ignore", invalid="ignore")
+    def solve(rate, rows):
+        phi = np.stack(
+            [col[rows] for col in columns] + [w[rows] * rate[:, None] ** m],
+            axis=-1,
+        )
+        G = np.einsum("nmk,nml->nkl", phi, phi)
+        # regularizes the case of degenerate rates
+        G += 1e-14 * np.trace(G, axis1=1, axis2=2)[:, None, None] * eye
+        b = np.einsum("nmk,nm->nk", phi, yw[rows])
+        c = np.linalg.solve(G, b[..., None])[..., 0]
+        free = np.ones(c.shape, dtype=bool)
+        Gm = G.copy()
+        if bounds is not None:
+            out = np.where(~np.all((c >= lower) & (c <= upper), axis=-1))[0]
+            # The bounded linear least squares solution is the best of the
+            # solutions on the faces of the bounds that are within the
+            # bounds. Only the curves outside the bounds are considered.
+            G_out, b_out = G[out], b[out]
+            best_cost = np.full(len(out), np.inf)
+            for face in faces[1:]:
+                f = np.broadcast_to(np.isnan(face), (len(out), k))
+                values = np.where(f, 0, face)
+                Gf = G_out * f[:, :, None] * f[:, None, :] + eye * ~f[:, None, :]
+                rhs = np.where(
+                    f, b_out - np.einsum("nkl,nl->nk", G_out, values), values
+                )
+                cf = np.linalg.solve(Gf, rhs[..., None])[..., 0]
+                feasible = np.all(
+                    (cf >= lower - 1e-12) & (cf <= upper + 1e-12), axis=-1
+                )
+                # sum of squares up to the constant |yw|**2
+                cost = np.einsum("nk,nkl,nl->n", cf, G_out, cf) - 2 * np.sum(
+                    b_out * cf, axis=-1
+                )
+                cost = np.where(feasible, cost, np.inf)
+                better = cost < best_cost
+                best_cost[better] = cost[better]
+                free[out[better]] = f[better]
+                Gm[out[better]] = Gf[better]
+                c[out[better]] = cf[better]
+        res = yw[rows] - np.einsum("nmk,nk->nm", phi, c)
+        return phi, free, Gm, c, res, np.sum(res ** 2, axis=-1)
+
+    # Log-linear estimate, the derivative of the decay does not depend on
+    # the offset: log|dy/dm| = log|c_2 log(rate)| + m log(rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dy = np.diff(y, axis=-1) / np.diff(m)
+        m_mid = (m[1:] + m[:-1]) / 2
+        z = np.log(np.abs(dy))
+        wz = np.where(np.isfinite(z), dy ** 2, 0)
+        z = np.where(np.isfinite(z), z, 0)
+        sw = wz.sum(axis=-1, keepdims=True)
+        m_mean = (wz * m_mid).sum(axis=-1, keepdims=True) / sw
+        z_mean = (wz * z).sum(axis=-1, keepdims=True) / sw
+        slope = (wz * (m_mid - m_mean) * (z - z_mean)).sum(axis=-1) / (
+            wz * (m_mid - m_mean) ** 2
+        ).sum(axis=-1)
+    rate = np.clip(np.nan_to_num(np.exp(slope), nan=0.9), 1e-3, 1 - 1e-9)
+
+    # The iterations start from the best of the log-linear estimate and a
+    # grid of rates, this avoids most local minima, e.g. with coefficients at
+    # the bounds
+    active = np.arange(len(y))
+    state = list(solve(rate, active))
+    for grid_rate in 1 - np.logspace(-4, -0.3, 12):
+        new_rate = np.full_like(rate, grid_rate)
+        new_state = solve(new_rate, active)
+        better = new_state[-1] < state[-1]
+        rate[better] = new_rate[better]
+        for x, new in zip(state, new_state):
+            x[better] = new[better]
+
+    # The iterations only continue for the curves that did not converge
+    scale = np.ones_like(rate)
+    for i in range(max_iter):
+        phi, free, Gm, c, res, cost = (x[active] for x in state)
+        # derivative of the model with respect to the rate, projected on the
+        # complement of the span of the free basis functions
+        d = c[:, -1:] * w[active] * m * rate[active, None] ** (m - 1)
+        a = np.linalg.solve(
+            Gm, (free * np.einsum("nmk,nm->nk", phi, d))[..., None]
+        )[..., 0]
+        g = d - np.einsum("nmk,nk->nm", phi, a)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = scale[active] * np.sum(g * res, axis=-1) / np.sum(g * g, axis=-1)
+        step = np.nan_to_num(step)
+        new_rate = rate[active] + step
+        new_rate = np.where(new_rate > 0, new_rate, rate[active] / 2)
+        new_state = solve(new_rate, active)
+
+        better = new_state[-1] <= cost
+        converged = (np.abs(step) <= tol) | (
+            better & (cost - new_state[-1] <= ftol * cost)
+        )
+        rate[active[better]] = new_rate[better]
+        for x, new in zip(state, new_state):
+            x[active[better]] = new[better]
+        # damping of the steps
+        scale[active] = np.where(
+            better, np.minimum(2 * scale[active], 1), scale[active] / 4
+        )
+        active = active[~converged & (scale[active] >= 1e-12)]
+        if len(active) == 0:
+            break
+
+    c, cost = state[3], state[-1]
+    invalid = ~np.all(np.isfinite(yw), axis=-1) | ~np.isfinite(cost)
+    rate[invalid] = np.nan
+    c[invalid] = np.nan
+    cost[invalid] = np.nan
+    return (
+        c.reshape(shape + (k,)),
+        rate.reshape(shape),
+        cost.reshape(shape),
+    )
+
+
+def bootstrap_seed_counts(n_seeds: int, n_boot: int, rng=None):
+    """
+    Nonparametric bootstrap over RB seeds.
+
+    Returns
+    -------
+    counts (array):
+        shape (n_boot, n_seeds), the number of times each seed is drawn in
+        each of the bootstrap samples, see `resampled_seed_means`
+    """
+    rng = np.random.default_rng(rng)
+    idxs = rng.integers(n_seeds, size=(n_boot, n_seeds))
+    idxs += n_seeds * np.arange(n_boot)[:, None]
+    return np.bincount(idxs.ravel(), minlength=n_boot * n_seeds).reshape(
+        n_boot, n_seeds
+    )
+
+
+def resampled_seed_means(values, counts):
+    """
+    Averages over the seeds of resampled data.
+
+    Parameters
+    ----------
+    values (array):
+        shape (..., n_seeds), e.g. the binned values of an RB experiment of
+        shape (len(ncl), n_seeds), NaNs are ignored
+    counts (array):
+        shape (n_boot, n_seeds), see `bootstrap_seed_counts`
+
+    Returns
+    -------
+        array of shape (n_boot, ...)
+    """
+    values = np.asarray(values)
+    valid = np.isfinite(values)
+    total = np.tensordot(counts, np.where(valid, values, 0), axes=(1, -1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return total / np.tensordot(counts, valid.astype(float), axes=(1, -1))
+
+
+def confidence_interval(samples, confidence: float = 0.95, axis: int = 0):
+    """
+    Percentile confidence interval of bootstrap samples, NaNs (failed fits)
+    are ignored.
+
+    Returns
+    -------
+        array of shape (2, ...), the lower and upper bound
+    """
+    q = 50 * (1 - confidence), 50 * (1 + confidence)
+    return np.nanpercentile(samples, q, axis=axis)
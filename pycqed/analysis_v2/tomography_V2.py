@@ -177,7 +177,8 @@ class TomoAnalysis():
 
     def execute_SDPA_2qubit_tomo(self, measurement_operators, counts_tomo, N_total=1, used_bins=[0,3],
                                  correct_measurement_operators=True, calc_chi_squared =False,
-                                 correct_zero_count_bins=True, TE_correction_matrix = None):
+                                 correct_zero_count_bins=True, TE_correction_matrix = None,
+                                 solver='csdp'):
         """
         Estimates a density matrix given single shot counts of 4 thresholded
         bins using a custom C semidefinite solver from Nathan Langford
@@ -186,23 +187,55 @@ class TomoAnalysis():
         The calibration counts are used in calculating corrections to the (ideal) measurement operators
         The tomo counts are used for the actual reconstruction.
         N_total is used for normalization. if counts_tomo is normalized use N_total=1
+        solver: 'csdp', 'dsdp5' or 'sdplr' for the external SDPA solvers or
+            'numpy' to solve the same problem in-process (see pytomo.mle_state)
 
         """
+        data, N, weights, measurement_vector = self._SDPA_2qubit_input(
+            measurement_operators, counts_tomo, N_total, used_bins, correct_zero_count_bins)
+        #calculate the density matrix using the SDPA solver
+        a = time.time()
+        rho_nathan = csdp_tomo.tomo_state(data, measurement_vector, weights,
+                                          tomo_options={'solver': solver})
+        b=time.time()-a
+        # print("time solving csdp: ", b)
+        # print(rho_nathan)
+        n_estimate = rho_nathan.trace()
+        # print(n_estimate)
+        rho = qt.Qobj(rho_nathan / n_estimate,dims=self.qt_dims)
+
+        # if((np.abs(N_total - n_estimate) / N_total > 0.03)):
+            # print('WARNING estimated N(%d) is not close to provided N(%d) '% (n_estimate,N_total))
 
+        if calc_chi_squared:
+            chi_squared = self._state_tomo_goodness_of_fit(rho, data, N, measurement_vector)
+            return rho, chi_squared
+        else:
+            return rho
+
+    def _SDPA_2qubit_input(self, measurement_operators, counts_tomo, N_total, used_bins,
+                           correct_zero_count_bins):
+        """
+        Returns the data, normalisations, weights and observables for the
+        SDPA tomo. counts_tomo can have a leading axis of datasets, in which
+        case data, normalisations and weights have one as well.
+        """
+        counts_tomo = np.asarray(counts_tomo)
         # If the tomography bins have zero counts, they not satisfy gaussian noise. If N>>1 then turning them into 1 fixes
         # convergence problems without screwing the total statistics/estimate.
         # if(np.sum(np.where(np.array(counts_tomo) == 0)) > 0):
                 # print("WARNING: Some bins contain zero counts, this violates gaussian assumptions. \n \
                         # If correct_zero_count_bins=True these will be set to 1 to minimize errors")
         if correct_zero_count_bins:
-            counts_tomo = np.array([[int(b) if b > 0 else  1 for b in bin_counts] for bin_counts in counts_tomo])
+            counts_tomo = np.where(counts_tomo > 0, counts_tomo, 1).astype(int)
 
 
         #Select the correct data based on the bins used
         #(and therefore based on the projection operators used)
-        data = counts_tomo[:,used_bins].T.flatten()
+        data = np.swapaxes(counts_tomo[..., used_bins], -1, -2)
+        data = data.reshape(data.shape[:-2] + (-1,))
         #get the total number of counts per tomo
-        N = np.array([np.sum(counts_tomo, axis=1) for k in used_bins]).flatten()
+        N = np.tile(np.sum(counts_tomo, axis=-1), len(used_bins))
 
         # add weights based on the total number of data points kept each run
         # N_total is a bit arbitrary but should be the average number of total counts of all runs, since in nathans code this
@@ -214,24 +247,7 @@ class TomoAnalysis():
             measurement_vectors.append([m.full() for m in  self.get_measurement_vector(measurement_operators[k])])
         measurement_vector = np.vstack(measurement_vectors)
         # print('length of the measurement vector'len(measurement_vector))
-        #calculate the density matrix using the csdp solver
-        a = time.time()
-        rho_nathan = csdp_tomo.tomo_state(data, measurement_vector, weights)
-        b=time.time()-a
-        # print("time solving csdp: ", b)
-        # print(rho_nathan)
-        n_estimate = rho_nathan.trace()
-        # print(n_estimate)
-        rho = qt.Qobj(rho_nathan / n_estimate,dims=self.qt_dims)
-
-        # if((np.abs(N_total - n_estimate) / N_total > 0.03)):
-            # print('WARNING estimated N(%d) is not close to provided N(%d) '% (n_estimate,N_total))
-
-        if calc_chi_squared:
-            chi_squared = self._state_tomo_goodness_of_fit(rho, data, N, measurement_vector)
-            return rho, chi_squared
-        else:
-            return rho
+        return data, N, weights, measurement_vector
 
     def execute_SDPA_MC_2qubit_tomo(self,
                                     measurement_operators,
@@ -241,24 +257,37 @@ class TomoAnalysis():
                                     n_runs = 100,
                                     array_like = False,
                                     correct_measurement_operators = True,
-                                    TE_correction_matrix=None):
+                                    TE_correction_matrix=None,
+                                    solver='csdp'):
         """
         Executes the SDPDA tomo n_runs times with data distributed via a Multinomial distribution
         in order to get a list of rhos from which one can calculate errorbars on various derived quantities
         returns a list of Qobjects (the rhos).
         If array_like is set to true it will just return a 3D array of rhos
+        With solver='numpy' all runs are reconstructed at once.
         """
 
+        #generate data sets based on multinomial distribution with means according to the measured data
+        mcs = [[np.random.multinomial(sum(counts),(np.array(counts)+0.0) / sum(counts)) for counts in counts_tomo]
+               for i in range(n_runs)]
+        if solver == 'numpy':
+            data, N, weights, measurement_vector = self._SDPA_2qubit_input(
+                measurement_operators, mcs, N_total, used_bins, True)
+            rhos = csdp_tomo.mle_state(data, measurement_vector, weights,
+                                       tomo_options={'normalised': True})
+            if array_like:
+                return rhos
+            return [qt.Qobj(rho, dims=self.qt_dims) for rho in rhos]
+
         rhos= []
-        for i in range(n_runs):
-            #generate a data set based on multinomial distribution with means according to the measured data
-            mc = [np.random.multinomial(sum(counts),(np.array(counts)+0.0) / sum(counts)) for counts in counts_tomo]
+        for mc in mcs:
             rhos.append(self.execute_SDPA_2qubit_tomo(measurement_operators,
                                                       mc,
                                                       N_total,
                                                       used_bins,
                                                       correct_measurement_operators,
-                                                      TE_correction_matrix=TE_correction_matrix))
+                                                      TE_correction_matrix=TE_correction_matrix,
+                                                      solver=solver))
 
         if array_like:
             return np.array([rho.full() for rho in rhos])
@@ -411,13 +440,9 @@ class TomoAnalysis():
         self.weights :  weights per measurement vector used in calculating the loss
         """
         rho = self.build_rho_from_triangular_params(t_params)
-        L = 0 + 0j
-        for i in range(len(self.measurement_vector_numpy)):
-            expectation = np.trace(
-                np.dot(self.measurement_vector_numpy[i], rho))
-            L += ((expectation -
-                   self.measurements_tomo[i]) ** 2) * self.weights[i]
-        return L
+        # the traces of the products of all measurement operators with rho
+        expectations = np.einsum('kij,ji->k', self.measurement_vector_numpy, rho)
+        return np.sum(((expectations - self.measurements_tomo) ** 2) * self.weights)
 
 #############################################################################################
     # CDSP tomo functions for likelihood.
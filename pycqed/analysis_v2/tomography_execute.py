@@ -29,6 +29,7 @@ class TomographyExecute(object):
                  start_shot=0, end_shot=-1,
                  verbose=0,
                  tomography_type="SDPA",
+                 sdpa_solver='csdp',
                  fig_format='png',
                  q0_label='q0',
                  q1_label='q1', close_fig=True):
@@ -43,6 +44,7 @@ class TomographyExecute(object):
 		self.q1_label = q1_label
 		self.close_fig = close_fig
 		self.tomography_type = tomography_type
+		self.sdpa_solver = sdpa_solver
 		self.plot_matrix_histogram = plot_matrix_histogram
 
 		
@@ -85,7 +87,8 @@ class TomographyExecute(object):
 
 		if self.tomography_type == "SDPA":
 			self.rhos = tomos.execute_SDPA_2qubit_tomo(self.measurement_operators,self.counts_from_data_prep, used_bins= [0], 
-												   correct_measurement_operators=False, N_total=512)
+												   correct_measurement_operators=False, N_total=512,
+												   solver=self.sdpa_solver)
 		if self.tomography_type == "MLE":
 			self.rhos =  tomos.execute_mle_T_matrix_tomo(self.measurement_operators[0], 
 														 self.counts_from_data_prep[:,0]/512.0,
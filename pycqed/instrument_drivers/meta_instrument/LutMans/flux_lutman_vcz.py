@@ -804,7 +804,30 @@ class HDAWG_Flux_LutMan(Base_Flux_LutMan):
         """
         Loads a specific waveform to the AWG
         """
+        waveform_name, codeword_str, waveform = self._get_waveform_to_load(
+            wave_id, regenerate_waveforms=regenerate_waveforms
+        )
+
+        if self.cfg_distort():
+            # This is where the fixed length waveform is
+            # set to cfg_max_wf_length
+            waveform = self.distort_waveform(waveform)
+            self._wave_dict_dist[waveform_name] = waveform
+        else:
+            # This is where the fixed length waveform is
+            # set to cfg_max_wf_length
+            waveform = self._append_zero_samples(waveform)
+            self._wave_dict_dist[waveform_name] = waveform
+
+        self.AWG.get_instr().set(codeword_str, waveform)
 
+    def _get_waveform_to_load(
+        self, wave_id: str, regenerate_waveforms: bool = False
+    ):
+        """
+        Returns the name, codeword string and the waveform (including
+        compensation pulses) to load of a waveform in the LutMap.
+        """
         # Here we are ductyping to determine if the waveform name or the
         # codeword was specified.
         if type(wave_id) == str:
@@ -832,19 +855,7 @@ class HDAWG_Flux_LutMan(Base_Flux_LutMan):
 
         if self.cfg_append_compensation():
             waveform = self.add_compensation_pulses(waveform)
-
-        if self.cfg_distort():
-            # This is where the fixed length waveform is
-            # set to cfg_max_wf_length
-            waveform = self.distort_waveform(waveform)
-            self._wave_dict_dist[waveform_name] = waveform
-        else:
-            # This is where the fixed length waveform is
-            # set to cfg_max_wf_length
-            waveform = self._append_zero_samples(waveform)
-            self._wave_dict_dist[waveform_name] = waveform
-
-        self.AWG.get_instr().set(codeword_str, waveform)
+        return waveform_name, codeword_str, waveform
 
     def load_waveforms_onto_AWG_lookuptable(
         self, regenerate_waveforms: bool = True, stop_start: bool = True
@@ -865,10 +876,21 @@ class HDAWG_Flux_LutMan(Base_Flux_LutMan):
         if stop_start:
             AWG.stop()
 
-        for idx, waveform in self.LutMap().items():
-            self.load_waveform_onto_AWG_lookuptable(
+        to_load = [
+            self._get_waveform_to_load(
                 wave_id=idx, regenerate_waveforms=regenerate_waveforms
             )
+            for idx in self.LutMap().keys()
+        ]
+        waveforms = [waveform for _, _, waveform in to_load]
+        if self.cfg_distort():
+            # All waveforms are distorted in a single batch
+            waveforms = self.distort_waveforms(waveforms)
+        else:
+            waveforms = [self._append_zero_samples(waveform) for waveform in waveforms]
+        for (waveform_name, codeword_str, _), waveform in zip(to_load, waveforms):
+            self._wave_dict_dist[waveform_name] = waveform
+            AWG.set(codeword_str, waveform)
 
         self.cfg_awg_channel_amplitude()
         self.cfg_awg_channel_range()
@@ -932,6 +954,31 @@ class HDAWG_Flux_LutMan(Base_Flux_LutMan):
             )
         return distorted_waveform
 
+    def distort_waveforms(self, waveforms: list, inverse=False):
+        """
+        Distorts several waveforms at once, see distort_waveform.
+        """
+        k = self.instr_distortion_kernel.get_instr()
+        # duck typing the distort waveforms method
+        if not hasattr(k, "distort_waveforms"):
+            return [
+                self.distort_waveform(waveform, inverse=inverse)
+                for waveform in waveforms
+            ]
+
+        # Prepend zeros to delay waveforms to correct for fine timing
+        delay_samples = int(self.cfg_pre_pulse_delay() * self.sampling_rate())
+        waveforms = [
+            np.pad(waveform, (delay_samples, 0), "constant") for waveform in waveforms
+        ]
+        return k.distort_waveforms(
+            waveforms,
+            length_samples=int(
+                roundup1024(self.cfg_max_wf_length() * self.sampling_rate())
+            ),
+            inverse=inverse,
+        )
+
     #################################
     #  Plotting methods            #
     #################################
@@ -354,6 +354,26 @@ class DeviceCCL(Instrument):
             vals=vals.Dict(),
         )
 
+        # Started on the first parallel RB compilation, see
+        # `get_rb_compilation_pool`
+        self._rb_compilation_pool = None
+
+    def close(self):
+        if self._rb_compilation_pool is not None:
+            self._rb_compilation_pool.close()
+            self._rb_compilation_pool = None
+        super().close()
+
+    def get_rb_compilation_pool(self):
+        """
+        Returns the pool of worker processes used to compile RB sequences in
+        parallel. The pool is started on first use and reused for all
+        following RB measurements.
+        """
+        if self._rb_compilation_pool is None:
+            self._rb_compilation_pool = cl_oql.CompilationPool()
+        return self._rb_compilation_pool
+
     def _set_dio_map(self, dio_map_dict):
         allowed_keys = {"ro_", "mw_", "flux_"}
         for key in dio_map_dict:
@@ -4053,7 +4073,7 @@ class DeviceCCL(Instrument):
         flux_allocated_duration_ns: int = None,
         sim_cz_qubits: list = None,
         compile_only: bool = False,
-        pool=None,  # a multiprocessing.Pool()
+        pool=None,  # a cl_oql.CompilationPool or multiprocessing.Pool
         rb_tasks=None,  # used after called with `compile_only=True`
         MC=None
     ):
@@ -4110,7 +4130,7 @@ class DeviceCCL(Instrument):
             compilation_only (bool):
                 Compile only the RB sequences without measuring, intended for
                 parallelizing iRB sequences compilation with measurements
-            pool (multiprocessing.Pool):
+            pool (cl_oql.CompilationPool):
                 Only relevant for `compilation_only=True`
                 Pool to which the compilation tasks will be assigned
             rb_tasks (list):
@@ -4191,16 +4211,15 @@ class DeviceCCL(Instrument):
             return rb_tasks
 
         if rb_tasks is None:
-            # Using `with ...:` makes sure the other processes will be terminated
-            # avoid starting too mane processes,
-            # nr_processes = None will start as many as the PC can handle
-            nr_processes = None if recompile else 1
-            with multiprocessing.Pool(
-                nr_processes,
-                maxtasksperchild=cl_oql.maxtasksperchild  # avoid RAM issues
-            ) as pool:
-                rb_tasks = send_rb_tasks(pool)
+            if recompile:
+                rb_tasks = send_rb_tasks(self.get_rb_compilation_pool())
                 cl_oql.wait_for_rb_tasks(rb_tasks)
+            else:
+                # Nothing is compiled, a single process avoids starting the
+                # workers of the compilation pool
+                with multiprocessing.Pool(1) as pool:
+                    rb_tasks = send_rb_tasks(pool)
+                    cl_oql.wait_for_rb_tasks(rb_tasks)
 
         programs_filenames = rb_tasks.get()
 
@@ -4281,24 +4300,23 @@ class DeviceCCL(Instrument):
 
         rounds_success = np.zeros(nr_iRB_runs)
         t0 = time.time()
-        # `maxtasksperchild` avoid RAM issues
-        with multiprocessing.Pool(maxtasksperchild=cl_oql.maxtasksperchild) as pool:
-            rb_tasks_start = None
-            last_run = nr_iRB_runs - 1
-            for i in range(nr_iRB_runs):
-                iRB_kw["rb_tasks_start"] = rb_tasks_start
-                iRB_kw["pool"] = pool
-                iRB_kw["start_next_round_compilation"] = (i < last_run)
-                round_successful = False
-                try:
-                    rb_tasks_start = measurement_func(
-                        **iRB_kw
-                    )
-                    round_successful = True
-                except Exception:
-                    print_exception()
-                finally:
-                    rounds_success[i] = 1 if round_successful else 0
+        pool = self.get_rb_compilation_pool()
+        rb_tasks_start = None
+        last_run = nr_iRB_runs - 1
+        for i in range(nr_iRB_runs):
+            iRB_kw["rb_tasks_start"] = rb_tasks_start
+            iRB_kw["pool"] = pool
+            iRB_kw["start_next_round_compilation"] = (i < last_run)
+            round_successful = False
+            try:
+                rb_tasks_start = measurement_func(
+                    **iRB_kw
+                )
+                round_successful = True
+            except Exception:
+                print_exception()
+            finally:
+                rounds_success[i] = 1 if round_successful else 0
         t1 = time.time()
         good_rounds = int(np.sum(rounds_success))
         print("Performed {}/{} successful iRB measurements in {:>7.1f} s ({:>7.1f} min.).".format(
@@ -4333,6 +4351,10 @@ class DeviceCCL(Instrument):
         If recompile is `True` or `as needed` it will parallelize RB sequence
         compilation with measurement (beside the parallelization of the RB
         sequences which will always happen in parallel).
+
+        The sequences are compiled using the persistent compilation pool of
+        the device (see `get_rb_compilation_pool`), unless `maxtasksperchild`
+        is specified, in which case a new `multiprocessing.Pool` is used.
         """
         if MC is None:
             MC = self.instr_MC.get_instr()
@@ -4492,15 +4514,17 @@ class DeviceCCL(Instrument):
             # This is an optimization that compiles the interleaved RB
             # sequences for the next measurement while measuring the previous
             # one
-            if pool is None:
+            if pool is None and maxtasksperchild:
                 # Using `with ...:` makes sure the other processes will be terminated
                 # `maxtasksperchild` avoid RAM issues
-                if not maxtasksperchild:
-                    maxtasksperchild = cl_oql.maxtasksperchild
                 with multiprocessing.Pool(maxtasksperchild=maxtasksperchild) as pool:
                     run_parallel_iRB(recompile=recompile,
                                     pool=pool,
                                     rb_tasks_start=rb_tasks_start)
+            elif pool is None:
+                run_parallel_iRB(recompile=recompile,
+                                 pool=self.get_rb_compilation_pool(),
+                                 rb_tasks_start=rb_tasks_start)
             else:
                 # In this case the `pool` to execute the RB compilation tasks
                 # is provided, `rb_tasks_start` is expected to be as well
@@ -4676,12 +4700,10 @@ class DeviceCCL(Instrument):
             # sequences for the next measurement while measuring the previous
             # one
             if pool is None:
-                # Using `with ...:` makes sure the other processes will be terminated
-                with multiprocessing.Pool(maxtasksperchild=cl_oql.maxtasksperchild) as pool:
-                    run_parallel_iRB(
-                        recompile=recompile,
-                        pool=pool,
-                        rb_tasks_start=rb_tasks_start)
+                run_parallel_iRB(
+                    recompile=recompile,
+                    pool=self.get_rb_compilation_pool(),
+                    rb_tasks_start=rb_tasks_start)
             else:
                 # In this case the `pool` to execute the RB compilation tasks
                 # is provided, `rb_tasks_start` is expected to be as well
@@ -4736,7 +4758,7 @@ class DeviceCCL(Instrument):
             rb_on_parked_qubit_only: bool = False,
             interleaving_cliffords: list = [None],
             compile_only: bool = False,
-            pool=None,  # a multiprocessing.Pool()
+            pool=None,  # a cl_oql.CompilationPool or multiprocessing.Pool
             rb_tasks=None  # used after called with `compile_only=True`
         ):
         """
@@ -4841,16 +4863,15 @@ class DeviceCCL(Instrument):
             return rb_tasks
 
         if rb_tasks is None:
-            # Using `with ...:` makes sure the other processes will be terminated
-            # avoid starting too mane processes,
-            # nr_processes = None will start as many as the PC can handle
-            nr_processes = None if recompile else 1
-            with multiprocessing.Pool(
-                nr_processes,
-                maxtasksperchild=cl_oql.maxtasksperchild  # avoid RAM issues
-            ) as pool:
-                rb_tasks = send_rb_tasks(pool)
+            if recompile:
+                rb_tasks = send_rb_tasks(self.get_rb_compilation_pool())
                 cl_oql.wait_for_rb_tasks(rb_tasks)
+            else:
+                # Nothing is compiled, a single process avoids starting the
+                # workers of the compilation pool
+                with multiprocessing.Pool(1) as pool:
+                    rb_tasks = send_rb_tasks(pool)
+                    cl_oql.wait_for_rb_tasks(rb_tasks)
 
         programs_filenames = rb_tasks.get()
 
@@ -5233,7 +5254,7 @@ class DeviceCCL(Instrument):
             cal_points: bool = True,
             ro_acq_weight_type: str = "optimal IQ",
             compile_only: bool = False,
-            pool=None,  # a multiprocessing.Pool()
+            pool=None,  # a cl_oql.CompilationPool or multiprocessing.Pool
             rb_tasks=None  # used after called with `compile_only=True`
         ):
         """
@@ -5331,16 +5352,15 @@ class DeviceCCL(Instrument):
             return rb_tasks
 
         if rb_tasks is None:
-            # Using `with ...:` makes sure the other processes will be terminated
-            # avoid starting too mane processes,
-            # nr_processes = None will start as many as the PC can handle
-            nr_processes = None if recompile else 1
-            with multiprocessing.Pool(
-                nr_processes,
-                maxtasksperchild=cl_oql.maxtasksperchild  # avoid RAM issues
-            ) as pool:
-                rb_tasks = send_rb_tasks(pool)
+            if recompile:
+                rb_tasks = send_rb_tasks(self.get_rb_compilation_pool())
                 cl_oql.wait_for_rb_tasks(rb_tasks)
+            else:
+                # Nothing is compiled, a single process avoids starting the
+                # workers of the compilation pool
+                with multiprocessing.Pool(1) as pool:
+                    rb_tasks = send_rb_tasks(pool)
+                    cl_oql.wait_for_rb_tasks(rb_tasks)
 
         programs_filenames = rb_tasks.get()
 
@@ -5414,7 +5434,7 @@ class DeviceCCL(Instrument):
             cal_points: bool = True,
             ro_acq_weight_type: str = "optimal IQ",
             compile_only: bool = False,
-            pool=None,  # a multiprocessing.Pool()
+            pool=None,  # a cl_oql.CompilationPool or multiprocessing.Pool
             rb_tasks=None,  # used after called with `compile_only=True
             label_name=None,
             prepare_for_timedomain=True
@@ -5503,16 +5523,15 @@ class DeviceCCL(Instrument):
             return rb_tasks
 
         if rb_tasks is None:
-            # Using `with ...:` makes sure the other processes will be terminated
-            # avoid starting too mane processes,
-            # nr_processes = None will start as many as the PC can handle
-            nr_processes = None if recompile else 1
-            with multiprocessing.Pool(
-                nr_processes,
-                maxtasksperchild=cl_oql.maxtasksperchild  # avoid RAM issues
-            ) as pool:
-                rb_tasks = send_rb_tasks(pool)
+            if recompile:
+                rb_tasks = send_rb_tasks(self.get_rb_compilation_pool())
                 cl_oql.wait_for_rb_tasks(rb_tasks)
+            else:
+                # Nothing is compiled, a single process avoids starting the
+                # workers of the compilation pool
+                with multiprocessing.Pool(1) as pool:
+                    rb_tasks = send_rb_tasks(pool)
+                    cl_oql.wait_for_rb_tasks(rb_tasks)
 
         programs_filenames = rb_tasks.get()
 
@@ -5,6 +5,7 @@ the real-time distortion corrections in the HDAWG instrument.
 
 It is based on the kernel_object.DistortionsKernel
 """
+import pickle
 import numpy as np
 import logging
 from scipy import signal
@@ -19,6 +20,8 @@ class LinDistortionKernel(Instrument):
     def __init__(self, name, num_models=10, **kw):
         super().__init__(name, **kw)
         self._num_models = num_models
+        # compiled filters per value of inverse, see get_compiled_filter
+        self._compiled_filters = {}
 
         self.add_parameter(
             "cfg_sampling_rate",
@@ -166,149 +169,237 @@ class LinDistortionKernel(Instrument):
             (May 2019) MAR
         N.B.3 the real-time distortions are reset and set on the HDAWG every
             time a waveform is distorted. This is a suboptimal workflow.
+            Use distort_waveforms to distort several waveforms at once.
 
         """
+        return self.distort_waveforms(
+            [waveform], length_samples=length_samples, inverse=inverse
+        )[0]
+
+    def distort_waveforms(
+        self, waveforms: list, length_samples: int = None, inverse: bool = False
+    ):
+        """
+        Distorts several waveforms, e.g. all the waveforms of a LutMap, using
+        the models specified in the Kernel Object. The waveforms are filtered
+        as a single 2D batch by the compiled filter (see
+        get_compiled_filter) and the real-time distortions are set once.
+
+        Args:
+            waveforms (list)    : waveforms to be distorted
+            lenght_samples (int): number of samples after which to cut of
+                the waveforms, if None the waveforms keep their length.
+            inverse (bool)      : if True apply the inverse of the waveform.
+
+        Return:
+            y_sigs (list)       : waveforms with distortion filters applied
+        """
+        waveforms = [np.asarray(waveform) for waveform in waveforms]
         if length_samples is not None:
-            extra_samples = length_samples - len(waveform)
-            if extra_samples >= 0:
-                y_sig = np.concatenate([waveform, np.zeros(extra_samples)])
-            else:
-                y_sig = waveform[:extra_samples]
+            lengths = [length_samples] * len(waveforms)
         else:
-            y_sig = waveform
+            lengths = [len(waveform) for waveform in waveforms]
 
         # Specific real-time filters are turned on below
         self.set_unused_realtime_distortions_zero()
+        self._set_realtime_distortions()
+        filt = self.get_compiled_filter(inverse=inverse)
+
+        # All filters are causal, padding the waveforms with zeros to the
+        # same length does not change the samples that are kept.
+        y_sig = np.zeros((len(waveforms), max(lengths, default=0)))
+        for i, (waveform, length) in enumerate(zip(waveforms, lengths)):
+            n = min(len(waveform), length)
+            y_sig[i, :n] = waveform[:n]
+        y_sig = self._apply_compiled_filter(filt, y_sig)
+
+        if inverse:
+            y_sig /= self.cfg_gain_correction()
+        else:
+            y_sig *= self.cfg_gain_correction()
+        return [y_sig[i, :length] for i, length in enumerate(lengths)]
+
+    def get_compiled_filter(self, inverse: bool = False):
+        """
+        Compiles the filter models that are not real-time into a single
+        filter. The compiled filter is cached until the filter models or the
+        sampling rate change.
+
+        Return:
+            filt (dict) with
+                sos: the IIR filters of the high-pass and exponential models
+                    as a cascade of second-order sections, one per model
+                iir: (b, a) of the inverse of the FIR models
+                fir: the kernel of the FIR and bounce models convolved into
+                    a single FIR filter.
+        """
+        models = [
+            self.get("filter_model_{:02}".format(filt_id))
+            for filt_id in range(self._num_models)
+        ]
+        key = pickle.dumps((self.cfg_sampling_rate(), models))
+        cached = self._compiled_filters.get(inverse)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        sos = []
+        iir = []
+        fir = np.ones(1)
+        for filt in models:
+            if not filt:
+                continue  # dict is empty
+            model = filt["model"]
+            real_time = "real-time" in filt.keys() and filt["real-time"]
+            if model not in ["high-pass", "exponential", "bounce", "FIR"]:
+                raise KeyError("Model {} not recognized".format(model))
+            if real_time:
+                continue  # set in _set_realtime_distortions
+            if model == "high-pass":
+                b, a = kf.bias_tee_correction_coeffs(
+                    sampling_rate=self.cfg_sampling_rate(),
+                    inverse=inverse,
+                    **filt["params"]
+                )
+                sos.append(_first_order_section(b, a))
+            elif model == "exponential":
+                b, a = kf.exponential_decay_correction_coeffs(
+                    sampling_rate=self.cfg_sampling_rate(),
+                    inverse=inverse,
+                    **filt["params"]
+                )
+                sos.append(_first_order_section(b, a))
+            elif model == "bounce":
+                # N.B. the bounce is also applied when inverse is True and
+                # assumes the sampling rate of the HDAWG
+                fir = np.convolve(
+                    fir,
+                    kf.first_order_bounce_corr_kern(
+                        delay=filt["params"]["tau"],
+                        amp=filt["params"]["amp"],
+                        awg_sample_rate=2.4e9,
+                    ),
+                )
+            elif model == "FIR":
+                fir_filter_coeffs = np.asarray(filt["params"]["weights"])
+                if not inverse:
+                    fir = np.convolve(fir, fir_filter_coeffs)
+                else:
+                    iir.append((np.ones(1), fir_filter_coeffs))
+
+        filt = {"sos": np.array(sos).reshape(-1, 6), "iir": iir, "fir": fir}
+        self._compiled_filters[inverse] = (key, filt)
+        return filt
+
+    @staticmethod
+    def _apply_compiled_filter(filt, y_sig):
+        """
+        Applies a filter of get_compiled_filter along the last axis of y_sig.
+        """
+        if len(filt["sos"]):
+            y_sig = signal.sosfilt(filt["sos"], y_sig, axis=-1)
+        for b, a in filt["iir"]:
+            y_sig = signal.lfilter(b, a, y_sig, axis=-1)
+        fir = filt["fir"]
+        if len(fir) > 1:
+            # overlap-add convolution of the whole batch
+            y_sig = signal.oaconvolve(y_sig, fir[np.newaxis, :], axes=-1)[
+                :, : y_sig.shape[-1]
+            ]
+        elif fir[0] != 1:
+            y_sig = y_sig * fir[0]
+        return y_sig
+
+    def _set_realtime_distortions(self):
+        """
+        Sets the real-time distortion filters of the HDAWG.
+        """
         nr_real_time_exp_models = 0
         nr_real_time_hp_models = 0
         nr_real_time_bounce_models = 0
         for filt_id in range(self._num_models):
             filt = self.get("filter_model_{:02}".format(filt_id))
 
-            if not filt:
-                pass  # dict is empty
-            else:
-                model = filt["model"]
-                AWG = self.instr_AWG.get_instr()
-                if model == "high-pass":
-                    if "real-time" in filt.keys() and filt["real-time"]:
-                        # Implementation tested and found not working -MAR
-                        raise NotImplementedError()
-                        nr_real_time_hp_models += 1
-                        if nr_real_time_hp_models > 1:
-                            raise ValueError()
-                    else:
-                        y_sig = kf.bias_tee_correction(
-                            y_sig,
-                            sampling_rate=self.cfg_sampling_rate(),
-                            inverse=inverse,
-                            **filt["params"]
-                        )
-                elif model == "exponential":
-                    if "real-time" in filt.keys() and filt["real-time"]:
-
-                        AWG.set(
-                            "sigouts_{}_precompensation_exponentials"
-                            "_{}_timeconstant".format(
-                                self.cfg_awg_channel() - 1, nr_real_time_exp_models
-                            ),
-                            filt["params"]["tau"],
-                        )
-                        AWG.set(
-                            "sigouts_{}_precompensation_exponentials"
-                            "_{}_amplitude".format(
-                                self.cfg_awg_channel() - 1, nr_real_time_exp_models
-                            ),
-                            filt["params"]["amp"],
-                        )
-                        AWG.set(
-                            "sigouts_{}_precompensation_exponentials"
-                            "_{}_enable".format(
-                                self.cfg_awg_channel() - 1, nr_real_time_exp_models
-                            ),
-                            1,
-                        )
-
-                        nr_real_time_exp_models += 1
-                        if nr_real_time_exp_models > 5:
-                            raise ValueError()
-                    else:
-                        y_sig = kf.exponential_decay_correction(
-                            y_sig,
-                            sampling_rate=self.cfg_sampling_rate(),
-                            inverse=inverse,
-                            **filt["params"]
-                        )
-                elif model == "bounce":
-                    if "real-time" in filt.keys() and filt["real-time"]:
-
-                        AWG.set(
-                            "sigouts_{}_precompensation_bounces"
-                            "_{}_delay".format(
-                                self.cfg_awg_channel() - 1, nr_real_time_bounce_models
-                            ),
-                            filt["params"]["tau"],
-                        )
-                        AWG.set(
-                            "sigouts_{}_precompensation_bounces"
-                            "_{}_amplitude".format(
-                                self.cfg_awg_channel() - 1, nr_real_time_bounce_models
-                            ),
-                            filt["params"]["amp"],
-                        )
-                        AWG.set(
-                            "sigouts_{}_precompensation_bounces"
-                            "_{}_enable".format(
-                                self.cfg_awg_channel() - 1, nr_real_time_bounce_models
-                            ),
-                            1,
-                        )
-
-                        nr_real_time_bounce_models += 1
-                        if nr_real_time_bounce_models > 1:
-                            raise ValueError()
-                    else:
-                        y_sig = kf.first_order_bounce_corr(
-                            sig=y_sig,
-                            delay=filt["params"]["tau"],
-                            amp=filt["params"]["amp"],
-                            awg_sample_rate=2.4e9,
-                        )
-
-                elif model == "FIR":
-                    fir_filter_coeffs = filt["params"]["weights"]
-                    if "real-time" in filt.keys() and filt["real-time"]:
-                        if len(fir_filter_coeffs) != 40:
-                            raise ValueError(
-                                "Realtime FIR filter must contain 40 weights"
-                            )
-                        else:
-                            AWG.set(
-                                "sigouts_{}_precompensation_fir_coefficients".format(
-                                    self.cfg_awg_channel() - 1
-                                ),
-                                fir_filter_coeffs,
-                            )
-                            AWG.set(
-                                "sigouts_{}_precompensation_fir_enable".format(
-                                    self.cfg_awg_channel() - 1
-                                ),
-                                1,
-                            )
-                    else:
-                        if not inverse:
-                            y_sig = signal.lfilter(fir_filter_coeffs, 1, y_sig)
-                        elif inverse:
-                            y_sig = signal.lfilter(np.ones(1), fir_filter_coeffs, y_sig)
+            if not filt or not ("real-time" in filt.keys() and filt["real-time"]):
+                continue  # dict is empty or filter applied in software
+            model = filt["model"]
+            AWG = self.instr_AWG.get_instr()
+            if model == "high-pass":
+                # Implementation tested and found not working -MAR
+                raise NotImplementedError()
+                nr_real_time_hp_models += 1
+                if nr_real_time_hp_models > 1:
+                    raise ValueError()
+            elif model == "exponential":
+                AWG.set(
+                    "sigouts_{}_precompensation_exponentials"
+                    "_{}_timeconstant".format(
+                        self.cfg_awg_channel() - 1, nr_real_time_exp_models
+                    ),
+                    filt["params"]["tau"],
+                )
+                AWG.set(
+                    "sigouts_{}_precompensation_exponentials"
+                    "_{}_amplitude".format(
+                        self.cfg_awg_channel() - 1, nr_real_time_exp_models
+                    ),
+                    filt["params"]["amp"],
+                )
+                AWG.set(
+                    "sigouts_{}_precompensation_exponentials"
+                    "_{}_enable".format(
+                        self.cfg_awg_channel() - 1, nr_real_time_exp_models
+                    ),
+                    1,
+                )
 
-                else:
-                    raise KeyError("Model {} not recognized".format(model))
+                nr_real_time_exp_models += 1
+                if nr_real_time_exp_models > 5:
+                    raise ValueError()
+            elif model == "bounce":
+                AWG.set(
+                    "sigouts_{}_precompensation_bounces"
+                    "_{}_delay".format(
+                        self.cfg_awg_channel() - 1, nr_real_time_bounce_models
+                    ),
+                    filt["params"]["tau"],
+                )
+                AWG.set(
+                    "sigouts_{}_precompensation_bounces"
+                    "_{}_amplitude".format(
+                        self.cfg_awg_channel() - 1, nr_real_time_bounce_models
+                    ),
+                    filt["params"]["amp"],
+                )
+                AWG.set(
+                    "sigouts_{}_precompensation_bounces"
+                    "_{}_enable".format(
+                        self.cfg_awg_channel() - 1, nr_real_time_bounce_models
+                    ),
+                    1,
+                )
 
-        if inverse:
-            y_sig /= self.cfg_gain_correction()
-        else:
-            y_sig *= self.cfg_gain_correction()
-        return y_sig
+                nr_real_time_bounce_models += 1
+                if nr_real_time_bounce_models > 1:
+                    raise ValueError()
+            elif model == "FIR":
+                fir_filter_coeffs = filt["params"]["weights"]
+                if len(fir_filter_coeffs) != 40:
+                    raise ValueError("Realtime FIR filter must contain 40 weights")
+                else:
+                    AWG.set(
+                        "sigouts_{}_precompensation_fir_coefficients".format(
+                            self.cfg_awg_channel() - 1
+                        ),
+                        fir_filter_coeffs,
+                    )
+                    AWG.set(
+                        "sigouts_{}_precompensation_fir_enable".format(
+                            self.cfg_awg_channel() - 1
+                        ),
+                        1,
+                    )
+            else:
+                raise KeyError("Model {} not recognized".format(model))
 
     def print_overview(self):
         print("*" * 80)
@@ -327,3 +418,10 @@ class LinDistortionKernel(Instrument):
                     print("\treal-time : False")
 
         print("*" * 80)
+
+
+def _first_order_section(b, a):
+    """
+    Returns the first-order IIR filter (b, a) as a second-order section.
+    """
+    return np.concatenate([b, [0], a, [0]]) / a[0]
@@ -6,8 +6,10 @@ import matplotlib.pyplot as plt
 import logging
 import re
 import copy
+import hashlib
 from datetime import datetime
 from functools import partial
+from collections import OrderedDict
 
 from qcodes.instrument.base import Instrument
 from qcodes.utils import validators
@@ -47,6 +49,15 @@ def gen_partner_waveform_name(ch, cw):
     return gen_waveform_name(2*(ch//2) + ((ch + 1) % 2), cw)
 
 
+def gen_waveform_hash(waveform):
+    """
+    Return a hash of the content of a waveform. Two waveforms have the same
+    hash if, and only if, their samples are bit-identical.
+    """
+    return hashlib.sha1(
+        np.ascontiguousarray(waveform, dtype=np.float64).tobytes()).hexdigest()
+
+
 def merge_waveforms(chan0=None, chan1=None, marker=None):
     """
     Merges waveforms for channel 0, channel 1 and marker bits into a single
@@ -312,6 +323,7 @@ class MockDAQServer():
             self.nodes[f'/{self.device}/features/options'] = {'type': 'String', 'value': 'QA\nAWG'}
             for i in range(16):
                 self.nodes[f'/{self.device}/awgs/0/waveform/waves/{i}'] = {'type': 'ZIVectorData', 'value': np.array([])}
+            self.nodes[f'/{self.device}/awgs/0/elf/data'] = {'type': 'ZIVectorData', 'value': np.array([])}
             for i in range(10):
                 self.nodes[f'/{self.device}/qas/0/integration/weights/{i}/real'] = {'type': 'ZIVectorData', 'value': np.array([])}
                 self.nodes[f'/{self.device}/qas/0/integration/weights/{i}/imag'] = {'type': 'ZIVectorData', 'value': np.array([])}
@@ -338,6 +350,9 @@ class MockDAQServer():
                         'type': 'ZIVectorData', 'value': np.array([])}
                     self.nodes[f'/{self.device}/awgs/{awg_nr}/waveform/waves/{i}'] = {
                         'type': 'ZIVectorData', 'value': np.array([])}
+            for awg_nr in range(4):
+                self.nodes[f'/{self.device}/awgs/{awg_nr}/elf/data'] = {
+                    'type': 'ZIVectorData', 'value': np.array([])}
             for sigout_nr in range(8):
                 self.nodes[f'/{self.device}/sigouts/{sigout_nr}/precompensation/fir/coefficients'] = {
                     'type': 'ZIVectorData', 'value': np.array([])}
@@ -432,6 +447,11 @@ class MockDAQServer():
 
         self.nodes[path]['value'] = value
 
+        # Uploading an ELF makes the AWG ready
+        m = re.match(r'/(\w+)/awgs/(\d+)/elf/data', path)
+        if m:
+            self.setInt('/' + m.group(1) + '/awgs/' + m.group(2) + '/ready', 1)
+
     def setComplex(self, path, value):
         if path not in self.nodes:
             raise ziRuntimeError("Unknown node '" + path +
@@ -545,6 +565,7 @@ class MockAwgModule():
     This class implements a mock version of the awgModule object used for
     compiling and uploading AWG programs. It doesn't actually compile anything, but
     only maintains a counter of how often the compilation method has been executed.
+    The 'compiled' ELF file simply contains the program source.
 
     For the future, the class could be updated to allow the user to select whether
     the next compilation should be successful or not in order to enable more
@@ -557,8 +578,11 @@ class MockAwgModule():
         self._index = None
         self._sourcestring = None
         self._compilation_count = {}
+        self._elf_file = ''
         if not os.path.isdir('awg/waves'):
             os.makedirs('awg/waves')
+        if not os.path.isdir('awg/elf'):
+            os.makedirs('awg/elf')
 
     def get_compilation_count(self, index):
         if index not in self._compilation_count:
@@ -586,6 +610,9 @@ class MockAwgModule():
                     'Trying to compile AWG program, but no AWG device has been configured!')
 
             self._compilation_count[self._index] += 1
+            self._elf_file = '{}_{}_awg_default.elf'.format(self._device, self._index)
+            with open(os.path.join('awg', 'elf', self._elf_file), 'w') as f:
+                f.write(value)
             self._daq.setInt('/' + self._device + '/' +
                              'awgs/' + str(self._index) + '/ready', 1)
 
@@ -596,6 +623,10 @@ class MockAwgModule():
             value = [self._index]
         elif path == 'awgModule/compiler/statusstring':
             value = ['File successfully uploaded']
+        elif path == 'awgModule/elf/file':
+            value = [self._elf_file]
+        elif path == 'awgModule/progress':
+            value = [1.0]
         else:
             value = ['']
 
@@ -622,17 +653,23 @@ class ZI_base_instrument(Instrument):
     of the firmware are installed on the instrument.
 
     The base class also manages waveforms for the instruments. The waveforms
-    are kept in a table, which is kept synchronized with CSV files in the
-    awg/waves folder belonging to LabOne. The base class will select whether
+    are kept in a table, which is kept synchronized with a binary (.npy) store
+    in the awg/waves_npy folder belonging to LabOne. The CSV files in the
+    awg/waves folder that are needed by the AWG compiler are only written
+    just before a program is compiled. The base class will select whether
     to compile and configure an instrument based on changes to the waveforms
     and to the requested AWG program. Basically, if a waveform changes length
     or if the AWG program changes, then the program will be compiled and
     uploaded the next time the user executes the 'start' method. If a waveform
     has changed, but the length is the same, then the waveform will simply
     be updated on the instrument using a a fast waveform upload technique. Again,
-    this is triggered when the 'start' method is called.
+    this is triggered when the 'start' method is called. Waveforms that are
+    bit-identical to the ones already on the instrument are not uploaded again.
     """
 
+    # Maximum number of compiled programs kept in the program cache
+    _awg_program_cache_size = 16
+
     ##########################################################################
     # Constructor
     ##########################################################################
@@ -720,6 +757,16 @@ class ZI_base_instrument(Instrument):
 
             # Will hold information about all configured waveforms
             self._awg_waveforms = {}
+            # Directory of the binary waveform store, determined on first use
+            self._waveform_store_dir = None
+            # Content hashes of the waveforms on the instrument for each AWG,
+            # the keys are the DIO codewords
+            self._awg_uploaded_hashes = [
+                dict() for i in range(self._num_channels()//2)]
+            # Compiled programs (ELF data and compiler status) indexed by
+            # program hash, and the hash of the program running on each AWG
+            self._awg_program_cache = OrderedDict()
+            self._awg_program_hashes = [None]*(self._num_channels()//2)
 
             # Asserted when AWG needs to be reconfigured
             self._awg_needs_configuration = [False]*(self._num_channels()//2)
@@ -814,6 +861,35 @@ class ZI_base_instrument(Instrument):
             parameter_class=ManualParameter,
             vals=validators.Ints())
 
+        if self._awgModule is None:
+            return
+
+        self.add_parameter(
+            'cfg_compile_cache',
+            initial_value=False,
+            parameter_class=ManualParameter,
+            vals=validators.Bool(),
+            docstring=(
+                'If True, "configure_awg_from_string" does not compile a '
+                'program that is identical to the one running on the AWG and '
+                'uploads the cached ELF of programs that were compiled before. '
+                'Programs are identical if the source, the waveforms it '
+                'references and the device options are unchanged.'))
+
+        for name, label in [('awg_compile_time', 'compilation'),
+                            ('awg_upload_time', 'upload'),
+                            ('awg_ready_wait_time', 'ready wait')]:
+            self.add_parameter(
+                name,
+                unit='s',
+                label='AWG {} time'.format(label),
+                initial_value=0.0,
+                parameter_class=ManualParameter,
+                vals=validators.Numbers(),
+                docstring=(
+                    'Time spent in the {} step of the last call to '
+                    '"configure_awg_from_string".'.format(label)))
+
     ##########################################################################
     # Private methods
     ##########################################################################
@@ -1056,29 +1132,79 @@ class ZI_base_instrument(Instrument):
                 extra_zeros = 8-(len(waveform) % 8)
                 waveform = np.concatenate([waveform, np.zeros(extra_zeros)])
 
+            # Nothing to do if the waveform did not change
+            wf_hash = gen_waveform_hash(waveform)
+            if wf_hash == self._awg_waveforms[wf_name]['hash']:
+                log.debug(f"{self.devname}: Waveform {wf_name} is unchanged.")
+                return
+
             # If the length has changed, we need to recompile the AWG program
             if len(waveform) != len(self._awg_waveforms[wf_name]['waveform']):
                 log.debug(f"{self.devname}: Length of waveform has changed. Flagging awg as requiring recompilation.")
                 self._awg_needs_configuration[awg_nr] = True
 
-            # Update the associated CSV file
-            log.debug(f"{self.devname}: Updating csv waveform {wf_name}, for ch{ch}, cw{cw}")
-            self._write_csv_waveform(ch=ch, cw=cw, wf_name=wf_name,
+            # Update the associated binary file, the CSV file is only needed
+            # by the compiler and is written before compilation
+            log.debug(f"{self.devname}: Updating npy waveform {wf_name}, for ch{ch}, cw{cw}")
+            self._write_npy_waveform(ch=ch, cw=cw, wf_name=wf_name,
                                      waveform=waveform)
 
             # And the entry in our table and mark it for update
             self._awg_waveforms[wf_name]['waveform'] = waveform
+            self._awg_waveforms[wf_name]['hash'] = wf_hash
+            self._awg_waveforms[wf_name]['csv_dirty'] = True
             log.debug(f"{self.devname}: Marking waveform as dirty.")
             self._awg_waveforms[wf_name]['dirty'] = True
 
         return write_func
 
+    def _get_waveform_store_directory(self):
+        """
+        Returns the directory of the binary waveform store of this device.
+        """
+        if self._waveform_store_dir is None:
+            self._waveform_store_dir = os.path.join(
+                self._get_awg_directory(), 'waves_npy', self.devname)
+            os.makedirs(self._waveform_store_dir, exist_ok=True)
+        return self._waveform_store_dir
+
+    def _write_npy_waveform(self, ch: int, cw: int, wf_name: str, waveform) -> None:
+        filename = os.path.join(
+            self._get_waveform_store_directory(), wf_name + '.npy')
+        np.save(filename, np.asarray(waveform, dtype=np.float64))
+
+    def _read_npy_waveform(self, ch: int, cw: int, wf_name: str):
+        filename = os.path.join(
+            self._get_waveform_store_directory(), wf_name + '.npy')
+        try:
+            return np.load(filename)
+        except (OSError, ValueError):
+            # if the waveform does not exist yet dont raise exception
+            return None
+
     def _write_csv_waveform(self, ch: int, cw: int, wf_name: str, waveform) -> None:
         filename = os.path.join(
             self._get_awg_directory(), 'waves',
             self.devname + '_' + wf_name + '.csv')
         np.savetxt(filename, waveform, delimiter=",")
 
+    def _write_csv_waveforms(self, awg_nr):
+        """
+        Writes the CSV files of all waveforms of an AWG that changed since
+        they were last written. The CSV files are read by the compiler.
+        """
+        t0 = time.time()
+        nr_written = 0
+        for ch in [2*awg_nr, 2*awg_nr+1]:
+            for cw in range(self._num_codewords):
+                wf_name = gen_waveform_name(ch, cw)
+                if wf_name in self._awg_waveforms and self._awg_waveforms[wf_name]['csv_dirty']:
+                    self._write_csv_waveform(
+                        ch, cw, wf_name, self._awg_waveforms[wf_name]['waveform'])
+                    self._awg_waveforms[wf_name]['csv_dirty'] = False
+                    nr_written += 1
+        log.debug(f"{self.devname}: Wrote {nr_written} csv waveforms for AWG {awg_nr} in {1.0e3*(time.time()-t0):.1f} ms")
+
     def _gen_read_waveform(self, ch, cw):
         def read_func():
             # AWG
@@ -1089,26 +1215,33 @@ class ZI_base_instrument(Instrument):
             log.debug(f"{self.devname}: Reading waveform {wf_name} for ch{ch} cw{cw}")
             # Check if the waveform data is in our dictionary
             if wf_name not in self._awg_waveforms:
-                log.debug(f"{self.devname}: Waveform not in self._awg_waveforms: reading from csv file.")
-                # Initialize elements
+                log.debug(f"{self.devname}: Waveform not in self._awg_waveforms: reading from npy file.")
+                # Initialize elements, the CSV file is not known to match
+                # the binary store so it is rewritten before compilation
                 self._awg_waveforms[wf_name] = {
-                    'waveform': None, 'dirty': False, 'readonly': False}
+                    'waveform': None, 'dirty': False, 'readonly': False,
+                    'hash': None, 'csv_dirty': True}
                 # Make sure everything gets recompiled
                 log.debug(f"{self.devname}: Flagging awg as requiring recompilation.")
                 self._awg_needs_configuration[awg_nr] = True
-                # It isn't, so try to read the data from CSV
-                waveform = self._read_csv_waveform(ch, cw, wf_name)
+                # It isn't, so try to read the data from the binary store
+                waveform = self._read_npy_waveform(ch, cw, wf_name)
+                if waveform is None:
+                    # Fall back to CSV files written by older versions
+                    waveform = self._read_csv_waveform(ch, cw, wf_name)
+                    if waveform is not None:
+                        waveform = np.atleast_1d(waveform)
+                        self._write_npy_waveform(ch, cw, wf_name, waveform)
                 # Check whether  we got something
                 if waveform is None:
-                    log.debug(f"{self.devname}: Waveform CSV does not exist, initializing to zeros.")
+                    log.debug(f"{self.devname}: Waveform file does not exist, initializing to zeros.")
                     # Nope, initialize to zeros
                     waveform = np.zeros(32)
-                    self._awg_waveforms[wf_name]['waveform'] = waveform
-                    # write the CSV file
-                    self._write_csv_waveform(ch, cw, wf_name, waveform)
-                else:
-                    # Got data, update dictionary
-                    self._awg_waveforms[wf_name]['waveform'] = waveform
+                    # write the binary file
+                    self._write_npy_waveform(ch, cw, wf_name, waveform)
+                # Got data, update dictionary
+                self._awg_waveforms[wf_name]['waveform'] = waveform
+                self._awg_waveforms[wf_name]['hash'] = gen_waveform_hash(waveform)
 
             # Get the waveform data from our dictionary, which must now
             # have the data
@@ -1120,6 +1253,8 @@ class ZI_base_instrument(Instrument):
         filename = os.path.join(
             self._get_awg_directory(), 'waves',
             self.devname + '_' + wf_name + '.csv')
+        if not os.path.isfile(filename):
+            return None
         try:
             log.debug(f"{self.devname}: reading waveform from csv '{filename}'")
             return np.genfromtxt(filename, delimiter=',')
@@ -1231,16 +1366,36 @@ class ZI_base_instrument(Instrument):
         log.info(f"{self.devname}: Using dynamic waveform update for AWG {awg_nr}.")
         wf_table = self._get_waveform_table(awg_nr)
 
+        nr_uploaded = 0
         for dio_cw, (wf_name, other_wf_name) in enumerate(wf_table):
             if self._awg_waveforms[wf_name]['dirty'] or self._awg_waveforms[other_wf_name]['dirty']:
+                # Skip waveforms that are bit-identical to the ones on the instrument
+                hashes = (self._awg_waveforms[wf_name]['hash'],
+                          self._awg_waveforms[other_wf_name]['hash'])
+                if self._awg_uploaded_hashes[awg_nr].get(dio_cw) == hashes:
+                    continue
                 # Combine the waveforms and upload
                 wf_data = merge_waveforms(self._awg_waveforms[wf_name]['waveform'],
                                           self._awg_waveforms[other_wf_name]['waveform'])
                 # Write the new waveform
-                # print('DEBUG::upload_updated_waveforms awg_nr={}; dio_cw={}\n'.format(awg_nr,dio_cw))
-                # print('DEBUG::upload_updated_waveforms {}'.format(wf_data))
                 self.setv(
                     'awgs/{}/waveform/waves/{}'.format(awg_nr, dio_cw), wf_data)
+                self._awg_uploaded_hashes[awg_nr][dio_cw] = hashes
+                # The AWG no longer runs the waveforms of the compiled program
+                self._awg_program_hashes[awg_nr] = None
+                nr_uploaded += 1
+        log.debug(f"{self.devname}: Uploaded {nr_uploaded} waveforms to AWG {awg_nr}.")
+
+    def _update_uploaded_hashes(self, awg_nr):
+        """
+        Records the content hashes of the waveforms of the codeword table of an
+        AWG after it has been configured with a codeword program.
+        """
+        self._awg_uploaded_hashes[awg_nr] = {
+            dio_cw: (self._awg_waveforms[wf_name]['hash'],
+                     self._awg_waveforms[other_wf_name]['hash'])
+            for dio_cw, (wf_name, other_wf_name)
+            in enumerate(self._get_waveform_table(awg_nr))}
 
     def _codeword_table_preamble(self, awg_nr):
         """
@@ -1262,10 +1417,111 @@ class ZI_base_instrument(Instrument):
                 '// End of automatically generated codeword table\n' + \
                 self._awg_program[awg_nr]
 
+            # The compiler reads the waveforms from the CSV files
+            self._write_csv_waveforms(awg_nr)
             self.configure_awg_from_string(awg_nr, full_program)
+            self._update_uploaded_hashes(awg_nr)
         else:
             logging.warning(f"{self.devname}: No program configured for awg_nr {awg_nr}.")
 
+    def _gen_awg_program_hash(self, program_string: str) -> str:
+        """
+        Returns a hash identifying the compiled version of an AWG program.
+        Besides the program source, the hash covers the device type, options
+        and firmware as well as the content of the waveforms referenced by
+        the program.
+        """
+        h = hashlib.sha1()
+        for value in [self.devtype, self.gets('features/options'),
+                      self.geti('system/fwrevision'), program_string]:
+            h.update(str(value).encode('utf-8'))
+        # Waveforms are referenced by the name of their CSV file
+        for name in sorted(set(re.findall(r'"([^"]+)"', program_string))):
+            wf_name = name[len(self.devname)+1:]
+            if name.startswith(self.devname + '_') and wf_name in self._awg_waveforms:
+                h.update(self._awg_waveforms[wf_name]['hash'].encode('utf-8'))
+            else:
+                filename = os.path.join(
+                    self._get_awg_directory(), 'waves', name + '.csv')
+                if os.path.isfile(filename):
+                    stat = os.stat(filename)
+                    h.update('{}{}'.format(stat.st_mtime_ns, stat.st_size).encode('utf-8'))
+        return h.hexdigest()
+
+    def _store_awg_program(self, program_hash: str, comp_msg: str) -> None:
+        """
+        Adds the ELF of the last compiled program to the cache of compiled
+        programs.
+        """
+        filename = os.path.join(
+            self._get_awg_directory(), 'elf',
+            self._awgModule.get('awgModule/elf/file')['elf']['file'][0])
+        if not os.path.isfile(filename):
+            log.warning(f"{self.devname}: Compiled ELF '{filename}' not found, not caching program.")
+            return
+        with open(filename, 'rb') as f:
+            elf = f.read()
+        self._awg_program_cache[program_hash] = {'elf': elf, 'status': comp_msg}
+        self._awg_program_cache.move_to_end(program_hash)
+        while len(self._awg_program_cache) > self._awg_program_cache_size:
+            self._awg_program_cache.popitem(last=False)
+
+    def _upload_cached_awg_program(self, awg_nr: int, program_hash: str,
+                                   timeout: float=15) -> None:
+        """
+        Uploads the cached ELF of a previously compiled program to an AWG.
+        """
+        log.info(f'{self.devname}: Uploading cached program to AWG {awg_nr}.')
+        self._awg_program_cache.move_to_end(program_hash)
+        entry = self._awg_program_cache[program_hash]
+
+        t0 = time.time()
+        success_and_ready = False
+        while not success_and_ready:
+            if (time.time()-t0 >= timeout):
+                raise TimeoutError(
+                    'Timeout while waiting for AWG {} to become ready!'.format(awg_nr))
+            self.setv('awgs/{}/elf/data'.format(awg_nr),
+                      np.frombuffer(entry['elf'], dtype=np.uint8))
+            t_uploaded = time.time()
+            success_and_ready = self._wait_awg_ready(awg_nr)
+
+        t1 = time.time()
+        self.awg_compile_time(0.0)
+        self.awg_upload_time(t_uploaded-t0)
+        self.awg_ready_wait_time(t1-t_uploaded)
+        print(entry['status'] + ' (cached) in {:.2f}s'.format(t1-t0))
+
+        self._awg_program_hashes[awg_nr] = program_hash
+        self._check_awg_memory_usage(awg_nr)
+
+    def _wait_awg_ready(self, awg_nr: int, timeout: float = 10,
+                        poll_interval: float = 1) -> bool:
+        """
+        Waits at most `timeout` seconds for the AWG to become ready after
+        an upload, polling every `poll_interval` seconds. Returns False
+        if the AWG is not ready in time.
+        """
+        t0 = time.time()
+        while True:
+            ready = self.getdeep(
+                'awgs/{}/ready'.format(awg_nr))['value'][0]
+            if ready == 1:
+                return True
+            if time.time() - t0 >= timeout:
+                log.warning('AWG {} not ready after {} s'.format(
+                    awg_nr, timeout))
+                return False
+            time.sleep(poll_interval)
+
+    def _check_awg_memory_usage(self, awg_nr: int) -> None:
+        # Check status
+        if self.get('awgs_{}_waveform_memoryusage'.format(awg_nr)) > 1.0:
+            log.warning(f'{self.devname}: Waveform memory usage exceeds available internal memory!')
+
+        if self.get('awgs_{}_sequencer_memoryusage'.format(awg_nr)) > 1.0:
+            log.warning(f'{self.devname}: Sequencer memory usage exceeds available instruction memory!')
+
     def _write_cmd_to_logfile(self, cmd):
         if self._logfile is not None:
             now = datetime.now()
@@ -1518,10 +1774,33 @@ class ZI_base_instrument(Instrument):
 
         This function is tested to work and give the correct error messages
         when compilation fails.
+
+        If the 'cfg_compile_cache' parameter is set, a program that is
+        identical to the one running on the AWG is not compiled and uploaded
+        again, and the cached ELF is uploaded for programs that were compiled
+        before. The time spent is available in the 'awg_compile_time',
+        'awg_upload_time' and 'awg_ready_wait_time' parameters.
         """
         log.info(f'{self.devname}: Configuring AWG {awg_nr} from string.')
         # Check that awg_nr is set in accordance with devtype
         self._check_awg_nr(awg_nr)
+        # The waveforms on the instrument are replaced by the new program
+        self._awg_uploaded_hashes[awg_nr] = {}
+
+        program_hash = None
+        if self.cfg_compile_cache():
+            program_hash = self._gen_awg_program_hash(program_string)
+            if program_hash == self._awg_program_hashes[awg_nr] and \
+                    self.geti('awgs/{}/ready'.format(awg_nr)) == 1:
+                log.info(f'{self.devname}: Program of AWG {awg_nr} is unchanged, skipping compilation.')
+                self.awg_compile_time(0.0)
+                self.awg_upload_time(0.0)
+                self.awg_ready_wait_time(0.0)
+                return
+            if program_hash in self._awg_program_cache:
+                self._upload_cached_awg_program(awg_nr, program_hash, timeout)
+                return
+        self._awg_program_hashes[awg_nr] = None
 
         t0 = time.time()
         success_and_ready = False
@@ -1549,6 +1828,7 @@ class ZI_base_instrument(Instrument):
                     success = False
                     raise TimeoutError(
                         'Timeout while waiting for compilation to finish!')
+            t_compiled = time.time()
 
             comp_msg = (self._awgModule.get(
                 'awgModule/compiler/statusstring')['compiler']
@@ -1564,27 +1844,28 @@ class ZI_base_instrument(Instrument):
                 print('\n')
                 raise ziCompilationError(comp_msg)
 
-            # Give the device one second to respond
-            for i in range(10):
-                ready = self.getdeep(
-                    'awgs/{}/ready'.format(awg_nr))['value'][0]
-                if ready != 1:
-                    log.warning('AWG {} not ready'.format(awg_nr))
-                    time.sleep(1)
-                else:
-                    success_and_ready = True
-                    break
+            # Wait for the module to finish uploading the ELF
+            while self._awgModule.get('awgModule/progress')['progress'][0] < 1.0:
+                time.sleep(0.01)
+
+                if (time.time()-t0 >= timeout):
+                    raise TimeoutError(
+                        'Timeout while waiting for upload to finish!')
+            t_uploaded = time.time()
+
+            success_and_ready = self._wait_awg_ready(awg_nr)
 
         t1 = time.time()
-        print(self._awgModule.get('awgModule/compiler/statusstring')
-              ['compiler']['statusstring'][0] + ' in {:.2f}s'.format(t1-t0))
+        self.awg_compile_time(t_compiled-t0)
+        self.awg_upload_time(t_uploaded-t_compiled)
+        self.awg_ready_wait_time(t1-t_uploaded)
+        print(comp_msg + ' in {:.2f}s'.format(t1-t0))
 
-        # Check status
-        if self.get('awgs_{}_waveform_memoryusage'.format(awg_nr)) > 1.0:
-            log.warning(f'{self.devname}: Waveform memory usage exceeds available internal memory!')
+        self._awg_program_hashes[awg_nr] = program_hash
+        if self.cfg_compile_cache():
+            self._store_awg_program(program_hash, comp_msg)
 
-        if self.get('awgs_{}_sequencer_memoryusage'.format(awg_nr)) > 1.0:
-            log.warning(f'{self.devname}: Sequencer memory usage exceeds available instruction memory!')
+        self._check_awg_memory_usage(awg_nr)
 
     def plot_dio_snapshot(self, bits=range(32)):
         raise NotImplementedError('Virtual method with no implementation!')
@@ -41,10 +41,14 @@ class InstrumentMonitor(Instrument):
         self.create_tree(figsize=figsize)
 
     def update(self):
+        """
+        Updates the tree with the cached values of the parameters, such
+        that it can be called while the instruments are being measured.
+        """
         time_since_last_update = time.time()-self.last_update_time
         if time_since_last_update > self.update_interval():
             self.last_update_time = time.time()
-            snapshot = self.station.snapshot()
+            snapshot = self.station.snapshot(update=False)
             self.tree.setData(snapshot['instruments'])
 
     def _init_qt(self):
@@ -13,6 +13,7 @@ from pycqed.analysis.fit_toolbox import functions as fn
 from pycqed.measurement.waveform_control import pulse
 from pycqed.measurement.waveform_control import element
 from pycqed.measurement.waveform_control import sequence
+from pycqed.measurement import measurement_control_helpers as mch
 from qcodes.instrument.parameter import _BaseParameter
 from pycqed.instrument_drivers.virtual_instruments.pyqx import qasm_loader as ql
 from packaging import version
@@ -2159,6 +2160,12 @@ class UHFQC_integration_logging_det(Hard_Detector):
                  always_prepare: bool = False,
                  prepare_function=None,
                  prepare_function_kwargs: dict = None,
+                 streaming: bool = False,
+                 thresholds: list = None,
+                 nr_segments: int = 1,
+                 nr_bins: int = 100,
+                 hist_range: tuple = None,
+                 archive_raw_shots: bool = False,
                  **kw):
         """
         Args:
@@ -2181,6 +2188,22 @@ class UHFQC_integration_logging_det(Hard_Detector):
             first call the prepare statement. This is particularly important
             when it is both a single_int_avg detector and acquires multiple
             segments per point.
+
+        streaming (bool) : when True the MeasurementControl does not store
+            the shots in the datafile but accumulates statistics while the
+            shots are acquired: the counts of the declared bitstrings,
+            histograms and the mean of every segment, see
+            measurement_control_helpers.ShotStatistics.
+        thresholds (list)  : threshold of every channel used for declaring
+            the bitstrings in streaming mode, defaults to 0.5 for the
+            digitized result logging mode.
+        nr_segments (int)  : number of segments (e.g., prepared states) the
+            streaming statistics are accumulated for separately.
+        nr_bins (int)      : number of bins of the streaming histograms.
+        hist_range (tuple) : range of the streaming histograms, determined
+            from the first chunk of shots if None.
+        archive_raw_shots (bool) : when True the shots are also stored in a
+            compressed dataset in streaming mode.
         """
         super().__init__()
 
@@ -2226,6 +2249,15 @@ class UHFQC_integration_logging_det(Hard_Detector):
         self.prepare_function = prepare_function
         self.prepare_function_kwargs = prepare_function_kwargs
 
+        self.shot_stream = None
+        if streaming:
+            if thresholds is None and result_logging_mode == 'digitized':
+                thresholds = [0.5]*len(self.channels)
+            self.shot_stream = mch.ShotStatistics(
+                thresholds=thresholds, nr_segments=nr_segments,
+                nr_bins=nr_bins, hist_range=hist_range,
+                archive_raw_shots=archive_raw_shots)
+
     def _get_readout(self):
         return sum([(1 << c) for c in self.channels])
 
@@ -8,10 +8,15 @@ Contains:
   object, adapted for usage with qcodes
 - name generators in the style of qtlab Data objects
 - functions to create standard data sets
+- a store of base snapshots for delta-encoded instrument snapshots
 """
 
 import os
+import copy
 import time
+import hashlib
+import tempfile
+import functools
 import h5py
 import numpy as np
 import logging
@@ -128,6 +133,202 @@ class Data(h5py.File):
         self.flush()
 
 
+class BufferedDataset:
+    """
+    Write buffer in front of a resizable 2D hdf5 dataset.
+
+    Writing a measurement row by row directly into an h5py dataset requires
+    a resize and a read/modify/write cycle on the file for every single data
+    point. This class keeps all rows in a preallocated in-memory array
+    (growing geometrically) and only writes the rows that were modified
+    to the file when a time or row budget is exceeded or when `flush` is
+    called explicitly (e.g., at the end of a measurement).
+
+    It mimics the subset of the h5py.Dataset interface used by the
+    MeasurementControl (`shape`, `resize`, `attrs`, indexing), reading
+    always happens from memory.
+    """
+
+    def __init__(
+        self,
+        group,
+        name: str,
+        ncols: int,
+        dtype: str = "float64",
+        chunk_rows: int = 1024,
+        growth_factor: float = 2.0,
+        flush_interval: float = 5.0,
+        flush_rows: int = 10000,
+    ):
+        """
+        Args:
+            group (hdf5 group/file):
+                    location in the hdf5 file where the dataset is created.
+            name (str):
+                    name of the dataset.
+            ncols (int):
+                    number of columns of the dataset, cannot be changed.
+            dtype (str):
+                    data type of the dataset.
+            chunk_rows (int):
+                    number of rows in an hdf5 chunk, also the granularity
+                    of the in-memory preallocation.
+            growth_factor (float):
+                    factor by which the in-memory buffer grows when full.
+            flush_interval (float):
+                    maximum time in seconds modified rows are kept in memory
+                    only.
+            flush_rows (int):
+                    maximum number of modified rows kept in memory only.
+        """
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be larger than 1")
+        self.chunk_rows = int(chunk_rows)
+        self.growth_factor = growth_factor
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+
+        self.h5_dset = group.create_dataset(
+            name,
+            (0, ncols),
+            maxshape=(None, ncols),
+            chunks=(self.chunk_rows, ncols),
+            dtype=dtype,
+        )
+        # N.B. zeros and not empty, newly added rows are expected to read as
+        # zero as is the case for a resized hdf5 dataset
+        self._buffer = np.zeros((self.chunk_rows, ncols), dtype=dtype)
+        self._nrows = 0
+        # [start, stop) range of rows that are modified but not on disk yet
+        self._dirty_start = None
+        self._dirty_stop = None
+        self._last_flush_time = time.time()
+        # [start, stop) range of rows that are modified since the last call
+        # of `pop_modified_rows`, used to update the live plots
+        self._modified_start = None
+        self._modified_stop = None
+
+    @property
+    def shape(self):
+        return (self._nrows, self._buffer.shape[1])
+
+    @property
+    def dtype(self):
+        return self._buffer.dtype
+
+    @property
+    def attrs(self):
+        return self.h5_dset.attrs
+
+    @property
+    def name(self):
+        return self.h5_dset.name
+
+    def __len__(self):
+        return self._nrows
+
+    def __getitem__(self, key):
+        vals = self._buffer[: self._nrows][key]
+        # Returning a copy is consistent with h5py and ensures the returned
+        # arrays are not modified by subsequent writes
+        if isinstance(vals, np.ndarray):
+            vals = vals.copy()
+        return vals
+
+    def __setitem__(self, key, value):
+        self._buffer[: self._nrows][key] = value
+        row_key = key[0] if isinstance(key, tuple) and len(key) > 0 else key
+        start, stop = self._get_row_range(row_key)
+        self._mark_dirty(start, stop)
+        self._flush_if_needed()
+
+    def resize(self, size):
+        """
+        Resizes the dataset to "size", only the number of rows can change.
+        """
+        nrows, ncols = size
+        if ncols != self._buffer.shape[1]:
+            raise ValueError("Only the number of rows of the dataset can change.")
+        nrows = int(nrows)
+        if nrows > len(self._buffer):
+            self._grow_buffer(nrows)
+        if nrows > self._nrows:
+            self._buffer[self._nrows : nrows] = 0
+            self._mark_dirty(self._nrows, nrows)
+        self._nrows = nrows
+
+    def flush(self):
+        """
+        Writes all modified rows to the hdf5 file.
+        """
+        if self.h5_dset.shape[0] != self._nrows:
+            self.h5_dset.resize((self._nrows, self._buffer.shape[1]))
+        if self._dirty_start is not None:
+            stop = min(self._dirty_stop, self._nrows)
+            if stop > self._dirty_start:
+                self.h5_dset[self._dirty_start : stop] = self._buffer[
+                    self._dirty_start : stop
+                ]
+            self._dirty_start = None
+            self._dirty_stop = None
+        self.h5_dset.file.flush()
+        self._last_flush_time = time.time()
+
+    def pop_modified_rows(self):
+        """
+        Returns the [start, stop) range of rows that were modified since the
+        last call, or None if no rows were modified.
+        """
+        if self._modified_start is None:
+            return None
+        start = self._modified_start
+        stop = min(self._modified_stop, self._nrows)
+        self._modified_start = None
+        self._modified_stop = None
+        return start, max(start, stop)
+
+    def _grow_buffer(self, nrows: int):
+        new_len = max(nrows, int(np.ceil(len(self._buffer) * self.growth_factor)))
+        # round up to an integer number of chunks
+        new_len = int(np.ceil(new_len / self.chunk_rows) * self.chunk_rows)
+        new_buffer = np.zeros((new_len, self._buffer.shape[1]), dtype=self.dtype)
+        new_buffer[: self._nrows] = self._buffer[: self._nrows]
+        self._buffer = new_buffer
+
+    def _get_row_range(self, row_key):
+        if isinstance(row_key, (int, np.integer)):
+            idx = range(self._nrows)[row_key]
+            return idx, idx + 1
+        elif isinstance(row_key, slice):
+            start, stop, _ = row_key.indices(self._nrows)
+            return start, max(start, stop)
+        # Fancy indexing or Ellipsis, assume everything changed
+        return 0, self._nrows
+
+    def _mark_dirty(self, start: int, stop: int):
+        if stop <= start:
+            return
+        if self._dirty_start is None:
+            self._dirty_start, self._dirty_stop = start, stop
+        else:
+            self._dirty_start = min(self._dirty_start, start)
+            self._dirty_stop = max(self._dirty_stop, stop)
+        if self._modified_start is None:
+            self._modified_start, self._modified_stop = start, stop
+        else:
+            self._modified_start = min(self._modified_start, start)
+            self._modified_stop = max(self._modified_stop, stop)
+
+    def _flush_if_needed(self):
+        if self._dirty_start is None:
+            return
+        if (
+            self._dirty_stop - self._dirty_start >= self.flush_rows
+            or time.time() - self._last_flush_time > self.flush_interval
+        ):
+            self.flush()
+
+
 def encode_to_utf8(s):
     """
     Required because h5py does not support python3 strings
@@ -326,6 +527,10 @@ def read_dict_from_hdf5(data_dict: dict, h5_group):
                 item = []
         data_dict[key] = item
 
+    if "snapshot_base" in h5_group.attrs:
+        # Delta-encoded snapshot, see `SnapshotStore`
+        return _apply_snapshot_delta(data_dict, h5_group)
+
     if "list_type" in h5_group.attrs:
         if (
             h5_group.attrs["list_type"] == "generic_list"
@@ -347,6 +552,295 @@ def read_dict_from_hdf5(data_dict: dict, h5_group):
     return data_dict
 
 
+class SnapshotStore:
+    """
+    Shared local store of base snapshots for delta-encoded instrument
+    snapshots.
+
+    Instead of the full snapshot of the station, a data file then only
+    contains the entries of the snapshot that differ from a base snapshot.
+    The base snapshot is stored once in the store as `<content hash>.hdf5`.
+    The snapshot group in the data file refers to it with the attributes
+        snapshot_base:    content hash of the base snapshot
+        snapshot_store:   location of the store, relative to the data file
+        snapshot_deleted: "/" separated paths of the entries of the base
+                          snapshot that are not in the snapshot
+    `read_dict_from_hdf5` transparently reconstructs the full snapshot.
+
+    The base snapshot is the first snapshot written through the store. A
+    new base snapshot is stored when more than `max_delta_fraction` of the
+    entries of a snapshot have changed with respect to the base.
+    """
+
+    def __init__(self, path: str, max_delta_fraction: float = 0.2):
+        self.path = os.path.abspath(path)
+        self.max_delta_fraction = max_delta_fraction
+        self.base_hash = None
+        self._base = None
+
+    def base_filepath(self, base_hash: str):
+        return os.path.join(self.path, "{}.hdf5".format(base_hash))
+
+    def put(self, snapshot: dict):
+        """
+        Stores `snapshot` as base snapshot, if it is not in the store yet,
+        and makes it the base of the snapshots written next.
+
+        Returns:
+            the content hash of the snapshot.
+        """
+        base_hash = snapshot_hash(snapshot)
+        filepath = self.base_filepath(base_hash)
+        if not os.path.isfile(filepath):
+            os.makedirs(self.path, exist_ok=True)
+            # Written under a temporary name such that other processes never
+            # read an incomplete base snapshot
+            fd, tmp_filepath = tempfile.mkstemp(suffix=".hdf5", dir=self.path)
+            os.close(fd)
+            try:
+                with h5py.File(tmp_filepath, "w") as f:
+                    write_dict_to_hdf5(snapshot, f.create_group("Snapshot"))
+                os.replace(tmp_filepath, filepath)
+            except Exception:
+                os.remove(tmp_filepath)
+                raise
+        self.base_hash = base_hash
+        self._base = copy.deepcopy(snapshot)
+        return base_hash
+
+    def get(self, base_hash: str):
+        """
+        Returns the base snapshot with content hash `base_hash`.
+        """
+        return copy.deepcopy(_read_base_snapshot(self.base_filepath(base_hash)))
+
+    def write_snapshot(self, snapshot: dict, entry_point):
+        """
+        Writes the entries of `snapshot` that differ from the base snapshot
+        to `entry_point` (an hdf5 group), storing a new base snapshot first
+        if there is none yet or if too many entries changed.
+        """
+        if self._base is None:
+            self.put(snapshot)
+        changed, deleted = snapshot_delta(self._base, snapshot)
+        nr_changes = _count_entries(changed) + len(deleted)
+        if nr_changes > self.max_delta_fraction * _count_entries(snapshot):
+            self.put(snapshot)
+            changed, deleted = {}, []
+
+        write_dict_to_hdf5(changed, entry_point=entry_point)
+        entry_point.attrs["snapshot_base"] = self.base_hash
+        folder = os.path.dirname(os.path.abspath(entry_point.file.filename))
+        try:
+            store_path = os.path.relpath(self.path, folder)
+        except ValueError:
+            # e.g., on a different drive
+            store_path = self.path
+        entry_point.attrs["snapshot_store"] = store_path
+        if len(deleted) > 0:
+            entry_point.attrs.create(
+                "snapshot_deleted",
+                ["/".join(str(key) for key in path) for path in deleted],
+                dtype=h5py.special_dtype(vlen=str),
+            )
+
+
+def snapshot_hash(snapshot: dict):
+    """
+    Content hash of a (snapshot) dictionary, independent of the order of
+    the keys.
+    """
+    h = hashlib.sha1()
+    _update_hash(h, snapshot)
+    return h.hexdigest()
+
+
+def snapshot_delta(base: dict, snapshot: dict, path: tuple = ()):
+    """
+    Compares a (snapshot) dictionary to a base dictionary.
+
+    Returns:
+        changed (dict): the nested entries of `snapshot` that are not in
+            or differ from `base`.
+        deleted (list): the paths (tuples of keys) of the entries of `base`
+            that are not in `snapshot`.
+    """
+    changed = {}
+    deleted = []
+    for key, item in snapshot.items():
+        if key in base and isinstance(item, dict) and isinstance(base[key], dict):
+            sub_changed, sub_deleted = snapshot_delta(
+                base[key], item, path + (key,))
+            if sub_changed:
+                changed[key] = sub_changed
+            deleted += sub_deleted
+        elif key not in base or not _items_equal(item, base[key]):
+            changed[key] = item
+    for key in base:
+        if key not in snapshot:
+            deleted.append(path + (key,))
+    return changed, deleted
+
+
+def read_snapshot_subtrees(h5_group, paths: list):
+    """
+    Reads only the requested subtrees of a snapshot, e.g. the snapshots of
+    a few instruments, instead of the whole snapshot group.
+    Supports delta-encoded snapshots (see `SnapshotStore`), of which the
+    base snapshot is read once and cached.
+
+    Args:
+        h5_group (hdf5 group):
+                snapshot group, e.g. file["Snapshot"].
+        paths (list):
+                "/" separated paths of the subtrees (dictionaries) relative
+                to h5_group, e.g. ["instruments/q0", "instruments/q1"].
+
+    Returns:
+        dict of the subtree per path.
+
+    Raises:
+        KeyError if a path is not in the snapshot.
+    """
+    if "snapshot_base" not in h5_group.attrs:
+        subtrees = {}
+        for path in paths:
+            entry = h5_group.get(path.strip("/"))
+            if not isinstance(entry, h5py.Group):
+                raise KeyError('"{}" not in snapshot'.format(path))
+            subtrees[path] = read_dict_from_hdf5({}, entry)
+        return subtrees
+
+    store = _snapshot_store_of(h5_group)
+    base = _read_base_snapshot(store.base_filepath(h5_group.attrs["snapshot_base"]))
+    deleted = list(h5_group.attrs.get("snapshot_deleted", []))
+    subtrees = {}
+    for path in paths:
+        keys = path.strip("/").split("/")
+        rel_path = "/".join(keys)
+        if any(rel_path == d or rel_path.startswith(d + "/") for d in deleted):
+            raise KeyError('"{}" not in snapshot'.format(path))
+        entry = base
+        try:
+            for key in keys:
+                entry = entry[_match_key(entry, key)]
+            subtree = copy.deepcopy(entry)
+        except (KeyError, TypeError):
+            subtree = None
+        changed = h5_group.get(rel_path)
+        if isinstance(changed, h5py.Group):
+            changed = read_dict_from_hdf5({}, changed)
+            if isinstance(subtree, dict):
+                _merge_dicts(subtree, changed)
+            else:
+                subtree = changed
+        if not isinstance(subtree, dict):
+            raise KeyError('"{}" not in snapshot'.format(path))
+        for d in deleted:
+            if d.startswith(rel_path + "/"):
+                d_keys = d[len(rel_path) + 1:].split("/")
+                entry = subtree
+                for key in d_keys[:-1]:
+                    entry = entry[_match_key(entry, key)]
+                del entry[_match_key(entry, d_keys[-1])]
+        subtrees[path] = subtree
+    return subtrees
+
+
+def _snapshot_store_of(h5_group):
+    folder = os.path.dirname(os.path.abspath(h5_group.file.filename))
+    store = SnapshotStore(os.path.join(folder, h5_group.attrs["snapshot_store"]))
+    base_hash = h5_group.attrs["snapshot_base"]
+    if not os.path.isfile(store.base_filepath(base_hash)):
+        raise FileNotFoundError(
+            'Base snapshot "{}" of "{}" not found in the snapshot store '
+            '"{}"'.format(base_hash, h5_group.file.filename, store.path)
+        )
+    return store
+
+
+def _apply_snapshot_delta(data_dict: dict, h5_group):
+    base_hash = data_dict.pop("snapshot_base")
+    data_dict.pop("snapshot_store")
+    deleted = data_dict.pop("snapshot_deleted", [])
+    snapshot = _snapshot_store_of(h5_group).get(base_hash)
+    for path in deleted:
+        path = path.split("/")
+        entry = snapshot
+        for key in path[:-1]:
+            entry = entry[_match_key(entry, key)]
+        del entry[_match_key(entry, path[-1])]
+    _merge_dicts(snapshot, data_dict)
+    data_dict.clear()
+    data_dict.update(snapshot)
+    return data_dict
+
+
+@functools.lru_cache(maxsize=8)
+def _read_base_snapshot(filepath: str):
+    # N.B. the base snapshots are never modified, the callers copy them
+    with h5py.File(filepath, "r") as f:
+        return read_dict_from_hdf5({}, f["Snapshot"])
+
+
+def _merge_dicts(base: dict, update: dict):
+    for key, item in update.items():
+        if isinstance(item, dict) and isinstance(base.get(key), dict):
+            _merge_dicts(base[key], item)
+        else:
+            base[key] = item
+
+
+def _match_key(d: dict, key: str):
+    # keys are read back as int if they represent an int
+    for k in d:
+        if str(k) == key:
+            return k
+    raise KeyError(key)
+
+
+def _count_entries(d: dict):
+    return sum(_count_entries(item) if isinstance(item, dict) else 1
+               for item in d.values())
+
+
+def _items_equal(a, b):
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, np.ndarray):
+        return a.shape == b.shape and a.dtype == b.dtype and np.array_equal(a, b)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(map(_items_equal, a, b))
+    if isinstance(a, dict):
+        return snapshot_delta(a, b) == ({}, [])
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _update_hash(h, item):
+    if isinstance(item, dict):
+        h.update(b"{")
+        for key in sorted(item, key=str):
+            h.update(repr(key).encode("utf-8") + b":")
+            _update_hash(h, item[key])
+        h.update(b"}")
+    elif isinstance(item, (list, tuple)):
+        h.update(type(item).__name__.encode("utf-8") + b"[")
+        for x in item:
+            _update_hash(h, x)
+        h.update(b"]")
+    elif isinstance(item, np.ndarray):
+        h.update("ndarray{}{}".format(item.dtype, item.shape).encode("utf-8"))
+        if item.dtype.hasobject:
+            h.update(repr(item.tolist()).encode("utf-8"))
+        else:
+            h.update(np.ascontiguousarray(item).tobytes())
+    else:
+        h.update(repr((type(item).__name__, item)).encode("utf-8"))
+
+
 def extract_pars_from_datafile(filepath: str, param_spec: dict) -> dict:
     """
     Extract parameters from an hdf5 datafile.
@@ -24,16 +24,27 @@ def bias_tee_correction(ysig, tau: float, sampling_rate: float=1,
     Corrects for a bias tee correction using a linear IIR filter with time
     constant tau.
     """
+    b, a = bias_tee_correction_coeffs(
+        tau=tau, sampling_rate=sampling_rate, inverse=inverse)
+    return signal.lfilter(b, a, ysig)
+
+
+def bias_tee_correction_coeffs(tau: float, sampling_rate: float=1,
+                               inverse: bool=False):
+    """
+    Returns the coefficients (b, a) of the linear IIR filter of the
+    bias_tee_correction, such that
+        filtered_signal = signal.lfilter(b, a, ysig)
+    """
     # factor 2 comes from bilinear transform
     k = 2*tau*sampling_rate
     b = [1, -1]
     a = [(k+1)/k, -(k-1)/k]
 
     if inverse:
-        filtered_signal = signal.lfilter(b, a, ysig)
+        return b, a
     else:
-        filtered_signal = signal.lfilter(a, b, ysig)
-    return filtered_signal
+        return a, b
 
 
 def exponential_decay_correction(ysig, tau: float, amp: float,
@@ -46,7 +57,19 @@ def exponential_decay_correction(ysig, tau: float, amp: float,
         y = gc*(1 + amp *exp(-t/tau))
     where gc is a gain correction factor that is ignored in the corrections.
     """
+    b, a = exponential_decay_correction_coeffs(
+        tau=tau, amp=amp, sampling_rate=sampling_rate, inverse=inverse)
+    return signal.lfilter(b, a, ysig)
 
+
+def exponential_decay_correction_coeffs(tau: float, amp: float,
+                                        sampling_rate: float=1,
+                                        inverse: bool=False):
+    """
+    Returns the coefficients (b, a) of the linear IIR filter of the
+    exponential_decay_correction, such that
+        filtered_signal = signal.lfilter(b, a, ysig)
+    """
     # alpha ~1/8 is like averaging 8 samples, sets the timescale for averaging
     # larger alphas break the approximation of the low pass filter
     # numerical instability occurs if alpha > .03
@@ -72,10 +95,9 @@ def exponential_decay_correction(ysig, tau: float, amp: float,
     # if alpha > 0.03 the filter can be unstable.
 
     if inverse:
-        filtered_signal = signal.lfilter(b, a, ysig)
+        return b, a
     else:
-        filtered_signal = signal.lfilter(a, b, ysig)
-    return filtered_signal
+        return a, b
 
 
 def bounce_correction(ysig, tau: float, amp: float,
@@ -341,43 +363,32 @@ def first_order_bounce_corr(sig, delay, amp, awg_sample_rate,
     Returns:
         sigout: Numpy array representing the output signal of the filter
     """
-    delay_n_samples = int(round(awg_sample_rate*delay))
-    if not 1 <= delay_n_samples < bufsize - 8:
-        raise ValueError(textwrap.dedent("""
-            The maximum delay ("{}"/ {:.2f}ns)needs to be less than {:d} (bufsize-8) AWG samples to save hardware resources.
-            The delay needs to be at least 1 AWG sample.")
-            """.format(delay_n_samples, delay*1e9, bufsize - 8)))
-    if not -1 < amp < 1:
-        raise ValueError(
-            "The amplitude ({}) needs to be between -1 and 1.".format(amp))
+    delay_n_samples = _bounce_delay_samples(delay, amp, awg_sample_rate,
+                                            bufsize)
 
     # The scope sampling rate is equal to the AWG sampling rate by default.
     if scope_sample_rate is None:
         scope_sample_rate = awg_sample_rate
 
-    # Reserve buffer space for bounce compensation
-    shift_reg = np.zeros(delay_n_samples)
-
     awg_sample_incr = awg_sample_rate/scope_sample_rate
-
-    previous_awg_sample_cnt = 0
-    present_awg_sample_cnt = 0
-
     amp_hw = coef_round(amp, force_bshift=0)
 
-    sigout = np.zeros(len(sig))
-
-    for i, s in enumerate(sig):
-        # Compute output signal
-        sigout[i] = s + amp_hw*shift_reg[-1]
-
-        present_awg_sample_cnt += awg_sample_incr
-        awg_sample_diff = int(present_awg_sample_cnt) - previous_awg_sample_cnt
-        if awg_sample_diff >= 1:
-            # Update shift register with present scope sample
-            shift_reg[awg_sample_diff:] = shift_reg[:-awg_sample_diff]
-            shift_reg[:awg_sample_diff] = s*np.ones(awg_sample_diff)
-            previous_awg_sample_cnt = int(present_awg_sample_cnt)
+    sig = np.asarray(sig)
+    # The hardware keeps a shift register of the last delay_n_samples AWG
+    # samples, every scope sample pushes the number of AWG samples that
+    # passed (the increase of the AWG sample count) copies of itself.
+    # N.B. the cumulative sum adds the increments in the same order as a
+    # running count and therefore rounds identically.
+    awg_sample_cnt = np.cumsum(np.full(len(sig), awg_sample_incr)).astype(int)
+    # the number of pushes before each sample
+    nr_pushes = np.concatenate([[0], awg_sample_cnt])[:-1]
+    # the push at the end of the register and the sample that pushed it
+    push_idx = nr_pushes - delay_n_samples
+    valid = push_idx >= 0
+    src_idx = np.searchsorted(awg_sample_cnt, push_idx[valid], side='right')
+
+    sigout = np.array(sig, dtype=float)
+    sigout[valid] += amp_hw*sig[src_idx]
 
     if sim_hw_delay:
         sigout = sigdelay(sigout, int(round(8*(4+5)/awg_sample_incr)))
@@ -385,6 +396,35 @@ def first_order_bounce_corr(sig, delay, amp, awg_sample_rate,
     return sigout
 
 
+def first_order_bounce_corr_kern(delay, amp, awg_sample_rate, bufsize=256):
+    """
+    Returns the FIR filter kernel of first_order_bounce_corr for a scope
+    sampling rate equal to the AWG sampling rate, i.e.
+        first_order_bounce_corr(sig, delay, amp, awg_sample_rate)
+    equals
+        np.convolve(sig, kern)[:len(sig)]
+    """
+    delay_n_samples = _bounce_delay_samples(delay, amp, awg_sample_rate,
+                                            bufsize)
+    kern = np.zeros(delay_n_samples+1)
+    kern[0] = 1
+    kern[-1] = coef_round(amp, force_bshift=0)
+    return kern
+
+
+def _bounce_delay_samples(delay, amp, awg_sample_rate, bufsize):
+    delay_n_samples = int(round(awg_sample_rate*delay))
+    if not 1 <= delay_n_samples < bufsize - 8:
+        raise ValueError(textwrap.dedent("""
+            The maximum delay ("{}"/ {:.2f}ns)needs to be less than {:d} (bufsize-8) AWG samples to save hardware resources.
+            The delay needs to be at least 1 AWG sample.")
+            """.format(delay_n_samples, delay*1e9, bufsize - 8)))
+    if not -1 < amp < 1:
+        raise ValueError(
+            "The amplitude ({}) needs to be between -1 and 1.".format(amp))
+    return delay_n_samples
+
+
 # def first_order_bounce_corr_with_interpolation(sig, delay, amp, awg_sample_rate, scope_sample_rate = None, bufsize=256):
 #     """ This function simulates the real-time bounce correction.
 
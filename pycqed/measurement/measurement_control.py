@@ -1,7 +1,9 @@
+import os
 import types
 import logging
 import time
 import numpy as np
+from collections import OrderedDict
 from collections.abc import Iterable
 import operator
 from scipy.optimize import fmin_powell
@@ -15,6 +17,7 @@ from pycqed.utilities.general import (
     get_git_revision_hash,
 )
 from pycqed.utilities.get_default_datadir import get_default_datadir
+from pycqed.utilities import measurement_catalogue as mcat
 from pycqed.utilities.general import get_module_name
 
 # Used for auto qcodes parameter wrapping
@@ -131,6 +134,17 @@ class MeasurementControl(Instrument):
             vals=vals.Ints(1),
             initial_value=4000,
         )
+        self.add_parameter(
+            "plotting_decimation_pts",
+            label="Maximum number of points per curve of the main plotmon",
+            docstring="Above this number of points the main plot monitor "
+            "shows, per bin of consecutive points, only the points with the "
+            "minimum and maximum value. plotting_max_pts does not apply to "
+            "the decimated plots. Set to 0 to disable the decimation.",
+            parameter_class=ManualParameter,
+            vals=vals.Ints(0),
+            initial_value=2000,
+        )
         self.add_parameter(
             "verbose",
             parameter_class=ManualParameter,
@@ -143,6 +157,17 @@ class MeasurementControl(Instrument):
             vals=vals.Bool(),
             initial_value=live_plot_enabled,
         )
+        self.add_parameter(
+            "publish_in_background",
+            docstring="If True the plot monitors and the instrument monitor "
+            "are updated in a background thread, such that the acquisition "
+            "does not wait on the plotting. Updates that are not published "
+            "yet are replaced by newer updates. The plot monitors of "
+            "adaptive runs are always updated in the measurement loop.",
+            parameter_class=ManualParameter,
+            vals=vals.Bool(),
+            initial_value=True,
+        )
         self.add_parameter(
             "plotting_interval",
             unit="s",
@@ -179,7 +204,45 @@ class MeasurementControl(Instrument):
             "instrument_monitor",
             parameter_class=ManualParameter,
             initial_value=None,
-            vals=vals.Strings(),
+            vals=vals.MultiType(vals.Strings(), vals.Enum(None)),
+        )
+
+        self.add_parameter(
+            "datasaving_chunk_rows",
+            docstring="Number of rows per hdf5 chunk of the experimental data "
+            "dataset. Data is also preallocated in memory in multiples of this.",
+            parameter_class=ManualParameter,
+            vals=vals.Ints(1),
+            initial_value=1024,
+        )
+        self.add_parameter(
+            "datasaving_flush_interval",
+            unit="s",
+            docstring="Maximum time that acquired data is kept in memory "
+            "before it is written to the hdf5 file.",
+            parameter_class=ManualParameter,
+            vals=vals.Numbers(min_value=0),
+            initial_value=5,
+        )
+        self.add_parameter(
+            "datasaving_flush_rows",
+            docstring="Maximum number of modified rows that are kept in "
+            "memory before they are written to the hdf5 file.",
+            parameter_class=ManualParameter,
+            vals=vals.Ints(1),
+            initial_value=10000,
+        )
+
+        self.add_parameter(
+            "snapshot_store",
+            docstring="Directory of a shared store of base snapshots, e.g. "
+            "in the datadir. If specified, the data files only contain the "
+            "entries of the instrument snapshot that differ from a base "
+            "snapshot in the store, see `hdf5_data.SnapshotStore`. "
+            "`hdf5_data.read_dict_from_hdf5` reconstructs the full snapshot.",
+            parameter_class=ManualParameter,
+            vals=vals.MultiType(vals.Strings(), vals.Enum(None)),
+            initial_value=None,
         )
 
         self.add_parameter(
@@ -196,6 +259,12 @@ class MeasurementControl(Instrument):
         self.plotting_interval(plotting_interval)
 
         self.soft_iteration = 0  # used as a counter for soft_avg
+        # Publishes the updates of the plot monitors and instrument monitor
+        self._publisher = mch.BackgroundPublisher(
+            name="{}_publisher".format(self.name)
+        )
+        self._reset_run_timing()
+        self._snapshot_store = None
         self._persist_dat = None
         self._persist_xlabs = None
         self._persist_ylabs = None
@@ -283,9 +352,22 @@ class MeasurementControl(Instrument):
         return_dict = {}
         self.last_sweep_pts = None  # used to prevent resetting same value
 
+        # Running mean and variance of the soft averages of hard measurements
+        self.soft_avg_accumulator = mch.RunningAverage()
+
+        self._reset_run_timing()
+        self._publisher.reset_stats()
+        t_start = time.perf_counter()
+
         with h5d.Data(
             name=self.get_measurement_name(), datadir=self.datadir()
         ) as self.data_object:
+            # Makes the measurement available to `a_tools.latest_data` and
+            # co. without re-scanning the datadir
+            mcat.register_measurement(
+                self.data_object.folder, datadir=self.datadir())
+            self.dset = None
+            self.shot_stream = None
             try:
 
                 check_keyboard_interrupt()
@@ -293,6 +375,7 @@ class MeasurementControl(Instrument):
                 if not disable_snapshot_metadata:
                     self.save_instrument_settings(self.data_object)
                 self.create_experimentaldata_dataset()
+                self.prepare_shot_stream()
 
                 self.plotting_bins = None
                 if exp_metadata is not None:
@@ -318,6 +401,17 @@ class MeasurementControl(Instrument):
                     raise ValueError('Mode "{}" not recognized.'.format(self.mode))
             except KeyboardFinish as e:
                 print(e)
+            finally:
+                # The last plot updates are published before returning
+                self._wait_for_publisher()
+                self._finish_run_timing(t_start)
+                # Data is buffered in memory during the measurement, make
+                # sure it ends up in the file, also if the measurement crashed
+                if self.dset is not None:
+                    self.dset.flush()
+                self.save_soft_avg_stderr(self.data_object)
+                if self.shot_stream is not None:
+                    self.shot_stream.save(self.data_object["Experimental Data"])
             result = self.dset[()]
             self.get_measurement_endtime()
             self.save_MC_metadata(self.data_object)  # timing labels etc
@@ -355,11 +449,13 @@ class MeasurementControl(Instrument):
 
             while self.get_percdone() < 100:
                 start_idx = self.get_datawriting_start_idx()
+                t_acq = time.perf_counter()
                 if len(self.sweep_functions) == 1:
                     self.sweep_functions[0].set_parameter(sweep_points[start_idx])
                     self.detector_function.prepare(
                         sweep_points=self.get_sweep_points().astype(np.float64)
                     )
+                    self._add_run_time("acquisition", t_acq)
                     self.measure_hard()
                 else:  # If mode is 2D
                     for i, sweep_function in enumerate(self.sweep_functions):
@@ -371,6 +467,7 @@ class MeasurementControl(Instrument):
                             start_idx : start_idx + self.xlen, 0
                         ].astype(np.float64)
                     )
+                    self._add_run_time("acquisition", t_acq)
                     self.measure_hard()
         else:
             raise Exception(
@@ -381,12 +478,14 @@ class MeasurementControl(Instrument):
             print(self.detector_function.detector_control)
 
         check_keyboard_interrupt()
+        t0 = time.perf_counter()
         self.update_instrument_monitor()
         self.update_plotmon(force_update=True)
         if self.mode == "2D":
             self.update_plotmon_2D(force_update=True)
         elif self.mode == "adaptive":
             self.update_plotmon_adaptive(force_update=True)
+        self._add_run_time("live_plot", t0)
         for sweep_function in self.sweep_functions:
             sweep_function.finish()
         self.detector_function.finish()
@@ -416,9 +515,22 @@ class MeasurementControl(Instrument):
         else:
             af_pars_list = [self.af_pars]
 
-        for sweep_function in self.sweep_functions:
-            sweep_function.prepare()
-        self.detector_function.prepare()
+        # In batch mode the points are measured in hardware sweeps, the sweep
+        # functions and detector are prepared for each batch of points
+        self.batch_size = self.af_pars.get("batch_size", None)
+        if self.batch_size is not None:
+            if self.detector_function.detector_control != "hard" or any(
+                sweep_function.sweep_control != "hard"
+                for sweep_function in self.sweep_functions
+            ):
+                raise ValueError(
+                    '"batch_size" requires hard sweep functions and a hard '
+                    "detector."
+                )
+        else:
+            for sweep_function in self.sweep_functions:
+                sweep_function.prepare()
+            self.detector_function.prepare()
         self.get_measurement_preparetime()
 
         # ######################################################################
@@ -477,8 +589,12 @@ class MeasurementControl(Instrument):
                     opt_func = lambda x: self.mk_optimization_function()(
                         flatten([x, X])
                     )
+                    batch_func = lambda xs: self.mk_optimization_function_batch()(
+                        [flatten([x, X]) for x in xs]
+                    )
                 else:
                     opt_func = self.mk_optimization_function()
+                    batch_func = self.mk_optimization_function_batch()
 
                 if is_subclass(self.adaptive_function, BaseLearner):
                     Learner = self.adaptive_function
@@ -545,17 +661,40 @@ class MeasurementControl(Instrument):
 
                         lu.tell_X_Y(self.learner, X=X0, Y=Y0, x_scale=self.x_scale)
 
-                    if "X0" in af_pars:
-                        # Tell the learner the initial points if provided
-                        lu.evaluate_X(self.learner, af_pars["X0"], x_scale=self.x_scale)
+                    if self.batch_size is None:
+                        if "X0" in af_pars:
+                            # Tell the learner the initial points if provided
+                            lu.evaluate_X(
+                                self.learner, af_pars["X0"], x_scale=self.x_scale
+                            )
 
-                    # N.B. the runner that is used is not an `adaptive.Runner` object
-                    # rather it is the `adaptive.runner.simple` function. This
-                    # ensures that everything runs in a single process, as is
-                    # required by QCoDeS (May 2018) and makes things simpler.
-                    self.runner = runner.simple(
-                        learner=self.learner, goal=af_pars["goal"]
-                    )
+                        # N.B. the runner that is used is not an `adaptive.Runner`
+                        # object rather it is the `adaptive.runner.simple`
+                        # function. This ensures that everything runs in a single
+                        # process, as is required by QCoDeS (May 2018) and makes
+                        # things simpler.
+                        self.runner = runner.simple(
+                            learner=self.learner, goal=af_pars["goal"]
+                        )
+                    else:
+                        # The learner is asked for `batch_size` points at a
+                        # time that are measured in a single hard sweep
+                        try:
+                            if "X0" in af_pars:
+                                lu.evaluate_X(
+                                    self.learner,
+                                    af_pars["X0"],
+                                    x_scale=self.x_scale,
+                                    batch_function=batch_func,
+                                )
+                            self.runner = lu.runner_batch(
+                                learner=self.learner,
+                                goal=af_pars["goal"],
+                                batch_function=batch_func,
+                                batch_size=self.batch_size,
+                            )
+                        except StopIteration:
+                            print("Reached f_termination: %s" % (self.f_termination))
 
                     # Only save optimization results if the sampling is a single
                     # adaptive run
@@ -593,12 +732,31 @@ class MeasurementControl(Instrument):
                             "adaptive_function",
                             "minimize",
                             "f_termination",
+                            "batch_size",
                         ]
                         for non_used_par in non_used_pars:
                             af_pars_copy.pop(non_used_par, None)
-                        self.adaptive_result = self.adaptive_function(
-                            self.mk_optimization_function(), **af_pars_copy
-                        )
+                        if self.batch_size is None:
+                            self.adaptive_result = self.adaptive_function(
+                                self.mk_optimization_function(), **af_pars_copy
+                            )
+                        elif get_module_name(self.adaptive_function, level=0) == "cma":
+                            # Each generation of CMA-ES is measured in a single
+                            # hard sweep
+                            options = dict(af_pars_copy.get("options", {}))
+                            options.setdefault("popsize", self.batch_size)
+                            af_pars_copy["options"] = options
+                            self.adaptive_result = self.adaptive_function(
+                                None,
+                                parallel_objective=batch_func,
+                                **af_pars_copy
+                            )
+                        else:
+                            raise ValueError(
+                                '"batch_size" is not supported for "{}".'.format(
+                                    self.adaptive_function
+                                )
+                            )
                     except StopIteration:
                         print("Reached f_termination: %s" % (self.f_termination))
 
@@ -627,13 +785,19 @@ class MeasurementControl(Instrument):
             sweep_function.finish()
         self.detector_function.finish()
         check_keyboard_interrupt()
+        t0 = time.perf_counter()
         self.update_instrument_monitor()
         self.update_plotmon(force_update=True)
         self.update_plotmon_adaptive(force_update=True)
+        self._add_run_time("live_plot", t0)
         return
 
     def measure_hard(self):
+        t_acq = time.perf_counter()
         new_data = np.array(self.detector_function.get_values()).astype(np.float64).T
+        self._add_run_time("acquisition", t_acq)
+        if self.shot_stream is not None:
+            return self.measure_hard_streaming(new_data)
 
         ###########################
         # Shape determining block #
@@ -645,24 +809,15 @@ class MeasurementControl(Instrument):
         new_datasetshape = (np.max([datasetshape[0], stop_idx]), datasetshape[1])
         self.dset.resize(new_datasetshape)
         len_new_data = stop_idx - start_idx
+        # The soft averages are accumulated in memory, the dataset only
+        # receives the updated mean
+        new_vals = self.soft_avg_accumulator.add(
+            start_idx, stop_idx, new_data.reshape(len_new_data, -1)
+        )
         if len(np.shape(new_data)) == 1:
-            old_vals = self.dset[start_idx:stop_idx, len(self.sweep_functions)]
-            new_vals = (new_data + old_vals * self.soft_iteration) / (
-                1 + self.soft_iteration
-            )
-
-            self.dset[start_idx:stop_idx, len(self.sweep_functions)] = new_vals.astype(
-                np.float64
-            )
+            self.dset[start_idx:stop_idx, len(self.sweep_functions)] = new_vals[:, 0]
         else:
-            old_vals = self.dset[start_idx:stop_idx, len(self.sweep_functions) :]
-            new_vals = (new_data + old_vals * self.soft_iteration) / (
-                1 + self.soft_iteration
-            )
-
-            self.dset[
-                start_idx:stop_idx, len(self.sweep_functions) :
-            ] = new_vals.astype(np.float64)
+            self.dset[start_idx:stop_idx, len(self.sweep_functions) :] = new_vals
         sweep_len = len(self.get_sweep_points().T)
 
         ######################
@@ -689,10 +844,28 @@ class MeasurementControl(Instrument):
                 pass
 
         check_keyboard_interrupt()
+        t0 = time.perf_counter()
         self.update_instrument_monitor()
         self.update_plotmon()
         if self.mode == "2D":
             self.update_plotmon_2D_hard()
+        self._add_run_time("live_plot", t0)
+        self.iteration += 1
+        self.print_progress(stop_idx)
+        return new_data
+
+    def measure_hard_streaming(self, new_data):
+        """
+        Adds the shots returned by a hard detector to the shot statistics
+        of the detector instead of storing them in the dataset.
+        """
+        start_idx, stop_idx = self.get_datawriting_indices_update_ctr(new_data)
+        self.shot_stream.add(start_idx, new_data.reshape(stop_idx - start_idx, -1))
+
+        check_keyboard_interrupt()
+        t0 = time.perf_counter()
+        self.update_instrument_monitor()
+        self._add_run_time("live_plot", t0)
         self.iteration += 1
         self.print_progress(stop_idx)
         return new_data
@@ -705,6 +878,7 @@ class MeasurementControl(Instrument):
             x = [x]
         if np.size(x) != len(self.sweep_functions):
             raise ValueError('size of x "%s" not equal to # sweep functions' % x)
+        t_acq = time.perf_counter()
         for i, sweep_function in enumerate(self.sweep_functions[::-1]):
             # If statement below tests if the value is different from the
             # last value that was set, if it is the same the sweep function
@@ -750,6 +924,7 @@ class MeasurementControl(Instrument):
         datasetshape = self.dset.shape
 
         vals = self.detector_function.acquire_data_point()
+        self._add_run_time("acquisition", t_acq)
         start_idx, stop_idx = self.get_datawriting_indices_update_ctr(vals)
         # Resizing dataset and saving
         new_datasetshape = (np.max([datasetshape[0], stop_idx]), datasetshape[1])
@@ -764,12 +939,14 @@ class MeasurementControl(Instrument):
         self.dset[start_idx:stop_idx, :] = new_vals.astype(np.float64)
         # update plotmon
         check_keyboard_interrupt()
+        t0 = time.perf_counter()
         self.update_instrument_monitor()
         self.update_plotmon()
         if self.mode == "2D":
             self.update_plotmon_2D()
         elif self.mode == "adaptive":
             self.update_plotmon_adaptive()
+        self._add_run_time("live_plot", t0)
         self.iteration += 1
         if self.mode != "adaptive":
             self.print_progress(stop_idx)
@@ -839,6 +1016,92 @@ class MeasurementControl(Instrument):
 
         return func
 
+    def measurement_function_batch(self, X):
+        """
+        Measurement function used for batches of adaptive points with a hard
+        detector. The points are given to the (hard) sweep functions as
+        sweep points and measured in a single hard sweep.
+
+        Args:
+            X (array): points, shape (number of points, number of sweep
+                functions)
+
+        Returns:
+            array of the values of the detector, shape (number of points,
+            number of values)
+        """
+        X = np.array(X, dtype=np.float64).reshape(len(X), -1)
+        if np.shape(X)[1] != len(self.sweep_functions):
+            raise ValueError('size of x "%s" not equal to # sweep functions' % X[0])
+        t_acq = time.perf_counter()
+        for i, sweep_function in enumerate(self.sweep_functions):
+            sweep_function.sweep_points = X[:, i]
+            sweep_function.prepare()
+        if len(self.sweep_functions) == 1:
+            self.detector_function.prepare(sweep_points=X[:, 0])
+        else:
+            self.detector_function.prepare(sweep_points=X)
+        vals = np.array(self.detector_function.get_values(), dtype=np.float64).T
+        vals = vals.reshape(len(X), -1)
+        self._add_run_time("acquisition", t_acq)
+
+        start_idx, stop_idx = self.get_datawriting_indices_update_ctr(vals)
+        datasetshape = self.dset.shape
+        new_datasetshape = (np.max([datasetshape[0], stop_idx]), datasetshape[1])
+        self.dset.resize(new_datasetshape)
+        self.dset[start_idx:stop_idx, :] = np.concatenate([X, vals], axis=1)
+
+        check_keyboard_interrupt()
+        t0 = time.perf_counter()
+        self.update_instrument_monitor()
+        self.update_plotmon()
+        self.update_plotmon_adaptive()
+        self._add_run_time("live_plot", t0)
+        self.iteration += 1
+        self.print_progress_adaptive()
+        return vals
+
+    def mk_optimization_function_batch(self):
+        """
+        Returns a wrapper around `measurement_function_batch`, the equivalent
+        of `mk_optimization_function` for a list of points.
+        """
+
+        def func(X):
+            """
+            Takes a list of points and returns the list of values, rescaled
+            and inverted as in `mk_optimization_function`.
+            Compares the measured values with "f_termination" after all
+            points have been measured and stored.
+            """
+            X = np.array(X, dtype=np.float64).reshape(len(X), -1)
+            if self.x_scale is not None:
+                X = X / np.array(self.x_scale, dtype=np.float64)
+
+            start_idx = self.get_datawriting_start_idx()
+            vals = self.measurement_function_batch(X)[:, self.par_idx]
+
+            # Keep track of the best seen points so far, in the order the
+            # points are stored
+            col_indx = len(self.sweep_function_names) + self.par_idx
+            comp_op = operator.lt if self.minimize_optimization else operator.gt
+            best_val = self.dset[self.adaptive_besteval_indxs[-1], col_indx]
+            for i, val in enumerate(vals):
+                if comp_op(val, best_val):
+                    best_val = val
+                    self.adaptive_besteval_indxs.append(start_idx + i)
+
+            if self.f_termination is not None:
+                if np.any(comp_op(vals, self.f_termination)):
+                    raise StopIteration()
+
+            if not self.minimize_optimization:
+                vals = -vals
+
+            return list(vals)
+
+        return func
+
     def finish(self, result):
         """
         Deletes arrays to clean up memory and avoid memory related mistakes
@@ -858,6 +1121,8 @@ class MeasurementControl(Instrument):
             "ylen",
             "iteration",
             "soft_iteration",
+            "soft_avg_accumulator",
+            "shot_stream",
         ]:
             try:
                 delattr(self, attr)
@@ -953,9 +1218,16 @@ class MeasurementControl(Instrument):
         )
 
     def initialize_plot_monitor(self):
+        # Pending updates refer to the traces of the previous measurement
+        self._wait_for_publisher()
         if self.main_QtPlot.traces != []:
             self.main_QtPlot.clear()
         self.curves = []
+        self.plotmon_decimator = None
+        if self.plotting_decimation_pts() > 0:
+            self.plotmon_decimator = mch.MinMaxDecimator(
+                max_bins=max(self.plotting_decimation_pts() // 2, 1)
+            )
         self.curves_mv_thresh = []
         xlabels = self.sweep_par_names
         xunits = self.sweep_par_units
@@ -969,12 +1241,23 @@ class MeasurementControl(Instrument):
             persist = True
         else:
             persist = False
+        if persist and self.plotmon_decimator is not None:
+            persist_decimator = mch.MinMaxDecimator(self.plotmon_decimator.max_bins)
+            persist_decimator.update(self._persist_dat)
         for yi, ylab in enumerate(ylabels):
             for xi, xlab in enumerate(xlabels):
                 if persist:  # plotting persist first so new data on top
-                    yp = self._persist_dat[:, yi + len(self.sweep_function_names)]
-                    xp = self._persist_dat[:, xi]
-                    if len(xp) < self.plotting_max_pts():
+                    y_col = yi + len(self.sweep_function_names)
+                    if self.plotmon_decimator is not None:
+                        persist_dat = self._persist_dat[persist_decimator.rows(y_col)]
+                    else:
+                        persist_dat = self._persist_dat
+                    yp = persist_dat[:, y_col]
+                    xp = persist_dat[:, xi]
+                    if (
+                        len(xp) < self.plotting_max_pts()
+                        or self.plotmon_decimator is not None
+                    ):
                         self.main_QtPlot.add(
                             x=xp,
                             y=yp,
@@ -1023,10 +1306,15 @@ class MeasurementControl(Instrument):
             self.main_QtPlot.win.nextRow()
 
     def update_plotmon(self, force_update=False):
-        # Note: plotting_max_pts takes precendence over force update
+        # Note: plotting_max_pts takes precendence over force update, it
+        # does not apply when the plotted data is decimated
+        decimator = getattr(self, "plotmon_decimator", None)
+        if self.plotting_bins is not None:
+            decimator = None
         if self.live_plot_enabled() and (
             self.dset.shape[0] < self.plotting_max_pts()
             or (self.plotting_bins is not None)
+            or (decimator is not None)
         ):
             i = 0
             try:
@@ -1042,10 +1330,21 @@ class MeasurementControl(Instrument):
                 ):
 
                     nr_sweep_funcs = len(self.sweep_function_names)
+                    # (trace, config) of the traces to update
+                    trace_data = []
+                    if decimator is not None:
+                        # Only the new and modified rows are processed
+                        decimator.update(self.dset, self.dset.pop_modified_rows())
+                    else:
+                        rows = self.dset[:, :]
                     for y_ind in range(len(self.detector_function.value_names)):
+                        if decimator is not None:
+                            rows = self.dset[
+                                decimator.rows(nr_sweep_funcs + y_ind)
+                            ]
                         for x_ind in range(nr_sweep_funcs):
-                            x = self.dset[:, x_ind]
-                            y = self.dset[:, nr_sweep_funcs + y_ind]
+                            x = rows[:, x_ind]
+                            y = rows[:, nr_sweep_funcs + y_ind]
 
                             # used to average e.g., single shot measuremnts
                             # can be specified in MC.run(exp_metadata['bins'])
@@ -1069,8 +1368,7 @@ class MeasurementControl(Instrument):
                                     axis=1,
                                 )
 
-                            self.curves[i]["config"]["x"] = x
-                            self.curves[i]["config"]["y"] = y
+                            trace_data.append((self.curves[i], {"x": x, "y": y}))
                             i += 1
 
                             if (
@@ -1090,16 +1388,19 @@ class MeasurementControl(Instrument):
                                         if self.minimize_optimization
                                         else -threshold
                                     )
-                                    self.curves_mv_thresh[x_ind]["config"]["x"] = [
-                                        min_x,
-                                        max_x,
-                                    ]
-                                    self.curves_mv_thresh[x_ind]["config"]["y"] = [
-                                        threshold,
-                                        threshold,
-                                    ]
+                                    trace_data.append(
+                                        (
+                                            self.curves_mv_thresh[x_ind],
+                                            {
+                                                "x": [min_x, max_x],
+                                                "y": [threshold, threshold],
+                                            },
+                                        )
+                                    )
                     self._mon_upd_time = time.time()
-                    self.main_QtPlot.update_plot()
+                    self._publish(
+                        "plotmon", self._update_traces, self.main_QtPlot, trace_data
+                    )
             except Exception as e:
                 log.warning(e)
 
@@ -1111,6 +1412,7 @@ class MeasurementControl(Instrument):
         works). It should be easy to extend this function for more vals.
         """
         if self.live_plot_enabled():
+            self._wait_for_publisher()
             self.time_last_2Dplot_update = time.time()
             n = len(self.sweep_pts_y)
             m = len(self.sweep_pts_x)
@@ -1154,9 +1456,6 @@ class MeasurementControl(Instrument):
                 for j in range(len(self.detector_function.value_names)):
                     z_ind = len(self.sweep_functions) + j
                     self.TwoD_array[y_ind, x_ind, j] = self.dset[i, z_ind]
-                self.secondary_QtPlot.traces[j]["config"]["z"] = self.TwoD_array[
-                    :, :, j
-                ]
                 if (
                     time.time() - self.time_last_2Dplot_update
                     > self.plotting_interval()
@@ -1164,7 +1463,7 @@ class MeasurementControl(Instrument):
                     or force_update
                 ):
                     self.time_last_2Dplot_update = time.time()
-                    self.secondary_QtPlot.update_plot()
+                    self._publish_plotmon_2D()
             except Exception as e:
                 log.warning(e)
 
@@ -1838,9 +2137,6 @@ class MeasurementControl(Instrument):
                     self.TwoD_array[y_ind, :, j] = self.dset[
                         i * self.xlen : (i + 1) * self.xlen, z_ind
                     ]
-                    self.secondary_QtPlot.traces[j]["config"]["z"] = self.TwoD_array[
-                        :, :, j
-                    ]
 
                 if (
                     time.time() - self.time_last_2Dplot_update
@@ -1848,10 +2144,31 @@ class MeasurementControl(Instrument):
                     or self.iteration == len(self.sweep_points) / self.xlen
                 ):
                     self.time_last_2Dplot_update = time.time()
-                    self.secondary_QtPlot.update_plot()
+                    self._publish_plotmon_2D()
         except Exception as e:
             log.warning(e)
 
+    def _publish_plotmon_2D(self):
+        # The published arrays are copies, the TwoD_array keeps being
+        # filled during the update
+        trace_data = [
+            (self.secondary_QtPlot.traces[j], {"z": self.TwoD_array[:, :, j].copy()})
+            for j in range(len(self.detector_function.value_names))
+        ]
+        self._publish(
+            "plotmon_2D", self._update_traces, self.secondary_QtPlot, trace_data
+        )
+
+    @staticmethod
+    def _update_traces(plot, trace_data):
+        """
+        Sets the config of the traces in trace_data, a list of
+        (trace, config) tuples, and updates the plot.
+        """
+        for trace, config in trace_data:
+            trace["config"].update(config)
+        plot.update_plot()
+
     def _set_plotting_interval(self, plotting_interval):
         if hasattr(self, "main_QtPlot"):
             self.main_QtPlot.interval = plotting_interval
@@ -1869,7 +2186,82 @@ class MeasurementControl(Instrument):
     def update_instrument_monitor(self):
         if self.instrument_monitor() is not None:
             inst_mon = self.find_instrument(self.instrument_monitor())
-            inst_mon.update()
+            # The monitor only reads the cached values of the parameters
+            # and has its own plotting process, so it is also published in
+            # adaptive runs
+            if self.publish_in_background():
+                self._publisher.submit("instrument_monitor", inst_mon.update)
+            else:
+                inst_mon.update()
+
+    #############################################
+    # Background publishing and timing of a run #
+    #############################################
+
+    def _publish(self, key, func, *args):
+        """
+        Executes func(*args) in the background publisher if
+        publish_in_background is enabled, immediately otherwise.
+        A pending task with the same key is replaced.
+
+        Adaptive runs always publish immediately: their plot monitors
+        write the traces and update the secondary plot in the measurement
+        loop, and the plots are not thread-safe.
+        """
+        if self.publish_in_background() and self.mode != "adaptive":
+            self._publisher.submit(key, func, *args)
+        else:
+            func(*args)
+
+    def _wait_for_publisher(self):
+        if self._publisher.is_alive:
+            self._publisher.wait()
+
+    def _reset_run_timing(self):
+        self.run_timing = OrderedDict(
+            [
+                ("total", 0.0),
+                ("acquisition", 0.0),
+                ("overhead", 0.0),
+                ("live_plot", 0.0),
+                ("publisher", 0.0),
+            ]
+        )
+
+    def _add_run_time(self, step, t0):
+        self.run_timing[step] += time.perf_counter() - t0
+
+    def _finish_run_timing(self, t_start):
+        """
+        Completes `run_timing`, the time in seconds of the last run spent
+            total:       in the run, including the preparation
+            acquisition: setting sweep points and acquiring/preparing the
+                         detector
+            overhead:    total - acquisition
+            live_plot:   updating the monitors in the measurement loop
+            publisher:   updating the monitors in the background publisher
+        """
+        timing = self.run_timing
+        timing["total"] = time.perf_counter() - t_start
+        timing["overhead"] = timing["total"] - timing["acquisition"]
+        timing["publisher"] = self._publisher.stats["busy_time"]
+        log.info(
+            "{}: {:.2f} s total, {:.2f} s acquisition, {:.2f} s overhead, "
+            "{:.2f} s live plotting, {:.2f} s in the background "
+            "publisher".format(
+                self.name,
+                timing["total"],
+                timing["acquisition"],
+                timing["overhead"],
+                timing["live_plot"],
+                timing["publisher"],
+            )
+        )
+
+    def close(self):
+        if hasattr(self, "_publisher"):
+            self._publisher.stop()
+        super().close()
 
     ##################################
     # Small helper/utility functions #
@@ -1904,14 +2296,16 @@ class MeasurementControl(Instrument):
 
     def create_experimentaldata_dataset(self):
         data_group = self.data_object.create_group("Experimental Data")
-        self.dset = data_group.create_dataset(
+        # Rows are buffered in memory and written to the file in blocks,
+        # writing to the file for every data point is slow for long sweeps
+        self.dset = h5d.BufferedDataset(
+            data_group,
             "Data",
-            (0, len(self.sweep_functions) + len(self.detector_function.value_names)),
-            maxshape=(
-                None,
-                len(self.sweep_functions) + len(self.detector_function.value_names),
-            ),
+            ncols=len(self.sweep_functions) + len(self.detector_function.value_names),
             dtype="float64",
+            chunk_rows=self.datasaving_chunk_rows(),
+            flush_interval=self.datasaving_flush_interval(),
+            flush_rows=self.datasaving_flush_rows(),
         )
         self.get_column_names()
         self.dset.attrs["column_names"] = h5d.encode_to_utf8(self.column_names)
@@ -1931,6 +2325,24 @@ class MeasurementControl(Instrument):
             self.detector_function.value_units
         )
 
+    def prepare_shot_stream(self):
+        """
+        Streaming of single shots is enabled by hard detectors that have a
+        `shot_stream` (see measurement_control_helpers.ShotStatistics),
+        the shots are then reduced to statistics while they are acquired
+        and not stored in the dataset.
+        """
+        shot_stream = getattr(self.detector_function, "shot_stream", None)
+        if shot_stream is None or self.detector_function.detector_control != "hard":
+            return
+        self.shot_stream = shot_stream
+        self.shot_stream.reset()
+        if self.shot_stream.archive_raw_shots:
+            self.shot_stream.open_archive(
+                self.data_object["Experimental Data"],
+                len(self.detector_function.value_names),
+            )
+
     def create_experiment_result_dict(self):
         try:
             # only exists as an open dataset when running an
@@ -1951,8 +2363,29 @@ class MeasurementControl(Instrument):
             "value_units": self.detector_function.value_units,
             "opt_res": opt_res,
         }
+        if self.shot_stream is not None:
+            result_dict["shot_statistics"] = self.shot_stream.result()
         return result_dict
 
+    def save_soft_avg_stderr(self, data_object):
+        """
+        Saves the standard error of the mean of soft averaged hard
+        measurements to the data file. The standard error is saved at
+            file['Experimental Data']['Standard error']
+        with one column per detector value.
+        """
+        acc = self.soft_avg_accumulator
+        if acc.count is None or np.max(acc.count) < 2:
+            return
+        stderr_dset = data_object["Experimental Data"].create_dataset(
+            "Standard error", data=acc.stderr
+        )
+        nr_sweep_funcs = len(self.sweep_functions)
+        stderr_dset.attrs["column_names"] = h5d.encode_to_utf8(
+            self.column_names[nr_sweep_funcs : nr_sweep_funcs + acc.mean.shape[1]]
+        )
+        stderr_dset.attrs["soft_averages"] = int(np.max(acc.count))
+
     def save_optimization_settings(self):
         """
         Saves the parameters used for optimization
@@ -2107,7 +2540,12 @@ class MeasurementControl(Instrument):
                 # but was saved as a string
                 snap, keys=exclude_keys, types_to_str={complex})
 
-            h5d.write_dict_to_hdf5(cleaned_snapshot, entry_point=snap_grp)
+            if self.snapshot_store() is not None:
+                self.get_snapshot_store().write_snapshot(
+                    cleaned_snapshot, entry_point=snap_grp
+                )
+            else:
+                h5d.write_dict_to_hdf5(cleaned_snapshot, entry_point=snap_grp)
 
             if self.save_legacy_snapshot:
                 # Below is old style saving of snapshot, exists for the sake of
@@ -2125,6 +2563,21 @@ class MeasurementControl(Instrument):
                             val = ""
                         instrument_grp.attrs[p_name] = str(val)
 
+    def get_snapshot_store(self):
+        """
+        Returns the `hdf5_data.SnapshotStore` of the snapshot_store
+        directory. The store keeps the base snapshot in memory and is reused
+        as long as the directory does not change.
+        """
+        path = self.snapshot_store()
+        if path is None:
+            return None
+        if self._snapshot_store is None or self._snapshot_store.path != os.path.abspath(
+            path
+        ):
+            self._snapshot_store = h5d.SnapshotStore(path)
+        return self._snapshot_store
+
     def save_MC_metadata(self, data_object=None, *args):
         """
         Save metadata on the MC (such as timings)
@@ -2142,6 +2595,10 @@ class MeasurementControl(Instrument):
         set_grp.attrs["measurement_name"] = self.measurement_name
         set_grp.attrs["live_plot_enabled"] = self.live_plot_enabled()
 
+        timing_grp = set_grp.create_group("Timing")
+        for step, t in self.run_timing.items():
+            timing_grp.attrs[step] = t
+
     @classmethod
     def save_exp_metadata(self, metadata: dict, data_object):
         """
@@ -2404,6 +2861,14 @@ class MeasurementControl(Instrument):
                                     is smaller than this value
             "par_idx": 0            If a parameter returns multiple values,
                                     specifies which one to use.
+            "batch_size": None      int, measures the points in batches of
+                                    this size, each in a single hard sweep.
+                                    Requires hard sweep functions, that get
+                                    the points as sweep_points in prepare,
+                                    and a hard detector. Supported for the
+                                    adaptive learners (asked for batch_size
+                                    points at a time) and cma.fmin (the
+                                    default population size is batch_size).
 
         Common keywords (used in python nelder_mead implementation):
             "x0":                   list of initial values
@@ -2411,6 +2876,20 @@ class MeasurementControl(Instrument):
             "no_improv_break"
             "maxiter"
         """
+        pars = adaptive_function_parameters
+        if pars.get("batch_size", None) is not None:
+            for af_pars in pars.get("adaptive_pars_list", [pars]):
+                adaptive_function = af_pars.get("adaptive_function")
+                if not (
+                    is_subclass(adaptive_function, BaseLearner)
+                    or get_module_name(adaptive_function, level=0) == "cma"
+                ):
+                    raise ValueError(
+                        '"batch_size" is not supported for "{}".'.format(
+                            adaptive_function
+                        )
+                    )
+
         self.af_pars = adaptive_function_parameters
 
         # x_scale is expected to be an array or list.
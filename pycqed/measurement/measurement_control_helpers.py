@@ -3,10 +3,16 @@ measurement_control.py is becoming very large
 
 this file is intended for small helpers to keep main file more clean
 """
+import time
+import logging
+import threading
+from collections import OrderedDict
 from collections.abc import Iterable
 from scipy.spatial import ConvexHull
 import numpy as np
 
+log = logging.getLogger(__name__)
+
 
 def scale_bounds(af_pars, x_scale=None):
     if x_scale is not None:
@@ -35,3 +41,547 @@ def scale_bounds(af_pars, x_scale=None):
                     af_pars[b_name] = scaled_bounds
 
     return True
+
+
+class RunningAverage:
+    """
+    In-memory accumulator for the soft averages of a hard measurement.
+
+    Uses Welford's online algorithm so that besides the running mean also
+    the variance, and thereby the standard error of the mean, is available
+    without storing the individual soft iterations. The accumulator grows
+    (geometrically) when rows beyond the current size are added.
+    """
+
+    def __init__(self):
+        self._nrows = 0
+        self._mean = None
+        self._M2 = None
+        self._count = None
+
+    @property
+    def mean(self):
+        return None if self._mean is None else self._mean[: self._nrows]
+
+    @property
+    def count(self):
+        return None if self._count is None else self._count[: self._nrows]
+
+    def add(self, start_idx: int, stop_idx: int, new_data):
+        """
+        Adds new_data (shape (stop_idx - start_idx, nr_values)) to the rows
+        start_idx:stop_idx of the accumulator.
+
+        Returns:
+            the updated mean of these rows.
+        """
+        new_data = np.asarray(new_data, dtype=np.float64)
+        if self._mean is None:
+            self._allocate(stop_idx, new_data.shape[1])
+        elif stop_idx > len(self._count):
+            self._allocate(max(stop_idx, 2 * len(self._count)), new_data.shape[1])
+        self._nrows = max(self._nrows, stop_idx)
+
+        self._count[start_idx:stop_idx] += 1
+        count = self._count[start_idx:stop_idx, None]
+        mean = self._mean[start_idx:stop_idx]
+        delta = new_data - mean
+        mean += delta / count
+        self._M2[start_idx:stop_idx] += delta * (new_data - mean)
+        return mean
+
+    @property
+    def variance(self):
+        """
+        Sample variance of the soft iterations, NaN for less than 2 samples.
+        """
+        count = self.count[:, None].astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = self._M2[: self._nrows] / (count - 1)
+        var[self.count < 2] = np.nan
+        return var
+
+    @property
+    def stderr(self):
+        """
+        Standard error of the mean, NaN for less than 2 samples.
+        """
+        return np.sqrt(self.variance / self.count[:, None])
+
+    def _allocate(self, nrows: int, ncols: int):
+        mean = np.zeros((nrows, ncols))
+        M2 = np.zeros((nrows, ncols))
+        count = np.zeros(nrows, dtype=np.int64)
+        if self._mean is not None:
+            mean[: self._nrows] = self._mean[: self._nrows]
+            M2[: self._nrows] = self._M2[: self._nrows]
+            count[: self._nrows] = self._count[: self._nrows]
+        self._mean, self._M2, self._count = mean, M2, count
+
+
+class ShotStatistics:
+    """
+    Streaming accumulator for single-shot measurements.
+
+    Instead of storing every shot in the datafile, the shots are reduced
+    as they are acquired to per segment
+        - the number of occurrences of every declared bitstring, obtained
+          by thresholding the shots of every channel,
+        - a histogram of the shots of every channel,
+        - the sum and the sum of squares of the shots of every channel,
+    where the segment of a shot is its index in the sweep modulo
+    `nr_segments` (e.g., the number of prepared states).
+    Optionally, the raw shots are archived in a compressed dataset.
+
+    A hard detector enables streaming by having a `shot_stream`
+    attribute containing a ShotStatistics object, the MeasurementControl
+    then saves the statistics to
+        file['Experimental Data']['Shot statistics']
+    instead of storing the shots in file['Experimental Data']['Data'].
+    """
+
+    def __init__(
+        self,
+        thresholds: list = None,
+        nr_segments: int = 1,
+        nr_bins: int = 100,
+        hist_range: tuple = None,
+        archive_raw_shots: bool = False,
+        archive_dtype: str = "float32",
+    ):
+        """
+        Args:
+            thresholds (list):
+                    threshold of every channel, a shot above the threshold
+                    is declared as 1. The bitstrings are only counted if
+                    thresholds are specified, the first channel corresponds
+                    to the most significant bit.
+            nr_segments (int):
+                    number of segments over which the statistics are
+                    accumulated separately.
+            nr_bins (int):
+                    number of bins of the histograms.
+            hist_range (tuple):
+                    (min, max) of the histograms of all channels. If None,
+                    the range of every channel is determined from the first
+                    chunk of shots, extended by half its width on both
+                    sides. Shots outside of the range are only counted in
+                    the underflow and overflow.
+            archive_raw_shots (bool):
+                    if True the shots are also stored in
+                    file['Experimental Data']['Raw shots'].
+            archive_dtype (str):
+                    data type of the archived shots.
+        """
+        self.thresholds = None if thresholds is None else np.asarray(
+            thresholds, dtype=np.float64)
+        self.nr_segments = int(nr_segments)
+        self.nr_bins = int(nr_bins)
+        self.hist_range = hist_range
+        self.archive_raw_shots = archive_raw_shots
+        self.archive_dtype = archive_dtype
+        self.reset()
+
+    def reset(self):
+        """
+        Clears the accumulated statistics, called at the start of a run.
+        """
+        self.nr_channels = None
+        self.bin_edges = None
+        self.nr_shots = np.zeros(self.nr_segments, dtype=np.int64)
+        self.counts = None
+        self.histograms = None
+        self.underflow = None
+        self.overflow = None
+        self.sums = None
+        self.sums_sq = None
+        self.archive = None
+
+    def open_archive(self, group, nr_channels: int, chunk_rows: int = 65536):
+        """
+        Creates the dataset "Raw shots" in group to which the shots are
+        appended.
+        """
+        self.archive = group.create_dataset(
+            "Raw shots",
+            (0, nr_channels),
+            maxshape=(None, nr_channels),
+            chunks=(chunk_rows, nr_channels),
+            dtype=self.archive_dtype,
+            compression="gzip",
+            shuffle=True,
+        )
+
+    def add(self, start_idx: int, new_data):
+        """
+        Adds a chunk of shots new_data (shape (nr_shots, nr_channels)),
+        the first of which has index start_idx in the sweep.
+        """
+        new_data = np.asarray(new_data, dtype=np.float64)
+        if new_data.ndim == 1:
+            new_data = new_data[:, None]
+        if self.nr_channels is None:
+            self._allocate(new_data)
+        nr_shots = len(new_data)
+        segments = (start_idx + np.arange(nr_shots)) % self.nr_segments
+
+        self.nr_shots += np.bincount(segments, minlength=self.nr_segments)
+        for ch in range(self.nr_channels):
+            self.sums[:, ch] += np.bincount(
+                segments, new_data[:, ch], minlength=self.nr_segments)
+            self.sums_sq[:, ch] += np.bincount(
+                segments, new_data[:, ch] ** 2, minlength=self.nr_segments)
+            self._add_to_histogram(ch, segments, new_data[:, ch])
+
+        if self.thresholds is not None:
+            bitstrings = np.zeros(nr_shots, dtype=np.int64)
+            for ch in range(self.nr_channels):
+                bit = (new_data[:, ch] > self.thresholds[ch]).astype(np.int64)
+                bitstrings |= bit << (self.nr_channels - 1 - ch)
+            nr_bitstrings = 2 ** self.nr_channels
+            self.counts += np.bincount(
+                segments * nr_bitstrings + bitstrings,
+                minlength=self.nr_segments * nr_bitstrings,
+            ).reshape(self.nr_segments, nr_bitstrings)
+
+        if self.archive is not None:
+            nr_archived = self.archive.shape[0]
+            self.archive.resize((nr_archived + nr_shots, self.nr_channels))
+            self.archive[nr_archived:] = new_data
+
+    @property
+    def mean(self):
+        """
+        Mean of the shots (segment, channel).
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.sums / self.nr_shots[:, None]
+
+    @property
+    def std(self):
+        """
+        Standard deviation of the shots (segment, channel).
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = self.sums_sq / self.nr_shots[:, None] - self.mean ** 2
+        return np.sqrt(np.clip(var, 0, None))
+
+    @property
+    def probabilities(self):
+        """
+        Fraction of the shots declared as every bitstring
+        (segment, bitstring).
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.counts / self.nr_shots[:, None]
+
+    def result(self):
+        """
+        Returns the accumulated statistics as a dict.
+        """
+        result = {
+            "nr_shots": self.nr_shots,
+            "mean": self.mean,
+            "std": self.std,
+            "histograms": self.histograms,
+            "bin_edges": self.bin_edges,
+            "underflow": self.underflow,
+            "overflow": self.overflow,
+        }
+        if self.thresholds is not None:
+            result.update({
+                "thresholds": self.thresholds,
+                "counts": self.counts,
+                "probabilities": self.probabilities,
+            })
+        return result
+
+    def save(self, group):
+        """
+        Saves the statistics to the group "Shot statistics" in group.
+        """
+        stats_group = group.create_group("Shot statistics")
+        stats_group.attrs["nr_segments"] = self.nr_segments
+        if self.nr_channels is None:
+            # nothing was acquired
+            return stats_group
+        for key, val in self.result().items():
+            stats_group.create_dataset(key, data=val)
+        return stats_group
+
+    def _allocate(self, new_data):
+        self.nr_channels = new_data.shape[1]
+        if self.thresholds is not None:
+            if len(self.thresholds) != self.nr_channels:
+                raise ValueError(
+                    "Expected {} thresholds, one for every channel, got "
+                    "{}".format(self.nr_channels, len(self.thresholds)))
+            self.counts = np.zeros(
+                (self.nr_segments, 2 ** self.nr_channels), dtype=np.int64)
+        self.sums = np.zeros((self.nr_segments, self.nr_channels))
+        self.sums_sq = np.zeros((self.nr_segments, self.nr_channels))
+        self.histograms = np.zeros(
+            (self.nr_channels, self.nr_segments, self.nr_bins), dtype=np.int64)
+        self.underflow = np.zeros(self.nr_channels, dtype=np.int64)
+        self.overflow = np.zeros(self.nr_channels, dtype=np.int64)
+
+        if self.hist_range is not None:
+            ranges = [self.hist_range] * self.nr_channels
+        else:
+            ranges = []
+            for ch in range(self.nr_channels):
+                lo, hi = np.nanmin(new_data[:, ch]), np.nanmax(new_data[:, ch])
+                margin = (hi - lo) / 2 if hi > lo else 0.5
+                ranges.append((lo - margin, hi + margin))
+        self.bin_edges = np.array(
+            [np.linspace(lo, hi, self.nr_bins + 1) for lo, hi in ranges])
+
+    def _add_to_histogram(self, ch: int, segments, values):
+        lo, hi = self.bin_edges[ch, 0], self.bin_edges[ch, -1]
+        bin_idx = np.floor(
+            (values - lo) / (hi - lo) * self.nr_bins).astype(np.int64)
+        # as np.histogram, the last bin includes the right edge
+        bin_idx[values == hi] = self.nr_bins - 1
+        self.underflow[ch] += np.count_nonzero(values < lo)
+        self.overflow[ch] += np.count_nonzero(values > hi)
+        inside = (bin_idx >= 0) & (bin_idx < self.nr_bins)
+        self.histograms[ch] += np.bincount(
+            segments[inside] * self.nr_bins + bin_idx[inside],
+            minlength=self.nr_segments * self.nr_bins,
+        ).reshape(self.nr_segments, self.nr_bins)
+
+
+class MinMaxDecimator:
+    """
+    Incremental min/max decimation of the rows of a dataset for live
+    plotting.
+
+    The rows are grouped in at most `max_bins` bins of consecutive rows
+    (in the order of acquisition). Of every bin only the rows with the
+    minimum and the maximum value are plotted, per column, such that the
+    plotted curve keeps the envelope of the data, including outliers.
+    When the number of rows exceeds the capacity of the bins, the bin width
+    is doubled by merging neighbouring bins.
+
+    Only the bins containing modified or new rows are updated, the cost of
+    an update is proportional to the number of new rows (plus one bin) and
+    not to the size of the dataset.
+    """
+
+    def __init__(self, max_bins: int = 1000):
+        if max_bins < 1:
+            raise ValueError("max_bins must be at least 1")
+        self.max_bins = int(max_bins)
+        self.reset()
+
+    def reset(self):
+        self.bin_width = 1
+        self.nrows = 0
+        self._imin = None
+        self._imax = None
+        self._vmin = None
+        self._vmax = None
+
+    @property
+    def nr_bins(self):
+        return -(-self.nrows // self.bin_width)
+
+    def update(self, dset, modified_rows=None):
+        """
+        Updates the bins with the rows of `dset` (an array or dataset of
+        shape (nrows, ncols)) that are new since the last update and the
+        rows in the [start, stop) range `modified_rows`.
+        """
+        nrows, ncols = np.shape(dset)
+        if self._imin is None or self._imin.shape[1] != ncols or nrows < self.nrows:
+            self.reset()
+            shape = (self.max_bins, ncols)
+            self._imin = np.zeros(shape, dtype=np.int64)
+            self._imax = np.zeros(shape, dtype=np.int64)
+            self._vmin = np.zeros(shape)
+            self._vmax = np.zeros(shape)
+
+        first_row = self.nrows
+        while nrows > self.max_bins * self.bin_width:
+            self._merge_bins()
+        if modified_rows is not None and modified_rows[0] < first_row:
+            start, stop = modified_rows
+            self._update_bins(dset, start // self.bin_width,
+                              -(-min(stop, first_row) // self.bin_width))
+        self.nrows = nrows
+        self._update_bins(dset, first_row // self.bin_width, self.nr_bins)
+
+    def rows(self, col: int):
+        """
+        Returns the indices of the rows to plot for column `col`, in the
+        order of acquisition.
+        """
+        if self.bin_width == 1:
+            return np.arange(self.nrows)
+        nb = self.nr_bins
+        idx = np.sort(np.stack(
+            [self._imin[:nb, col], self._imax[:nb, col]], axis=1), axis=1)
+        # drop the duplicates of bins with a single row or constant values
+        keep = np.ones(idx.shape, dtype=bool)
+        keep[:, 1] = idx[:, 1] != idx[:, 0]
+        return idx[keep]
+
+    def _update_bins(self, dset, k0: int, k1: int):
+        if k1 <= k0:
+            return
+        w = self.bin_width
+        start, stop = k0 * w, min(k1 * w, self.nrows)
+        vals = np.array(dset[start:stop], dtype=np.float64)
+        pad = (k1 - k0) * w - len(vals)
+        vals = np.concatenate([vals, np.full((pad, vals.shape[1]), np.nan)])
+        vals = vals.reshape(k1 - k0, w, -1)
+        nan = np.isnan(vals)
+        jmin = np.argmin(np.where(nan, np.inf, vals), axis=1)
+        jmax = np.argmax(np.where(nan, -np.inf, vals), axis=1)
+        offset = start + w * np.arange(k1 - k0)[:, None]
+        self._imin[k0:k1] = offset + jmin
+        self._imax[k0:k1] = offset + jmax
+        self._vmin[k0:k1] = np.take_along_axis(vals, jmin[:, None], 1)[:, 0]
+        self._vmax[k0:k1] = np.take_along_axis(vals, jmax[:, None], 1)[:, 0]
+        # bins without numbers are compared as if they were empty
+        self._vmin[k0:k1][np.isnan(self._vmin[k0:k1])] = np.inf
+        self._vmax[k0:k1][np.isnan(self._vmax[k0:k1])] = -np.inf
+
+    def _merge_bins(self):
+        nb = self.nr_bins
+        n_new = -(-nb // 2)
+        for i, v, better in [(self._imin, self._vmin, np.less),
+                             (self._imax, self._vmax, np.greater)]:
+            a, b = slice(0, nb, 2), slice(1, nb, 2)
+            ia, va = i[a].copy(), v[a].copy()
+            ib, vb = i[b], v[b]
+            nb_pairs = len(ib)
+            second = better(vb, va[:nb_pairs])
+            ia[:nb_pairs][second] = ib[second]
+            va[:nb_pairs][second] = vb[second]
+            i[:n_new], v[:n_new] = ia, va
+        self.bin_width *= 2
+
+
+class BackgroundPublisher:
+    """
+    Runs tasks, such as updating the plot monitors or the instrument
+    monitor, in a background thread so that the acquisition loop does not
+    wait on the GUI or on the serialization of snapshots.
+
+    Tasks are submitted under a key. A pending task is replaced by a newer
+    task with the same key (coalescing): only the latest update of a
+    monitor is published. At most `max_pending` tasks are pending, when a
+    task with a new key is submitted to a full queue the oldest pending
+    task is dropped. Submitting therefore never blocks.
+
+    The tasks are executed one at a time in the order of submission.
+    Exceptions raised by a task are logged and do not stop the thread.
+    """
+
+    def __init__(self, max_pending: int = 16, name: str = "BackgroundPublisher"):
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.max_pending = int(max_pending)
+        self.name = name
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopped = False
+        self._thread = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        Resets the counters in `stats`: the number of tasks submitted,
+        executed, coalesced (replaced by a newer task), dropped (queue
+        full) and failed, and the time spent executing tasks (busy_time).
+        """
+        with self._cond:
+            self.stats = {
+                "submitted": 0,
+                "executed": 0,
+                "coalesced": 0,
+                "dropped": 0,
+                "failed": 0,
+                "busy_time": 0.0,
+            }
+
+    @property
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._cond:
+            if self.is_alive:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Schedules `func(*args, **kwargs)`, replacing the pending task with
+        the same key. Starts the thread if it is not running.
+        """
+        if not self.is_alive:
+            self.start()
+        with self._cond:
+            self.stats["submitted"] += 1
+            if key in self._pending:
+                del self._pending[key]
+                self.stats["coalesced"] += 1
+            elif len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.stats["dropped"] += 1
+            self._pending[key] = (func, args, kwargs)
+            self._cond.notify_all()
+
+    def wait(self, timeout: float = None):
+        """
+        Waits until all pending tasks have been executed.
+
+        Returns:
+            False if the timeout expired, True otherwise.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Can not wait for the publisher from a task")
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not (self._pending and self.is_alive) and not self._busy,
+                timeout,
+            )
+
+    def stop(self, timeout: float = None):
+        """
+        Executes the pending tasks and stops the thread.
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopped)
+                if not self._pending:
+                    return
+                key, (func, args, kwargs) = self._pending.popitem(last=False)
+                self._busy = True
+            t0 = time.perf_counter()
+            failed = False
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                failed = True
+                log.warning("{}: task {} failed: {}".format(self.name, key, e))
+            finally:
+                with self._cond:
+                    self.stats["busy_time"] += time.perf_counter() - t0
+                    self.stats["executed"] += 1
+                    self.stats["failed"] += failed
+                    self._busy = False
+                    self._cond.notify_all()
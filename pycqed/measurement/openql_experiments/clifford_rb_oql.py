@@ -4,6 +4,9 @@ OpenQL sequence. FIXME: copy/paste error
 """
 
 import os
+import queue
+import threading
+import multiprocessing
 import numpy as np
 from pycqed.measurement.randomized_benchmarking import randomized_benchmarking as rb
 from pycqed.measurement.openql_experiments import openql_helpers as oqh
@@ -12,6 +15,7 @@ from pycqed.measurement.randomized_benchmarking.two_qubit_clifford_group import
     TwoQubitClifford,
     common_cliffords,
 )
+import pycqed.measurement.randomized_benchmarking.two_qubit_clifford_group as tqc
 import json
 import time
 from pycqed.utilities.general import check_keyboard_interrupt
@@ -19,6 +23,11 @@ import inspect
 from importlib import reload
 import logging
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
 reload(rb)
 
 log = logging.getLogger(__name__)
@@ -29,8 +38,14 @@ log = logging.getLogger(__name__)
 # likely due to code outside python
 # Not sure what this number should be, it is a trade off between memory
 # consumption and the overhead of having to start a new python process
+# N.B. only used when a `multiprocessing.Pool` is used, the `CompilationPool`
+# restarts the workers based on their memory usage instead
 maxtasksperchild = 4
 
+# Memory usage (resident set size) above which a worker of the
+# `CompilationPool` is restarted after finishing its task
+max_rss_per_worker = 2 * 2**30  # bytes
+
 
 def parallel_friendly_rb(rb_kw_dict):
     """
@@ -53,28 +68,297 @@ def parallel_friendly_rb(rb_kw_dict):
 def wait_for_rb_tasks(rb_tasks, refresh_rate: float = 4):
     """
     Blocks the main process till all tasks in `rb_tasks` are done
+
+    Args:
+        rb_tasks: `CompilationTasks` returned by `CompilationPool.map_async`
+            or the `AsyncResult` of a `multiprocessing.Pool`.
+        refresh_rate (float): time in seconds between progress updates
     """
     t0 = time.time()
     while not rb_tasks.ready():
-        # NB the _number_left is not the number of RB programs,
-        # it is an internal number of groups of compilation tasks (chunks)
-        # It is enough to have an indication of progress without
-        # compromising the efficiency
-        print(
-            "{} RB compilation tasks left."
-            " Elapsed waiting {:>7.1f}s".format(
-                np.sum(rb_tasks._number_left * rb_tasks._chunksize), time.time() - t0
-            ),
-            end="\r",
-        )
+        if isinstance(rb_tasks, CompilationTasks):
+            print(
+                "{}/{} RB compilation tasks done."
+                " Elapsed waiting {:>7.1f}s".format(
+                    rb_tasks.nr_done, rb_tasks.nr_tasks, time.time() - t0
+                ),
+                end="\r",
+            )
+        else:
+            print(
+                "Compiling RB sequences."
+                " Elapsed waiting {:>7.1f}s".format(time.time() - t0),
+                end="\r",
+            )
 
         # check for keyboard interrupt q because generating can be slow
         check_keyboard_interrupt()
-        time.sleep(refresh_rate)
+        rb_tasks.wait(refresh_rate)
 
     print("\nDone compiling RB sequences!")
 
 
+def _get_rss():
+    """
+    Returns the resident set size (bytes) of the current process or None
+    if it cannot be determined.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _compilation_worker(task_queue, result_queue, current_task, max_rss):
+    """
+    Main loop of the worker processes of the `CompilationPool`.
+
+    Sends ("done" | "error", task_id, value) messages to the main process.
+    The id of the task being executed is kept in the shared `current_task`
+    such that the task can be marked as failed if the worker crashes.
+    The worker quits after a task when its memory usage exceeds `max_rss`,
+    the pool starts a new worker to replace it.
+    """
+    pid = os.getpid()
+    # Load the clifford tables before the first task arrives
+    tqc.multiply_clifford_indices(0, 0, number_of_qubits=2)
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, func, arg = task
+        current_task.value = task_id
+        try:
+            result_queue.put(("done", task_id, func(arg)))
+        except Exception as e:
+            result_queue.put(("error", task_id, repr(e)))
+        current_task.value = -1
+
+        rss = _get_rss()
+        if max_rss is not None and rss is not None and rss > max_rss:
+            log.info("Restarting compilation worker {} using {:.0f} MB".format(
+                pid, rss / 2**20))
+            break
+
+
+class CompilationTasks:
+    """
+    Handle to a group of tasks sent to a `CompilationPool`, similar to the
+    `AsyncResult` of a `multiprocessing.Pool`.
+    """
+
+    def __init__(self, nr_tasks: int):
+        self.nr_tasks = nr_tasks
+        self.nr_done = 0
+        self._results = [None] * nr_tasks
+        self._errors = []
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        if nr_tasks == 0:
+            self._event.set()
+
+    def _set_result(self, index: int, value, error: str = None):
+        with self._lock:
+            self._results[index] = value
+            if error is not None:
+                self._errors.append(error)
+            self.nr_done += 1
+            if self.nr_done == self.nr_tasks:
+                self._event.set()
+
+    def ready(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float = None):
+        self._event.wait(timeout)
+
+    def successful(self) -> bool:
+        if not self.ready():
+            raise ValueError("Tasks not ready")
+        return len(self._errors) == 0
+
+    def get(self, timeout: float = None):
+        """
+        Returns the list of results of the tasks, raises a RuntimeError if
+        any of the tasks failed.
+        """
+        self.wait(timeout)
+        if not self.ready():
+            raise multiprocessing.TimeoutError()
+        if self._errors:
+            raise RuntimeError(
+                "{}/{} compilation tasks failed, first error: {}".format(
+                    len(self._errors), self.nr_tasks, self._errors[0]
+                )
+            )
+        return list(self._results)
+
+
+class CompilationPool:
+    """
+    Long lived pool of worker processes used to compile (RB) programs in
+    parallel.
+
+    Compared to a `multiprocessing.Pool(maxtasksperchild=...)` created for
+    every measurement, the workers are started once (lazily, on the first
+    tasks), already have pycqed/OpenQL imported and the clifford tables
+    loaded, and are only restarted when their memory usage exceeds
+    `max_worker_rss`.
+
+    Usage:
+        pool = CompilationPool()
+        rb_tasks = pool.map_async(parallel_friendly_rb, tasks_inputs)
+        wait_for_rb_tasks(rb_tasks)
+        programs_filenames = rb_tasks.get()
+        ...
+        pool.close()
+    """
+
+    def __init__(self, nr_processes: int = None, max_worker_rss: int = None):
+        """
+        Args:
+            nr_processes (int): number of worker processes, defaults to the
+                number of CPUs.
+            max_worker_rss (int): memory usage (bytes) above which a worker
+                is restarted, defaults to `max_rss_per_worker`.
+        """
+        self.nr_processes = nr_processes or os.cpu_count() or 1
+        self.max_worker_rss = max_worker_rss or max_rss_per_worker
+        self.nr_worker_starts = 0
+
+        self._workers = []  # (process, shared id of the current task)
+        self._tasks = {}  # task_id -> (CompilationTasks, index)
+        self._next_task_id = 0
+        self._lock = threading.Lock()
+        self._manager = None
+        self._closed = False
+
+    @property
+    def started(self) -> bool:
+        return self._manager is not None
+
+    def start(self):
+        """
+        Starts the worker processes, called automatically by `map_async`.
+        """
+        if self._closed:
+            raise ValueError("CompilationPool is closed")
+        if self.started:
+            return
+        ctx = multiprocessing.get_context()
+        self._ctx = ctx
+        self._task_queue = ctx.Queue()
+        self._result_queue = ctx.Queue()
+        self._maintain_workers()
+        self._manager = threading.Thread(
+            target=self._manage, name="CompilationPool", daemon=True)
+        self._manager.start()
+
+    def map_async(self, func, iterable) -> CompilationTasks:
+        """
+        Applies `func` to every element of `iterable` in the worker processes.
+        `func` must be a function defined at the top level of a module.
+        """
+        self.start()
+        args = list(iterable)
+        tasks = CompilationTasks(len(args))
+        with self._lock:
+            for index, arg in enumerate(args):
+                task_id = self._next_task_id
+                self._next_task_id += 1
+                self._tasks[task_id] = (tasks, index)
+                self._task_queue.put((task_id, func, arg))
+        return tasks
+
+    def close(self):
+        """
+        Stops the worker processes, pending tasks are discarded.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if not self.started:
+            return
+        self._manager.join()
+        # Drop the pending tasks such that the workers get the sentinels
+        # after their current task
+        while True:
+            try:
+                self._task_queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self._workers:
+            self._task_queue.put(None)
+        for process, _ in self._workers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self._workers = []
+        with self._lock:
+            for tasks, index in self._tasks.values():
+                tasks._set_result(index, None, "CompilationPool closed")
+            self._tasks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _maintain_workers(self):
+        """
+        Replaces workers that quit (memory usage) or crashed.
+        """
+        for process, current_task in list(self._workers):
+            if process.is_alive():
+                continue
+            process.join()
+            self._workers.remove((process, current_task))
+            if process.exitcode != 0 and current_task.value >= 0:
+                self._finish_task(
+                    current_task.value, None,
+                    "worker crashed with exitcode {}".format(process.exitcode))
+
+        while len(self._workers) < self.nr_processes:
+            current_task = self._ctx.Value("q", -1, lock=False)
+            process = self._ctx.Process(
+                target=_compilation_worker,
+                args=(self._task_queue, self._result_queue, current_task,
+                      self.max_worker_rss),
+                daemon=True,
+            )
+            process.start()
+            self._workers.append((process, current_task))
+            self.nr_worker_starts += 1
+
+    def _finish_task(self, task_id, value, error=None):
+        with self._lock:
+            tasks, index = self._tasks.pop(task_id, (None, None))
+        if tasks is not None:
+            tasks._set_result(index, value, error)
+
+    def _handle_messages(self, timeout: float):
+        while True:
+            try:
+                kind, task_id, value = self._result_queue.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if kind == "done":
+                self._finish_task(task_id, value)
+            else:
+                self._finish_task(task_id, None, value)
+            timeout = 0
+
+    def _manage(self):
+        while not self._closed:
+            self._handle_messages(timeout=0.1)
+            self._maintain_workers()
+
+
 def randomized_benchmarking(
     qubits: list,
     platf_cfg: str,
@@ -243,24 +527,47 @@ def randomized_benchmarking(
         except KeyError:
             raise ValueError("Could not find flux duration. Specify manually!")
 
+    if not simultaneous_single_qubit_RB and not simultaneous_single_qubit_parking_RB:
+        # Generate the sequences for all seeds at once, the sequences for the
+        # different nr_cliffords are truncations of the longest sequence.
+        # Even though no seed is provided we draw new seeds such that it is
+        # safe to generate and compile the random sequences in parallel
+        # using multiprocess
+        rb_seeds = np.random.RandomState().randint(
+            0, 2**31 - 1, size=(len(interleaving_cliffords), nr_seeds)
+        )
+        # As randomized_benchmarking_sequence(..., desired_net_cl=...), every
+        # sequence contains a recovery to the last net clifford, followed by
+        # the recovery to the net clifford of the kernel
+        seq_net_clifford = net_cliffords[-1]
+        rb_sequences = [
+            rb.randomized_benchmarking_sequences(
+                seeds,
+                max_n_cl=int(np.max(nr_cliffords)),
+                number_of_qubits=number_of_qubits,
+                desired_net_cl=seq_net_clifford,
+                max_clifford_idx=max_clifford_idx,
+                interleaving_cl=interleaving_cl,
+            )
+            for seeds, interleaving_cl in zip(rb_seeds, interleaving_cliffords)
+        ]
+
     for seed in range(nr_seeds):
         for j, n_cl in enumerate(nr_cliffords):
-            for interleaving_cl in interleaving_cliffords:
+            for intl_idx, interleaving_cl in enumerate(interleaving_cliffords):
                 if (
                     not simultaneous_single_qubit_RB
                     and not simultaneous_single_qubit_parking_RB
                 ):
                     # ############ 1 qubit, or 2 qubits using TwoQubitClifford
-                    # generate sequence
-                    for net_clifford in net_cliffords:
-                        cl_seq = rb.randomized_benchmarking_sequence(
-                            n_cl,
-                            number_of_qubits=number_of_qubits,
-                            desired_net_cl=net_clifford,
-                            max_clifford_idx=max_clifford_idx,
-                            interleaving_cl=interleaving_cl,
-                        )
-                    net_cl_seq = rb.calculate_net_clifford(cl_seq, Cl)
+                    # truncate the sequence, recovery_cls contains the
+                    # recovery to seq_net_clifford for every truncation
+                    cl_seqs, recovery_cls = rb_sequences[intl_idx]
+                    if interleaving_cl is None:
+                        cl_seq = cl_seqs[seed, : int(n_cl)]
+                    else:
+                        cl_seq = cl_seqs[seed, : 2 * int(n_cl)]
+                    cl_seq = np.append(cl_seq, recovery_cls[seed, int(n_cl)])
 
                     # decompose
                     cl_seq_decomposed = [None] * len(cl_seq)
@@ -278,7 +585,9 @@ def randomized_benchmarking(
                     # generate OpenQL kernel for every net_clifford
                     for net_clifford in net_cliffords:
                         # create decomposed sequence including recovery
-                        recovery_to_idx_clifford = net_cl_seq.get_inverse()
+                        recovery_to_idx_clifford = Cl(
+                            seq_net_clifford
+                        ).get_inverse()
                         recovery_clifford = Cl(net_clifford) * recovery_to_idx_clifford
                         cl_seq_decomposed_with_net = cl_seq_decomposed + [
                             recovery_clifford.gate_decomposition
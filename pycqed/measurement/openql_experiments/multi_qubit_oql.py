@@ -6,6 +6,7 @@ from pycqed.utilities.general import int2base, suppress_stdout
 from os.path import join
 from pycqed.instrument_drivers.meta_instrument.LutMans.flux_lutman import _def_lm as _def_lm_flux
 
+@oqh.cached_program
 def single_flux_pulse_seq(qubit_indices: tuple,
                           platf_cfg: str):
 
@@ -26,6 +27,7 @@ def single_flux_pulse_seq(qubit_indices: tuple,
     return p
 
 
+@oqh.cached_program
 def flux_staircase_seq(platf_cfg: str):
 
     p = oqh.create_program("flux_staircase_seq", platf_cfg)
@@ -46,6 +48,7 @@ def flux_staircase_seq(platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def multi_qubit_off_on(qubits: list,  initialize: bool,
                        second_excited_state: bool, platf_cfg: str,nr_flux_dance:int=None, wait_time : float=None):
     """
@@ -121,6 +124,7 @@ def multi_qubit_off_on(qubits: list,  initialize: bool,
 
     return p
 
+@oqh.cached_program
 def single_qubit_off_on(qubits: list,
                         qtarget,
                         initialize: bool,
@@ -168,6 +172,7 @@ def single_qubit_off_on(qubits: list,
 
     return p
 
+@oqh.cached_program
 def targeted_off_on(qubits: list,
                     q_target: int,
                     pulse_comb: str,
@@ -231,6 +236,7 @@ def targeted_off_on(qubits: list,
 
     return p
 
+@oqh.cached_program
 def Ramsey_msmt_induced_dephasing(qubits: list, angles: list, platf_cfg: str,
                                   target_qubit_excited: bool=False, wait_time=0,
                                   extra_echo=False):
@@ -292,6 +298,7 @@ def Ramsey_msmt_induced_dephasing(qubits: list, angles: list, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def echo_msmt_induced_dephasing(qubits: list, angles: list, platf_cfg: str,
                                 wait_time: float=0, target_qubit_excited: bool=False,
                                 extra_echo: bool=False):
@@ -371,6 +378,7 @@ def echo_msmt_induced_dephasing(qubits: list, angles: list, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def two_qubit_off_on(q0: int, q1: int, platf_cfg: str):
     '''
     off_on sequence on two qubits.
@@ -389,6 +397,7 @@ def two_qubit_off_on(q0: int, q1: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def two_qubit_tomo_cardinal(q0: int, q1: int, cardinal: int,  platf_cfg: str):
     '''
     Cardinal tomography for two qubits.
@@ -434,6 +443,7 @@ def two_qubit_tomo_cardinal(q0: int, q1: int, cardinal: int,  platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def two_qubit_AllXY(q0: int, q1: int, platf_cfg: str,
                     sequence_type='sequential',
                     replace_q1_pulses_with: str = None,
@@ -535,6 +545,7 @@ def two_qubit_AllXY(q0: int, q1: int, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def residual_coupling_sequence(times, q0: int, q_spectator_idx: list,
                                spectator_state: str, platf_cfg: str):
     """
@@ -592,6 +603,7 @@ def residual_coupling_sequence(times, q0: int, q_spectator_idx: list,
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def FluxTimingCalibration(qubit_idxs: list, platf_cfg: str,
                           flux_cw: str = 'fl_cw_02',
                           cal_points: bool = True):
@@ -723,6 +735,7 @@ def Cryoscope(
     return p
 
 
+@oqh.cached_program
 def CryoscopeGoogle(qubit_idx: int, buffer_time1, times, platf_cfg: str):
     """
     A Ramsey sequence with varying waiting times `times` around a flux pulse.
@@ -764,6 +777,7 @@ def CryoscopeGoogle(qubit_idx: int, buffer_time1, times, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def fluxed_ramsey(qubit_idx: int, wait_time: float,
                   flux_cw: str='fl_cw_02',
                   platf_cfg: str=''):
@@ -815,6 +829,7 @@ def fluxed_ramsey(qubit_idx: int, wait_time: float,
 # FIMXE: merge into the real chevron seq
 
 
+@oqh.cached_program
 def Chevron_hack(qubit_idx: int, qubit_idx_spec,
                  buffer_time, buffer_time2, platf_cfg: str):
     """
@@ -955,6 +970,7 @@ def Chevron(qubit_idx: int, qubit_idx_spec: int, qubit_idx_parks: int,
     return p
 
 
+@oqh.cached_program
 def two_qubit_ramsey(times, qubit_idx: int, qubit_idx_spec: int,
                      platf_cfg: str, target_qubit_sequence: str='excited'):
     """
@@ -1018,6 +1034,7 @@ def two_qubit_ramsey(times, qubit_idx: int, qubit_idx_spec: int,
     return p
 
 
+@oqh.cached_program
 def two_qubit_tomo_bell(bell_state, q0, q1,
                         platf_cfg, wait_after_flux: float=None
                         , flux_codeword: str='cz'):
@@ -1089,6 +1106,7 @@ def two_qubit_tomo_bell(bell_state, q0, q1,
     return p
 
 
+@oqh.cached_program
 def two_qubit_tomo_bell_by_waiting(bell_state, q0, q1,
                                    platf_cfg, wait_time: int=20):
     '''
@@ -1151,6 +1169,7 @@ def two_qubit_tomo_bell_by_waiting(bell_state, q0, q1,
     return p
 
 
+@oqh.cached_program
 def two_qubit_DJ(q0, q1, platf_cfg):
     '''
     Two qubit Deutsch-Josza.
@@ -1259,6 +1278,7 @@ def two_qubit_DJ(q0, q1, platf_cfg):
     return p
 
 
+@oqh.cached_program
 def single_qubit_parity_check(qD: int, qA: int, platf_cfg: str,
                               number_of_repetitions: int = 10,
                               initialization_msmt: bool=False,
@@ -1334,6 +1354,7 @@ def single_qubit_parity_check(qD: int, qA: int, platf_cfg: str,
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def two_qubit_parity_check(qD0: int, qD1: int, qA: int, 
                             platf_cfg: str,
                             echo: bool=False,
@@ -1534,6 +1555,7 @@ def two_qubit_parity_check(qD0: int, qD1: int, qA: int,
     return p
 
 
+@oqh.cached_program
 def conditional_oscillation_seq(q0: int, q1: int,
                                 q2: int = None, q3: int = None,
                                 platf_cfg: str = None,
@@ -1730,6 +1752,7 @@ def conditional_oscillation_seq(q0: int, q1: int,
     return p
 
 
+@oqh.cached_program
 def conditional_oscillation_seq_multi(
         Q_idxs_target,
         Q_idxs_control,
@@ -1901,6 +1924,7 @@ def conditional_oscillation_seq_multi(
 
     return p
 
+@oqh.cached_program
 def parity_check_flux_dance(
         Q_idxs_target: List[int],
         Q_idxs_control: List[int],
@@ -2069,6 +2093,7 @@ def parity_check_flux_dance(
 
     return p
 
+@oqh.cached_program
 def parity_check_fidelity(
         Q_idxs_ancilla,
         Q_idxs_data,
@@ -2177,6 +2202,7 @@ def parity_check_fidelity(
     return p
 
 
+@oqh.cached_program
 def grovers_two_qubit_all_inputs(q0: int, q1: int, platf_cfg: str,
                                  precompiled_flux: bool=True,
                                  second_CZ_delay: int=0,
@@ -2257,6 +2283,7 @@ def grovers_two_qubit_all_inputs(q0: int, q1: int, platf_cfg: str,
 
 
 
+@oqh.cached_program
 def grovers_two_qubits_repeated(qubits, platf_cfg: str,
                                 nr_of_grover_iterations: int):
     """
@@ -2330,6 +2357,7 @@ def grovers_two_qubits_repeated(qubits, platf_cfg: str,
 
 
 
+@oqh.cached_program
 def grovers_tomography(q0: int, q1: int, omega: int, platf_cfg: str,
                        precompiled_flux: bool=True,
                        cal_points: bool=True, second_CZ_delay: int=260,
@@ -2412,6 +2440,7 @@ def grovers_tomography(q0: int, q1: int, omega: int, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def CZ_poisoned_purity_seq(q0, q1, platf_cfg: str,
                            nr_of_repeated_gates: int,
                            cal_points: bool=True):
@@ -2570,6 +2599,7 @@ def CZ_restless_state_cycling(q0: str, q1: str, N: int=1):
     # qasm_file.writelines('RO {}\n'.format(q0))
 
 
+@oqh.cached_program
 def Chevron_first_manifold(qubit_idx: int, qubit_idx_spec: int,
                            buffer_time, buffer_time2, flux_cw: int, platf_cfg: str):
     """
@@ -2611,6 +2641,7 @@ def Chevron_first_manifold(qubit_idx: int, qubit_idx_spec: int,
     return p
 
 
+@oqh.cached_program
 def partial_tomography_cardinal(q0: int, q1: int, cardinal: int, platf_cfg: str,
                                 precompiled_flux: bool=True,
                                 cal_points: bool=True, second_CZ_delay: int=260,
@@ -2675,6 +2706,7 @@ def partial_tomography_cardinal(q0: int, q1: int, cardinal: int, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def two_qubit_VQE(q0: int, q1: int, platf_cfg: str):
     """
     VQE tomography for two qubits.
@@ -2717,6 +2749,7 @@ def two_qubit_VQE(q0: int, q1: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def sliding_flux_pulses_seq(
         qubits: list, platf_cfg: str,
         angles=np.arange(0, 360, 20), wait_time: int=0,
@@ -2805,6 +2838,7 @@ def sliding_flux_pulses_seq(
         p.set_sweep_points(p.sweep_points, len(p.sweep_points))
     return p
 
+@oqh.cached_program
 def two_qubit_state_tomography(qubit_idxs,
                                bell_state,
                                product_state,
@@ -2937,6 +2971,7 @@ def two_qubit_state_tomography(qubit_idxs,
     return p
 
 
+@oqh.cached_program
 def multi_qubit_Depletion(qubits: list, platf_cfg: str,
                           time: float):
     """
@@ -2992,6 +3027,7 @@ def multi_qubit_Depletion(qubits: list, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def two_qubit_Depletion(q0: int, q1: int, platf_cfg: str,
                         time: float,
                         sequence_type='sequential',
@@ -3087,6 +3123,7 @@ def two_qubit_Depletion(q0: int, q1: int, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def Two_qubit_RTE(QX: int , QZ: int, platf_cfg: str,
                   measurements: int, net='i', start_states: list = ['0'],
                   ramsey_time_1: int = 120, ramsey_time_2: int = 120,
@@ -3151,6 +3188,7 @@ def Two_qubit_RTE(QX: int , QZ: int, platf_cfg: str,
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def Two_qubit_RTE_pipelined(QX:int, QZ:int, QZ_d:int, platf_cfg: str,
                             measurements:int, start_states:list = ['0'],
                             ramsey_time: int = 120, echo:bool = False):
@@ -3208,6 +3246,7 @@ def Two_qubit_RTE_pipelined(QX:int, QZ:int, QZ_d:int, platf_cfg: str,
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def Ramsey_cross(wait_time: int,
                  angles: list,
                  q_rams: int,
@@ -3266,6 +3305,7 @@ def Ramsey_cross(wait_time: int,
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def TEST_RTE(QX:int , QZ:int, platf_cfg: str,
              measurements:int):
     """
@@ -3316,6 +3356,7 @@ def TEST_RTE(QX:int , QZ:int, platf_cfg: str,
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def multi_qubit_AllXY(qubits_idx: list, platf_cfg: str, double_points: bool = True):
     """
     Used for AllXY measurement and calibration for multiple qubits simultaneously.
@@ -3365,6 +3406,7 @@ def multi_qubit_AllXY(qubits_idx: list, platf_cfg: str, double_points: bool = Tr
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def multi_qubit_rabi(qubits_idx: list,platf_cfg: str = None):
   p = oqh.create_program("Multi_qubit_rabi", platf_cfg)
   k = oqh.create_kernel("rabi", p)
@@ -3376,6 +3418,7 @@ def multi_qubit_rabi(qubits_idx: list,platf_cfg: str = None):
   p = oqh.compile(p)
   return p
 
+@oqh.cached_program
 def multi_qubit_ramsey(times,qubits_idx: list, platf_cfg: str):
   n_qubits = len(qubits_idx)
   points = len(times[0])
@@ -3398,6 +3441,7 @@ def multi_qubit_ramsey(times,qubits_idx: list, platf_cfg: str):
   p = oqh.compile(p)
   return p
 
+@oqh.cached_program
 def multi_qubit_T1(times,qubits_idx: list, platf_cfg: str):
   n_qubits = len(qubits_idx)
   points = len(times[0])
@@ -3418,6 +3462,7 @@ def multi_qubit_T1(times,qubits_idx: list, platf_cfg: str):
   p = oqh.compile(p)
   return p  
 
+@oqh.cached_program
 def multi_qubit_Echo(times,qubits_idx: list, platf_cfg: str):
   n_qubits = len(qubits_idx) 
   points = len(times[0])
@@ -3448,6 +3493,7 @@ def multi_qubit_Echo(times,qubits_idx: list, platf_cfg: str):
   p = oqh.compile(p)
   return p 
 
+@oqh.cached_program
 def multi_qubit_flipping(number_of_flips,qubits_idx: list, platf_cfg: str,
                          equator: bool = False, cal_points: bool = True,
                          ax: str = 'x', angle: str = '180'):
@@ -3489,6 +3535,7 @@ def multi_qubit_flipping(number_of_flips,qubits_idx: list, platf_cfg: str,
   p = oqh.compile(p)
   return p  
 
+@oqh.cached_program
 def multi_qubit_motzoi(qubits_idx: list,platf_cfg: str = None):
   p = oqh.create_program("Multi_qubit_Motzoi", platf_cfg)
 
@@ -3564,6 +3611,7 @@ def multi_qubit_motzoi(qubits_idx: list,platf_cfg: str = None):
 #     p = oqh.compile(p)
 #     return p
     
+@oqh.cached_program
 def Ramsey_tomo(qR: list,
                 qC: list,
                 exc_specs: list,
@@ -1,8 +1,15 @@
 import re
+import os
+import time
+import shutil
+import pickle
+import hashlib
+import inspect
 import logging
+import functools
 import numpy as np
 from os import remove
-from os.path import join, dirname, isfile
+from os.path import join, dirname, isfile, isdir
 import json
 from typing import List, Tuple
 
@@ -24,6 +31,16 @@ output_dir = join(dirname(__file__), 'output')
 ql.set_option('output_dir', output_dir)
 ql.set_option('scheduler', 'ALAP')
 
+# Settings of the content addressed cache of compiled programs,
+# see `cached_program`. The cache is opt-in, set
+# `compile_cache_enabled = True` to use it
+compile_cache_enabled = False
+compile_cache_dir = join(output_dir, 'compile_cache')
+compile_cache_max_size = 2**30  # bytes
+# Files written by compiling a program `name` besides the program file
+# itself, `name + suffix`, they are cached when written by the compilation
+compile_cache_output_suffixes = ['.qasm', '_scheduled.qasm', '.map']
+
 
 def create_program(pname: str, platf_cfg: str, nregisters: int = 32):
     """
@@ -119,6 +136,235 @@ def is_compatible_openql_version_cc() -> bool:
     """
     return ql.get_version() >= '0.8.1.dev5'  # we need latest configuration file changes
 
+#############################################################################
+# Compilation cache
+#############################################################################
+
+
+def _update_hash(h, value):
+    """
+    Updates the hash object `h` with a representation of `value` that does
+    not depend on the identity of the objects (e.g. numpy arrays).
+    """
+    if isinstance(value, np.ndarray):
+        h.update('ndarray{}{}'.format(value.dtype.str, value.shape).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update('{}{}'.format(type(value).__name__, len(value)).encode())
+        for v in value:
+            _update_hash(h, v)
+    elif isinstance(value, dict):
+        h.update('dict{}'.format(len(value)).encode())
+        for k in sorted(value.keys(), key=repr):
+            _update_hash(h, k)
+            _update_hash(h, value[k])
+    else:
+        h.update(repr(value).encode())
+    h.update(b';')
+
+
+def get_compile_cache_key(func, *args, **kwargs) -> str:
+    """
+    Returns the key of a program in the compile cache, the sha256 hash of
+        - the name of the generator function `func`
+        - the source code of the openql_experiments package (generators,
+          calibration points etc.) and of the module of `func`
+        - the arguments of the call (including defaults)
+        - the contents of the platform configuration file `platf_cfg`
+        - the OpenQL version
+    """
+    bound_args = inspect.signature(func).bind(*args, **kwargs)
+    bound_args.apply_defaults()
+    arguments = dict(bound_args.arguments)
+    arguments.pop('recompile', None)
+
+    h = hashlib.sha256()
+    _update_hash(h, func.__module__ + '.' + func.__qualname__)
+    for fn in _compile_cache_source_files(func):
+        _update_hash(h, os.path.basename(fn))
+        _update_hash(h, get_file_sha256_hash(fn, return_hexdigest=True))
+    _update_hash(h, arguments)
+    platf_cfg = arguments.get('platf_cfg', None)
+    if platf_cfg is not None:
+        _update_hash(h, get_file_sha256_hash(platf_cfg, return_hexdigest=True))
+    _update_hash(h, ql.get_version())
+    return h.hexdigest()
+
+
+def _compile_cache_source_files(func) -> list:
+    """
+    Returns the source files the program generated by `func` depends on,
+    the modules of the openql_experiments package and the module of `func`.
+    """
+    package_dir = dirname(os.path.abspath(__file__))
+    fns = sorted(join(package_dir, fn) for fn in os.listdir(package_dir)
+                 if fn.endswith('.py'))
+    func_fn = os.path.abspath(inspect.getsourcefile(func))
+    if func_fn not in fns:
+        fns.append(func_fn)
+    return fns
+
+
+def _compile_cache_entry_dir(key: str) -> str:
+    return join(compile_cache_dir, key[:2], key)
+
+
+def _load_from_compile_cache(key: str, platf_cfg: str):
+    """
+    Copies the compiled files stored under `key` to the output directory and
+    returns a Program with the intended filename, or None if the key is not
+    in the cache.
+    """
+    entry_dir = _compile_cache_entry_dir(key)
+    meta_fn = join(entry_dir, 'meta.pickle')
+    try:
+        with open(meta_fn, 'rb') as f:
+            meta = pickle.load(f)
+        for fn in meta['files']:
+            shutil.copyfile(join(entry_dir, fn), join(output_dir, fn))
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError) as e:
+        if isdir(entry_dir):
+            log.warning('Ignoring corrupt compile cache entry {}: {}'.format(
+                entry_dir, e))
+        return None
+    # The modification time of the meta file is used for the LRU eviction
+    os.utime(meta_fn)
+
+    p = create_program(meta['name'], platf_cfg)
+    for attr, value in meta['attributes'].items():
+        setattr(p, attr, value)
+    log.info('Program "{}" taken from the compile cache {}'.format(
+        meta['name'], entry_dir))
+    return p
+
+
+def _store_in_compile_cache(key: str, p, t_start: float):
+    """
+    Stores the files written by compiling program `p` after `t_start` in the
+    compile cache.
+
+    The entry is written to a temporary directory that is renamed when
+    complete, such that (parallel) interrupted compilations never end up in
+    the cache.
+    """
+    entry_dir = _compile_cache_entry_dir(key)
+    if isdir(entry_dir):
+        return
+    output_fns = {os.path.basename(p.filename)} | {
+        p.name + suffix for suffix in compile_cache_output_suffixes}
+    files = [
+        entry.name for entry in os.scandir(p.output_dir)
+        if entry.is_file() and entry.name in output_fns
+        and entry.stat().st_mtime >= t_start
+    ]
+    if os.path.basename(p.filename) not in files:
+        log.warning('Compiled program {} not found, not cached'.format(
+            p.filename))
+        return
+    meta = {
+        'name': p.name,
+        'files': files,
+        'attributes': {attr: getattr(p, attr) for attr in
+                       ['sweep_points', 'combinations'] if hasattr(p, attr)},
+    }
+
+    tmp_dir = '{}.tmp{}'.format(entry_dir, os.getpid())
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        for fn in files:
+            shutil.copyfile(join(p.output_dir, fn), join(tmp_dir, fn))
+        with open(join(tmp_dir, 'meta.pickle'), 'wb') as f:
+            pickle.dump(meta, f)
+        os.rename(tmp_dir, entry_dir)
+    except OSError as e:
+        # e.g. another process stored the same program in the mean time
+        log.debug('Could not store {} in compile cache: {}'.format(
+            p.filename, e))
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+    evict_compile_cache(compile_cache_max_size)
+
+
+def evict_compile_cache(max_size: int = None):
+    """
+    Removes the least recently used programs from the compile cache until
+    the total size of the cache is below `max_size` (bytes).
+    Use `max_size=0` to clear the cache.
+    """
+    if max_size is None:
+        max_size = compile_cache_max_size
+    if not isdir(compile_cache_dir):
+        return
+    entries = []
+    total_size = 0
+    for prefix in os.scandir(compile_cache_dir):
+        if not prefix.is_dir():
+            continue
+        for entry in os.scandir(prefix.path):
+            meta_fn = join(entry.path, 'meta.pickle')
+            if not entry.is_dir() or not isfile(meta_fn):
+                continue  # incomplete entries are being written
+            size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            entries.append((os.stat(meta_fn).st_mtime, size, entry.path))
+            total_size += size
+
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total_size -= size
+
+
+def cached_program(func):
+    """
+    Decorator for functions that generate and compile an OpenQL program
+    (taking a `platf_cfg` argument and returning the compiled program).
+
+    Only active if `compile_cache_enabled` is True (default False).
+    The compiled files are stored in a content addressed cache (see
+    `get_compile_cache_key`). When the same program is requested again, the
+    files are copied from the cache to the output directory instead of
+    generating and compiling the program, which is logged at INFO level
+    together with the cache entry. The least recently used programs
+    are removed when the cache grows beyond `compile_cache_max_size`.
+    Only use it for generators that are determined by their arguments, not
+    for e.g. randomized benchmarking with unseeded random sequences.
+
+    If the function has a `recompile` argument it is respected:
+        True -> the program is compiled (and stored in the cache)
+        'as needed' -> the program is taken from the cache if possible
+        False -> the function is called unchanged
+    """
+    parameters = inspect.signature(func).parameters
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not compile_cache_enabled:
+            return func(*args, **kwargs)
+
+        bound_args = inspect.signature(func).bind(*args, **kwargs)
+        bound_args.apply_defaults()
+        recompile = bound_args.arguments.get('recompile', 'as needed')
+        if recompile is False:
+            return func(*args, **kwargs)
+
+        key = get_compile_cache_key(func, *args, **kwargs)
+        if recompile == 'as needed':
+            p = _load_from_compile_cache(key, bound_args.arguments['platf_cfg'])
+            if p is not None:
+                return p
+            if 'recompile' in parameters:
+                # Not in the cache, enforce compilation
+                bound_args.arguments['recompile'] = True
+
+        t_start = time.time() - 1  # margin for the file system time resolution
+        p = func(*bound_args.args, **bound_args.kwargs)
+        _store_in_compile_cache(key, p, t_start)
+        return p
+
+    return wrapper
+
+
 #############################################################################
 # Calibration points
 #############################################################################
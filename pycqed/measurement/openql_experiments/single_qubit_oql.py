@@ -5,6 +5,7 @@ from pycqed.measurement.randomized_benchmarking import \
 import pycqed.measurement.openql_experiments.openql_helpers as oqh
 
 
+@oqh.cached_program
 def CW_tone(qubit_idx: int, platf_cfg: str):
     """
     Sequence to generate an "always on" pulse or "ContinuousWave" (CW) tone.
@@ -21,6 +22,7 @@ def CW_tone(qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def vsm_timing_cal_sequence(qubit_idx: int, platf_cfg: str):
     """
     A sequence for calibrating the VSM timing delay.
@@ -40,6 +42,7 @@ def vsm_timing_cal_sequence(qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def CW_RO_sequence(qubit_idx: int, platf_cfg: str):
     """
     A sequence that performs readout back to back without initialization.
@@ -65,6 +68,7 @@ def CW_RO_sequence(qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def pulsed_spec_seq(qubit_idx: int, spec_pulse_length: float,
                     platf_cfg: str):
     """
@@ -92,6 +96,7 @@ def pulsed_spec_seq(qubit_idx: int, spec_pulse_length: float,
     return p
 
 
+@oqh.cached_program
 def pulsed_spec_seq_marked(qubit_idx: int, spec_pulse_length: float,
                            platf_cfg: str, trigger_idx: int, trigger_idx_2: int = None,
                            wait_time_ns: int = 0, cc: str = 'CCL'):
@@ -136,6 +141,7 @@ def pulsed_spec_seq_marked(qubit_idx: int, spec_pulse_length: float,
     return p
 
 
+@oqh.cached_program
 def pulsed_spec_seq_v2(qubit_idx: int, spec_pulse_length: float,
                        platf_cfg: str, trigger_idx: int):
     """
@@ -163,6 +169,7 @@ def pulsed_spec_seq_v2(qubit_idx: int, spec_pulse_length: float,
     return p
 
 
+@oqh.cached_program
 def flipping(qubit_idx: int, number_of_flips, platf_cfg: str,
              equator: bool = False, cal_points: bool = True,
              ax: str = 'x', angle: str = '180'):
@@ -228,6 +235,7 @@ def flipping(qubit_idx: int, number_of_flips, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def AllXY(qubit_idx: int, platf_cfg: str, double_points: bool = True):
     """
     Single qubit AllXY sequence.
@@ -280,6 +288,7 @@ def AllXY(qubit_idx: int, platf_cfg: str, double_points: bool = True):
     return p
 
 
+@oqh.cached_program
 def T1(
         qubit_idx: int,
         platf_cfg: str, 
@@ -340,6 +349,7 @@ def T1(
     return p
 
 
+@oqh.cached_program
 def T1_second_excited_state(times, qubit_idx: int, platf_cfg: str):
     """
     Single qubit T1 sequence for the second excited states.
@@ -384,6 +394,7 @@ def T1_second_excited_state(times, qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def Ramsey(times, qubit_idx: int, platf_cfg: str):
     """
     Single qubit Ramsey sequence.
@@ -417,6 +428,7 @@ def Ramsey(times, qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def complex_Ramsey(times, qubit_idx: int, platf_cfg: str):
     """
     Single qubit Ramsey sequence.
@@ -453,6 +465,7 @@ def complex_Ramsey(times, qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def echo(times, qubit_idx: int, platf_cfg: str):
     """
     Single qubit Echo sequence.
@@ -496,6 +509,7 @@ def echo(times, qubit_idx: int, platf_cfg: str):
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def CPMG(times, order: int, qubit_idx: int, platf_cfg: str):
     """
     Single qubit CPMG sequence.
@@ -545,6 +559,7 @@ def CPMG(times, order: int, qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def CPMG_SO(orders, tauN: int, qubit_idx: int, platf_cfg: str):
     """
     Single qubit CPMG sequence.
@@ -591,6 +606,7 @@ def CPMG_SO(orders, tauN: int, qubit_idx: int, platf_cfg: str):
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def spin_lock_simple(times, qubit_idx: int, platf_cfg: str, 
                      mw_gate_duration: float = 40e-9, 
                      tomo: bool = False):
@@ -645,6 +661,7 @@ def spin_lock_simple(times, qubit_idx: int, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def rabi_frequency(times, qubit_idx: int, platf_cfg: str, 
                     mw_gate_duration: float = 40e-9,
                     tomo: bool = False):
@@ -705,6 +722,7 @@ def rabi_frequency(times, qubit_idx: int, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def spin_lock_echo(times, qubit_idx: int, platf_cfg: str):
     """
     Single qubit Echo sequence.
@@ -752,6 +770,7 @@ def spin_lock_echo(times, qubit_idx: int, platf_cfg: str):
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def idle_error_rate_seq(nr_of_idle_gates,
                         states: list,
                         gate_duration_ns: int,
@@ -822,6 +841,7 @@ def idle_error_rate_seq(nr_of_idle_gates,
     return p
 
 
+@oqh.cached_program
 def single_elt_on(qubit_idx: int, platf_cfg: str):
     p = oqh.create_program('single_elt_on', platf_cfg)
 
@@ -836,6 +856,7 @@ def single_elt_on(qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def off_on(qubit_idx: int, pulse_comb: str, initialize: bool, platf_cfg: str,nr_flux_dance:float=None,wait_time:float=None):
     """
     Performs an 'off_on' sequence on the qubit specified.
@@ -901,6 +922,7 @@ def off_on(qubit_idx: int, pulse_comb: str, initialize: bool, platf_cfg: str,nr_
     return p
 
 
+@oqh.cached_program
 def butterfly(qubit_idx: int, initialize: bool, platf_cfg: str):
     """
     Performs a 'butterfly' sequence on the qubit specified.
@@ -938,6 +960,7 @@ def butterfly(qubit_idx: int, initialize: bool, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def RTE(qubit_idx: int, sequence_type: str, platf_cfg: str,
         net_gate: str, feedback=False):
     """
@@ -1062,6 +1085,7 @@ def randomized_benchmarking(qubit_idx: int, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def motzoi_XY(qubit_idx: int, platf_cfg: str,
               program_name: str = 'motzoi_XY'):
     '''
@@ -1112,6 +1136,7 @@ def Ram_Z(qubit_name,
     pass
 
 
+@oqh.cached_program
 def FluxTimingCalibration(qubit_idx: int, times, platf_cfg: str,
                           flux_cw: str = 'fl_cw_02',
                           cal_points: bool = True,
@@ -1147,6 +1172,7 @@ def FluxTimingCalibration(qubit_idx: int, times, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def TimingCalibration_1D(qubit_idx: int, times, platf_cfg: str,
                          # flux_cw: str = 'fl_cw_02',
                          cal_points: bool = True):
@@ -1182,6 +1208,7 @@ def TimingCalibration_1D(qubit_idx: int, times, platf_cfg: str,
     return p
 
 
+@oqh.cached_program
 def FluxTimingCalibration_2q(q0, q1, buffer_time1, times, platf_cfg: str):
     """
     A Ramsey sequence with varying waiting times `times` around a flux pulse.
@@ -1220,6 +1247,7 @@ def FluxTimingCalibration_2q(q0, q1, buffer_time1, times, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def FastFeedbackControl(latency, qubit_idx: int, platf_cfg: str):
     """
     Single qubit sequence to test fast feedback control (fast conditional
@@ -1282,6 +1310,7 @@ def FastFeedbackControl(latency, qubit_idx: int, platf_cfg: str):
     return p
 
 
+@oqh.cached_program
 def ef_rabi_seq(q0: int,
                 amps: list,
                 platf_cfg: str,
@@ -1338,6 +1367,7 @@ def ef_rabi_seq(q0: int,
     return p
 
 
+@oqh.cached_program
 def Depletion(time, qubit_idx: int, platf_cfg: str, double_points: bool):
     """
     Input pars:
@@ -1390,6 +1420,7 @@ def Depletion(time, qubit_idx: int, platf_cfg: str, double_points: bool):
     p = oqh.compile(p)
     return p
 
+@oqh.cached_program
 def TEST_RTE(qubit_idx: int, platf_cfg: str,
              measurements:int):
     """
@@ -1,5 +1,5 @@
 from pycqed.measurement.randomized_benchmarking.two_qubit_clifford_group \
-    import SingleQubitClifford, TwoQubitClifford
+    import SingleQubitClifford, TwoQubitClifford, construct_signed_perm_table
 from os.path import join, dirname, abspath
 from os import mkdir
 import numpy as np
@@ -34,6 +34,8 @@ def generate_hash_tables():
     with open(join(output_dir, 'two_qubit_hash_lut.txt'), 'w') as f:
         for h in two_qubit_hash_lut:
             f.write(str(h)+'\n')
+    np.save(join(output_dir, 'two_qubit_signed_perm_lut.npy'),
+            construct_signed_perm_table())
     print("Successfully generated Clifford hash tables.")
 
 if __name__ == '__main__':
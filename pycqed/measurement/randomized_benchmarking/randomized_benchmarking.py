@@ -28,35 +28,36 @@ def calculate_net_clifford(rb_clifford_indices, Clifford=tqc.SingleQubitClifford
         the reverse of what it would be in a chained dot product.
     """
 
-    # Calculate the net clifford
-    net_clifford = Clifford(0)  # assumes element 0 is the Identity
-    for idx in rb_clifford_indices:
-        # [2020-07-03 Victor] the `abs` below was to remove the sign that was
-        # used to treat CZ as CZ and not the member of CNOT-like set of gates
-        # Using negative sign convention (i.e. `-4368` for the interleaved CZ)
-        # was a bad choice because there is no such thing as negative zero and
-        # the clifford numer 0 is the identity that is necessary for
-        # benchmarking an idling identity with the same duration as the time
-        # allocated to the flux pulses, for example
-        # cliff = Clifford(abs(idx))  # Deprecated!
-        assert idx > -1, (
-            "The convention for interleaved gates has changed! "
-            + "See notes in this function. "
-            + "You probably need to specify {}".format(100_000 + abs(idx))
-        )
+    rb_clifford_indices = np.asarray(rb_clifford_indices, dtype=int)
+    # [2020-07-03 Victor] the `abs` below was to remove the sign that was
+    # used to treat CZ as CZ and not the member of CNOT-like set of gates
+    # Using negative sign convention (i.e. `-4368` for the interleaved CZ)
+    # was a bad choice because there is no such thing as negative zero and
+    # the clifford numer 0 is the identity that is necessary for
+    # benchmarking an idling identity with the same duration as the time
+    # allocated to the flux pulses, for example
+    # cliff = Clifford(abs(idx))  # Deprecated!
+    assert np.all(rb_clifford_indices > -1), (
+        "The convention for interleaved gates has changed! "
+        + "See notes in this function. "
+        + "You probably need to specify {}".format(
+            100_000 + abs(np.min(rb_clifford_indices)))
+    )
 
-        # In order to benchmark specific gates (and not cliffords), e.g. CZ but
-        # not as a member of the CNOT-like set of gates, or an identity with
-        # the same duration as the CZ we use, by convention, when specifying
-        # the interleaved gate, the index of the corresponding
-        # clifford + 100000, this is to keep it readable and bigger than the
-        # 11520 elements of the Two-qubit Clifford group C2
-        # corresponding clifford
-        cliff = Clifford(idx % 100_000)
-        # order of operators applied in is right to left, therefore
-        # the new operator is applied on the left side.
-        net_clifford = cliff * net_clifford
-    return net_clifford
+    # In order to benchmark specific gates (and not cliffords), e.g. CZ but
+    # not as a member of the CNOT-like set of gates, or an identity with
+    # the same duration as the CZ we use, by convention, when specifying
+    # the interleaved gate, the index of the corresponding
+    # clifford + 100000, this is to keep it readable and bigger than the
+    # 11520 elements of the Two-qubit Clifford group C2
+    # corresponding clifford
+    # The net clifford is calculated using the precomputed clifford tables,
+    # the order of operators applied in is right to left, i.e. each new
+    # operator is applied on the left side.
+    net_idx = tqc.net_clifford_index(
+        rb_clifford_indices % 100_000, Clifford.number_of_qubits
+    )
+    return Clifford(net_idx)
 
 
 def calculate_recovery_clifford(cl_in, desired_cl=0):
@@ -212,3 +213,87 @@ def randomized_benchmarking_sequence(
         recovery_clifford = Cl(desired_net_cl) * recovery_to_idx_clifford
         rb_clifford_indices = np.append(rb_clifford_indices, recovery_clifford.idx)
     return rb_clifford_indices
+
+
+def randomized_benchmarking_sequences(
+    seeds,
+    max_n_cl: int,
+    desired_net_cl: int = 0,
+    number_of_qubits: int = 1,
+    max_clifford_idx: int = 11520,
+    interleaving_cl: int = None,
+):
+    """
+    Generates randomized benchmarking sequences for many seeds at once
+    together with the recovery cliffords for all truncation lengths.
+
+    The random cliffords of each row are drawn in the same way as in
+    `randomized_benchmarking_sequence`, i.e., truncating row `i` to `n_cl`
+    cliffords and appending `recovery_cliffords[i, n_cl]` gives the same
+    sequence as
+
+        randomized_benchmarking_sequence(n_cl, desired_net_cl, ...,
+                                         seed=seeds[i])
+
+    The net cliffords of all prefixes are calculated at once using the
+    precomputed clifford tables (a vectorized prefix product).
+
+    Args:
+        seeds (list of ints): seeds used to initialize the random number
+            generator of each sequence (one row per seed).
+        max_n_cl       (int) : maximum number of Cliffords
+        desired_net_cl (int) : idx of the desired net clifford
+        number_of_qubits(int): used to determine if Cliffords are drawn
+            from the single qubit or two qubit clifford group.
+        max_clifford_idx (int): used to set the index of the highest random
+            clifford generated.
+        interleaving_cl (int): interleaves the sequences with a specific
+            clifford if desired
+    Returns:
+        rb_clifford_indices (array): shape (len(seeds), max_n_cl), or
+            (len(seeds), 2*max_n_cl) when interleaving, of clifford indices.
+        recovery_cliffords (array): shape (len(seeds), max_n_cl+1), the
+            element [i, n_cl] is the recovery clifford of the first `n_cl`
+            (interleaved) cliffords of row i.
+    """
+    if number_of_qubits == 1:
+        group_size = np.min([24, max_clifford_idx])
+    elif number_of_qubits == 2:
+        group_size = np.min([11520, max_clifford_idx])
+    else:
+        raise NotImplementedError()
+
+    seeds = np.atleast_1d(seeds)
+    max_n_cl = int(max_n_cl)
+
+    # Drawing per seed ensures the rows do not depend on the other seeds
+    rb_clifford_indices = np.empty((len(seeds), max_n_cl), dtype=int)
+    for i, seed in enumerate(seeds):
+        rb_clifford_indices[i] = np.random.RandomState(seed).randint(
+            0, group_size, max_n_cl
+        )
+
+    if interleaving_cl is not None:
+        rb_clif_ind_intl = np.empty((len(seeds), 2 * max_n_cl), dtype=int)
+        rb_clif_ind_intl[:, 0::2] = rb_clifford_indices
+        rb_clif_ind_intl[:, 1::2] = interleaving_cl
+        rb_clifford_indices = rb_clif_ind_intl
+
+    # See `calculate_net_clifford` for the 100_000 convention
+    net_cliffords = tqc.prefix_clifford_indices(
+        rb_clifford_indices % 100_000, number_of_qubits
+    )
+    if interleaving_cl is not None:
+        # only truncate after an interleaved clifford
+        net_cliffords = net_cliffords[:, 1::2]
+    # prepend the identity for the sequence of length 0
+    net_cliffords = np.concatenate(
+        [np.zeros((len(seeds), 1), dtype=int), net_cliffords], axis=1
+    )
+
+    recovery_cliffords = tqc.multiply_clifford_indices(
+        desired_net_cl,
+        tqc.invert_clifford_indices(net_cliffords, number_of_qubits),
+        number_of_qubits,
+    )
+    return rb_clifford_indices, recovery_cliffords
@@ -1,7 +1,10 @@
 import numpy as np
 from zlib import crc32
+from functools import lru_cache
 from os.path import join, dirname, abspath
 from pycqed.measurement.randomized_benchmarking.clifford_group import clifford_group_single_qubit as C1, CZ, S1
+from pycqed.measurement.randomized_benchmarking.clifford_group import \
+    clifford_lookuptable
 from pycqed.measurement.randomized_benchmarking.clifford_decompositions \
     import(epstein_efficient_decomposition)
 
@@ -111,11 +114,14 @@ class Clifford(object):
         Product of two clifford gates.
         returns a new Clifford object that performs the net operation
         that is the product of both operations.
+
+        N.B. the product is determined using precomputed tables
+        (see `multiply_clifford_indices`), this is equivalent to
+        the dot product of the pauli transfer matrices.
         """
-        net_op = np.dot(self.pauli_transfer_matrix,
-                        other.pauli_transfer_matrix)
-        idx = get_clifford_id(net_op)
-        return self.__class__(idx)
+        idx = multiply_clifford_indices(self.idx, other.idx,
+                                        self.number_of_qubits)
+        return self.__class__(int(idx))
 
     def __repr__(self):
         return '{}(idx={})'.format(self.__class__.__name__, self.idx)
@@ -126,12 +132,12 @@ class Clifford(object):
                                                 )
 
     def get_inverse(self):
-        inverse_ptm = np.linalg.inv(self.pauli_transfer_matrix).astype(int)
-        idx = get_clifford_id(inverse_ptm)
-        return self.__class__(idx)
+        idx = invert_clifford_indices(self.idx, self.number_of_qubits)
+        return self.__class__(int(idx))
 
 
 class SingleQubitClifford(Clifford):
+    number_of_qubits = 1
 
     def __init__(self, idx: int):
         assert(idx < 24)
@@ -151,19 +157,31 @@ class SingleQubitClifford(Clifford):
 
 
 class TwoQubitClifford(Clifford):
+    number_of_qubits = 2
 
     def __init__(self, idx: int):
         assert(idx < 11520)
         self.idx = idx
 
-        if idx < 576:
-            self.pauli_transfer_matrix = single_qubit_like_PTM(idx)
-        elif idx < 576 + 5184:
-            self.pauli_transfer_matrix = CNOT_like_PTM(idx-576)
-        elif idx < 576 + 2*5184:
-            self.pauli_transfer_matrix = iSWAP_like_PTM(idx-(576+5184))
-        elif idx < 11520:
-            self.pauli_transfer_matrix = SWAP_like_PTM(idx-(576+2*5184))
+    @property
+    def pauli_transfer_matrix(self):
+        """
+        Returns the pauli transfer matrix of the Clifford.
+
+        Computed only when required, composing Cliffords does not need it.
+        """
+        if not hasattr(self, '_pauli_transfer_matrix'):
+            idx = self.idx
+            if idx < 576:
+                ptm = single_qubit_like_PTM(idx)
+            elif idx < 576 + 5184:
+                ptm = CNOT_like_PTM(idx-576)
+            elif idx < 576 + 2*5184:
+                ptm = iSWAP_like_PTM(idx-(576+5184))
+            elif idx < 11520:
+                ptm = SWAP_like_PTM(idx-(576+2*5184))
+            self._pauli_transfer_matrix = ptm
+        return self._pauli_transfer_matrix
 
     @property
     def gate_decomposition(self):
@@ -388,22 +406,13 @@ def SWAP_like_gates(idx):
     return gates
 
 
-##############################################################################
-# It is important that this check is after the Clifford objects as otherwise
-# it is impossible to generate the hash tables
-##############################################################################
-try:
-    open(join(hash_dir, 'single_qubit_hash_lut.txt'), 'r')
-except FileNotFoundError:
-    print("Clifford group hash tables not detected.")
-    from pycqed.measurement.randomized_benchmarking.generate_clifford_hash_tables import generate_hash_tables
-    generate_hash_tables()
-
-
+@lru_cache()
 def get_single_qubit_clifford_hash_table():
     """
     Get's the single qubit clifford hash table. Requires this to be generated
     first. To generate, execute "generate_clifford_hash_tables.py".
+
+    N.B. the table is only read from disk once, the returned list is shared.
     """
     with open(join(hash_dir, 'single_qubit_hash_lut.txt'),
               'r') as f:
@@ -411,10 +420,13 @@ def get_single_qubit_clifford_hash_table():
     return hash_table
 
 
+@lru_cache()
 def get_two_qubit_clifford_hash_table():
     """
     Get's the two qubit clifford hash table. Requires this to be generated
     first. To generate, execute "generate_clifford_hash_tables.py".
+
+    N.B. the table is only read from disk once, the returned list is shared.
     """
     with open(join(hash_dir, 'two_qubit_hash_lut.txt'),
               'r') as f:
@@ -422,16 +434,255 @@ def get_two_qubit_clifford_hash_table():
     return hash_table
 
 
+@lru_cache()
+def _get_clifford_hash_lookup(number_of_qubits: int):
+    """
+    Returns a dict mapping the hash of a pauli transfer matrix to the
+    clifford index.
+    """
+    if number_of_qubits == 1:
+        hash_table = get_single_qubit_clifford_hash_table()
+    else:
+        hash_table = get_two_qubit_clifford_hash_table()
+    return {h: idx for idx, h in enumerate(hash_table)}
+
+
 def get_clifford_id(pauli_transfer_matrix):
     """
     returns the unique Id of a Clifford.
     """
     unique_hash = crc32(pauli_transfer_matrix.astype(int))
     if np.array_equal(np.shape(pauli_transfer_matrix), (4, 4)):
-        hash_table = get_single_qubit_clifford_hash_table()
+        hash_lookup = _get_clifford_hash_lookup(1)
     elif np.array_equal(np.shape(pauli_transfer_matrix), (16, 16)):
-        hash_table = get_two_qubit_clifford_hash_table()
+        hash_lookup = _get_clifford_hash_lookup(2)
     else:
         raise NotImplementedError()
-    idx = hash_table.index(unique_hash)
-    return idx
+    try:
+        return hash_lookup[unique_hash]
+    except KeyError:
+        raise ValueError('Pauli transfer matrix is not an element of the '
+                         'Clifford group.')
+
+
+##############################################################################
+# Table based Clifford calculus
+##############################################################################
+"""
+Composing Cliffords using the dot product of the pauli transfer matrices
+followed by a hash table lookup is slow. Instead the products are
+determined using precomputed tables:
+
+- The 24 elements of C1 are composed using the 24x24 multiplication
+  (Cayley) table.
+- The pauli transfer matrix of a Clifford is a signed permutation matrix.
+  An element of C2 is stored as the permutation and signs of the columns
+  of its 16x16 pauli transfer matrix. Composing two Cliffords is then a
+  permutation of 16 integers and the result is identified by how it maps
+  the generators of the two-qubit Pauli group (X and Z on both qubits).
+
+All functions below act elementwise on (arrays of) clifford indices.
+"""
+
+# Columns of the two qubit pauli transfer matrix corresponding to the
+# Paulis XI, ZI, IX and IZ (basis ordered as kron(P_q1, P_q0), P in I,X,Y,Z)
+_C2_generator_columns = np.array([1, 3, 4, 12])
+
+
+@lru_cache()
+def _single_qubit_clifford_tables():
+    """
+    Returns
+        mult_table (array (24, 24)): mult_table[a, b] is the index of C[a]*C[b]
+        inverse_table (array (24,)): index of the inverse of each Clifford
+    """
+    # N.B. clifford_lookuptable[i, j] is the index of C[j]*C[i]
+    mult_table = np.array(clifford_lookuptable.T, dtype=int)
+    inverse_table = np.argmax(mult_table == 0, axis=1)
+    return mult_table, inverse_table
+
+
+def construct_signed_perm_table():
+    """
+    Returns an array (11520, 16) containing for every column of the pauli
+    transfer matrix of each two qubit Clifford the (row index + 1) of the
+    nonzero entry multiplied by its sign.
+    """
+    ptms = np.array([TwoQubitClifford(idx).pauli_transfer_matrix
+                     for idx in range(11520)]).round().astype(int)
+    perms = np.argmax(ptms != 0, axis=1)
+    signs = np.take_along_axis(ptms, perms[:, None, :], axis=1)[:, 0, :]
+    return ((perms + 1) * signs).astype(np.int8)
+
+
+def get_two_qubit_clifford_signed_perm_table():
+    """
+    Get's the two qubit clifford signed permutation table (see
+    `construct_signed_perm_table`). The table is generated and stored next
+    to the hash tables if it does not exist yet.
+    """
+    fn = join(hash_dir, 'two_qubit_signed_perm_lut.npy')
+    try:
+        return np.load(fn)
+    except FileNotFoundError:
+        signed_perms = construct_signed_perm_table()
+        try:
+            np.save(fn, signed_perms)
+        except OSError:
+            pass
+        return signed_perms
+
+
+def _signed_perm_keys(perms, signs):
+    """
+    Unique integer key for the images (perms, signs) of the generator columns
+    """
+    codes = 2 * perms + (signs < 0)
+    return np.sum(codes * 32**np.arange(codes.shape[-1]), axis=-1)
+
+
+@lru_cache()
+def _two_qubit_clifford_tables():
+    """
+    Returns
+        codes (array (11520, 16)): 2*row + (sign < 0) of the nonzero entry
+            in each column of the pauli transfer matrix.
+        key_lookup (array): maps the key of the generator columns to the
+            clifford index.
+        inverse_table (array (11520,)): index of the inverse of each Clifford
+    """
+    signed_perms = get_two_qubit_clifford_signed_perm_table()
+    perms = np.abs(signed_perms).astype(int) - 1
+    signs = np.sign(signed_perms).astype(int)
+
+    keys = _signed_perm_keys(perms[:, _C2_generator_columns],
+                             signs[:, _C2_generator_columns])
+    assert len(np.unique(keys)) == 11520
+    key_lookup = np.full(32**len(_C2_generator_columns), -1, dtype=int)
+    key_lookup[keys] = np.arange(11520)
+
+    # The inverse of a pauli transfer matrix is its transpose
+    inv_perms = np.empty_like(perms)
+    inv_signs = np.empty_like(signs)
+    np.put_along_axis(inv_perms, perms, np.arange(16)[None, :], axis=1)
+    np.put_along_axis(inv_signs, perms, signs, axis=1)
+    inverse_table = key_lookup[
+        _signed_perm_keys(inv_perms[:, _C2_generator_columns],
+                          inv_signs[:, _C2_generator_columns])]
+    codes = 2 * perms + (signs < 0)
+    return codes, key_lookup, inverse_table
+
+
+def multiply_clifford_indices(idx_a, idx_b, number_of_qubits: int = 1):
+    """
+    Returns the index of the product C[idx_a]*C[idx_b], i.e., the net
+    clifford when first C[idx_b] and then C[idx_a] is applied.
+
+    Args:
+        idx_a, idx_b (int or array): clifford indices, arrays are multiplied
+            elementwise (with broadcasting).
+        number_of_qubits (int): 1 or 2 for the single and two qubit
+            Clifford group respectively.
+    """
+    if number_of_qubits == 1:
+        mult_table, _ = _single_qubit_clifford_tables()
+        return mult_table[idx_a, idx_b]
+    elif number_of_qubits == 2:
+        codes, key_lookup, _ = _two_qubit_clifford_tables()
+        idx_a, idx_b = np.broadcast_arrays(idx_a, idx_b)
+        # Column j of C[a]*C[b] is sign_b[j] times column perm_b[j] of C[a],
+        # i.e., the code of column perm_b[j] of C[a] with the sign bit flipped
+        codes_b = codes[idx_b[..., None], _C2_generator_columns]
+        new_codes = (codes.reshape(-1)[16 * idx_a[..., None] + (codes_b >> 1)]
+                     ^ (codes_b & 1))
+        return key_lookup[new_codes @ 32**np.arange(len(_C2_generator_columns))]
+    else:
+        raise NotImplementedError()
+
+
+def invert_clifford_indices(idx, number_of_qubits: int = 1):
+    """
+    Returns the index of the inverse of C[idx].
+
+    Args:
+        idx (int or array): clifford indices
+        number_of_qubits (int): 1 or 2 for the single and two qubit
+            Clifford group respectively.
+    """
+    if number_of_qubits == 1:
+        _, inverse_table = _single_qubit_clifford_tables()
+    elif number_of_qubits == 2:
+        _, _, inverse_table = _two_qubit_clifford_tables()
+    else:
+        raise NotImplementedError()
+    return inverse_table[idx]
+
+
+def net_clifford_index(clifford_indices, number_of_qubits: int = 1):
+    """
+    Returns the index of the net clifford of a sequence of cliffords.
+
+    The order corresponds to the order in a pulse sequence, i.e., the first
+    element is applied first. The product is evaluated as a (vectorized)
+    pairwise tree reduction.
+    """
+    idx = np.asarray(clifford_indices, dtype=int).reshape(-1)
+    if len(idx) == 0:
+        return 0  # the identity
+    while len(idx) > 1:
+        nr_pairs = len(idx) // 2
+        products = multiply_clifford_indices(
+            idx[1:2 * nr_pairs:2], idx[0:2 * nr_pairs:2], number_of_qubits)
+        if len(idx) % 2:
+            products = np.append(products, idx[-1])
+        idx = products
+    return int(idx[0])
+
+
+def prefix_clifford_indices(clifford_indices, number_of_qubits: int = 1):
+    """
+    Returns the indices of the net cliffords of all prefixes of a sequence
+    of cliffords, i.e., element k is the net clifford of the first k+1
+    cliffords.
+
+    The prefixes are taken along the last axis, such that many sequences
+    (e.g., one per row) are handled at once. The sequences are split in
+    blocks of ~sqrt(length) cliffords that are scanned in parallel, after
+    which the net cliffords of the preceding blocks are applied.
+    """
+    idx = np.asarray(clifford_indices, dtype=int)
+    length = idx.shape[-1]
+    if length == 0:
+        return idx.copy()
+    block_size = int(np.ceil(np.sqrt(length)))
+    nr_blocks = -(-length // block_size)
+    # pad with identities to an integer number of blocks
+    net = np.zeros(idx.shape[:-1] + (nr_blocks * block_size,), dtype=int)
+    net[..., :length] = idx
+    net = net.reshape(idx.shape[:-1] + (nr_blocks, block_size))
+
+    # later cliffords are applied on the left side
+    for k in range(1, block_size):
+        net[..., k] = multiply_clifford_indices(
+            net[..., k], net[..., k - 1], number_of_qubits)
+    block_nets = net[..., -1].copy()
+    for k in range(1, nr_blocks):
+        block_nets[..., k] = multiply_clifford_indices(
+            block_nets[..., k], block_nets[..., k - 1], number_of_qubits)
+    net[..., 1:, :] = multiply_clifford_indices(
+        net[..., 1:, :], block_nets[..., :-1, None], number_of_qubits)
+
+    return net.reshape(idx.shape[:-1] + (-1,))[..., :length]
+
+
+##############################################################################
+# It is important that this check is at the end of this file, after the
+# Clifford objects and tables, as otherwise it is impossible to generate
+# the hash tables
+##############################################################################
+try:
+    open(join(hash_dir, 'single_qubit_hash_lut.txt'), 'r')
+except FileNotFoundError:
+    print("Clifford group hash tables not detected.")
+    from pycqed.measurement.randomized_benchmarking.generate_clifford_hash_tables import generate_hash_tables
+    generate_hash_tables()
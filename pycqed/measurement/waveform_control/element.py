@@ -5,10 +5,18 @@
 
 import numpy as np
 import pprint
+import types
+from collections import OrderedDict
 from copy import deepcopy
 from pycqed.measurement.waveform_control import pulsar as ps
 import logging
 
+# The waveforms of pulses are cached based on the pulse parameters and the
+# time values they are sampled at, such that identical pulses (e.g., in the
+# repeated elements of a sequence) are only computed once.
+waveform_cache_size = 4096
+_waveform_cache = OrderedDict()
+
 
 class Element:
     """
@@ -292,11 +300,12 @@ class Element:
             tvals[c] = np.arange(nsamples) / self._clock(c)
         # we first compute the ideal function values
         for p in self.pulses:
-            chan_tvals = {}
-            for c in self.pulses[p].channels:
+            pulse = self.pulses[p]
+            chan_tvals_keys = {}
+            for c in pulse.channels:
                 if not self.global_time:
                     psamples = self.pulse_samples(p, c)
-                    chan_tvals[c] = tvals[c].copy()[:psamples]
+                    chan_tvals_keys[c] = (psamples, self._clock(c))
                 else:
                     idx0 = self.pulse_start_sample(p, c)
                     idx1 = self.pulse_end_sample(p, c) + 1
@@ -305,19 +314,51 @@ class Element:
                             'Pulse {} on channel {} in element {} starts at a '
                             'negative time. Please increase the RO_fixpoint.'
                                 .format(p, c, self.name))
-                    chan_tvals[c] = np.round(tvals[c].copy()[idx0:idx1] +
-                                             self.channel_delay(c) +
-                                             self.time_offset,
-                                             ps.SIGNIFICANT_DIGITS)
-            pulsewfs = self.pulses[p].get_wfs(chan_tvals)
-
-            for c in self.pulses[p].channels:
+                    chan_tvals_keys[c] = (idx0, idx1, self._clock(c),
+                                          self.channel_delay(c),
+                                          self.time_offset)
+            cache_key = pulse_cache_key(pulse, chan_tvals_keys)
+            pulsewfs = get_cached_waveforms(cache_key)
+            if pulsewfs is None:
+                chan_tvals = {}
+                for c, tvals_key in chan_tvals_keys.items():
+                    if not self.global_time:
+                        chan_tvals[c] = tvals[c][:tvals_key[0]].copy()
+                    else:
+                        idx0, idx1 = tvals_key[:2]
+                        chan_tvals[c] = np.round(tvals[c][idx0:idx1] +
+                                                 self.channel_delay(c) +
+                                                 self.time_offset,
+                                                 ps.SIGNIFICANT_DIGITS)
+                pulsewfs = pulse.get_wfs(chan_tvals)
+                cache_waveforms(cache_key, pulsewfs)
+
+            for c in pulse.channels:
                 idx0 = self.pulse_start_sample(p, c)
                 idx1 = self.pulse_end_sample(p, c) + 1
                 wfs[c][idx0:idx1] += pulsewfs[c]
 
         return tvals, wfs
 
+    def content_key(self):
+        """
+        Returns a hashable representation of everything that determines the
+        waveforms of the element, elements with equal keys have identical
+        waveforms. Returns None if the element contains parameters of which
+        the contents cannot be represented (see `content_key`).
+        """
+        try:
+            return content_key((
+                [(type(pulse), vars(pulse)) for pulse in self.pulses.values()],
+                self.granularity, self.min_samples,
+                self.ignore_offset_correction, self.global_time,
+                self.time_offset, self.ignore_delays,
+                self.chan_distorted, self.distorted_wfs,
+                self.pulsar.channels,
+                [self._clock(c) for c in self.pulsar.channels]))
+        except TypeError:
+            return None
+
     def waveforms(self):
         """
         return:
@@ -398,6 +439,81 @@ class Element:
 # sequencer)
 
 
+def content_key(obj):
+    """
+    Returns a hashable representation of the contents of obj, consisting of
+    (nested) numbers, strings, arrays, lists, tuples and dicts. Functions
+    and classes are represented by themselves.
+
+    Raises a TypeError for any other object, as its contents can change
+    without changing its hash.
+    """
+    obj_type = type(obj)
+    if obj is None or obj_type is str or obj_type is bytes:
+        return obj
+    if obj_type in _number_types or isinstance(obj, np.generic):
+        # 1, 1.0 and True have the same hash
+        return obj_type, obj
+    if obj_type is dict:
+        return (dict,) + tuple((content_key(k), content_key(v))
+                               for k, v in obj.items())
+    if obj_type is list or obj_type is tuple:
+        return (obj_type,) + tuple(content_key(o) for o in obj)
+    if obj_type is np.ndarray:
+        return np.ndarray, obj.dtype.str, obj.shape, obj.tobytes()
+    if isinstance(obj, (types.FunctionType, types.BuiltinFunctionType,
+                        type)):
+        return obj
+    raise TypeError('Cannot represent the contents of {}'.format(obj_type))
+
+
+_number_types = {bool, int, float, complex}
+
+
+def pulse_cache_key(pulse, chan_tvals_keys):
+    """
+    Returns the key of the waveforms of a pulse sampled at the time values
+    described by chan_tvals_keys in the waveform cache, None if the pulse
+    cannot be cached.
+    """
+    try:
+        return (type(pulse), content_key(vars(pulse)),
+                content_key(chan_tvals_keys))
+    except TypeError:
+        return None
+
+
+def get_cached_waveforms(key):
+    """
+    Returns the cached waveforms {channel: waveform} of a pulse, None if not
+    cached. The waveforms are shared between callers and therefore
+    read-only.
+    """
+    if key is None or key not in _waveform_cache:
+        return None
+    _waveform_cache.move_to_end(key)
+    return dict(_waveform_cache[key])
+
+
+def cache_waveforms(key, wfs):
+    """
+    Stores the waveforms {channel: waveform} of a pulse in the cache,
+    see `pulse_cache_key`.
+    """
+    if key is None or waveform_cache_size <= 0:
+        return
+    wfs = {c: np.array(wf) for c, wf in wfs.items()}
+    for wf in wfs.values():
+        wf.setflags(write=False)
+    _waveform_cache[key] = wfs
+    while len(_waveform_cache) > waveform_cache_size:
+        _waveform_cache.popitem(last=False)
+
+
+def clear_waveform_cache():
+    _waveform_cache.clear()
+
+
 def calculate_time_correction(t0, fixed_point=1e-6):
     return np.round((fixed_point-t0) % fixed_point, decimals=9)
 
@@ -2,6 +2,7 @@
 # Modified by Adriaan Rol 9/2015
 # Modified by Ants Remm 5/2017
 
+import hashlib
 import numpy as np
 import logging
 from qcodes.instrument.base import Instrument
@@ -26,6 +27,21 @@ except Exception:
 SIGNIFICANT_DIGITS = 11
 
 
+def _waveforms_key(*wfs):
+    """
+    Returns a digest of the contents of the waveforms wfs, which can be None.
+    """
+    h = hashlib.sha1()
+    for wf in wfs:
+        if wf is None:
+            h.update(b'None')
+        else:
+            wf = np.ascontiguousarray(wf, dtype=np.float64)
+            h.update(str(wf.shape).encode())
+            h.update(wf.tobytes())
+    return h.digest()
+
+
 class Pulsar(Instrument):
     """
     A meta-instrument responsible for all communication with the AWGs.
@@ -252,8 +268,16 @@ class Pulsar(Instrument):
         #                waveform data)))
         AWG_wfs = {}
 
+        # identical elements (e.g., calibration points) are computed once
+        el_waveforms = {}
         for i, el in enumerate(elements):
-            tvals, waveforms = el.normalized_waveforms()
+            el_key = el.content_key()
+            if el_key is not None and el_key in el_waveforms:
+                waveforms = el_waveforms[el_key]
+            else:
+                tvals, waveforms = el.normalized_waveforms()
+                if el_key is not None:
+                    el_waveforms[el_key] = waveforms
             for cname in waveforms:
                 if cname not in channels:
                     continue
@@ -317,8 +341,11 @@ class Pulsar(Instrument):
         grps.sort()
 
         # create a packed waveform for each element for each channel group
-        # in the sequence
+        # in the sequence, identical waveforms are only packed and uploaded
+        # once and shared by the elements
         packed_waveforms = {}
+        el_wfnames = {}
+        unique_wfnames = {}
         elements_with_non_zero_first_points = set()
         for (i, el), cid_wfs in sorted(el_wfs.items()):
             maxlen = 0
@@ -347,10 +374,16 @@ class Pulsar(Instrument):
                         elements_with_non_zero_first_points.add(el)
                 wfname = el + '_' + grp
 
-                packed_waveforms[wfname] = obj.pack_waveform(
-                    grp_wfs[grp],
-                    grp_wfs[grp + '_marker1'],
-                    grp_wfs[grp + '_marker2'])
+                wf_key = _waveforms_key(grp_wfs[grp],
+                                        grp_wfs[grp + '_marker1'],
+                                        grp_wfs[grp + '_marker2'])
+                if wf_key not in unique_wfnames:
+                    unique_wfnames[wf_key] = wfname
+                    packed_waveforms[wfname] = obj.pack_waveform(
+                        grp_wfs[grp],
+                        grp_wfs[grp + '_marker1'],
+                        grp_wfs[grp + '_marker2'])
+                el_wfnames[i, el, grp] = unique_wfnames[wf_key]
 
         # sequence programming
         _t0 = time.time()
@@ -382,8 +415,7 @@ class Pulsar(Instrument):
             grp_wfnames = []
             # add all wf names of channel
             for i, el in sorted(el_wfs):
-                wfname = el + '_' + grp
-                grp_wfnames.append(wfname)
+                grp_wfnames.append(el_wfnames[i, el, grp])
             wfname_l.append(grp_wfnames)
 
         for el in sequence.elements:
@@ -466,28 +498,42 @@ wait(1000);
 setTrigger(0);
 """
 
-        # parse elements
+        # parse elements, identical waveforms are only declared and
+        # uploaded once and shared by the elements
         elements_with_non_zero_first_points = []
         wfnames = {'ch1': [], 'ch2': []}
         wfdata = {'ch1': [], 'ch2': []}
-        i = 1
+        unique_wfnames = {}
+        nr_waves = 0
         for i, el in el_wfs:
             for cid in ['ch1', 'ch2']:
-
+                cid_wf = el_wfs[i, el].get(cid, None)
+                if cid_wf is not None and cid_wf[0] != 0.:
+                    elements_with_non_zero_first_points.append(el)
+            wf_key = _waveforms_key(el_wfs[i, el].get('ch1', None),
+                                    el_wfs[i, el].get('ch2', None))
+            if wf_key in unique_wfnames:
+                for cid in ['ch1', 'ch2']:
+                    wfnames[cid].append(unique_wfnames[wf_key][cid])
+                    wfdata[cid].append(None)
+                continue
+            unique_wfnames[wf_key] = {}
+            for cid in ['ch1', 'ch2']:
                 if cid in el_wfs[i, el]:
                     wfname = el + '_' + cid
                     cid_wf = el_wfs[i, el][cid]
                     wfnames[cid].append(wfname)
                     wfdata[cid].append(cid_wf)
-                    if cid_wf[0] != 0.:
-                        elements_with_non_zero_first_points.append(el)
+                    # the ramps make the placeholder waves distinct
+                    nr_waves += 1
                     header += 'wave {} = ramp({}, 0, {});\n'.format(
-                        wfname, len(cid_wf), 1 / i
+                        wfname, len(cid_wf), 1 / nr_waves
                     )
-                    i += 1
                 else:
+                    wfname = None
                     wfnames[cid].append(None)
                     wfdata[cid].append(None)
+                unique_wfnames[wf_key][cid] = wfname
 
         # create waveform playback code
         for i, el in enumerate(sequence.elements):
@@ -1,6 +1,8 @@
 import numpy as np
 import qutip as qtp
 import scipy
+import scipy.linalg
+import scipy.sparse.csgraph
 
 from scipy.interpolate import interp1d
 import matplotlib.pyplot as plt
@@ -205,9 +207,12 @@ def coupled_transmons_hamiltonian_new(w_q0, w_q1, alpha_q0, alpha_q1, J):
     return H
 
 
-def calc_hamiltonian(amp, fluxlutman, fluxlutman_static, which_gate: str = "NE"):
-    # all inputs should be given in terms of frequencies, i.e. without the 2*np.pi factor
-    # instead, the output H includes already that factor
+def calc_hamiltonian_parameters(amp, fluxlutman, fluxlutman_static, which_gate: str = "NE"):
+    """
+    Returns the frequencies, anharmonicities and coupling (w_q0, w_q1,
+    alpha_q0, alpha_q1, J) entering `coupled_transmons_hamiltonian_new`
+    for the amplitude(s) amp. Works elementwise if amp is an array.
+    """
     w_q0 = fluxlutman.calc_amp_to_freq(amp, "01", which_gate=which_gate)
     w_q1 = fluxlutman.calc_amp_to_freq(amp, "10", which_gate=which_gate)
     alpha_q0 = fluxlutman.calc_amp_to_freq(amp, "02", which_gate=which_gate) - 2 * w_q0
@@ -226,6 +231,15 @@ def calc_hamiltonian(amp, fluxlutman, fluxlutman_static, which_gate: str = "NE")
         / ((delta_q1 + delta_q0_intpoint) / (delta_q1 * delta_q0_intpoint))
         * ((delta_q1 + delta_q0) / (delta_q1 * delta_q0))
     )
+    return w_q0, w_q1, alpha_q0, alpha_q1, J_temp
+
+
+def calc_hamiltonian(amp, fluxlutman, fluxlutman_static, which_gate: str = "NE"):
+    # all inputs should be given in terms of frequencies, i.e. without the 2*np.pi factor
+    # instead, the output H includes already that factor
+    w_q0, w_q1, alpha_q0, alpha_q1, J_temp = calc_hamiltonian_parameters(
+        amp, fluxlutman, fluxlutman_static, which_gate=which_gate
+    )
 
     H = coupled_transmons_hamiltonian_new(
         w_q0=w_q0, w_q1=w_q1, alpha_q0=alpha_q0, alpha_q1=alpha_q1, J=J_temp
@@ -233,6 +247,34 @@ def calc_hamiltonian(amp, fluxlutman, fluxlutman_static, which_gate: str = "NE")
     return H
 
 
+def calc_hamiltonian_array(amps, fluxlutman, fluxlutman_static, which_gate: str = "NE"):
+    """
+    Vectorized version of `calc_hamiltonian`.
+
+    Returns:
+        H (array): shape (len(amps), d, d), the hamiltonians (including the
+            2*np.pi factor) as numpy arrays, d = n_levels_q0*n_levels_q1
+    """
+    amps = np.asarray(amps, dtype=float)
+    w_q0, w_q1, alpha_q0, alpha_q1, J_temp = [
+        np.broadcast_to(np.asarray(x, dtype=float), amps.shape)[:, None, None]
+        for x in calc_hamiltonian_parameters(
+            amps, fluxlutman, fluxlutman_static, which_gate=which_gate
+        )
+    ]
+    adag = a.dag()
+    bdag = b.dag()
+
+    H = (
+        w_q0 * n_q0.full()
+        + w_q1 * n_q1.full()
+        + 1 / 2 * alpha_q0 * (adag * adag * a * a).full()
+        + 1 / 2 * alpha_q1 * (bdag * bdag * b * b).full()
+        + J_temp * (-1) * (adag * b + a * bdag).full()
+    )
+    return H * (2 * np.pi)
+
+
 def rotating_frame_transformation_propagator_new(U, t: float, H):
     """
     Transforms the frame of the unitary according to
@@ -1071,6 +1113,161 @@ def return_jump_operators(
     return c_ops
 
 
+def lindblad_dissipator_array(c):
+    """
+    Returns the Lindblad dissipator of the jump operator c (numpy array) as a
+    superoperator in the column-stacking convention used by QuTiP.
+    """
+    c = np.asarray(c)
+    eye = np.eye(c.shape[0])
+    cdc = c.conj().T @ c
+    return np.kron(c.conj(), c) - 0.5 * np.kron(eye, cdc) - 0.5 * np.kron(cdc.T, eye)
+
+
+def liouvillian_array(H, c_ops=[], idx=None):
+    """
+    Vectorized version of `qtp.liouvillian` for a stack of hamiltonians.
+
+    Args:
+        H (array): shape (n, d, d), hamiltonians
+        c_ops (list): jump operators (Qobj), time dependent jump operators
+            are given as [Qobj, array of n rates] (as returned by
+            `c_ops_amplitudedependent`)
+        idx (array): indices of the Liouville space to return, e.g., a block
+            returned by `liouvillian_blocks`. All indices by default.
+
+    Returns:
+        L (array): shape (n, len(idx), len(idx)), the Liouvillians
+    """
+    n, d = H.shape[0], H.shape[1]
+    if idx is None:
+        idx = np.arange(d ** 2)
+    # -1j * (spre(H) - spost(H)) in the column-stacking convention, the
+    # Liouville space index is a*d+i for the element (i, a) of the density matrix
+    a, i = np.divmod(idx, d)
+    L = -1j * (
+        (a[:, None] == a[None, :]) * H[:, i[:, None], i[None, :]]
+        - (i[:, None] == i[None, :]) * H[:, a[None, :], a[:, None]]
+    )
+    if c_ops != []:
+        # the dissipator of a jump operator scales with the square of its rate
+        rates = np.array(
+            [
+                np.broadcast_to(np.asarray(c[1], dtype=float), (n,)) ** 2
+                if isinstance(c, list)
+                else np.ones(n)
+                for c in c_ops
+            ]
+        )
+        dissipators = np.array(
+            [
+                lindblad_dissipator_array(
+                    c[0].full() if isinstance(c, list) else c.full()
+                )[idx[:, None], idx[None, :]]
+                for c in c_ops
+            ]
+        )
+        L += (rates.T @ dissipators.reshape(len(c_ops), -1)).reshape(L.shape)
+    return L
+
+
+def chain_propagators(U):
+    """
+    Returns the product U[-1] @ ... @ U[1] @ U[0] of a stack of propagators,
+    i.e., the propagator of the consecutive time steps. Neighbouring pairs
+    are multiplied in a binary tree, which requires log2(n) batched matrix
+    products instead of n sequential ones.
+    """
+    U = np.asarray(U)
+    while len(U) > 1:
+        nr_pairs = len(U) // 2
+        U_pairs = U[1 : 2 * nr_pairs : 2] @ U[0 : 2 * nr_pairs : 2]
+        if len(U) % 2:
+            U_pairs = np.concatenate([U_pairs, U[-1:]])
+        U = U_pairs
+    return U[0]
+
+
+def liouvillian_blocks(H, c_ops=[], rtol: float = 1e-12):
+    """
+    Returns the blocks in which the Liouvillians of `liouvillian_array` can
+    be decomposed, i.e., groups of indices of the Liouville space such that
+    the Liouvillians never couple indices of different groups.
+
+    For the coupled transmons the blocks are the elements of the density
+    matrix with a fixed difference in the number of excitations of the ket
+    and bra, which reduces the largest block from 81 to 19 elements.
+    Entries of H smaller than rtol times its largest entry are ignored.
+    """
+    H_abs = np.max(np.abs(H), axis=0)
+    H_abs = np.where(H_abs > rtol * np.max(H_abs), H_abs, 0)
+    eye = np.eye(H_abs.shape[0])
+    pattern = np.kron(eye, H_abs) + np.kron(H_abs.T, eye)
+    for c in c_ops:
+        c_abs = np.abs(c[0].full() if isinstance(c, list) else c.full())
+        cdc_abs = c_abs.T @ c_abs
+        pattern += np.kron(c_abs, c_abs) + np.kron(eye, cdc_abs) + np.kron(cdc_abs.T, eye)
+    nr_blocks, labels = scipy.sparse.csgraph.connected_components(
+        pattern > 0, directed=False
+    )
+    return [np.where(labels == i)[0] for i in range(nr_blocks)]
+
+
+def propagator_from_hamiltonians(H, c_ops, intervals_list, chunk_size: int = 512):
+    """
+    NumPy engine for the time evolution of piecewise constant hamiltonians.
+
+    The propagators of all time steps are computed at once, using the
+    eigendecomposition of the hamiltonians for unitary evolution and a
+    batched matrix exponential of the blocks of the Liouvillians
+    (see `liouvillian_blocks`) otherwise. They are combined using
+    `chain_propagators`.
+
+    Args:
+        H (array): shape (n, d, d), hamiltonian of each time step
+        c_ops (list): jump operators, see `liouvillian_array`
+        intervals_list (array): duration of each time step
+        chunk_size (int): number of time steps exponentiated at once, limits
+            the memory usage
+
+    Returns:
+        U (array): the unitary (d, d) if there are no jump operators, the
+            superoperator (d**2, d**2) otherwise
+    """
+    H = np.asarray(H)
+    intervals_list = np.asarray(intervals_list, dtype=float)[: len(H)]
+    if c_ops != []:
+        blocks = liouvillian_blocks(H, c_ops)
+        dim = H.shape[1] ** 2
+    else:
+        dim = H.shape[1]
+
+    U_total = np.eye(dim, dtype=complex)
+    for start in range(0, len(H), chunk_size):
+        sl = slice(start, start + chunk_size)
+        dt = intervals_list[sl, None, None]
+        if c_ops != []:
+            c_ops_chunk = [
+                [c[0], np.broadcast_to(np.asarray(c[1], dtype=float), (len(H),))[sl]]
+                if isinstance(c, list)
+                else c
+                for c in c_ops
+            ]
+            U_chunk = np.zeros((dim, dim), dtype=complex)
+            for idx in blocks:
+                L = liouvillian_array(H[sl], c_ops_chunk, idx=idx)
+                U_chunk[np.ix_(idx, idx)] = chain_propagators(
+                    scipy.linalg.expm(L * dt)
+                )
+        else:
+            # The hamiltonians are hermitian, exponentiate in their eigenbasis
+            E, V = np.linalg.eigh(H[sl])
+            U_steps = (V * np.exp(-1j * E * dt[:, 0])[:, None, :]) @ V.conj().transpose(0, 2, 1)
+            U_chunk = chain_propagators(U_steps)
+        U_total = U_chunk @ U_total
+    return U_total
+
+
 def time_evolution_new(
     c_ops,
     sim_control_CZ,
@@ -1081,6 +1278,7 @@ def time_evolution_new(
     sim_step=None,
     intervals_list=None,
     which_gate: str = "NE",
+    engine: str = "numpy",
 ):
     """
     Calculates the propagator (either unitary or superoperator)
@@ -1091,6 +1289,10 @@ def time_evolution_new(
         amp(array): amplitude in voltage describes the y-component of the trajectory to simulate. Should be equisampled in time
         fluxlutman,sim_control_CZ: instruments containing various parameters
         fluxbias_q1(float): random fluxbias on the spectator qubit
+        engine(str): "numpy" computes the hamiltonians of all time steps at
+            once and exponentiates and multiplies them in batches (see
+            `propagator_from_hamiltonians`), "qutip" uses QuTiP one time step
+            at a time (reference implementation)
 
     Returns
         U_final(Qobj): propagator
@@ -1140,37 +1342,51 @@ def time_evolution_new(
         "q_freq_10_{}".format(which_gate), w_q1_biased
     )  # we insert the change to w_q1 in this way because then J1 is also tuned appropriately
 
-    exp_L_total = 1
-    # tt = 0
-    for i in range(len(amp)):
-        H = calc_hamiltonian(
-            amp[i], fluxlutman, fluxlutman_static, which_gate=which_gate
+    if engine == "numpy":
+        H = calc_hamiltonian_array(
+            amp, fluxlutman, fluxlutman_static, which_gate=which_gate
         )
-        H = S.dag() * H * S
-        # qtp.Qobj(matrix_change_of_variables(H),dims=[[3, 3], [3, 3]])
-        # Alternative for collapse operators that follow the basis of H
-        # We do not believe that this would be the correct model.
-        S_H = qtp.tensor(qtp.qeye(n_levels_q1), qtp.qeye(n_levels_q0))
-
-        if c_ops != []:
-            c_ops_temp = []
-            for c in range(len(c_ops)):
-                S_Hdag = S_H.dag()
-                if isinstance(c_ops[c], list):
-                    c_ops_temp.append(
-                        S_H * c_ops[c][0] * c_ops[c][1][i] * S_Hdag
-                    )  # c_ops are already in the H_0 basis
-                else:
-                    c_ops_temp.append(S_H * c_ops[c] * S_Hdag)
-
-            # t1 = time.time()
-            liouville_exp_t = (
-                qtp.liouvillian(H, c_ops_temp) * intervals_list[i]
-            ).expm()
-            # tt += time.time() - t1
-        else:
-            liouville_exp_t = (-1j * H * intervals_list[i]).expm()
-        exp_L_total = liouville_exp_t * exp_L_total
+        S_array = S.full()
+        H = S_array.conj().T @ H @ S_array
+        dims = [[n_levels_q1, n_levels_q0], [n_levels_q1, n_levels_q0]]
+        exp_L_total = qtp.Qobj(
+            propagator_from_hamiltonians(H, c_ops, intervals_list),
+            dims=dims if c_ops == [] else [dims, dims],
+        )
+    elif engine == "qutip":
+        exp_L_total = 1
+        # tt = 0
+        for i in range(len(amp)):
+            H = calc_hamiltonian(
+                amp[i], fluxlutman, fluxlutman_static, which_gate=which_gate
+            )
+            H = S.dag() * H * S
+            # qtp.Qobj(matrix_change_of_variables(H),dims=[[3, 3], [3, 3]])
+            # Alternative for collapse operators that follow the basis of H
+            # We do not believe that this would be the correct model.
+            S_H = qtp.tensor(qtp.qeye(n_levels_q1), qtp.qeye(n_levels_q0))
+
+            if c_ops != []:
+                c_ops_temp = []
+                for c in range(len(c_ops)):
+                    S_Hdag = S_H.dag()
+                    if isinstance(c_ops[c], list):
+                        c_ops_temp.append(
+                            S_H * c_ops[c][0] * c_ops[c][1][i] * S_Hdag
+                        )  # c_ops are already in the H_0 basis
+                    else:
+                        c_ops_temp.append(S_H * c_ops[c] * S_Hdag)
+
+                # t1 = time.time()
+                liouville_exp_t = (
+                    qtp.liouvillian(H, c_ops_temp) * intervals_list[i]
+                ).expm()
+                # tt += time.time() - t1
+            else:
+                liouville_exp_t = (-1j * H * intervals_list[i]).expm()
+            exp_L_total = liouville_exp_t * exp_L_total
+    else:
+        raise ValueError("Engine {} not recognized".format(engine))
 
     # log.warning('\n expm: {}\n'.format(tt))
 
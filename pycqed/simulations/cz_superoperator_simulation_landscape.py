@@ -0,0 +1,573 @@
+"""
+Instrument free interface to the CZ simulation of
+`cz_superoperator_simulation_new2` and a parallel runner for landscapes.
+
+The parameters of the simulation are given as plain objects instead of
+the `HDAWG_Flux_LutMan` and `SimControlCZ` instruments. This avoids creating
+(and closing) instruments, a `Station` and a `MeasurementControl` for every
+work item, and makes the parameters picklable so the points of a landscape
+can be evaluated in a pool of worker processes:
+
+    flux_pars = FluxLutmanParameters.from_instrument(fluxlutman)
+    static_pars = StaticLutmanParameters.from_instrument(fluxlutman_static)
+    sim_pars = SimControlParameters.from_instrument(sim_control_CZ)
+
+    qoi = simulate_cz(flux_pars, static_pars, sim_pars)
+    res = simulate_landscape(flux_pars, static_pars, sim_pars,
+                             theta_f=np.linspace(40, 140, 50),
+                             lambda_2=np.linspace(-0.5, 0.5, 50))
+
+The results of a landscape are written to a single datafile with the same
+layout as a measurement of the MeasurementControl.
+"""
+import multiprocessing
+import sys
+import time
+from copy import copy, deepcopy
+
+import adaptive
+import numpy as np
+
+from pycqed.analysis import analysis_toolbox as a_tools
+from pycqed.instrument_drivers.meta_instrument.LutMans import flux_lutman as flm
+from pycqed.measurement import hdf5_data as h5d
+from pycqed.measurement import measurement_control as mc
+from pycqed.simulations import cz_superoperator_simulation_new2 as cz_main
+from pycqed.utilities import measurement_catalogue as mcat
+
+# Units of the flux lutman parameters that can be swept in a landscape
+sweep_parameter_units = {'cz_theta_f': 'deg', 'cz_lambda_2': '',
+                         'cz_lambda_3': '', 'cz_length': 's'}
+
+
+class _Parameters:
+    """
+    Base class of the parameters of the simulation.
+
+    The parameters and their defaults are given by `_defaults`, a tuple of
+    (name, default) pairs. Mutable defaults are copied for every instance.
+    """
+    _defaults = ()
+
+    def __init__(self, **kw):
+        names = self.parameter_names()
+        for name in kw:
+            if name not in names:
+                raise TypeError("{}() got an unexpected parameter '{}'".format(
+                    type(self).__name__, name))
+        for name, default in self._defaults:
+            setattr(self, name, kw[name] if name in kw else copy(default))
+
+    @classmethod
+    def parameter_names(cls):
+        return [name for name, _ in cls._defaults]
+
+    def as_dict(self):
+        return {name: deepcopy(getattr(self, name))
+                for name in self.parameter_names()}
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(name, value)
+            for name, value in self.as_dict().items()))
+
+
+class FluxLutmanParameters(_Parameters):
+    """
+    Parameters of the fluxing qubit and the CZ pulse, the names correspond
+    to the parameters of the `HDAWG_Flux_LutMan` without the gate suffix
+    (e.g., `cz_theta_f` for `cz_theta_f_NE`).
+    """
+    _defaults = (
+        ('sampling_rate', 2.4e9),
+        ('cz_length', 35e-9),
+        ('q_J2', 15e6),
+        ('czd_double_sided', False),
+        ('cz_lambda_2', 0),
+        ('cz_lambda_3', 0),
+        ('cz_theta_f', 80),
+        ('czd_length_ratio', 0.5),
+        ('q_polycoeffs_freq_01_det', np.array([-2e9, 0, 0])),
+        ('q_polycoeffs_anharm', np.array([0, 0, -300e6])),
+        ('q_freq_01', 6e9),
+        ('bus_freq', 7.77e9),
+        ('q_freq_10', 6e9),
+    )
+
+    # parameters that exist for every gate (direction) of the flux lutman
+    _gate_parameters = ('cz_length', 'q_J2', 'czd_double_sided',
+                        'cz_lambda_2', 'cz_lambda_3', 'cz_theta_f',
+                        'czd_length_ratio', 'bus_freq', 'q_freq_10')
+
+    @classmethod
+    def from_instrument(cls, fluxlutman, which_gate: str = 'NE'):
+        pars = {}
+        for name in cls.parameter_names():
+            if name in cls._gate_parameters:
+                pars[name] = fluxlutman.get('{}_{}'.format(name, which_gate))
+            else:
+                pars[name] = fluxlutman.get(name)
+        return cls(**pars)
+
+    def instrument_parameters(self, which_gate: str = 'NE'):
+        """
+        Returns a dict with the values of the corresponding parameters of
+        the flux lutman for the gate `which_gate`.
+        """
+        pars = {}
+        for name, value in self.as_dict().items():
+            if name in self._gate_parameters:
+                name = '{}_{}'.format(name, which_gate)
+            pars[name] = value
+        return pars
+
+
+class StaticLutmanParameters(_Parameters):
+    """
+    Parameters of the static (spectator) qubit.
+    """
+    _defaults = (
+        ('q_polycoeffs_anharm', np.array([0, 0, -300e6])),
+    )
+
+    @classmethod
+    def from_instrument(cls, fluxlutman_static):
+        return cls(q_polycoeffs_anharm=fluxlutman_static.q_polycoeffs_anharm())
+
+    def instrument_parameters(self, which_gate: str = 'NE'):
+        return self.as_dict()
+
+
+class SimControlParameters(_Parameters):
+    """
+    Noise and other simulation parameters, see `SimControlCZ` for the
+    meaning of the parameters.
+
+    N.B. `cost_func` is the cost function itself, `cost_func(qoi)`, as
+    `SimControlCZ.cost_func`, `None` corresponds to the default cost
+    function. With the 'spawn' start method of multiprocessing it is
+    pickled, i.e., it has to be a module level function instead of a
+    lambda.
+    """
+    _defaults = (
+        ('T1_q0', 0),
+        ('T1_q1', 0),
+        ('T2_q1', 0),
+        ('T2_q0_amplitude_dependent', np.array([-1, -1])),
+        ('sigma_q0', 0),
+        ('sigma_q1', 0),
+        ('w_q0_sweetspot', None),
+        ('w_q1_sweetspot', None),
+        ('Z_rotations_length', 0),
+        ('total_idle_time', 0),
+        ('dressed_compsub', True),
+        ('distortions', False),
+        ('voltage_scaling_factor', 1),
+        ('n_sampling_gaussian_vec', np.array([11])),
+        ('look_for_minimum', False),
+        ('T2_scaling', 1),
+        ('waiting_at_sweetspot', 0),
+        ('which_gate', 'NE'),
+        ('simstep_div', 4),
+        ('gates_num', 1),
+        ('gates_interval', 0),
+        ('double_cz_pi_pulses', ''),
+        ('cost_func', None),
+    )
+
+    @classmethod
+    def from_instrument(cls, sim_control_CZ):
+        return cls(**{name: sim_control_CZ.get(name)
+                      for name in cls.parameter_names()})
+
+    def instrument_parameters(self, which_gate: str = 'NE'):
+        return self.as_dict()
+
+    def datafile_parameters(self):
+        """
+        Parameters as stored in a datafile, the cost function is recorded
+        by its name.
+        """
+        pars = self.as_dict()
+        if pars['cost_func'] is not None:
+            pars['cost_func'] = '{}.{}'.format(
+                pars['cost_func'].__module__,
+                pars['cost_func'].__qualname__)
+        return pars
+
+
+class _ParameterView:
+    """
+    Stand-in for the instruments read by the simulation functions.
+
+    Parameters are stored in a dict and can be accessed in the same way as
+    qcodes parameters, i.e., `view.name()`, `view.name(value)`,
+    `view.get(name)` and `view.set(name, value)`.
+    """
+
+    def __init__(self, parameters: dict):
+        self._parameters = dict(parameters)
+
+    def get(self, name: str):
+        return self._parameters[name]
+
+    def set(self, name: str, value):
+        self._parameters[name] = value
+
+    def __getattr__(self, name: str):
+        # N.B. __dict__ is used to avoid a recursion before __init__
+        parameters = self.__dict__.get('_parameters', {})
+        if name not in parameters:
+            raise AttributeError(name)
+
+        def parameter(*value):
+            if len(value) == 0:
+                return self.get(name)
+            self.set(name, value[0])
+        return parameter
+
+
+class _FluxLutmanView(_ParameterView):
+    """
+    Stand-in for the `HDAWG_Flux_LutMan`, the conversions between
+    amplitude and frequency are those of the flux lutman itself.
+    """
+    get_polycoeffs_state = flm.HDAWG_Flux_LutMan.get_polycoeffs_state
+    calc_amp_to_eps = flm.HDAWG_Flux_LutMan.calc_amp_to_eps
+    calc_eps_to_amp = flm.HDAWG_Flux_LutMan.calc_eps_to_amp
+    calc_amp_to_freq = flm.HDAWG_Flux_LutMan.calc_amp_to_freq
+    calc_freq_to_amp = flm.HDAWG_Flux_LutMan.calc_freq_to_amp
+
+
+def _default_stepresponse(fitted_stepresponse_ty):
+    # Same default as the CZ_trajectory_superoperator detector
+    if fitted_stepresponse_ty is None:
+        return [np.array(1), np.array(1)]
+    return fitted_stepresponse_ty
+
+
+def _get_qoi_mask(qois):
+    if qois == 'all':
+        return np.arange(len(cz_main.qoi_value_names))
+    return np.array([cz_main.qoi_value_names.index(q) for q in qois])
+
+
+class CZSimulation:
+    """
+    Simulation of the CZ for fixed parameters, as a function of the
+    parameters of the flux pulse.
+
+    The parameter views are created once and reused for all points, this is
+    the object that lives in the worker processes of a landscape.
+    """
+
+    def __init__(self,
+                 flux_pars: FluxLutmanParameters,
+                 static_pars: StaticLutmanParameters,
+                 sim_pars: SimControlParameters,
+                 fitted_stepresponse_ty=None,
+                 qois='all',
+                 sweep_parameters=('cz_theta_f', 'cz_lambda_2')):
+        """
+        Args:
+            flux_pars, static_pars, sim_pars: parameters of the simulation.
+            fitted_stepresponse_ty: list of two elements, corresponding to
+                the time t and the step response in volts along the y axis,
+                only used when `sim_pars.distortions` is True.
+            qois: list of quantities of interest to return, entries of
+                `cz_main.qoi_value_names`, or 'all'.
+            sweep_parameters: names of the `FluxLutmanParameters` that
+                are set by the coordinates of a point.
+        """
+        which_gate = sim_pars.which_gate
+        self.fluxlutman = _FluxLutmanView(
+            flux_pars.instrument_parameters(which_gate))
+        self.fluxlutman_static = _ParameterView(
+            static_pars.instrument_parameters(which_gate))
+        self.sim_control_CZ = _ParameterView(
+            sim_pars.instrument_parameters(which_gate))
+        self.fitted_stepresponse_ty = _default_stepresponse(
+            fitted_stepresponse_ty)
+        self.qoi_mask = _get_qoi_mask(qois)
+        self.sweep_parameters = [
+            '{}_{}'.format(par, which_gate)
+            if par in FluxLutmanParameters._gate_parameters else par
+            for par in sweep_parameters]
+
+    def __call__(self, point=()):
+        for name, value in zip(self.sweep_parameters, point):
+            self.fluxlutman.set(name, value)
+        values = cz_main.simulate_quantities_of_interest(
+            fluxlutman=self.fluxlutman,
+            fluxlutman_static=self.fluxlutman_static,
+            sim_control_CZ=self.sim_control_CZ,
+            fitted_stepresponse_ty=self.fitted_stepresponse_ty)
+        return np.array(values, dtype=float)[self.qoi_mask]
+
+
+def simulate_cz(flux_pars: FluxLutmanParameters,
+                static_pars: StaticLutmanParameters,
+                sim_pars: SimControlParameters,
+                fitted_stepresponse_ty=None,
+                qois='all'):
+    """
+    Simulates a CZ and returns the quantities of interest.
+
+    Returns:
+        dict of {value_name: value}, the names and units are those of the
+        `CZ_trajectory_superoperator` detector.
+    """
+    sim = CZSimulation(flux_pars, static_pars, sim_pars,
+                       fitted_stepresponse_ty=fitted_stepresponse_ty,
+                       qois=qois, sweep_parameters=())
+    values = sim()
+    value_names = np.array(cz_main.qoi_value_names)[sim.qoi_mask]
+    return dict(zip(value_names, values))
+
+
+#######################################################################
+# Parallel evaluation of landscapes
+#######################################################################
+
+# The simulation of a worker process, set by the pool initializer such that
+# the parameters are only sent once to every worker
+_worker_simulation = None
+
+
+def _init_worker(*args):
+    global _worker_simulation
+    _worker_simulation = CZSimulation(*args)
+
+
+def _simulate_point(point):
+    return _worker_simulation(point)
+
+
+class _LandscapeRun:
+    """
+    Evaluates points in a pool of worker processes and appends the results
+    to a datafile with the layout of the MeasurementControl.
+    """
+
+    def __init__(self, flux_pars, static_pars, sim_pars,
+                 fitted_stepresponse_ty, qois, sweep_parameters,
+                 n_processes, label, datadir, exp_metadata):
+        self.sim_args = (flux_pars, static_pars, sim_pars,
+                         fitted_stepresponse_ty, qois, sweep_parameters)
+        self.sim = CZSimulation(*self.sim_args)
+        self.n_processes = (multiprocessing.cpu_count()
+                            if n_processes is None else n_processes)
+        self.label = label
+        self.datadir = a_tools.datadir if datadir is None else datadir
+        self.exp_metadata = exp_metadata
+        self.pool = None
+        self.data_object = None
+        self.dset = None
+        self.timings = {'simulation': 0, 'nr_points': 0}
+
+    def __enter__(self):
+        if self.n_processes > 1:
+            self.pool = multiprocessing.Pool(
+                self.n_processes, initializer=_init_worker,
+                initargs=self.sim_args)
+        try:
+            self.data_object = h5d.Data(name=self.label, datadir=self.datadir)
+            mcat.register_measurement(self.data_object.folder, self.datadir)
+            self._create_dataset()
+        except Exception:
+            self.__exit__(*sys.exc_info())
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.pool is not None:
+            if exc_type is None:
+                self.pool.close()
+            else:
+                self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.dset is not None:
+            self.dset.flush()
+        if self.data_object is not None:
+            self.data_object.close()
+
+    @property
+    def filepath(self):
+        return self.data_object.filepath
+
+    def _create_dataset(self):
+        flux_pars, static_pars, sim_pars = self.sim_args[:3]
+        value_names = list(
+            np.array(cz_main.qoi_value_names)[self.sim.qoi_mask])
+        value_units = list(
+            np.array(cz_main.qoi_value_units)[self.sim.qoi_mask])
+        sweep_par_names = self.sim.sweep_parameters
+        sweep_par_units = [sweep_parameter_units[name]
+                           for name in self.sim_args[5]]
+        column_names = [
+            '{} ({})'.format(name, unit) for name, unit in
+            zip(sweep_par_names + value_names, sweep_par_units + value_units)]
+
+        data_group = self.data_object.create_group('Experimental Data')
+        self.dset = h5d.BufferedDataset(
+            data_group, 'Data', ncols=len(column_names), dtype='float64')
+        self.dset.attrs['column_names'] = h5d.encode_to_utf8(column_names)
+        data_group.attrs['datasaving_format'] = h5d.encode_to_utf8('Version 2')
+        data_group.attrs['sweep_parameter_names'] = h5d.encode_to_utf8(
+            sweep_par_names)
+        data_group.attrs['sweep_parameter_units'] = h5d.encode_to_utf8(
+            sweep_par_units)
+        data_group.attrs['value_names'] = h5d.encode_to_utf8(value_names)
+        data_group.attrs['value_units'] = h5d.encode_to_utf8(value_units)
+        self.value_names = value_names
+        self.value_units = value_units
+
+        if self.exp_metadata is not None:
+            mc.MeasurementControl.save_exp_metadata(
+                self.exp_metadata, self.data_object)
+        # The parameters take the place of the instrument settings
+        pars_group = self.data_object.create_group('Simulation parameters')
+        for name, pars in [('fluxlutman', flux_pars),
+                           ('fluxlutman_static', static_pars),
+                           ('sim_control_CZ', sim_pars)]:
+            h5d.write_dict_to_hdf5(
+                pars.instrument_parameters(sim_pars.which_gate)
+                if name != 'sim_control_CZ' else pars.datafile_parameters(),
+                entry_point=pars_group.create_group(name))
+
+    def evaluate(self, points, chunksize: int = 1):
+        """
+        Evaluates the simulation for all points (rows of coordinates of the
+        sweep parameters) and appends them to the datafile.
+
+        Returns:
+            array of shape (len(points), len(value_names))
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        t0 = time.time()
+        if self.pool is None:
+            results = map(self.sim, points)
+        else:
+            results = self.pool.imap(_simulate_point, points,
+                                     chunksize=chunksize)
+
+        values = np.empty((len(points), len(self.value_names)))
+        start_idx = len(self.dset)
+        self.dset.resize((start_idx + len(points), self.dset.shape[1]))
+        for i, (point, value) in enumerate(zip(points, results)):
+            values[i] = value
+            self.dset[start_idx + i, :] = np.concatenate([point, value])
+        self.timings['simulation'] += time.time() - t0
+        self.timings['nr_points'] += len(points)
+        return values
+
+    def result(self, points, values):
+        return {'sweep_points': points,
+                'values': values,
+                'value_names': self.value_names,
+                'value_units': self.value_units,
+                'filepath': self.filepath,
+                'timings': dict(self.timings)}
+
+
+def simulate_landscape(flux_pars: FluxLutmanParameters,
+                       static_pars: StaticLutmanParameters,
+                       sim_pars: SimControlParameters,
+                       theta_f, lambda_2,
+                       fitted_stepresponse_ty=None,
+                       qois='all',
+                       n_processes: int = None,
+                       chunksize: int = None,
+                       label: str = '2D simulation landscape',
+                       datadir: str = None,
+                       exp_metadata: dict = None):
+    """
+    Simulates the CZ on a grid of `cz_theta_f` and `cz_lambda_2` values.
+
+    The grid is evaluated in a pool of `n_processes` worker processes (no
+    pool is used if `n_processes` is 1), every worker creates its
+    simulation once. The results are stored in a single datafile, in the
+    order of a 2D measurement of the MeasurementControl (theta_f is the
+    fast axis).
+
+    Args:
+        flux_pars, static_pars, sim_pars: parameters of the simulation, the
+            values of `cz_theta_f` and `cz_lambda_2` are ignored.
+        theta_f (array): values of `cz_theta_f` in deg.
+        lambda_2 (array): values of `cz_lambda_2`.
+        fitted_stepresponse_ty: step response used if sim_pars.distortions.
+        qois: list of quantities of interest to return or 'all'.
+        n_processes (int): number of worker processes, defaults to the
+            number of cpus.
+        chunksize (int): number of points sent to a worker at once, by
+            default the grid is split in about 4 chunks per worker.
+        label (str): name of the datafile.
+        datadir (str): data directory, defaults to `a_tools.datadir`.
+        exp_metadata (dict): metadata to store in the datafile.
+
+    Returns:
+        dict with the `sweep_points`, the `values` (one column per
+        quantity of interest), their names and units, the `filepath` of the
+        datafile and the `timings`.
+    """
+    theta_f_grid, lambda_2_grid = np.meshgrid(theta_f, lambda_2)
+    points = np.column_stack([theta_f_grid.ravel(), lambda_2_grid.ravel()])
+
+    with _LandscapeRun(flux_pars, static_pars, sim_pars,
+                       fitted_stepresponse_ty, qois,
+                       ('cz_theta_f', 'cz_lambda_2'), n_processes, label,
+                       datadir, exp_metadata) as run:
+        if chunksize is None:
+            chunksize = max(1, len(points) // (4 * run.n_processes))
+        values = run.evaluate(points, chunksize=chunksize)
+        return run.result(points, values)
+
+
+def simulate_landscape_adaptive(flux_pars: FluxLutmanParameters,
+                                static_pars: StaticLutmanParameters,
+                                sim_pars: SimControlParameters,
+                                bounds, n_points: int,
+                                batch_size: int = None,
+                                loss_per_triangle=None,
+                                fitted_stepresponse_ty=None,
+                                qois='all',
+                                n_processes: int = None,
+                                label: str = '2D simulation landscape',
+                                datadir: str = None,
+                                exp_metadata: dict = None):
+    """
+    Samples the `cz_theta_f`, `cz_lambda_2` landscape with an
+    `adaptive.Learner2D`, evaluating batches of `batch_size` points in
+    parallel. As in the adaptive mode of the MeasurementControl, the
+    learner uses the first quantity of interest.
+
+    Args:
+        bounds: [(theta_f_min, theta_f_max), (lambda2_min, lambda2_max)]
+        n_points (int): total number of points to evaluate.
+        batch_size (int): number of points requested from the learner at
+            once, defaults to the number of worker processes.
+        loss_per_triangle: loss function of the learner, e.g.,
+            `adaptive.learner.learner2D.uniform_loss`.
+
+        See `simulate_landscape` for the other arguments.
+    """
+    learner = adaptive.Learner2D(None, bounds=bounds,
+                                 loss_per_triangle=loss_per_triangle)
+
+    with _LandscapeRun(flux_pars, static_pars, sim_pars,
+                       fitted_stepresponse_ty, qois,
+                       ('cz_theta_f', 'cz_lambda_2'), n_processes, label,
+                       datadir, exp_metadata) as run:
+        if batch_size is None:
+            batch_size = run.n_processes
+        all_points = []
+        all_values = []
+        while len(all_points) < n_points:
+            points, _ = learner.ask(min(batch_size, n_points - len(all_points)))
+            values = run.evaluate(points)
+            learner.tell_many(points, values[:, 0])
+            all_points.extend(points)
+            all_values.append(values)
+        return run.result(np.array(all_points), np.concatenate(all_values))
+
@@ -20,7 +20,18 @@ import logging
 log = logging.getLogger(__name__)
 
 
+# Quantities of interest returned by `simulate_quantities_of_interest`
+qoi_value_names = ['Cost func', 'Cond phase', 'L1', 'L2', 'avgatefid_pc', 'avgatefid_compsubspace_pc',
+                   'phase_q0', 'phase_q1', 'avgatefid_compsubspace', 'avgatefid_compsubspace_pc_onlystaticqubit', 'population_02_state',
+                   'cond_phase02', 'coherent_leakage11', 'offset_difference', 'missing_fraction', '12_21_population_transfer', '12_03_population_transfer',
+                   'phase_diff_12_02', 'phase_diff_21_20', 'cond_phase12', 'cond_phase21', 'cond_phase03', 'cond_phase20']
+qoi_value_units = ['a.u.', 'deg', '%', '%', '%', '%', 'deg', 'deg', '%', '%', '%', 'deg', '%', '%', '%', '%', '%', 'deg', 'deg', 'deg', 'deg', 'deg', 'deg']
+
+
 def f_to_parallelize_new(arglist):
+    # N.B. to evaluate landscapes without creating instruments and a
+    # MeasurementControl for every work item use
+    # `cz_superoperator_simulation_landscape.simulate_landscape`
     # cluster wants a list as an argument.
     # Below the various list items are assigned to their own variable
 
@@ -66,6 +77,7 @@ def f_to_parallelize_new(arglist):
     czd_double_sided = fluxlutman.get('czd_double_sided_{}'.format(which_gate))
 
     d=CZ_trajectory_superoperator(fluxlutman=fluxlutman, sim_control_CZ=sim_control_CZ,
+                                  fluxlutman_static=fluxlutman_static,
                                   fitted_stepresponse_ty=fitted_stepresponse_ty,
                                   qois=adaptive_pars.get('qois', 'all'))
     MC.set_detector_function(d)
@@ -413,11 +425,8 @@ class CZ_trajectory_superoperator(det.Soft_Detector):
 
         super().__init__()
 
-        self.value_names = ['Cost func', 'Cond phase', 'L1', 'L2', 'avgatefid_pc', 'avgatefid_compsubspace_pc',
-                            'phase_q0', 'phase_q1', 'avgatefid_compsubspace', 'avgatefid_compsubspace_pc_onlystaticqubit', 'population_02_state',
-                            'cond_phase02', 'coherent_leakage11', 'offset_difference', 'missing_fraction', '12_21_population_transfer', '12_03_population_transfer',
-                            'phase_diff_12_02', 'phase_diff_21_20', 'cond_phase12', 'cond_phase21', 'cond_phase03', 'cond_phase20']
-        self.value_units = ['a.u.', 'deg', '%', '%', '%', '%', 'deg', 'deg', '%', '%', '%', 'deg', '%', '%', '%', '%', '%', 'deg', 'deg', 'deg', 'deg', 'deg', 'deg']
+        self.value_names = list(qoi_value_names)
+        self.value_units = list(qoi_value_units)
 
         self.qois = qois
         if self.qois != 'all':
@@ -436,144 +445,162 @@ class CZ_trajectory_superoperator(det.Soft_Detector):
             self.fitted_stepresponse_ty = fitted_stepresponse_ty
 
     def acquire_data_point(self, **kw):
+        return_values = simulate_quantities_of_interest(
+            fluxlutman=self.fluxlutman,
+            fluxlutman_static=self.fluxlutman_static,
+            sim_control_CZ=self.sim_control_CZ,
+            fitted_stepresponse_ty=self.fitted_stepresponse_ty)
+        if self.qois != 'all':
+            return np.array(return_values)[self.qoi_mask]
+
+        else:
+            return return_values
 
-        # Discretize average (integral) over a Gaussian distribution
-        mean = 0
-        sigma_q0 = self.sim_control_CZ.sigma_q0()
-        sigma_q1 = self.sim_control_CZ.sigma_q1()          # one for each qubit, in units of Phi_0
 
-        qoi_plot = []    # used to verify convergence properties. If len(n_sampling_gaussian_vec)==1, it is useless
+def simulate_quantities_of_interest(fluxlutman, fluxlutman_static,
+                                     sim_control_CZ, fitted_stepresponse_ty):
+    """
+    Simulates a CZ trajectory and returns all quantities of interest, in the
+    order of `qoi_value_names`.
 
-        # 11 guarantees excellent convergence.
-        # We choose it odd so that the central point of the Gaussian is included.
-        # Always choose it odd
-        n_sampling_gaussian_vec = self.sim_control_CZ.n_sampling_gaussian_vec()
+    The instruments are only used to read parameters from, any object
+    providing the same parameters and methods can be used instead, see
+    `cz_superoperator_simulation_landscape`.
+    """
 
-        for n_sampling_gaussian in n_sampling_gaussian_vec:
-            # If sigma=0 there's no need for sampling
-            if sigma_q0 != 0:
-                samplingpoints_gaussian_q0 = np.linspace(-5*sigma_q0,5*sigma_q0,n_sampling_gaussian)    # after 5 sigmas we cut the integral
-                delta_x_q0 = samplingpoints_gaussian_q0[1]-samplingpoints_gaussian_q0[0]
-                values_gaussian_q0 = czf.gaussian(samplingpoints_gaussian_q0,mean,sigma_q0)
-            else:
-                samplingpoints_gaussian_q0 = np.array([0])
-                delta_x_q0 = 1
-                values_gaussian_q0 = np.array([1])
-            if sigma_q1 != 0:
-                samplingpoints_gaussian_q1 = np.linspace(-5*sigma_q1,5*sigma_q1,n_sampling_gaussian)    # after 5 sigmas we cut the integral
-                delta_x_q1 = samplingpoints_gaussian_q1[1]-samplingpoints_gaussian_q1[0]
-                values_gaussian_q1 = czf.gaussian(samplingpoints_gaussian_q1,mean,sigma_q1)
-            else:
-                samplingpoints_gaussian_q1 = np.array([0])
-                delta_x_q1 = 1
-                values_gaussian_q1 = np.array([1])
-
-            # This is actually the input that was parallelized in an old version.
-            # Currently it just creates a list that is provided sequentially to compute_propagator
-            input_to_parallelize = []
-
-            weights=[]
-            number=-1           # used to number instruments that are created in the parallelization, to avoid conflicts in the cluster
-
-            for j_q0 in range(len(samplingpoints_gaussian_q0)):
-                fluxbias_q0 = samplingpoints_gaussian_q0[j_q0]                     # q0 fluxing qubit
-                for j_q1 in range(len(samplingpoints_gaussian_q1)):
-                    fluxbias_q1 = samplingpoints_gaussian_q1[j_q1]                 # q1 spectator qubit
-
-                    input_point = {'fluxbias_q0': fluxbias_q0,
-                                   'fluxbias_q1': fluxbias_q1,
-                                   'fluxlutman': self.fluxlutman,
-                                   'fluxlutman_static': self.fluxlutman_static,
-                                   'sim_control_CZ': self.sim_control_CZ,
-                                   'fitted_stepresponse_ty': self.fitted_stepresponse_ty}
-
-                    weight = values_gaussian_q0[j_q0]*delta_x_q0 * values_gaussian_q1[j_q1]*delta_x_q1
-                    weights.append(weight)
-
-                    input_to_parallelize.append(input_point)
-
-            U_final_vec = []
-            t_final_vec = []
-            for input_arglist in input_to_parallelize:
-                result_list = compute_propagator(input_arglist)
-                if self.sim_control_CZ.double_cz_pi_pulses() != '':
-                    # Experimenting with single qubit ideal pi pulses
-                    if self.sim_control_CZ.double_cz_pi_pulses() == 'with_pi_pulses':
-                        pi_single_qubit = qtp.Qobj([[0, 1, 0],
-                                                    [1, 0, 0],
-                                                    [0, 0, 1]])
-                        # pi_pulse = qtp.tensor(pi_single_qubit, qtp.qeye(n_levels_q0))
-                        pi_op = qtp.tensor(pi_single_qubit, pi_single_qubit)
-                        # pi_super_op = qtp.to_super(pi_op)
-                        U_final = result_list[0]
-                        U_final = pi_op * U_final * pi_op * U_final
-                    elif self.sim_control_CZ.double_cz_pi_pulses() == 'no_pi_pulses':
-                        U_final = result_list[0]
-                        U_final = U_final * U_final
-                    t_final = 2 * result_list[1]
-                else:
+    # Discretize average (integral) over a Gaussian distribution
+    mean = 0
+    sigma_q0 = sim_control_CZ.sigma_q0()
+    sigma_q1 = sim_control_CZ.sigma_q1()          # one for each qubit, in units of Phi_0
+
+    qoi_plot = []    # used to verify convergence properties. If len(n_sampling_gaussian_vec)==1, it is useless
+
+    # 11 guarantees excellent convergence.
+    # We choose it odd so that the central point of the Gaussian is included.
+    # Always choose it odd
+    n_sampling_gaussian_vec = sim_control_CZ.n_sampling_gaussian_vec()
+
+    for n_sampling_gaussian in n_sampling_gaussian_vec:
+        # If sigma=0 there's no need for sampling
+        if sigma_q0 != 0:
+            samplingpoints_gaussian_q0 = np.linspace(-5*sigma_q0,5*sigma_q0,n_sampling_gaussian)    # after 5 sigmas we cut the integral
+            delta_x_q0 = samplingpoints_gaussian_q0[1]-samplingpoints_gaussian_q0[0]
+            values_gaussian_q0 = czf.gaussian(samplingpoints_gaussian_q0,mean,sigma_q0)
+        else:
+            samplingpoints_gaussian_q0 = np.array([0])
+            delta_x_q0 = 1
+            values_gaussian_q0 = np.array([1])
+        if sigma_q1 != 0:
+            samplingpoints_gaussian_q1 = np.linspace(-5*sigma_q1,5*sigma_q1,n_sampling_gaussian)    # after 5 sigmas we cut the integral
+            delta_x_q1 = samplingpoints_gaussian_q1[1]-samplingpoints_gaussian_q1[0]
+            values_gaussian_q1 = czf.gaussian(samplingpoints_gaussian_q1,mean,sigma_q1)
+        else:
+            samplingpoints_gaussian_q1 = np.array([0])
+            delta_x_q1 = 1
+            values_gaussian_q1 = np.array([1])
+
+        # This is actually the input that was parallelized in an old version.
+        # Currently it just creates a list that is provided sequentially to compute_propagator
+        input_to_parallelize = []
+
+        weights=[]
+        number=-1           # used to number instruments that are created in the parallelization, to avoid conflicts in the cluster
+
+        for j_q0 in range(len(samplingpoints_gaussian_q0)):
+            fluxbias_q0 = samplingpoints_gaussian_q0[j_q0]                     # q0 fluxing qubit
+            for j_q1 in range(len(samplingpoints_gaussian_q1)):
+                fluxbias_q1 = samplingpoints_gaussian_q1[j_q1]                 # q1 spectator qubit
+
+                input_point = {'fluxbias_q0': fluxbias_q0,
+                               'fluxbias_q1': fluxbias_q1,
+                               'fluxlutman': fluxlutman,
+                               'fluxlutman_static': fluxlutman_static,
+                               'sim_control_CZ': sim_control_CZ,
+                               'fitted_stepresponse_ty': fitted_stepresponse_ty}
+
+                weight = values_gaussian_q0[j_q0]*delta_x_q0 * values_gaussian_q1[j_q1]*delta_x_q1
+                weights.append(weight)
+
+                input_to_parallelize.append(input_point)
+
+        U_final_vec = []
+        t_final_vec = []
+        for input_arglist in input_to_parallelize:
+            result_list = compute_propagator(input_arglist)
+            if sim_control_CZ.double_cz_pi_pulses() != '':
+                # Experimenting with single qubit ideal pi pulses
+                if sim_control_CZ.double_cz_pi_pulses() == 'with_pi_pulses':
+                    pi_single_qubit = qtp.Qobj([[0, 1, 0],
+                                                [1, 0, 0],
+                                                [0, 0, 1]])
+                    # pi_pulse = qtp.tensor(pi_single_qubit, qtp.qeye(n_levels_q0))
+                    pi_op = qtp.tensor(pi_single_qubit, pi_single_qubit)
+                    # pi_super_op = qtp.to_super(pi_op)
+                    U_final = result_list[0]
+                    U_final = pi_op * U_final * pi_op * U_final
+                elif sim_control_CZ.double_cz_pi_pulses() == 'no_pi_pulses':
                     U_final = result_list[0]
-                    t_final = result_list[1]
-                U_final_vec.append(U_final)
-                t_final_vec.append(t_final)
-
-            t_final = t_final_vec[0]  # equal for all entries, we need it to compute phases in the rotating frame
-            # needed to compute phases in the rotating frame, not used anymore
-            # w_q0, w_q1, alpha_q0, alpha_q1 = czf.dressed_frequencies(self.fluxlutman, self.fluxlutman_static, self.sim_control_CZ, which_gate=self.sim_control_CZ.which_gate())
-
-            # Reproducing Leo's plots of cond_phase and leakage vs. flux offset (I order vs II order)
-            # czf.sensitivity_to_fluxoffsets(U_final_vec,input_to_parallelize,t_final,self.fluxlutman,self.fluxlutman_static, which_gate=self.sim_control_CZ.which_gate())
-
-            for i in range(len(U_final_vec)):
-                if U_final_vec[i].type == 'oper':
-                    U_final_vec[i] = qtp.to_super(U_final_vec[i])           # weighted averaging needs to be done for superoperators
-                U_final_vec[i] = U_final_vec[i] * weights[i]
-            U_superop_average = sum(U_final_vec)              # computing resulting average propagator
-            # print(czf.verify_CPTP(U_superop_average))
-
-            qoi = czf.simulate_quantities_of_interest_superoperator_new(U=U_superop_average, t_final=t_final, fluxlutman=self.fluxlutman, fluxlutman_static=self.fluxlutman_static, which_gate=self.sim_control_CZ.which_gate())
-
-            # if we look only for the minimum avgatefid_pc in the heat maps,
-            # then we optimize the search via higher-order cost function
-            if self.sim_control_CZ.cost_func() is not None:
-                cost_func_val = self.sim_control_CZ.cost_func()(qoi)
-            elif self.sim_control_CZ.look_for_minimum():
-                cost_func_val = (np.log10(1 - qoi['avgatefid_compsubspace_pc']))**4  # sign removed for even powers
+                    U_final = U_final * U_final
+                t_final = 2 * result_list[1]
             else:
-                cost_func_val = (-np.log10(1 - qoi['avgatefid_compsubspace_pc']))
-
-            quantities_of_interest = [cost_func_val, qoi['phi_cond'], qoi['L1']*100, qoi['L2']*100, qoi['avgatefid_pc']*100,
-                qoi['avgatefid_compsubspace_pc']*100, qoi['phase_q0'], qoi['phase_q1'],
-                qoi['avgatefid_compsubspace']*100, qoi['avgatefid_compsubspace_pc_onlystaticqubit']*100, qoi['population_02_state']*100,
-                qoi['cond_phase02'], qoi['coherent_leakage11']*100, qoi['offset_difference']*100, qoi['missing_fraction']*100,
-                qoi['population_transfer_12_21']*100,qoi['population_transfer_12_03']*100,
-                qoi['phase_diff_12_02'], qoi['phase_diff_21_20'], qoi['cond_phase12'], qoi['cond_phase21'], qoi['cond_phase03'], qoi['cond_phase20']
-            ]
-            qoi_vec = np.array(quantities_of_interest)
-            qoi_plot.append(qoi_vec)
-
-            # To study the effect of the coherence of leakage on repeated CZs (simpler than simulating a full RB experiment):
-            # czf.repeated_CZs_decay_curves(U_superop_average,t_final,self.fluxlutman,self.fluxlutman_static, which_gate=self.sim_control_CZ.which_gate())
-
-            # czf.plot_spectrum(self.fluxlutman,self.fluxlutman_static, which_gate=self.sim_control_CZ.which_gate())
-
-        qoi_plot = np.array(qoi_plot)
-
-        # Uncomment to study the convergence properties of averaging over a Gaussian
-        # for i in range(len(qoi_plot[0])):
-        #     czf.plot(x_plot_vec=[n_sampling_gaussian_vec],
-        #                   y_plot_vec=[qoi_plot[:,i]],
-        #                   title='Study of convergence of average',
-        #                   xlabel='n_sampling_gaussian points',ylabel=self.value_names[i])
-
-        return_values = [qoi_plot[0,0], qoi_plot[0,1], qoi_plot[0,2], qoi_plot[0,3], \
-            qoi_plot[0,4], qoi_plot[0,5], qoi_plot[0,6], \
-            qoi_plot[0,7], qoi_plot[0,8], qoi_plot[0,9], qoi_plot[0,10], \
-            qoi_plot[0,11], qoi_plot[0,12], qoi_plot[0,13], qoi_plot[0,14], qoi_plot[0,15], qoi_plot[0,16], qoi_plot[0,17], qoi_plot[0,18],
-            qoi_plot[0,19], qoi_plot[0,20], qoi_plot[0,21], qoi_plot[0,22]]
-        if self.qois != 'all':
-            return np.array(return_values)[self.qoi_mask]
-
+                U_final = result_list[0]
+                t_final = result_list[1]
+            U_final_vec.append(U_final)
+            t_final_vec.append(t_final)
+
+        t_final = t_final_vec[0]  # equal for all entries, we need it to compute phases in the rotating frame
+        # needed to compute phases in the rotating frame, not used anymore
+        # w_q0, w_q1, alpha_q0, alpha_q1 = czf.dressed_frequencies(fluxlutman, fluxlutman_static, sim_control_CZ, which_gate=sim_control_CZ.which_gate())
+
+        # Reproducing Leo's plots of cond_phase and leakage vs. flux offset (I order vs II order)
+        # czf.sensitivity_to_fluxoffsets(U_final_vec,input_to_parallelize,t_final,fluxlutman,fluxlutman_static, which_gate=sim_control_CZ.which_gate())
+
+        for i in range(len(U_final_vec)):
+            if U_final_vec[i].type == 'oper':
+                U_final_vec[i] = qtp.to_super(U_final_vec[i])           # weighted averaging needs to be done for superoperators
+            U_final_vec[i] = U_final_vec[i] * weights[i]
+        U_superop_average = sum(U_final_vec)              # computing resulting average propagator
+        # print(czf.verify_CPTP(U_superop_average))
+
+        qoi = czf.simulate_quantities_of_interest_superoperator_new(U=U_superop_average, t_final=t_final, fluxlutman=fluxlutman, fluxlutman_static=fluxlutman_static, which_gate=sim_control_CZ.which_gate())
+
+        # if we look only for the minimum avgatefid_pc in the heat maps,
+        # then we optimize the search via higher-order cost function
+        if sim_control_CZ.cost_func() is not None:
+            cost_func_val = sim_control_CZ.cost_func()(qoi)
+        elif sim_control_CZ.look_for_minimum():
+            cost_func_val = (np.log10(1 - qoi['avgatefid_compsubspace_pc']))**4  # sign removed for even powers
         else:
-            return return_values
+            cost_func_val = (-np.log10(1 - qoi['avgatefid_compsubspace_pc']))
+
+        quantities_of_interest = [cost_func_val, qoi['phi_cond'], qoi['L1']*100, qoi['L2']*100, qoi['avgatefid_pc']*100,
+            qoi['avgatefid_compsubspace_pc']*100, qoi['phase_q0'], qoi['phase_q1'],
+            qoi['avgatefid_compsubspace']*100, qoi['avgatefid_compsubspace_pc_onlystaticqubit']*100, qoi['population_02_state']*100,
+            qoi['cond_phase02'], qoi['coherent_leakage11']*100, qoi['offset_difference']*100, qoi['missing_fraction']*100,
+            qoi['population_transfer_12_21']*100,qoi['population_transfer_12_03']*100,
+            qoi['phase_diff_12_02'], qoi['phase_diff_21_20'], qoi['cond_phase12'], qoi['cond_phase21'], qoi['cond_phase03'], qoi['cond_phase20']
+        ]
+        qoi_vec = np.array(quantities_of_interest)
+        qoi_plot.append(qoi_vec)
+
+        # To study the effect of the coherence of leakage on repeated CZs (simpler than simulating a full RB experiment):
+        # czf.repeated_CZs_decay_curves(U_superop_average,t_final,fluxlutman,fluxlutman_static, which_gate=sim_control_CZ.which_gate())
+
+        # czf.plot_spectrum(fluxlutman,fluxlutman_static, which_gate=sim_control_CZ.which_gate())
+
+    qoi_plot = np.array(qoi_plot)
+
+    # Uncomment to study the convergence properties of averaging over a Gaussian
+    # for i in range(len(qoi_plot[0])):
+    #     czf.plot(x_plot_vec=[n_sampling_gaussian_vec],
+    #                   y_plot_vec=[qoi_plot[:,i]],
+    #                   title='Study of convergence of average',
+    #                   xlabel='n_sampling_gaussian points',ylabel=qoi_value_names[i])
+
+    return_values = [qoi_plot[0,0], qoi_plot[0,1], qoi_plot[0,2], qoi_plot[0,3], \
+        qoi_plot[0,4], qoi_plot[0,5], qoi_plot[0,6], \
+        qoi_plot[0,7], qoi_plot[0,8], qoi_plot[0,9], qoi_plot[0,10], \
+        qoi_plot[0,11], qoi_plot[0,12], qoi_plot[0,13], qoi_plot[0,14], qoi_plot[0,15], qoi_plot[0,16], qoi_plot[0,17], qoi_plot[0,18],
+        qoi_plot[0,19], qoi_plot[0,20], qoi_plot[0,21], qoi_plot[0,22]]
+    return return_values
 
@@ -1,5 +1,6 @@
 import os
 import pytest
+import numpy as np
 import pycqed as pq
 from pycqed.analysis import analysis_toolbox as a_tools
 
@@ -37,3 +38,50 @@ def test_get_datafilepath_from_timestamp_raises_no_data():
     timestamp = '20170412_183929'
     with pytest.raises(ValueError):
         a_tools.get_datafilepath_from_timestamp(timestamp)
+
+
+def test_get_data_from_timestamp_list():
+    from pycqed.analysis import measurement_analysis as ma
+    timestamps = a_tools.get_timestamps_in_range(
+        '20170607_000000', '20170607_235959', label='QR')
+    params_dict = {'sweep_points': 'sweep_points',
+                   'measured_values': 'measured_values',
+                   'value_names': 'value_names',
+                   'measurementstring': 'measurementstring',
+                   'T1': 'Instrument settings.QR.T1',
+                   'folder': 'folder'}
+
+    data = a_tools.get_data_from_timestamp_list(
+        timestamps, params_dict, n_threads=2, use_cache=False)
+    assert data['timestamps'] == timestamps
+    for i, timestamp in enumerate(timestamps):
+        ana = ma.MeasurementAnalysis(timestamp=timestamp, auto=False,
+                                     h5mode='r')
+        ana.get_naming_and_values()
+        expected = a_tools.get_data_from_ma(ana, params_dict.values())
+        ana.finish()
+        for key, param in params_dict.items():
+            np.testing.assert_equal(data[key][i], expected[param])
+
+    # repeated queries are served from the cache, modifying the returned
+    # data does not modify the cache
+    data['sweep_points'][0][:] = np.nan
+    data_cached = a_tools.get_data_from_timestamp_list(
+        timestamps, params_dict)
+    data_cached = a_tools.get_data_from_timestamp_list(
+        timestamps, params_dict)
+    assert not np.isnan(data_cached['sweep_points'][0]).any()
+    np.testing.assert_equal(data_cached['measured_values'],
+                            data['measured_values'])
+
+
+def test_get_data_from_timestamp_list_instrument_settings_only():
+    data = a_tools.get_data_from_timestamp_list(
+        ['20170607_152324', '20170607_999999'],
+        {'f_qubit': 'Instrument settings.QL.f_qubit', 'folder': 'folder'},
+        numeric_params=['f_qubit'], use_cache=False)
+    # unknown timestamps are removed
+    assert data['timestamps'] == ['20170607_152324']
+    assert data['folder'] == [os.path.join(
+        datadir, '20170607', '152324_T1_QL')]
+    assert data['f_qubit'].dtype == np.float64
@@ -0,0 +1,70 @@
+import sys
+import subprocess
+import importlib
+
+import pytest
+
+from pycqed.analysis_v2 import measurement_analysis as ma2
+
+# on older python versions all modules are imported at once
+lazy_only = pytest.mark.skipif(
+    sys.version_info < (3, 7), reason='requires module __getattr__')
+
+
+@lazy_only
+def test_import_does_not_import_analysis_modules():
+    code = ("import sys\n"
+            "import pycqed.analysis_v2.measurement_analysis as ma2\n"
+            "print([m for m in sys.modules if m.startswith("
+            "'pycqed.analysis_v2.') and m != ma2.__name__])")
+    res = subprocess.run([sys.executable, '-c', code],
+                         stdout=subprocess.PIPE, check=True)
+    assert res.stdout.decode().strip().splitlines()[-1] == '[]'
+
+
+def test_lazy_import_keeps_datadir():
+    # the datadir is set before the first analysis module is imported
+    code = ("import pycqed.analysis_v2.measurement_analysis as ma2\n"
+            "ma2.a_tools.datadir = 'test_datadir'\n"
+            "ma2.Basic1DAnalysis\n"
+            "print(ma2.a_tools.datadir)")
+    res = subprocess.run([sys.executable, '-c', code],
+                         stdout=subprocess.PIPE, check=True)
+    assert res.stdout.decode().strip().splitlines()[-1] == 'test_datadir'
+
+
+def test_lazy_attributes():
+    from pycqed.analysis_v2 import readout_analysis
+    assert ma2.Singleshot_Readout_Analysis is \
+        readout_analysis.Singleshot_Readout_Analysis
+    assert ma2.ra is readout_analysis
+    # the names are bound after the first access
+    assert 'Singleshot_Readout_Analysis' in vars(ma2)
+    # the last binding of aliases that were bound twice
+    assert ma2.sa.__name__ == 'pycqed.analysis_v2.spectroscopy_analysis'
+    assert 'Basic1DAnalysis' in dir(ma2)
+
+    with pytest.raises(AttributeError):
+        ma2.Not_An_Analysis
+
+
+@pytest.mark.parametrize('module, names', sorted(ma2._lazy_attributes.items()))
+def test_lazy_attributes_exist(module, names):
+    try:
+        module = importlib.import_module('pycqed.analysis_v2.' + module)
+    except ImportError as e:
+        pytest.skip('Could not import {}: {}'.format(module, e))
+    for name in names:
+        assert hasattr(module, name)
+
+
+@lazy_only
+def test_reload_analysis_modules():
+    cls = ma2.Basic1DAnalysis
+    # reloading resets the module variables of the analysis toolbox
+    datadir = ma2.a_tools.datadir
+    ma2.reload_analysis_modules()
+    ma2.a_tools.datadir = datadir
+    assert 'Basic1DAnalysis' not in vars(ma2)
+    assert ma2.Basic1DAnalysis is not cls
+    assert ma2.Basic1DAnalysis.__name__ == 'Basic1DAnalysis'
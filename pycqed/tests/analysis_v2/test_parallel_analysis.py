@@ -0,0 +1,69 @@
+import os
+import unittest
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import pycqed as pq
+from pycqed.analysis_v2 import parallel_analysis as pa
+from pycqed.analysis_v2 import measurement_analysis as ma2
+
+
+class Test_ParallelAnalysis(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.datadir = os.path.join(pq.__path__[0], 'tests', 'test_data')
+        ma2.a_tools.datadir = self.datadir
+        options_dict = {'save_figs': False}
+        self.jobs = [
+            (ma2.Singleshot_Readout_Analysis,
+             {'t_start': '20171016_135112', 'options_dict': options_dict}),
+            ('Basic1DAnalysis',
+             {'t_start': '20171012_213543', 'options_dict': options_dict},
+             'RTE'),
+            ('Basic1DAnalysis', {'t_start': '19990101_000000'}, 'missing')]
+
+    @classmethod
+    def tearDownClass(self):
+        plt.close('all')
+
+    def check_results(self, results):
+        self.assertEqual([res['name'] for res in results],
+                         ['0_Singleshot_Readout_Analysis', 'RTE', 'missing'])
+        self.assertEqual([res['success'] for res in results],
+                         [True, True, False])
+        self.assertIn('No matching timestamps', results[2]['exception'])
+
+        res = results[0]
+        a = ma2.Singleshot_Readout_Analysis(
+            t_start='20171016_135112', options_dict={'save_figs': False})
+        self.assertEqual(res['timestamps'], ['20171016_135112'])
+        self.assertIn('shots_all', res['fit_res'])
+        self.assertEqual(list(res['proc_data']), ['threshold_raw'])
+        self.assertEqual(res['proc_data']['threshold_raw'],
+                         a.proc_data_dict['threshold_raw'])
+        self.assertGreater(res['timing']['total'], 0)
+        self.assertIn('run_fitting', res['timing'])
+        qoi = a.proc_data_dict['quantities_of_interest']
+        for key in ['SNR', 'F_a', 'F_d']:
+            np.testing.assert_almost_equal(
+                res['quantities_of_interest'][key], qoi[key])
+
+        report = pa.timing_report(results)
+        self.assertEqual(len(report.splitlines()), 4)
+        self.assertTrue(report.splitlines()[-1].endswith('failed'))
+
+    def test_run_analyses_sequential(self):
+        results = pa.run_analyses(
+            self.jobs, processes=0,
+            proc_data_keys=['threshold_raw', 'not_a_key'])
+        self.check_results(results)
+        self.assertEqual({res['pid'] for res in results}, {os.getpid()})
+
+    def test_run_analyses_pool(self):
+        results = pa.run_analyses(
+            self.jobs, processes=2,
+            proc_data_keys=['threshold_raw', 'not_a_key'])
+        self.check_results(results)
+        self.assertNotIn(os.getpid(), {res['pid'] for res in results})
@@ -0,0 +1,126 @@
+import itertools
+
+import numpy as np
+import scipy.optimize as so
+
+from pycqed.analysis_v2 import pytomo
+
+# eigenstates of the Pauli operators
+kets = [np.array([1, 0]), np.array([0, 1]),
+        np.array([1, 1])/np.sqrt(2), np.array([1, -1])/np.sqrt(2),
+        np.array([1, 1j])/np.sqrt(2), np.array([1, -1j])/np.sqrt(2)]
+projectors = [np.outer(k, k.conj()) for k in kets]
+
+
+def tensor(operators):
+    out = operators[0]
+    for op in operators[1:]:
+        out = np.kron(out, op)
+    return out
+
+
+def pauli_projectors(n_qubits):
+    return np.array([tensor(ops) for ops in
+                     itertools.product(projectors, repeat=n_qubits)])
+
+
+def random_unitary(d, rng):
+    U, _ = np.linalg.qr(rng.normal(size=(d, d)) + 1j*rng.normal(size=(d, d)))
+    return U
+
+
+def predicted(observables, rho):
+    return np.real(np.einsum('kij,ji->k', observables, rho))
+
+
+def objective(rho, data, observables, weights, fixedweight):
+    m = weights*predicted(observables, rho)
+    var = np.maximum(data, 1) if fixedweight else np.maximum(m, 1)
+    return np.sum((m - data)**2/var)
+
+
+def test_mle_state_noiseless():
+    rng = np.random.default_rng(0)
+    for n_qubits in [1, 2]:
+        E = pauli_projectors(n_qubits)
+        psi = random_unitary(2**n_qubits, rng)[:, 0]
+        rho = np.outer(psi, psi.conj())
+        data = 1000*predicted(E, rho)
+        rho_mle = pytomo.mle_state(data, E, 1000)
+        np.testing.assert_allclose(rho_mle, rho, atol=1e-6)
+
+
+def test_mle_state_minimises_objective():
+    # compare to a direct minimisation over rho = T T^dagger
+    rng = np.random.default_rng(1)
+    E = pauli_projectors(1)
+    psi = random_unitary(2, rng)[:, 0]
+    p = predicted(E, np.outer(psi, psi.conj()))
+    data = rng.binomial(100, np.clip(p, 0, 1)).astype(float)
+
+    def rho_from_params(t):
+        T = np.array([[t[0], 0], [t[1] + 1j*t[2], t[3]]])
+        return T @ T.conj().T
+
+    for fixedweight in [True, False]:
+        rho_mle = pytomo.mle_state(data, E, 100, fixedweight=fixedweight)
+        assert np.linalg.eigvalsh(rho_mle).min() > -1e-12
+        res = min((so.minimize(
+            lambda t: objective(rho_from_params(t), data, E, 100,
+                                fixedweight),
+            rng.normal(size=4), method='BFGS', options={'gtol': 1e-10})
+            for i in range(3)), key=lambda r: r.fun)
+        f_mle = objective(rho_mle, data, E, 100, fixedweight)
+        assert f_mle <= res.fun + 1e-6
+        np.testing.assert_allclose(rho_mle, rho_from_params(res.x),
+                                   atol=1e-4*np.trace(rho_mle).real)
+
+
+def test_mle_state_batch():
+    rng = np.random.default_rng(2)
+    E = pauli_projectors(2)
+    psi = random_unitary(4, rng)[:, 0]
+    p = predicted(E, np.outer(psi, psi.conj()))
+    data = rng.binomial(200, np.clip(p, 0, 1), size=(5, len(E)))
+    rhos = pytomo.mle_state(data, E, 200, tomo_options={'normalised': True})
+    assert rhos.shape == (5, 4, 4)
+    np.testing.assert_allclose(np.trace(rhos, axis1=1, axis2=2), 1)
+    for d, rho in zip(data, rhos):
+        np.testing.assert_allclose(
+            pytomo.mle_state(d, E, 200, tomo_options={'normalised': True}),
+            rho, atol=1e-7)
+    # the external solvers are not needed for the numpy solver
+    np.testing.assert_allclose(
+        pytomo.tomo_state(data[0], E, 200, tomo_options={'solver': 'numpy'}),
+        pytomo.mle_state(data[0], E, 200), atol=1e-12)
+
+
+def test_mle_process():
+    rng = np.random.default_rng(3)
+    d = 2
+    inputs, observables = map(np.array, zip(*itertools.product(
+        [projectors[i] for i in [0, 1, 2, 4]], projectors)))
+    U = random_unitary(d, rng)
+    # process matrix of U, normalised to unit trace
+    chi = sum(np.kron(np.outer(a, b), U @ np.outer(a, b) @ U.conj().T)
+              for a in np.eye(d) for b in np.eye(d))/d
+    p = np.real([d*np.trace(np.kron(R.T, E) @ chi)
+                 for R, E in zip(inputs, observables)])
+    np.testing.assert_allclose(
+        p, [np.trace(E @ U @ R @ U.conj().T).real
+            for R, E in zip(inputs, observables)], atol=1e-12)
+
+    chi_mle = pytomo.mle_process(1000*p, inputs, observables, 1000,
+                                 tomo_options={'normalised': True})
+    np.testing.assert_allclose(chi_mle, chi, atol=1e-6)
+
+    # noisy data, the results are completely positive and trace preserving
+    data = rng.binomial(100, np.clip(p, 0, 1), size=(3, len(p)))
+    for fixedweight in [True, False]:
+        chis = pytomo.mle_process(data, inputs, observables, 100,
+                                  fixedweight=fixedweight)
+        assert np.linalg.eigvalsh(chis).min() > -1e-12
+        tr_out = np.einsum('zaibi->zab', chis.reshape(-1, d, d, d, d))
+        tr = np.trace(chis, axis1=1, axis2=2)
+        np.testing.assert_allclose(
+            tr_out, tr[:, None, None]*np.eye(d)/d, atol=1e-6*tr.max().real)
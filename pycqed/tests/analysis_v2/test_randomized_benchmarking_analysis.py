@@ -1,8 +1,11 @@
 import unittest
+from collections import OrderedDict
+import numpy as np
 from matplotlib import rcParams
 import pycqed as pq
 import os
 from pycqed.analysis_v2 import measurement_analysis as ma
+from pycqed.analysis_v2 import randomized_benchmarking_analysis as rba
 
 
 class Test_RBAnalysis(unittest.TestCase):
@@ -123,6 +126,145 @@ class Test_RBAnalysis(unittest.TestCase):
         self.assertAlmostEqual(u_dec["eps"].value, 0.1068, places=3)
 
 
+class Test_RBBatchFitting(unittest.TestCase):
+    ncl = np.array([0, 2, 4, 8, 16, 32, 64, 128, 256, 512])
+
+    def test_fit_rb_decays(self):
+        rng = np.random.default_rng(0)
+        lambda_1 = rng.uniform(0.99, 0.999, (3, 4))
+        lambda_2 = rng.uniform(0.95, 0.998, (3, 4))
+        m = self.ncl
+        M0 = rba.full_rb_decay(
+            0.45, 0.05, 0.45, lambda_1[..., None], lambda_2[..., None], m
+        )
+        res = rba.fit_rb_decays(m, M0, lambda_1=lambda_1, L1=0.001, d1=2)
+        assert res["eps"].shape == (3, 4)
+        np.testing.assert_allclose(res["lambda_2"], lambda_2, rtol=1e-9)
+        np.testing.assert_allclose(res["B"], 0.05, atol=1e-7)
+        np.testing.assert_allclose(
+            res["eps"], 1 - ((2 - 1) * lambda_2 + 1 - 0.001) / 2, atol=1e-9
+        )
+
+        M0 = rba.full_rb_decay(0.5, 0, 0.45, 1, lambda_2[..., None], m)
+        res = rba.fit_rb_decays(m, M0, simple=True)
+        np.testing.assert_allclose(res["lambda_2"], lambda_2, rtol=1e-9)
+        np.testing.assert_allclose(res["A"], 0.5, atol=1e-7)
+
+        X1 = rba.leak_decay(0.9, 0.1, lambda_1[..., None], m)
+        res = rba.fit_leak_decays(m, X1)
+        np.testing.assert_allclose(res["lambda_1"], lambda_1, rtol=1e-9)
+        np.testing.assert_allclose(
+            res["L1"], 0.1 * (1 - lambda_1), rtol=1e-6
+        )
+
+    def test_fit_rb_decays_noisy(self):
+        rng = np.random.default_rng(1)
+        m = self.ncl
+        M0 = 0.5 + 0.45 * 0.99 ** m + rng.normal(0, 0.01, (20, len(m)))
+        M0[0, 3] = np.nan
+        sigma = rng.uniform(0.005, 0.02, len(m))
+        res = rba.fit_rb_decays(m, M0, simple=True, sigma=sigma)
+        assert np.isnan(res["lambda_2"][0])
+        assert np.all(np.isfinite(res["lambda_2"][1:]))
+        # the batched fit equals the fits of the individual curves and is a
+        # minimum of the weighted sum of squares
+        for i in range(1, 4):
+            res_i = rba.fit_rb_decays(m, M0[i], simple=True, sigma=sigma)
+            self.assertAlmostEqual(res_i["lambda_2"], res["lambda_2"][i], 10)
+            for d_lambda in [-1e-4, 1e-4]:
+                phi = np.array(
+                    [np.ones(len(m)), (res["lambda_2"][i] + d_lambda) ** m]
+                ).T
+                chisqr = np.linalg.lstsq(
+                    phi / sigma[:, None], M0[i] / sigma, rcond=None
+                )[1]
+                assert res["chisqr"][i] < chisqr
+
+        # bounds
+        M0 = 0.5 + 1.1 * 0.99 ** m
+        res = rba.fit_rb_decays(m, M0, simple=True)
+        self.assertAlmostEqual(res["C"], 1)
+        res = rba.fit_rb_decays(m, M0, simple=True, bounds=None)
+        self.assertAlmostEqual(res["C"], 1.1)
+
+    def test_bootstrap(self):
+        rng = np.random.default_rng(2)
+        counts = rba.bootstrap_seed_counts(10, 1000, rng)
+        assert counts.shape == (1000, 10)
+        np.testing.assert_array_equal(counts.sum(axis=1), 10)
+        self.assertAlmostEqual(counts.mean(), 1, places=2)
+
+        values = rng.normal(size=(5, 10))
+        values[0, 1] = np.nan
+        means = rba.resampled_seed_means(values, counts)
+        assert means.shape == (1000, 5)
+        np.testing.assert_allclose(
+            rba.resampled_seed_means(values, np.eye(10) * 3), values.T
+        )
+        self.assertAlmostEqual(
+            rba.resampled_seed_means(values, np.ones((1, 10)))[0, 0],
+            np.nanmean(values[0]),
+        )
+
+        low, high = rba.confidence_interval(means, 0.95)
+        assert np.all(low < np.nanmean(values, axis=1))
+        assert np.all(high > np.nanmean(values, axis=1))
+
+    def test_analysis_bootstrap(self):
+        # Synthetic single qubit RB with leakage, the cal points and the
+        # signals of the three levels in the IQ plane
+        rng = np.random.default_rng(3)
+        n_seeds = 40
+        ncl = self.ncl
+        V = np.array([[0.0, 0.0], [1.0, 0.2], [0.6, 1.0]])
+        lambda_1 = 1 - 0.002
+        P2 = 0.05 * (1 - lambda_1 ** ncl)
+        P0 = (1 - P2) / 2 + 0.48 * 0.996 ** ncl
+        P0 = P0[:, None] + rng.normal(0, 0.02, (len(ncl), n_seeds))
+        P2 = np.repeat(P2[:, None], n_seeds, axis=1)
+        SI = P0[..., None] * V[0] + (1 - P0 - P2)[..., None] * V[1]
+        SX = (1 - P0 - P2)[..., None] * V[0] + P0[..., None] * V[1]
+        SI += P2[..., None] * V[2]
+        SX += P2[..., None] * V[2]
+        cal = V[[0, 0, 1, 1, 2, 2]][:, None, :] + rng.normal(
+            0, 0.01, (6, n_seeds, 2)
+        )
+        a = rba.RandomizedBenchmarking_SingleQubit_Analysis(
+            t_start="20000101_000000",
+            options_dict={"n_bootstrap": 200, "bootstrap_seed": 0},
+            auto=False,
+        )
+        rdd = OrderedDict(ncl=ncl, value_names=["I", "Q"])
+        for i, key in enumerate(["cal_pts_zero", "cal_pts_one", "cal_pts_two"]):
+            rdd[key] = OrderedDict(
+                I=cal[2 * i:2 * i + 2, :, 0].ravel(),
+                Q=cal[2 * i:2 * i + 2, :, 1].ravel(),
+            )
+        rdd["measured_values_I"] = OrderedDict(I=SI[..., 0], Q=SI[..., 1])
+        rdd["measured_values_X"] = OrderedDict(I=SX[..., 0], Q=SX[..., 1])
+        a.raw_data_dict = rdd
+        a.process_data()
+
+        # no resampling reproduces the processed data
+        P0, P1, P2 = a._resampled_populations(np.ones((1, n_seeds)))
+        np.testing.assert_allclose(P0[0], a.proc_data_dict["P0"]["I"])
+        np.testing.assert_allclose(P2[0], a.proc_data_dict["P2"]["I"])
+
+        a.run_fitting()
+        qoi = a.proc_data_dict["quantities_of_interest"]
+        for name in ["eps_simple_I", "eps_X1_I", "L1_I", "L2_I"]:
+            low, high = qoi[name + "_ci"]
+            assert low <= qoi[name].n <= high
+        # the batched and lmfit fits agree
+        eps_simple = a.fit_res["rb_decay_simple_I"].params["eps"].value
+        res = rba.fit_rb_decays(ncl, a.proc_data_dict["M0"]["I"], simple=True)
+        self.assertAlmostEqual(res["eps"], eps_simple, places=6)
+
+        a.options_dict["weighted_fit"] = True
+        a.run_fitting()
+        assert a.fit_res["rb_decay_simple_I"].weights is not None
+
+
 class Test_CharRBAnalysis:
     def test_char_rb_extract_data(self):
 
@@ -5,6 +5,7 @@ import os
 import matplotlib.pyplot as plt
 from pycqed.analysis_v2 import measurement_analysis as ma
 from pycqed.analysis_v2 import readout_analysis as ra
+from pycqed.analysis_v2 import multiplexed_readout_analysis as mra
 
 # Add test: 20180508\182642 - 183214
 
@@ -216,3 +217,119 @@ class Test_multiplexed_readout_analysis(unittest.TestCase):
     #     a = ma.Multiplexed_Readout_Analysis(t_start=t_start, t_stop=t_stop,
     #                                         qubit_names=['QR', 'QL'])
     #     np.testing.assert_equal(a.proc_data_dict['qubit_names'], ['QR', 'QL'])
+
+
+class Test_multiplexed_readout_functions(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        rng = np.random.RandomState(0)
+        self.nr_qubits = 3
+        self.combinations = ['{:03b}'.format(i) for i in range(8)]
+        self.bits = mra.combinations_to_bits(8, self.nr_qubits)
+        # 50 complete rounds and an incomplete one
+        prepared = np.tile(self.bits, (51, 1))[:-3]
+        self.raw_shots = prepared + 0.4 * rng.randn(*prepared.shape)
+
+    def test_combinations_to_bits(self):
+        bits = [''.join(str(b) for b in row) for row in self.bits]
+        self.assertEqual(bits, self.combinations)
+
+    def test_reshape_mux_shots(self):
+        shots, valid = mra.reshape_mux_shots(self.raw_shots, 8)
+        self.assertEqual(shots[0].shape, (3, 8, 51))
+        self.assertEqual(valid[0].sum(), len(self.raw_shots))
+        np.testing.assert_array_equal(shots[0][:, :, 1],
+                                      self.raw_shots[8:16].T)
+        self.assertFalse(valid[0][-1, -1])
+        self.assertTrue(valid[0][-4, -1])
+
+        shots, valid = mra.reshape_mux_shots(self.raw_shots, 4,
+                                             nr_measurements=2)
+        np.testing.assert_array_equal(shots[0][:, 1, 0], self.raw_shots[2])
+        np.testing.assert_array_equal(shots[1][:, 1, 0], self.raw_shots[3])
+        # the last shot is a pre-measurement without its measurement
+        self.assertTrue(valid[0][2, -1])
+        self.assertFalse(valid[1][2, -1])
+        self.assertTrue(np.all(np.isnan(shots[1][:, 2, -1])))
+        self.assertEqual(valid[0].sum(), valid[1].sum() + 1)
+
+    def test_histogram_per_combination(self):
+        shots, valid = mra.reshape_mux_shots(self.raw_shots, 8)
+        counts, centers = mra.histogram_per_combination(
+            shots[0][1], valid[0], bins=20, range=(-1, 1.5))
+        for j in range(8):
+            h, edges = np.histogram(shots[0][1][j][valid[0][j]], bins=20,
+                                    range=(-1, 1.5))
+            np.testing.assert_array_equal(counts[j], h)
+        np.testing.assert_array_almost_equal(centers,
+                                             (edges[1:] + edges[:-1])/2)
+
+    def test_assignment_and_cross_fidelity_matrix(self):
+        shots, valid = mra.reshape_mux_shots(self.raw_shots, 8)
+        digitized = {'ch{}'.format(k): {
+            comb: (shots[0][k][j][valid[0][j]] > .5).astype(int)
+            for j, comb in enumerate(self.combinations)}
+            for k in range(self.nr_qubits)}
+        ass_mat = mra.calc_assignment_prob_matrix(self.combinations,
+                                                  digitized)
+
+        # straightforward count of the declared combinations
+        expected = np.zeros((8, 8))
+        for j, comb in enumerate(self.combinations):
+            declared = [''.join(str(digitized['ch{}'.format(k)][comb][s])
+                                for k in range(self.nr_qubits))
+                        for s in range(len(digitized['ch0'][comb]))]
+            for d in declared:
+                expected[j, self.combinations.index(d)] += 1/len(declared)
+        np.testing.assert_array_almost_equal(ass_mat, expected)
+
+        # rows and columns follow the order of the combinations
+        order = [3, 0, 7, 5, 1, 6, 2, 4]
+        np.testing.assert_array_almost_equal(
+            mra.calc_assignment_prob_matrix(
+                [self.combinations[j] for j in order], digitized),
+            expected[order][:, order])
+
+        cross_fid = mra.calc_cross_fidelity_matrix(self.combinations, ass_mat)
+        for i in range(self.nr_qubits):
+            for j in range(self.nr_qubits):
+                # P(qubit i declared in |1> | qubit j prepared in |0>)...
+                P_e0 = sum(ass_mat[p, d]
+                           for p in range(8) for d in range(8)
+                           if not self.bits[p, j] and self.bits[d, i])
+                # ...and P(qubit i declared in |0> | qubit j prepared in |1>)
+                P_g1 = sum(ass_mat[p, d]
+                           for p in range(8) for d in range(8)
+                           if self.bits[p, j] and not self.bits[d, i])
+                self.assertAlmostEqual(cross_fid[i, j], 1 - (P_e0 + P_g1)/4)
+
+    def test_cross_fidelity_matrix_permuted_combinations(self):
+        shots, valid = mra.reshape_mux_shots(self.raw_shots, 8)
+        digitized = {'ch{}'.format(k): {
+            comb: (shots[0][k][j][valid[0][j]] > .5).astype(int)
+            for j, comb in enumerate(self.combinations)}
+            for k in range(self.nr_qubits)}
+        combinations = [self.combinations[j] for j in [3, 0, 7, 5, 1, 6, 2, 4]]
+        ass_mat = mra.calc_assignment_prob_matrix(combinations, digitized)
+        cross_fid = mra.calc_cross_fidelity_matrix(combinations, ass_mat)
+
+        # loop over the digits of the combinations
+        expected = np.zeros((self.nr_qubits, self.nr_qubits))
+        for i in range(self.nr_qubits):
+            for j in range(self.nr_qubits):
+                P_eiIj = 0
+                P_giPj = 0
+                for prep_idx, c_prep in enumerate(combinations):
+                    for decl_idx, c_decl in enumerate(combinations):
+                        if c_decl[i] == '1' and c_prep[j] == '0':
+                            P_eiIj += ass_mat[prep_idx, decl_idx]
+                        elif c_decl[i] == '0' and c_prep[j] == '1':
+                            P_giPj += ass_mat[prep_idx, decl_idx]
+                expected[i, j] = 1 - (P_eiIj + P_giPj)/4
+        np.testing.assert_array_almost_equal(cross_fid, expected)
+        # the order of the combinations does not change the result
+        np.testing.assert_array_almost_equal(
+            cross_fid, mra.calc_cross_fidelity_matrix(
+                self.combinations, mra.calc_assignment_prob_matrix(
+                    self.combinations, digitized)))
@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 import tempfile
 import os
 import numpy
@@ -10,6 +11,10 @@ import pycqed.instrument_drivers.physical_instruments.ZurichInstruments.ZI_HDAWG
 class Test_ZI_HDAWG8(unittest.TestCase):
     @classmethod
     def setup_class(cls):
+        # The mock AWG module stores the waveforms relative to the working directory
+        cls.cwd = os.getcwd()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(cls.tmpdir.name)
         print('Connecting...')
         cls.hd = HDAWG.ZI_HDAWG8(name='MOCK_HD', server='emulator',
                                  num_codewords=32, device='dev8026', interface='1GbE')
@@ -18,6 +23,8 @@ class Test_ZI_HDAWG8(unittest.TestCase):
     def teardown_class(cls):
         print('Disconnecting...')
         cls.hd.close()
+        os.chdir(cls.cwd)
+        cls.tmpdir.cleanup()
 
     def test_instantiation(self):
         self.assertEqual(Test_ZI_HDAWG8.hd.devname, 'dev8026')
@@ -57,3 +64,170 @@ class Test_ZI_HDAWG8(unittest.TestCase):
         # Now the compilation must have been executed again
         self.assertEqual(
             Test_ZI_HDAWG8.hd._awgModule.get_compilation_count(0), 2)
+
+
+class Test_ZI_HDAWG8_waveform_store(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        # The mock AWG module stores the waveforms relative to the working directory
+        cls.cwd = os.getcwd()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(cls.tmpdir.name)
+        cls.hd = HDAWG.ZI_HDAWG8(name='MOCK_HD_store', server='emulator',
+                                 num_codewords=32, device='dev8026', interface='1GbE')
+        cls.hd.cfg_codeword_protocol('microwave')
+        cls.hd.upload_codeword_program()
+        cls.hd.start()
+        cls.hd.stop()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.hd.close()
+        os.chdir(cls.cwd)
+        cls.tmpdir.cleanup()
+
+    def test_waveform_stored_in_binary_file(self):
+        hd = Test_ZI_HDAWG8_waveform_store.hd
+        wf = numpy.linspace(0, 0.5, 48)
+        hd.wave_ch3_cw005(wf)
+
+        filename = os.path.join('awg', 'waves_npy', 'dev8026', 'wave_ch3_cw005.npy')
+        numpy.testing.assert_array_equal(numpy.load(filename), wf)
+        self.assertTrue(hd._awg_waveforms['wave_ch3_cw005']['csv_dirty'])
+
+        # The waveform is read back from the binary store by a new instance
+        hd2 = HDAWG.ZI_HDAWG8(name='MOCK_HD_store2', server='emulator',
+                              num_codewords=32, device='dev8026', interface='1GbE')
+        try:
+            numpy.testing.assert_array_equal(hd2.wave_ch3_cw005(), wf)
+        finally:
+            hd2.close()
+
+    def test_csv_written_before_compilation(self):
+        hd = Test_ZI_HDAWG8_waveform_store.hd
+        wf = numpy.linspace(0, 0.25, 64)
+        hd.wave_ch1_cw007(wf)
+        hd.start()
+        hd.stop()
+
+        filename = os.path.join('awg', 'waves', 'dev8026_wave_ch1_cw007.csv')
+        numpy.testing.assert_allclose(
+            numpy.genfromtxt(filename, delimiter=','), wf)
+        self.assertFalse(hd._awg_waveforms['wave_ch1_cw007']['csv_dirty'])
+
+    def test_legacy_csv_waveform(self):
+        wf = numpy.linspace(0, 0.125, 16)
+        numpy.savetxt(os.path.join('awg', 'waves', 'dev8027_wave_ch2_cw001.csv'),
+                      wf, delimiter=',')
+        hd2 = HDAWG.ZI_HDAWG8(name='MOCK_HD_store3', server='emulator',
+                              num_codewords=32, device='dev8027', interface='1GbE')
+        try:
+            numpy.testing.assert_allclose(hd2.wave_ch2_cw001(), wf)
+            self.assertTrue(os.path.isfile(os.path.join(
+                'awg', 'waves_npy', 'dev8027', 'wave_ch2_cw001.npy')))
+        finally:
+            hd2.close()
+
+    def test_skip_identical_waveform_upload(self):
+        hd = Test_ZI_HDAWG8_waveform_store.hd
+        node = '/dev8026/awgs/0/waveform/waves/2'
+        compilation_count = hd._awgModule.get_compilation_count(0)
+
+        # Change the waveform and restore it before starting
+        wf = hd.wave_ch1_cw002()
+        hd.wave_ch1_cw002(0.5*wf + 0.1)
+        hd.wave_ch1_cw002(wf)
+        hd.daq.nodes[node]['value'] = 'not uploaded'
+        hd.start()
+        hd.stop()
+        self.assertEqual(hd.daq.nodes[node]['value'], 'not uploaded')
+
+        # A waveform that differs is uploaded
+        hd.wave_ch1_cw002(0.5*wf + 0.1)
+        hd.start()
+        hd.stop()
+        numpy.testing.assert_array_equal(
+            hd.daq.nodes[node]['value'],
+            zibi.merge_waveforms(0.5*wf + 0.1, hd.wave_ch2_cw002()))
+        self.assertEqual(
+            hd._awgModule.get_compilation_count(0), compilation_count)
+
+
+class Test_ZI_HDAWG8_compile_cache(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.cwd = os.getcwd()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(cls.tmpdir.name)
+        cls.hd = HDAWG.ZI_HDAWG8(name='MOCK_HD_cache', server='emulator',
+                                 num_codewords=32, device='dev8026', interface='1GbE')
+
+    @classmethod
+    def teardown_class(cls):
+        cls.hd.close()
+        os.chdir(cls.cwd)
+        cls.tmpdir.cleanup()
+
+    def setUp(self):
+        Test_ZI_HDAWG8_compile_cache.hd.cfg_compile_cache(True)
+
+    def test_compile_cache_disabled(self):
+        hd = Test_ZI_HDAWG8_compile_cache.hd
+        hd.cfg_compile_cache(False)
+        hd.configure_awg_from_string(3, 'while(1) {}\n')
+        count = hd._awgModule.get_compilation_count(3)
+        with mock.patch.object(hd, '_gen_awg_program_hash') as gen_hash:
+            hd.configure_awg_from_string(3, 'while(1) {}\n')
+        gen_hash.assert_not_called()
+        self.assertEqual(hd._awgModule.get_compilation_count(3), count + 1)
+
+    def test_wait_awg_ready_timeout(self):
+        hd = Test_ZI_HDAWG8_compile_cache.hd
+        not_ready = {'value': [0]}
+        with mock.patch.object(hd, 'getdeep', return_value=not_ready), \
+                self.assertLogs(zibi.log, level='WARNING') as logs:
+            self.assertFalse(
+                hd._wait_awg_ready(0, timeout=0.05, poll_interval=0.01))
+        # a single warning when the AWG is not ready in time
+        self.assertEqual(len(logs.output), 1)
+        with mock.patch.object(hd, 'getdeep', return_value={'value': [1]}):
+            self.assertTrue(hd._wait_awg_ready(0, timeout=0.05))
+
+    def test_skip_unchanged_program(self):
+        hd = Test_ZI_HDAWG8_compile_cache.hd
+        program = 'while(1) {\n  wait(10);\n}\n'
+        hd.configure_awg_from_string(1, program)
+        count = hd._awgModule.get_compilation_count(1)
+        hd.daq.nodes['/dev8026/awgs/1/elf/data']['value'] = 'not uploaded'
+
+        hd.configure_awg_from_string(1, program)
+        self.assertEqual(hd._awgModule.get_compilation_count(1), count)
+        self.assertEqual(hd.daq.nodes['/dev8026/awgs/1/elf/data']['value'], 'not uploaded')
+        self.assertEqual(hd.awg_compile_time(), 0.0)
+        self.assertEqual(hd.awg_upload_time(), 0.0)
+
+    def test_upload_cached_program(self):
+        hd = Test_ZI_HDAWG8_compile_cache.hd
+        program_a = 'while(1) {\n  wait(20);\n}\n'
+        program_b = 'while(1) {\n  wait(30);\n}\n'
+        hd.configure_awg_from_string(2, program_a)
+        hd.configure_awg_from_string(2, program_b)
+        count = hd._awgModule.get_compilation_count(2)
+
+        # Switching back to a compiled program uploads the cached ELF
+        hd.configure_awg_from_string(2, program_a)
+        self.assertEqual(hd._awgModule.get_compilation_count(2), count)
+        self.assertEqual(
+            hd.daq.nodes['/dev8026/awgs/2/elf/data']['value'].tobytes().decode(),
+            program_a)
+        self.assertEqual(hd.awg_compile_time(), 0.0)
+
+    def test_waveform_change_invalidates_program(self):
+        hd = Test_ZI_HDAWG8_compile_cache.hd
+        program = 'wave w = "dev8026_wave_ch1_cw010";\nwhile(1) {\n  playWave(w);\n}\n'
+        hd.configure_awg_from_string(0, program)
+        count = hd._awgModule.get_compilation_count(0)
+
+        hd.wave_ch1_cw010(0.5*numpy.ones(32) + hd.wave_ch1_cw010())
+        hd.configure_awg_from_string(0, program)
+        self.assertEqual(hd._awgModule.get_compilation_count(0), count + 1)
@@ -1,5 +1,6 @@
 import os
 import json
+import time
 import unittest
 from openql import openql as ql
 from pycqed.measurement.openql_experiments import clifford_rb_oql as rb_oql
@@ -91,6 +92,64 @@ class Test_char_rb_oql(unittest.TestCase):
         self.assertEqual(p.name, 'character_bench_int_CZ')
 
 
+class Test_compilation_pool(unittest.TestCase):
+    def setUp(self):
+        curdir = os.path.dirname(__file__)
+        self.config_fn = os.path.join(curdir, 'test_cfg_CCL.json')
+        self.pool = rb_oql.CompilationPool(nr_processes=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_pool_reused(self):
+        self.assertFalse(self.pool.started)
+        rb_tasks = self.pool.map_async(abs, range(-10, 0))
+        rb_oql.wait_for_rb_tasks(rb_tasks, refresh_rate=0.1)
+        self.assertEqual(rb_tasks.get(), list(range(10, 0, -1)))
+        self.assertEqual(rb_tasks.nr_done, 10)
+
+        rb_tasks = self.pool.map_async(abs, range(-10, 0))
+        self.assertEqual(rb_tasks.get(timeout=60), list(range(10, 0, -1)))
+        self.assertEqual(self.pool.nr_worker_starts, 2)
+
+    def test_failing_task(self):
+        rb_tasks = self.pool.map_async(int, ['1', 'a', '3'])
+        rb_tasks.wait(60)
+        self.assertFalse(rb_tasks.successful())
+        with self.assertRaises(RuntimeError):
+            rb_tasks.get()
+
+    def test_close_discards_pending_tasks(self):
+        pool = rb_oql.CompilationPool(nr_processes=1)
+        rb_tasks = pool.map_async(time.sleep, [0.2] * 50)
+        workers = [process for process, _ in pool._workers]
+        pool.close()
+        # the worker quits after its current task instead of being terminated
+        self.assertEqual([process.exitcode for process in workers], [0])
+        self.assertTrue(rb_tasks.ready())
+        self.assertFalse(rb_tasks.successful())
+
+    def test_workers_recycled_by_memory_usage(self):
+        pool = rb_oql.CompilationPool(nr_processes=1, max_worker_rss=1)
+        with pool:
+            rb_tasks = pool.map_async(abs, range(-3, 0))
+            self.assertEqual(rb_tasks.get(timeout=60), [3, 2, 1])
+            # a new worker is started for every task
+            self.assertGreaterEqual(pool.nr_worker_starts, 3)
+
+    def test_parallel_rb_compilation(self):
+        tasks_inputs = [
+            dict(qubits=[0], platf_cfg=self.config_fn, nr_cliffords=[1, 5],
+                 nr_seeds=1, cal_points=False,
+                 program_name='RB_pool_s{}'.format(i))
+            for i in range(3)]
+        rb_tasks = self.pool.map_async(rb_oql.parallel_friendly_rb,
+                                       tasks_inputs)
+        rb_oql.wait_for_rb_tasks(rb_tasks, refresh_rate=0.1)
+        for fn in rb_tasks.get():
+            self.assertTrue(os.path.isfile(fn))
+
+
 """
     Author:             Wouter Vlothuizen, QuTech
     Purpose:            randomized benchmarking OpenQL tests for Qutech Central Controller
@@ -1,7 +1,12 @@
 import unittest
 import os
+import shutil
+import tempfile
+import types
+import numpy as np
 import pycqed as pq
 import pycqed.measurement.openql_experiments.openql_helpers as oqh
+from pycqed.measurement.openql_experiments import single_qubit_oql as sqo
 import openql.openql as ql
 
 file_paths_root = os.path.join(pq.__path__[0], 'tests',
@@ -162,3 +167,84 @@ class Test_openql_calibration_point_helpers(unittest.TestCase):
     @unittest.skip('Test not implemented')
     def test_add_multi_q_cal_points(self):
         raise NotImplementedError()
+
+
+class Test_compile_cache(unittest.TestCase):
+
+    def setUp(self):
+        curdir = os.path.dirname(__file__)
+        self.config_fn = os.path.join(curdir, 'test_cfg_cc.json')
+        self.cache_dir = tempfile.mkdtemp()
+        self.old_cache_dir = oqh.compile_cache_dir
+        self.old_cache_enabled = oqh.compile_cache_enabled
+        oqh.compile_cache_dir = self.cache_dir
+        oqh.compile_cache_enabled = True
+
+    def tearDown(self):
+        oqh.compile_cache_dir = self.old_cache_dir
+        oqh.compile_cache_enabled = self.old_cache_enabled
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_cache_key(self):
+        key = oqh.get_compile_cache_key(
+            sqo.AllXY.__wrapped__, 0, self.config_fn)
+        self.assertEqual(key, oqh.get_compile_cache_key(
+            sqo.AllXY.__wrapped__, qubit_idx=0, platf_cfg=self.config_fn,
+            double_points=True))
+        self.assertNotEqual(key, oqh.get_compile_cache_key(
+            sqo.AllXY.__wrapped__, 1, self.config_fn))
+        self.assertNotEqual(key, oqh.get_compile_cache_key(
+            sqo.flipping.__wrapped__, 0, np.arange(10), self.config_fn))
+
+    def test_cache_key_source_files(self):
+        fns = [os.path.basename(fn) for fn in
+               oqh._compile_cache_source_files(sqo.AllXY.__wrapped__)]
+        self.assertIn('openql_helpers.py', fns)
+        self.assertIn('multi_qubit_oql.py', fns)
+        self.assertIn('single_qubit_oql.py', fns)
+
+    def test_store_only_program_files(self):
+        output_dir = tempfile.mkdtemp()
+        p = types.SimpleNamespace(
+            name='prog', output_dir=output_dir,
+            filename=os.path.join(output_dir, 'prog.vq1asm'))
+        for fn in ['prog.vq1asm', 'prog_scheduled.qasm', 'prog.qasm',
+                   'prog_2.vq1asm', 'prog.vq1asm.bak']:
+            with open(os.path.join(output_dir, fn), 'w') as f:
+                f.write(fn)
+        oqh._store_in_compile_cache('0123', p, t_start=0)
+        shutil.rmtree(output_dir)
+
+        entry_dir = oqh._compile_cache_entry_dir('0123')
+        self.assertEqual(
+            sorted(os.listdir(entry_dir)),
+            ['meta.pickle', 'prog.qasm', 'prog.vq1asm', 'prog_scheduled.qasm'])
+
+    def test_program_from_cache(self):
+        p = sqo.AllXY(qubit_idx=0, platf_cfg=self.config_fn)
+        with open(p.filename) as f:
+            program_q0 = f.read()
+        # overwrites the program file
+        sqo.AllXY(qubit_idx=1, platf_cfg=self.config_fn)
+
+        key = oqh.get_compile_cache_key(
+            sqo.AllXY.__wrapped__, qubit_idx=0, platf_cfg=self.config_fn)
+        with self.assertLogs(oqh.log, level='INFO') as logs:
+            p_cached = oqh._load_from_compile_cache(key, self.config_fn)
+        self.assertIn(oqh._compile_cache_entry_dir(key), logs.output[0])
+        self.assertEqual(p_cached.filename, p.filename)
+        with open(p_cached.filename) as f:
+            self.assertEqual(f.read(), program_q0)
+
+    def test_evict_compile_cache(self):
+        sqo.AllXY(qubit_idx=0, platf_cfg=self.config_fn)
+        key = oqh.get_compile_cache_key(
+            sqo.AllXY.__wrapped__, qubit_idx=0, platf_cfg=self.config_fn)
+        self.assertTrue(os.path.isdir(oqh._compile_cache_entry_dir(key)))
+        oqh.evict_compile_cache(max_size=0)
+        self.assertIsNone(oqh._load_from_compile_cache(key, self.config_fn))
+
+    def test_compile_cache_disabled(self):
+        oqh.compile_cache_enabled = False
+        sqo.AllXY(qubit_idx=0, platf_cfg=self.config_fn)
+        self.assertEqual(os.listdir(self.cache_dir), [])
@@ -1,11 +1,15 @@
 import os
+import time
+import tempfile
 import pycqed as pq
 import unittest
+import h5py
 import numpy as np
 from scipy.spatial import ConvexHull
 import adaptive
 import pycqed.analysis.analysis_toolbox as a_tools
 from pycqed.measurement import measurement_control
+from pycqed.measurement import measurement_control_helpers as mch
 from pycqed.measurement.sweep_functions import (
     None_Sweep,
     None_Sweep_idx,
@@ -21,10 +25,48 @@ from pycqed.utilities.learner1D_minimizer import (Learner1D_Minimizer,
 from pycqed.analysis import measurement_analysis as ma
 from pycqed.utilities.get_default_datadir import get_default_datadir
 from pycqed.measurement.hdf5_data import read_dict_from_hdf5
+from qcodes.instrument.base import Instrument
 from qcodes.instrument.parameter import ManualParameter
 from qcodes import station
 
 
+class Parabola_Detector_Hard(det.Hard_Detector):
+    """
+    Hard detector that measures a parabola at all sweep points at once,
+    used to test the batch adaptive mode.
+    """
+
+    def __init__(self, **kw):
+        super().__init__()
+        self.name = "Parabola_Detector_Hard"
+        self.value_names = ["parabola", "sum"]
+        self.value_units = ["a.u.", "a.u."]
+        self.times_called = 0
+
+    def prepare(self, sweep_points):
+        self.sweep_points = np.array(sweep_points, dtype=float)
+
+    def get_values(self):
+        self.times_called += 1
+        X = self.sweep_points.reshape(len(self.sweep_points), -1)
+        return np.array([np.sum(X ** 2, axis=1), np.sum(X, axis=1)])
+
+
+class Slow_Instrument_Monitor(Instrument):
+    """
+    Instrument monitor of which an update takes `delay` seconds.
+    """
+
+    def __init__(self, name, delay=0.1, **kw):
+        super().__init__(name, **kw)
+        self.delay = delay
+        self.nr_updates = 0
+
+    def update(self):
+        time.sleep(self.delay)
+        self.nr_updates += 1
+
+
 class Test_MeasurementControl(unittest.TestCase):
     @classmethod
     def setUpClass(self):
@@ -33,6 +75,9 @@ class Test_MeasurementControl(unittest.TestCase):
             "MC", live_plot_enabled=True, verbose=True
         )
         self.MC.station = self.station
+        # the data files of the tests are not kept
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.MC.datadir(self.tmpdir.name)
         self.station.add_component(self.MC)
 
         self.mock_parabola = DummyParHolder("mock_parabola")
@@ -235,6 +280,80 @@ class Test_MeasurementControl(unittest.TestCase):
         self.assertEqual(s1.num_calls, 30 * 5)
         self.assertEqual(s2.num_calls, 5)
 
+    def test_hard_sweep_1D_decimated_plotmon(self):
+        sweep_pts = np.linspace(0, 1000, 100000)
+        self.MC.set_sweep_function(None_Sweep(sweep_control="hard"))
+        self.MC.set_sweep_points(sweep_pts)
+        self.MC.set_detector_function(det.Dummy_Detector_Hard())
+        dat = self.MC.run("1D_hard_decimated_plotmon")
+        dset = dat["dset"]
+
+        # min and max per bin of 128 points
+        self.assertEqual(self.MC.plotmon_decimator.bin_width, 128)
+        for i, curve in enumerate(self.MC.curves):
+            x = curve["config"]["x"]
+            y = curve["config"]["y"]
+            self.assertLessEqual(len(x), self.MC.plotting_decimation_pts())
+            self.assertEqual(np.min(y), np.min(dset[:, i + 1]))
+            self.assertEqual(np.max(y), np.max(dset[:, i + 1]))
+            self.assertTrue(np.all(np.diff(x) > 0))
+
+        self.MC.plotting_decimation_pts(0)
+        try:
+            self.MC.set_sweep_function(None_Sweep(sweep_control="hard"))
+            self.MC.set_sweep_points(sweep_pts)
+            self.MC.set_detector_function(det.Dummy_Detector_Hard())
+            self.MC.run("1D_hard_plotmon_disabled")
+            # Above plotting_max_pts the plot is not updated
+            self.assertEqual(len(self.MC.curves[0]["config"]["x"]), 1)
+        finally:
+            self.MC.plotting_decimation_pts(2000)
+
+    def test_background_publishing(self):
+        inst_mon = Slow_Instrument_Monitor("slow_inst_mon", delay=0.1)
+        self.MC.instrument_monitor(inst_mon.name)
+        try:
+            sweep_pts = np.linspace(0, 10, 30)
+            self.MC.set_sweep_function(None_Sweep())
+            self.MC.set_sweep_points(sweep_pts)
+            self.MC.set_detector_function(det.Dummy_Detector_Soft(delay=0.01))
+            dat = self.MC.run("1D_soft_background_publishing")
+
+            # The last plot update is published before the run returns
+            np.testing.assert_array_equal(
+                self.MC.curves[0]["config"]["x"], dat["dset"][:, 0])
+            np.testing.assert_array_equal(
+                self.MC.curves[1]["config"]["y"], dat["dset"][:, 2])
+            # The loop does not wait for the monitor, the updates are
+            # coalesced while the monitor is busy
+            self.assertGreater(inst_mon.nr_updates, 0)
+            self.assertLess(inst_mon.nr_updates, 30)
+
+            timing = self.MC.run_timing
+            self.assertGreaterEqual(timing["acquisition"], 30 * 0.01)
+            self.assertLess(timing["live_plot"], 30 * 0.1)
+            self.assertGreater(timing["publisher"], 0.1)
+            self.assertAlmostEqual(
+                timing["overhead"], timing["total"] - timing["acquisition"])
+            with h5py.File(self.MC.data_object.filepath, "r") as f:
+                saved_timing = dict(f["MC settings"]["Timing"].attrs)
+            self.assertEqual(saved_timing, dict(timing))
+
+            # Updates in the measurement loop
+            self.MC.publish_in_background(False)
+            inst_mon.nr_updates = 0
+            self.MC.set_sweep_function(None_Sweep())
+            self.MC.set_sweep_points(sweep_pts[:5])
+            self.MC.set_detector_function(det.Dummy_Detector_Soft())
+            self.MC.run("1D_soft_foreground_publishing")
+            self.assertEqual(inst_mon.nr_updates, 6)
+            self.assertGreaterEqual(self.MC.run_timing["live_plot"], 6 * 0.1)
+            self.assertEqual(self.MC.run_timing["publisher"], 0)
+        finally:
+            self.MC.publish_in_background(True)
+            self.MC.instrument_monitor(None)
+            inst_mon.close()
+
     def test_hard_sweep_2D(self):
         """
         Hard inner loop, soft outer loop
@@ -287,6 +406,36 @@ class Test_MeasurementControl(unittest.TestCase):
         d = self.MC.detector_function
         self.assertEqual(d.times_called, 10)
 
+    def test_hard_sweep_shot_streaming(self):
+        """
+        Tests a detector that streams shots into statistics instead of
+        storing them in the dataset
+        """
+        sweep_pts = np.arange(60) % 4
+        self.MC.set_sweep_function(None_Sweep(sweep_control="hard"))
+        self.MC.set_sweep_points(sweep_pts)
+        d = det.Dummy_Shots_Detector(max_shots=7)
+        d.shot_stream = mch.ShotStatistics(
+            thresholds=[1.5], nr_segments=4, nr_bins=4, hist_range=(-0.5, 3.5),
+            archive_raw_shots=True)
+        self.MC.set_detector_function(d)
+        dat = self.MC.run("shot_streaming")
+
+        self.assertEqual(np.shape(dat["dset"]), (0, 2))
+        stats = dat["shot_statistics"]
+        np.testing.assert_array_equal(stats["nr_shots"], [15] * 4)
+        np.testing.assert_array_equal(
+            stats["counts"], [[15, 0], [15, 0], [0, 15], [0, 15]])
+        np.testing.assert_array_equal(stats["histograms"][0], 15 * np.eye(4))
+        np.testing.assert_array_equal(stats["mean"][:, 0], np.arange(4))
+
+        with h5py.File(self.MC.data_object.filepath, "r") as f:
+            data_group = f["Experimental Data"]
+            np.testing.assert_array_equal(
+                data_group["Shot statistics"]["counts"][()], stats["counts"])
+            np.testing.assert_array_equal(
+                data_group["Raw shots"][()][:, 0], sweep_pts)
+
     def test_variable_sized_return_values_hard_sweep(self):
         """
         Tests a detector that acquires data in chunks of varying sizes
@@ -422,6 +571,28 @@ class Test_MeasurementControl(unittest.TestCase):
         np.testing.assert_array_almost_equal(yavg_1, np.zeros(len(x)), decimal=2)
         self.assertEqual(d.times_called, 5001)
 
+    def test_soft_averages_hard_sweep_stderr(self):
+        sweep_pts = np.arange(50)
+        self.MC.soft_avg(400)
+        self.MC.set_sweep_function(None_Sweep(sweep_control="hard"))
+        self.MC.set_sweep_points(sweep_pts)
+        self.MC.set_detector_function(det.Dummy_Detector_Hard(noise=0.4))
+        avg_dat = self.MC.run("averaged_dat_stderr")
+        avg_dset = avg_dat["dset"]
+
+        with h5py.File(self.MC.data_object.filepath, "r") as f:
+            stderr_dset = f["Experimental Data"]["Standard error"]
+            stderr = stderr_dset[()]
+            self.assertEqual(stderr_dset.attrs["soft_averages"], 400)
+            np.testing.assert_array_almost_equal(
+                f["Experimental Data"]["Data"][()], avg_dset)
+
+        self.assertEqual(np.shape(stderr), (len(sweep_pts), 2))
+        # uniform noise of width 0.4 averaged 400 times
+        expected_stderr = 0.4 / np.sqrt(12) / np.sqrt(400)
+        np.testing.assert_allclose(
+            np.mean(stderr, axis=0), [expected_stderr] * 2, rtol=0.1)
+
     def test_soft_averages_hard_sweep_2D(self):
         self.MC.soft_avg(1)
         self.MC.live_plot_enabled(False)
@@ -658,6 +829,131 @@ class Test_MeasurementControl(unittest.TestCase):
         self.MC.set_detector_function(self.mock_parabola.parabola)
         dat = self.MC.run("2D adaptive sampling test", mode="adaptive")
 
+    def test_adaptive_batch_Learner1D(self):
+        self.MC.set_sweep_function(None_Sweep(sweep_control="hard"))
+        self.MC.set_detector_function(det.Dummy_Detector_Hard())
+        self.MC.set_adaptive_function_parameters(
+            {
+                "adaptive_function": adaptive.Learner1D,
+                "goal": lambda l: l.npoints >= 20,
+                "bounds": (0, 10),
+                "batch_size": 5,
+            }
+        )
+        dat = self.MC.run("1D adaptive batch test", mode="adaptive")
+        dset = dat["dset"]
+        # one hard sweep per batch of points
+        self.assertEqual(self.MC.detector_function.times_called, 4)
+        self.assertEqual(len(dset), 20)
+        self.assertEqual(len(np.unique(dset[:, 0])), 20)
+        np.testing.assert_array_almost_equal(dset[:, 1], np.sin(dset[:, 0] / np.pi))
+        np.testing.assert_array_almost_equal(dset[:, 2], np.cos(dset[:, 0] / np.pi))
+        self.assertEqual(
+            self.MC.learner.data, {x: y for x, y in zip(dset[:, 0], dset[:, 1])}
+        )
+
+    def test_adaptive_batch_Learner2D_x_scale(self):
+        self.MC.set_sweep_functions(
+            [None_Sweep(sweep_control="hard"), None_Sweep(sweep_control="hard")]
+        )
+        self.MC.set_detector_function(Parabola_Detector_Hard())
+        self.MC.set_adaptive_function_parameters(
+            {
+                "adaptive_function": adaptive.Learner2D,
+                "goal": lambda l: l.npoints >= 40,
+                "bounds": ((-50, +50), (-20, +30)),
+                "X0": [(-20.0, 15.0), (-19.0, 16.0), (-18.0, 17.0)],
+                "x_scale": (100.0, 100.0),
+                "batch_size": 8,
+            }
+        )
+        dat = self.MC.run("2D adaptive batch test", mode="adaptive")
+        dset = dat["dset"]
+        self.assertEqual(self.MC.detector_function.times_called, 1 + 5)
+        self.assertEqual(len(dset), 3 + 5 * 8)
+        np.testing.assert_array_almost_equal(dset[0, :2], (-20.0, 15.0))
+        np.testing.assert_array_almost_equal(
+            dset[:, 2], dset[:, 0] ** 2 + dset[:, 1] ** 2
+        )
+        assert self.MC.learner.data[(-2000.0, 1500.0)] == dset[0, 2]
+
+        # the best seen points are tracked in the order of the dataset
+        best = np.minimum.accumulate(dset[:, 2])
+        idxs = np.concatenate([[0], np.where(np.diff(best) < 0)[0] + 1])
+        self.assertEqual(self.MC.adaptive_besteval_indxs, list(idxs))
+
+    def test_adaptive_batch_cma(self):
+        import cma
+
+        self.MC.set_sweep_functions(
+            [None_Sweep(sweep_control="hard") for i in range(3)]
+        )
+        self.MC.set_detector_function(Parabola_Detector_Hard())
+        self.MC.set_adaptive_function_parameters(
+            {
+                "adaptive_function": cma.fmin,
+                "x0": [-5, 5, 5],
+                "sigma0": 1,
+                "batch_size": 10,
+                # verb_log=0: no log files in outcmaes/
+                "options": {"maxfevals": 2000, "ftarget": 0.005, "seed": 1,
+                            "verb_log": 0},
+            }
+        )
+        dat = self.MC.run("CMA batch test", mode="adaptive")
+        dset = dat["dset"]
+        x_opt = self.MC.adaptive_result[0]
+        for i in range(3):
+            self.assertLess(abs(x_opt[i]), 0.5)
+        # one hard sweep per generation, except for the final evaluation of
+        # the mean of the distribution
+        n_calls = self.MC.detector_function.times_called
+        self.assertEqual(len(dset), 10 * (n_calls - 1) + 1)
+        self.assertGreater(len(dset), 20)
+
+    def test_adaptive_batch_f_termination(self):
+        self.MC.set_sweep_function(None_Sweep(sweep_control="hard"))
+        self.MC.set_detector_function(Parabola_Detector_Hard())
+        self.MC.set_adaptive_function_parameters(
+            {
+                "adaptive_function": adaptive.Learner1D,
+                "goal": lambda l: l.npoints >= 100,
+                "bounds": (-10, 10),
+                "batch_size": 4,
+                "minimize": False,
+                "f_termination": 50,
+            }
+        )
+        dat = self.MC.run("1D adaptive batch f_termination", mode="adaptive")
+        dset = dat["dset"]
+        # the first batch contains the bounds
+        self.assertEqual(len(dset), 4)
+        self.assertEqual(self.MC.detector_function.times_called, 1)
+
+    def test_adaptive_batch_soft_detector(self):
+        self.MC.set_sweep_function(None_Sweep(sweep_control="hard"))
+        self.MC.set_detector_function(det.Dummy_Detector_Soft())
+        self.MC.set_adaptive_function_parameters(
+            {
+                "adaptive_function": adaptive.Learner1D,
+                "goal": lambda l: l.npoints >= 10,
+                "bounds": (0, 10),
+                "batch_size": 5,
+            }
+        )
+        with self.assertRaises(ValueError):
+            self.MC.run("1D adaptive batch soft det", mode="adaptive")
+
+    def test_adaptive_batch_unsupported_function(self):
+        with self.assertRaises(ValueError):
+            self.MC.set_adaptive_function_parameters(
+                {
+                    "adaptive_function": nelder_mead,
+                    "x0": [-50, -50],
+                    "batch_size": 5,
+                }
+            )
+
     def test_adaptive_X0_x_scale(self):
         self.MC.soft_avg(1)
         self.mock_parabola.noise(0)
@@ -960,3 +1256,4 @@ class Test_MeasurementControl(unittest.TestCase):
         self.mock_parabola.close()
         del self.station.components["MC"]
         del self.station.components["mock_parabola"]
+        self.tmpdir.cleanup()
@@ -258,6 +258,60 @@ class TestCliffordCalculus(unittest.TestCase):
             self.assertTrue((Cl_inv*Cl).idx == 0)
 
 
+class TestCliffordTables(unittest.TestCase):
+
+    def test_multiplication_single_qubit(self):
+        for i in range(24):
+            for j in range(24):
+                idx = tqc.multiply_clifford_indices(i, j, number_of_qubits=1)
+                net_op = np.dot(tqc.SingleQubitClifford(i).pauli_transfer_matrix,
+                                tqc.SingleQubitClifford(j).pauli_transfer_matrix)
+                self.assertEqual(idx, tqc.get_clifford_id(net_op))
+
+    def test_multiplication_two_qubit(self):
+        idx_b = np.random.randint(0, high=11520, size=len(test_indices_2Q))
+        idxs = tqc.multiply_clifford_indices(
+            test_indices_2Q, idx_b, number_of_qubits=2)
+        for i, j, idx in zip(test_indices_2Q, idx_b, idxs):
+            net_op = np.dot(tqc.TwoQubitClifford(i).pauli_transfer_matrix,
+                            tqc.TwoQubitClifford(j).pauli_transfer_matrix)
+            self.assertEqual(idx, tqc.get_clifford_id(net_op))
+
+    def test_inverse_tables(self):
+        inv_1Q = tqc.invert_clifford_indices(np.arange(24), 1)
+        assert_array_equal(
+            tqc.multiply_clifford_indices(inv_1Q, np.arange(24), 1), 0)
+        inv_2Q = tqc.invert_clifford_indices(np.arange(11520), 2)
+        assert_array_equal(
+            tqc.multiply_clifford_indices(inv_2Q, np.arange(11520), 2), 0)
+        assert_array_equal(
+            tqc.multiply_clifford_indices(np.arange(11520), inv_2Q, 2), 0)
+
+    def test_net_clifford_index(self):
+        for Cl, group_size in [(tqc.SingleQubitClifford, 24),
+                               (tqc.TwoQubitClifford, 11520)]:
+            seq = np.random.randint(0, group_size, 51)
+            net_ptm = np.eye(4**Cl.number_of_qubits)
+            for idx in seq:
+                net_ptm = np.dot(Cl(idx).pauli_transfer_matrix, net_ptm)
+            self.assertEqual(
+                tqc.net_clifford_index(seq, Cl.number_of_qubits),
+                tqc.get_clifford_id(net_ptm.round()))
+        self.assertEqual(tqc.net_clifford_index([], 2), 0)
+
+    def test_prefix_clifford_indices(self):
+        for number_of_qubits, group_size in [(1, 24), (2, 11520)]:
+            for length in [0, 1, 2, 7, 50]:
+                seqs = np.random.randint(0, group_size, (3, length))
+                prefixes = tqc.prefix_clifford_indices(seqs, number_of_qubits)
+                self.assertEqual(prefixes.shape, seqs.shape)
+                for seq, prefix in zip(seqs, prefixes):
+                    expected = [tqc.net_clifford_index(seq[:k+1],
+                                                       number_of_qubits)
+                                for k in range(length)]
+                    assert_array_equal(prefix, expected)
+
+
 class TestCliffordGateDecomposition(unittest.TestCase):
     def test_single_qubit_gate_decomposition(self):
         for i in range(24):
@@ -360,3 +414,33 @@ class TestCliffordClassRBSeqs(unittest.TestCase):
             # and has components that are all tested.
 
 
+class TestRBSequencesBatch(unittest.TestCase):
+    def test_sequences_match_single_seed_sequences(self):
+        seeds = [0, 100, 200]
+        for number_of_qubits, interleaving_cl in [
+                (1, None), (1, 16), (2, None), (2, 104368)]:
+            cl_seqs, recovery_cls = rb.randomized_benchmarking_sequences(
+                seeds, max_n_cl=30, desired_net_cl=3,
+                number_of_qubits=number_of_qubits,
+                interleaving_cl=interleaving_cl)
+            intl = 1 if interleaving_cl is None else 2
+            self.assertEqual(cl_seqs.shape, (len(seeds), 30*intl))
+            self.assertEqual(recovery_cls.shape, (len(seeds), 31))
+            for i, seed in enumerate(seeds):
+                for n_cl in [0, 1, 8, 30]:
+                    cl_seq = rb.randomized_benchmarking_sequence(
+                        n_cl, desired_net_cl=3,
+                        number_of_qubits=number_of_qubits,
+                        interleaving_cl=interleaving_cl, seed=seed)
+                    assert_array_equal(
+                        cl_seq, np.append(cl_seqs[i, :n_cl*intl],
+                                          recovery_cls[i, n_cl]))
+
+    def test_sequences_reproducible_per_seed(self):
+        cl_seqs_a, rec_a = rb.randomized_benchmarking_sequences(
+            [5, 6, 7], 100, number_of_qubits=2)
+        cl_seqs_b, rec_b = rb.randomized_benchmarking_sequences(
+            [7], 100, number_of_qubits=2)
+        assert_array_equal(cl_seqs_a[2:], cl_seqs_b)
+        assert_array_equal(rec_a[2:], rec_b)
+        self.assertFalse(np.array_equal(cl_seqs_a[0], cl_seqs_a[1]))
@@ -0,0 +1,117 @@
+import numpy as np
+import qutip as qtp
+
+from pycqed.simulations import cz_superoperator_simulation_functions_v2 as czf
+from pycqed.instrument_drivers.meta_instrument.LutMans import flux_lutman_vcz as flm
+from pycqed.instrument_drivers.virtual_instruments import sim_control_CZ_v2 as scCZ_v2
+
+
+class TestTimeEvolution:
+
+    @classmethod
+    def setup_class(cls):
+        cls.fluxlutman = flm.HDAWG_Flux_LutMan("fluxlutman_te")
+        cls.fluxlutman_static = flm.HDAWG_Flux_LutMan("fluxlutman_static_te")
+        cls.sim_control_CZ = scCZ_v2.SimControlCZ_v2("sim_control_CZ_te")
+
+        cls.fluxlutman.q_polycoeffs_freq_01_det(np.array([-2.5e9, 0, 0]))
+        cls.fluxlutman.q_polycoeffs_anharm(np.array([0, 0, -300e6]))
+        cls.fluxlutman.q_freq_01(6.0e9)
+        cls.fluxlutman.q_freq_10_NE(5.0e9)
+        cls.fluxlutman.q_J2_NE(15e6)
+        cls.fluxlutman.bus_freq_NE(8.5e9)
+        cls.fluxlutman_static.q_polycoeffs_anharm(np.array([0, 0, -320e6]))
+        cls.sim_control_CZ.w_q0_sweetspot(6.0e9)
+        cls.sim_control_CZ.w_q1_sweetspot(5.0e9)
+
+        # amplitude of the 11-02 interaction point
+        amp_max = np.sqrt((6.0e9 - 5.0e9 + 300e6) / 2.5e9)
+        t = np.arange(0, 20e-9, 0.1e-9)
+        cls.amp = amp_max * np.sin(np.pi * t / t[-1])
+
+    @classmethod
+    def teardown_class(cls):
+        cls.fluxlutman.close()
+        cls.fluxlutman_static.close()
+        cls.sim_control_CZ.close()
+
+    def time_evolution(self, engine):
+        c_ops = czf.return_jump_operators(
+            self.sim_control_CZ, self.amp, self.fluxlutman
+        )
+        return czf.time_evolution_new(
+            c_ops,
+            self.sim_control_CZ,
+            self.fluxlutman,
+            self.fluxlutman_static,
+            fluxbias_q1=0,
+            amp=self.amp,
+            sim_step=0.1e-9,
+            engine=engine,
+        )
+
+    def test_calc_hamiltonian_array(self):
+        H = czf.calc_hamiltonian_array(
+            self.amp[::50], self.fluxlutman, self.fluxlutman_static
+        )
+        for amp, H_amp in zip(self.amp[::50], H):
+            H_ref = czf.calc_hamiltonian(amp, self.fluxlutman, self.fluxlutman_static)
+            np.testing.assert_allclose(H_amp, H_ref.full(), rtol=1e-12, atol=1e-3)
+
+    def test_liouvillian_array(self):
+        rng = np.random.RandomState(0)
+        H = rng.randn(3, 9, 9) + 1j * rng.randn(3, 9, 9)
+        H = H + H.conj().transpose(0, 2, 1)
+        rates = rng.rand(3)
+        c_ops = [czf.a * 0.3, [czf.n_q1, rates]]
+
+        L = czf.liouvillian_array(H, c_ops)
+        for n in range(3):
+            L_ref = qtp.liouvillian(
+                qtp.Qobj(H[n], dims=czf.a.dims), [c_ops[0], c_ops[1][0] * rates[n]]
+            )
+            np.testing.assert_allclose(L[n], L_ref.full(), atol=1e-12)
+
+        idx = np.array([0, 5, 17, 40, 80])
+        np.testing.assert_allclose(
+            czf.liouvillian_array(H, c_ops, idx=idx), L[:, idx[:, None], idx[None, :]]
+        )
+
+    def test_liouvillian_blocks(self):
+        c_ops = [czf.a, czf.b, czf.n_q0]
+        H = czf.calc_hamiltonian_array(
+            self.amp, self.fluxlutman, self.fluxlutman_static
+        )
+        blocks = czf.liouvillian_blocks(H, c_ops)
+        assert sorted(len(idx) for idx in blocks) == [1, 1, 4, 4, 10, 10, 16, 16, 19]
+        assert sorted(np.concatenate(blocks)) == list(range(81))
+
+    def test_chain_propagators(self):
+        rng = np.random.RandomState(1)
+        U = rng.randn(7, 4, 4)
+        U_ref = np.eye(4)
+        for U_step in U:
+            U_ref = U_step @ U_ref
+        np.testing.assert_allclose(czf.chain_propagators(U), U_ref)
+
+    def test_unitary_engine_equals_qutip(self):
+        self.sim_control_CZ.T1_q0(0)
+        self.sim_control_CZ.T1_q1(0)
+        self.sim_control_CZ.T2_q1(0)
+        self.sim_control_CZ.T2_q0_amplitude_dependent(np.array([-1, -1]))
+
+        U = self.time_evolution("numpy")
+        U_ref = self.time_evolution("qutip")
+        assert U.dims == U_ref.dims
+        np.testing.assert_allclose(U.full(), U_ref.full(), atol=1e-10)
+
+    def test_superoperator_engine_equals_qutip(self):
+        self.sim_control_CZ.T1_q0(60e-6)
+        self.sim_control_CZ.T1_q1(30e-6)
+        self.sim_control_CZ.T2_q1(40e-6)
+        self.sim_control_CZ.T2_q0_amplitude_dependent(np.array([3e4, 2e4]))
+
+        U = self.time_evolution("numpy")
+        U_ref = self.time_evolution("qutip")
+        assert U.dims == U_ref.dims
+        np.testing.assert_allclose(U.full(), U_ref.full(), atol=1e-10)
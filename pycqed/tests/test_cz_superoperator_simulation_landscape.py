@@ -0,0 +1,119 @@
+import os
+import tempfile
+
+import h5py
+import numpy as np
+
+from pycqed.simulations import cz_superoperator_simulation_new2 as cz_main
+from pycqed.simulations import cz_superoperator_simulation_landscape as czl
+from pycqed.instrument_drivers.meta_instrument.LutMans import flux_lutman as flm
+from pycqed.instrument_drivers.virtual_instruments import sim_control_CZ as scCZ
+
+
+class TestCZLandscape:
+
+    @classmethod
+    def setup_class(cls):
+        cls.fluxlutman = flm.HDAWG_Flux_LutMan("fluxlutman_ls")
+        cls.fluxlutman_static = flm.HDAWG_Flux_LutMan("fluxlutman_static_ls")
+        cls.sim_control_CZ = scCZ.SimControlCZ("sim_control_CZ_ls")
+
+        cls.fluxlutman.q_polycoeffs_freq_01_det(np.array([-2.5e9, 0, 0]))
+        cls.fluxlutman.q_freq_10_NE(5.0e9)
+        cls.fluxlutman.bus_freq_NE(8.5e9)
+        cls.fluxlutman.cz_length_NE(30e-9)
+        cls.fluxlutman.cz_theta_f_NE(80)
+        cls.fluxlutman.cz_lambda_2_NE(0.1)
+        cls.fluxlutman_static.q_polycoeffs_anharm(np.array([0, 0, -320e6]))
+        cls.sim_control_CZ.w_q0_sweetspot(6.0e9)
+        cls.sim_control_CZ.w_q1_sweetspot(5.0e9)
+        cls.sim_control_CZ.set_cost_func()
+
+        cls.flux_pars = czl.FluxLutmanParameters.from_instrument(cls.fluxlutman)
+        cls.static_pars = czl.StaticLutmanParameters.from_instrument(
+            cls.fluxlutman_static)
+        cls.sim_pars = czl.SimControlParameters.from_instrument(
+            cls.sim_control_CZ)
+        cls.datadir = tempfile.mkdtemp()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.fluxlutman.close()
+        cls.fluxlutman_static.close()
+        cls.sim_control_CZ.close()
+
+    def test_parameters_from_instrument(self):
+        assert self.flux_pars.cz_theta_f == 80
+        assert self.flux_pars.q_freq_10 == 5.0e9
+        assert self.sim_pars.w_q1_sweetspot == 5.0e9
+        assert self.sim_pars.cost_func is self.sim_control_CZ.cost_func()
+
+        pars = self.flux_pars.instrument_parameters(which_gate="SW")
+        assert pars["cz_theta_f_SW"] == 80
+        assert pars["q_freq_01"] == self.fluxlutman.q_freq_01()
+
+    def test_fluxlutman_view(self):
+        view = czl._FluxLutmanView(self.flux_pars.instrument_parameters())
+        assert view.cz_theta_f_NE() == 80
+        view.cz_theta_f_NE(90)
+        assert view.get("cz_theta_f_NE") == 90
+
+        amps = np.linspace(-0.3, 0.3, 7)
+        for state in ["01", "02", "10", "11"]:
+            np.testing.assert_allclose(
+                view.calc_amp_to_freq(amps, state),
+                self.fluxlutman.calc_amp_to_freq(amps, state))
+        np.testing.assert_allclose(
+            view.calc_eps_to_amp(amps * 1e9, state_A="11", state_B="02"),
+            self.fluxlutman.calc_eps_to_amp(amps * 1e9, state_A="11",
+                                            state_B="02"))
+
+    def test_simulate_cz_equals_detector(self):
+        d = cz_main.CZ_trajectory_superoperator(
+            fluxlutman=self.fluxlutman,
+            sim_control_CZ=self.sim_control_CZ,
+            fluxlutman_static=self.fluxlutman_static)
+        values = d.acquire_data_point()
+
+        qoi = czl.simulate_cz(self.flux_pars, self.static_pars, self.sim_pars)
+        assert list(qoi.keys()) == d.value_names
+        np.testing.assert_allclose(list(qoi.values()), values)
+
+        qoi = czl.simulate_cz(self.flux_pars, self.static_pars, self.sim_pars,
+                              qois=["L1", "Cond phase"])
+        assert list(qoi.keys()) == ["L1", "Cond phase"]
+        assert qoi["Cond phase"] == values[1]
+
+    def test_simulate_landscape(self):
+        res = czl.simulate_landscape(
+            self.flux_pars, self.static_pars, self.sim_pars,
+            theta_f=[70, 80], lambda_2=[0.1], qois=["Cost func", "L1"],
+            n_processes=2, datadir=self.datadir)
+
+        np.testing.assert_array_equal(res["sweep_points"], [[70, 0.1], [80, 0.1]])
+        assert res["value_names"] == ["Cost func", "L1"]
+        qoi = czl.simulate_cz(self.flux_pars, self.static_pars, self.sim_pars)
+        np.testing.assert_allclose(res["values"][1], [qoi["Cost func"], qoi["L1"]])
+
+        assert os.path.isfile(res["filepath"])
+        with h5py.File(res["filepath"], "r") as f:
+            data_group = f["Experimental Data"]
+            np.testing.assert_allclose(
+                data_group["Data"][()],
+                np.column_stack([res["sweep_points"], res["values"]]))
+            assert list(data_group.attrs["sweep_parameter_names"]) == [
+                "cz_theta_f_NE", "cz_lambda_2_NE"]
+            sim_pars = f["Simulation parameters"]["sim_control_CZ"]
+            assert sim_pars.attrs["cost_func"].endswith("<lambda>")
+
+    def test_simulate_landscape_adaptive(self):
+        res = czl.simulate_landscape_adaptive(
+            self.flux_pars, self.static_pars, self.sim_pars,
+            bounds=[(60, 100), (0, 0.2)], n_points=5, batch_size=4,
+            qois=["Cost func"], n_processes=1, datadir=self.datadir)
+        assert res["values"].shape == (5, 1)
+        assert res["sweep_points"].shape == (5, 2)
+        # the first batch are the corners of the bounds
+        np.testing.assert_array_equal(
+            sorted(map(tuple, res["sweep_points"][:4])),
+            [(60, 0), (60, 0.2), (100, 0), (100, 0.2)])
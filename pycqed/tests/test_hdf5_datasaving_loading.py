@@ -1,4 +1,6 @@
 import os
+import time
+import tempfile
 import pycqed as pq
 import unittest
 import h5py
@@ -9,6 +11,7 @@ from pycqed.measurement import measurement_control
 from pycqed.instrument_drivers.physical_instruments.dummy_instruments \
     import DummyParHolder
 
+import pytest
 from pytest import approx
 from qcodes import station
 from pycqed.analysis import analysis_toolbox as a_tools
@@ -22,7 +25,9 @@ class Test_HDF5(unittest.TestCase):
     @classmethod
     def setUpClass(self):
         self.station = station.Station()
-        self.datadir = datadir
+        # the data files of the tests are not kept
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.datadir = self.tmpdir.name
         self.MC = measurement_control.MeasurementControl(
             'MC', live_plot_enabled=False, verbose=False)
         self.MC.station = self.station
@@ -40,6 +45,8 @@ class Test_HDF5(unittest.TestCase):
         self.MC.close()
         self.mock_parabola.close()
         self.mock_parabola_2.close()
+        a_tools.datadir = datadir
+        self.tmpdir.cleanup()
 
     def test_storing_and_loading_station_snapshot(self):
         """
@@ -219,9 +226,191 @@ class Test_HDF5(unittest.TestCase):
         # complex numbers are automatically converted to strings
         self.assertEqual(self.mock_parabola_2.complex_like(), 1.0 + 4.0j)
 
+    def test_delta_snapshot_storing(self):
+        store_dir = tempfile.mkdtemp()
+        self.MC.snapshot_store(store_dir)
+        try:
+            self.mock_parabola.x(1.5)
+            self.mock_parabola.array_like(np.arange(5.))
+            filepaths = []
+            for x in [1.5, 2.5]:
+                self.mock_parabola.x(x)
+                self.MC.set_sweep_function(self.mock_parabola.y)
+                self.MC.set_sweep_points([0, 1])
+                self.MC.set_detector_function(
+                    self.mock_parabola.skewed_parabola)
+                self.MC.run('test_MC_delta_snapshot')
+                filepaths.append(self.MC.data_object.filepath)
+            snap = self.MC.get_snapshot_store()._base
+        finally:
+            self.MC.snapshot_store(None)
+
+        with h5py.File(filepaths[0], 'r') as f0, \
+                h5py.File(filepaths[1], 'r') as f1:
+            base_hash = f0['Snapshot'].attrs['snapshot_base']
+            self.assertEqual(f1['Snapshot'].attrs['snapshot_base'], base_hash)
+            self.assertEqual(os.listdir(store_dir), [base_hash + '.hdf5'])
+            # only the changed parameters are stored in the data file
+            pars = f1['Snapshot/instruments/mock_parabola/parameters']
+            self.assertEqual(pars['x'].attrs['value'], 2.5)
+            self.assertNotIn('array_like', pars)
+            self.assertNotIn('mock_parabola_2', f1['Snapshot/instruments'])
+
+            snapshot = h5d.read_dict_from_hdf5({}, f1['Snapshot'])
+        self.assertEqual(snapshot.keys(), snap.keys())
+        self.assertEqual(snapshot['instruments'].keys(),
+                         snap['instruments'].keys())
+        mock_parab_pars = snapshot['instruments']['mock_parabola']['parameters']
+        self.assertEqual(mock_parab_pars['x']['value'], 2.5)
+        np.testing.assert_array_equal(
+            mock_parab_pars['array_like']['value'], np.arange(5.))
+
+        # the settings are loaded from the reconstructed snapshot
+        self.mock_parabola.x(13)
+        gen.load_settings_onto_instrument_v2(
+            self.mock_parabola, label='test_MC_delta_snapshot')
+        self.assertEqual(self.mock_parabola.x(), 2.5)
+
+    def test_loading_settings_onto_instruments(self):
+        self.mock_parabola.x(42.23)
+        self.mock_parabola.array_like(np.linspace(12, 42, 11))
+        self.mock_parabola.complex_like(1.0 + 4.0j)
+        self.mock_parabola_2.y(3)
+        self.mock_parabola_2.dict_like({'a': {'b': [2, 3, 5]}})
+        self.MC.set_sweep_function(self.mock_parabola.y)
+        self.MC.set_sweep_points([0, 1])
+        self.MC.set_detector_function(self.mock_parabola.skewed_parabola)
+        self.MC.run('test_MC_bulk_settings')
+        self.mock_parabola.x(13)
+        self.mock_parabola.array_like(np.arange(3))
+        self.mock_parabola_2.y(4)
+
+        report = gen.load_settings_onto_instruments(
+            [self.mock_parabola, self.mock_parabola_2],
+            label='test_MC_bulk_settings')
+        self.assertEqual(report['filepath'], self.MC.data_object.filepath)
+        # only the changed parameters are set
+        self.assertEqual(
+            sorted(report['instruments']['mock_parabola']['set']),
+            ['array_like', 'x', 'y'])
+        self.assertEqual(report['instruments']['mock_parabola_2']['set'],
+                         ['y'])
+        self.assertIn('complex_like',
+                      report['instruments']['mock_parabola']['unchanged'])
+        self.assertIn('dict_like',
+                      report['instruments']['mock_parabola_2']['unchanged'])
+        self.assertEqual(report['instruments']['mock_parabola']['failed'], [])
+        self.assertGreater(report['timing']['read'], 0)
+
+        self.assertEqual(self.mock_parabola.x(), 42.23)
+        np.testing.assert_array_equal(self.mock_parabola.array_like(),
+                                      np.linspace(12, 42, 11))
+        self.assertEqual(self.mock_parabola_2.y(), 3)
+        self.assertEqual(self.mock_parabola_2.dict_like(),
+                         {'a': {'b': [2, 3, 5]}})
+
+        report = gen.load_settings_onto_instruments(
+            [self.mock_parabola_2], label='test_MC_bulk_settings',
+            load_from_instr={'mock_parabola_2': 'mock_parabola'},
+            only_changed=False)
+        self.assertEqual(report['instruments']['mock_parabola_2']['unchanged'],
+                         [])
+        self.assertEqual(self.mock_parabola_2.x(), 42.23)
+        self.assertEqual(self.mock_parabola_2.complex_like(), 1.0 + 4.0j)
+
+    def test_loading_settings_onto_instruments_per_file(self):
+        def run():
+            self.MC.set_sweep_function(self.mock_parabola.y)
+            self.MC.set_sweep_points([0, 1])
+            self.MC.set_detector_function(self.mock_parabola.skewed_parabola)
+            self.MC.run('test_MC_partial_settings')
+
+        self.mock_parabola_2.x(5)
+        run()
+        filepath_old = self.MC.data_object.filepath
+        # the last file does not contain mock_parabola_2
+        time.sleep(1.1)
+        self.station.remove_component('mock_parabola_2')
+        try:
+            self.mock_parabola.x(6)
+            run()
+        finally:
+            self.station.add_component(self.mock_parabola_2)
+        filepath_new = self.MC.data_object.filepath
+        self.mock_parabola.x(1)
+        self.mock_parabola_2.x(1)
+
+        mock_parabola_3 = DummyParHolder('mock_parabola_3')
+        try:
+            report = gen.load_settings_onto_instruments(
+                [self.mock_parabola, self.mock_parabola_2, mock_parabola_3],
+                label='test_MC_partial_settings')
+        finally:
+            mock_parabola_3.close()
+        self.assertEqual(report['filepath'], filepath_new)
+        self.assertEqual(report['filepaths'], {
+            'mock_parabola': filepath_new,
+            'mock_parabola_2': filepath_old})
+        self.assertEqual(report['missing'], ['mock_parabola_3'])
+        self.assertEqual(self.mock_parabola.x(), 6)
+        self.assertEqual(self.mock_parabola_2.x(), 5)
+
+
+def test_snapshot_store():
+    store = h5d.SnapshotStore(tempfile.mkdtemp(), max_delta_fraction=0.7)
+    base = {'instruments': {
+        'q0': {'freq': 5e9, 'pulses': [1, 2], 'arr': np.arange(3)},
+        'q1': {'freq': 6e9, 'name': 'q1', 'arr': np.arange(3)}}}
+    snapshots = [
+        base,
+        {'instruments': {
+            'q0': {'freq': 5.1e9, 'pulses': [1, 2, 3], 'arr': np.arange(3)},
+            'q1': {'freq': 6e9, 'arr': np.arange(3)},
+            'q2': {'freq': None}}},
+        # most entries change, stored as a new base
+        {'instruments': {
+            'q0': {'freq': 1, 'pulses': [], 'arr': np.arange(4)}}}]
+    assert h5d.snapshot_hash(base) == h5d.snapshot_hash(
+        {'instruments': {'q1': base['instruments']['q1'],
+                         'q0': base['instruments']['q0']}})
+
+    datadir = tempfile.mkdtemp()
+    for i, snap in enumerate(snapshots):
+        with h5py.File(os.path.join(datadir, '{}.hdf5'.format(i)), 'w') as f:
+            store.write_snapshot(snap, f.create_group('Snapshot'))
+    with h5py.File(os.path.join(datadir, '1.hdf5'), 'r') as f:
+        assert f['Snapshot'].attrs['snapshot_base'] == h5d.snapshot_hash(base)
+        assert list(f['Snapshot/instruments'].keys()) == ['q0', 'q2']
+        assert list(f['Snapshot'].attrs['snapshot_deleted']) == [
+            'instruments/q1/name']
+    with h5py.File(os.path.join(datadir, '2.hdf5'), 'r') as f:
+        assert f['Snapshot'].attrs['snapshot_base'] == h5d.snapshot_hash(
+            snapshots[2])
+    assert len(os.listdir(store.path)) == 2
+
+    for i, snap in enumerate(snapshots):
+        with h5py.File(os.path.join(datadir, '{}.hdf5'.format(i)), 'r') as f:
+            loaded = h5d.read_dict_from_hdf5({}, f)['Snapshot']
+        # as read from a file with the full snapshot
+        with h5py.File(os.path.join(datadir, 'full.hdf5'), 'w') as f:
+            h5d.write_dict_to_hdf5(snap, f)
+        with h5py.File(os.path.join(datadir, 'full.hdf5'), 'r') as f:
+            expected = h5d.read_dict_from_hdf5({}, f)
+        np.testing.assert_equal(loaded, expected)
+
+        with h5py.File(os.path.join(datadir, '{}.hdf5'.format(i)), 'r') as f:
+            subtrees = h5d.read_snapshot_subtrees(
+                f['Snapshot'], ['instruments/q0', '/instruments/'])
+            with pytest.raises(KeyError):
+                h5d.read_snapshot_subtrees(f['Snapshot'], ['instruments/q3'])
+        np.testing.assert_equal(subtrees['instruments/q0'],
+                                expected['instruments']['q0'])
+        np.testing.assert_equal(subtrees['/instruments/'],
+                                expected['instruments'])
+
 
 def test_wr_rd_hdf5_array():
-    datadir = os.path.join(pq.__path__[0], 'tests', 'test_data')
+    datadir = tempfile.mkdtemp()
     test_dict = {
         'x': np.linspace(0, 1, 14),
         'y': np.cos(np.linspace(0, 2*np.pi, 11))}
@@ -254,3 +443,40 @@ def test_extract_pars_from_datafile():
 
     assert extract_pars_dict['data'][:, 0] == approx(
         np.arange(0, 165.001e-6, 3.75e-6))
+
+
+def test_buffered_dataset():
+    data_object = h5d.Data(name='test_buffered_dataset',
+                           datadir=tempfile.mkdtemp())
+    dset = h5d.BufferedDataset(
+        data_object, 'Data', ncols=3, chunk_rows=4, flush_interval=1e9,
+        flush_rows=6)
+    assert dset.shape == (0, 3)
+
+    for i in range(5):
+        dset.resize((i + 1, 3))
+        # newly added rows read as zeros as for a resized h5py dataset
+        np.testing.assert_array_equal(dset[i, :], np.zeros(3))
+        dset[i:i + 1, :] = [i, 2 * i, 3 * i]
+    assert dset.shape == (5, 3)
+    assert len(dset) == 5
+    # Rows are only kept in memory until the row budget is exceeded
+    assert data_object['Data'].shape[0] == 0
+
+    for i in range(5, 10):
+        dset.resize((i + 1, 3))
+        dset[i:i + 1, :] = [i, 2 * i, 3 * i]
+    assert data_object['Data'].shape[0] >= 6
+
+    assert dset.pop_modified_rows() == (0, 10)
+    assert dset.pop_modified_rows() is None
+
+    # Overwrite previously written values (e.g., soft averaging)
+    dset[2:4, 1] = [-1, -1]
+    assert dset.pop_modified_rows() == (2, 4)
+    dset.flush()
+    expected = np.array([[i, 2 * i, 3 * i] for i in range(10)], dtype=float)
+    expected[2:4, 1] = -1
+    np.testing.assert_array_equal(dset[()], expected)
+    np.testing.assert_array_equal(data_object['Data'][()], expected)
+    data_object.close()
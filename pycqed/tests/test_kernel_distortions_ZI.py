@@ -41,6 +41,32 @@ class Test_Kernel_functions_ZI(unittest.TestCase):
         first_order_corr = signal.lfilter(b, 1.0, self.distorted_waveform)
         np.testing.assert_almost_equal(hw_corr, first_order_corr, 6)
 
+    def test_first_order_bounce_correction_sample_by_sample(self):
+        rng = np.random.default_rng(0)
+        sig = rng.normal(size=2000)
+        for scope_sample_rate in [None, 1e9, 2e9, 7.3e9]:
+            for sim_hw_delay in [False, True]:
+                hw_corr = ZI_kf.first_order_bounce_corr(
+                    sig, self.bounce_delay, -self.bounce_amp,
+                    self.sampling_rate, scope_sample_rate=scope_sample_rate,
+                    sim_hw_delay=sim_hw_delay)
+                expected = first_order_bounce_corr_loop(
+                    sig, self.bounce_delay, -self.bounce_amp,
+                    self.sampling_rate, scope_sample_rate=scope_sample_rate,
+                    sim_hw_delay=sim_hw_delay)
+                np.testing.assert_array_equal(hw_corr, expected)
+
+        kern = ZI_kf.first_order_bounce_corr_kern(
+            self.bounce_delay, self.bounce_amp, self.sampling_rate)
+        np.testing.assert_allclose(
+            np.convolve(sig, kern)[:len(sig)],
+            ZI_kf.first_order_bounce_corr(
+                sig, self.bounce_delay, self.bounce_amp, self.sampling_rate),
+            rtol=0, atol=1e-14)
+        with self.assertRaises(ValueError):
+            ZI_kf.first_order_bounce_corr_kern(
+                200e-9, self.bounce_amp, self.sampling_rate)
+
     def test_ideal_bounce_correction(self):
         # Construct impulse response
         impulse = np.zeros(len(self.time))
@@ -92,3 +118,32 @@ class Test_Kernel_functions_ZI(unittest.TestCase):
         # plt.legend()
         # plt.savefig("test_exponential_decay_correction_hw_friendly_continous.png", dpi = 600)
         # plt.show()
+
+
+def first_order_bounce_corr_loop(sig, delay, amp, awg_sample_rate,
+                                 scope_sample_rate=None, sim_hw_delay=False):
+    """
+    Sample by sample simulation of the shift register of the real-time
+    bounce correction.
+    """
+    delay_n_samples = int(round(awg_sample_rate*delay))
+    if scope_sample_rate is None:
+        scope_sample_rate = awg_sample_rate
+    shift_reg = np.zeros(delay_n_samples)
+    awg_sample_incr = awg_sample_rate/scope_sample_rate
+    previous_awg_sample_cnt = 0
+    present_awg_sample_cnt = 0
+    amp_hw = ZI_kf.coef_round(amp, force_bshift=0)
+
+    sigout = np.zeros(len(sig))
+    for i, s in enumerate(sig):
+        sigout[i] = s + amp_hw*shift_reg[-1]
+        present_awg_sample_cnt += awg_sample_incr
+        awg_sample_diff = int(present_awg_sample_cnt) - previous_awg_sample_cnt
+        if awg_sample_diff >= 1:
+            shift_reg[awg_sample_diff:] = shift_reg[:-awg_sample_diff]
+            shift_reg[:awg_sample_diff] = s*np.ones(awg_sample_diff)
+            previous_awg_sample_cnt = int(present_awg_sample_cnt)
+    if sim_hw_delay:
+        sigout = ZI_kf.sigdelay(sigout, int(round(8*(4+5)/awg_sample_incr)))
+    return sigout
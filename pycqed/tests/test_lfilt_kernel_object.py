@@ -1,6 +1,8 @@
 import unittest
 import numpy as np
+from scipy import signal
 import pycqed.instrument_drivers.meta_instrument.lfilt_kernel_object as lko
+from pycqed.measurement import kernel_functions_ZI as kf
 import pycqed.instrument_drivers.physical_instruments.ZurichInstruments.ZI_HDAWG8 as HDAWG
 
 
@@ -33,6 +35,69 @@ class Test_LinDistortionKernelObject(unittest.TestCase):
 
         self.k0.distort_waveform(my_square, length_samples=1000)
 
+    def test_distort_waveforms_sample_by_sample(self):
+        self.k0.cfg_gain_correction(1.1)
+        fir = np.zeros(40)
+        fir[:4] = [1.05, -0.02, -0.02, -0.01]
+        self.k0.filter_model_02({'model': 'bounce', 'real-time': False,
+                                 'params': {'tau': 10e-9, 'amp': 0.05}})
+        self.k0.filter_model_03({'model': 'FIR', 'real-time': False,
+                                 'params': {'weights': fir}})
+        self.k0.filter_model_04({'model': 'exponential', 'real-time': False,
+                                 'params': {'amp': -0.08, 'tau': 1e-8}})
+        rng = np.random.default_rng(0)
+        waveforms = [rng.normal(size=n) for n in [300, 1000, 2048]]
+
+        def distort_sequentially(waveform, length_samples, inverse):
+            # the filter models applied one after the other
+            y = np.zeros(length_samples)
+            n = min(len(waveform), length_samples)
+            y[:n] = waveform[:n]
+            fs = self.k0.cfg_sampling_rate()
+            for model in [self.k0.filter_model_00, self.k0.filter_model_01,
+                          self.k0.filter_model_04]:
+                kf_func = {'high-pass': kf.bias_tee_correction,
+                           'exponential': kf.exponential_decay_correction}[
+                               model()['model']]
+                y = kf_func(y, sampling_rate=fs, inverse=inverse,
+                            **model()['params'])
+            y = kf.first_order_bounce_corr(y, 10e-9, 0.05, 2.4e9)
+            if inverse:
+                return signal.lfilter([1], fir, y) / 1.1
+            return signal.lfilter(fir, 1, y) * 1.1
+
+        try:
+            for inverse in [False, True]:
+                distorted = self.k0.distort_waveforms(
+                    waveforms, length_samples=1024, inverse=inverse)
+                self.assertEqual(len(distorted), 3)
+                for waveform, y_sig in zip(waveforms, distorted):
+                    np.testing.assert_allclose(
+                        y_sig, distort_sequentially(waveform, 1024, inverse),
+                        rtol=1e-10, atol=1e-12)
+                np.testing.assert_array_equal(
+                    self.k0.distort_waveform(
+                        waveforms[1], length_samples=1024, inverse=inverse),
+                    distorted[1])
+
+            distorted = self.k0.distort_waveforms(waveforms)
+            self.assertEqual([len(y_sig) for y_sig in distorted],
+                             [300, 1000, 2048])
+            np.testing.assert_allclose(
+                distorted[0], distort_sequentially(waveforms[0], 300, False),
+                rtol=1e-10, atol=1e-12)
+
+            # the compiled filter is cached until a filter model changes
+            filt = self.k0.get_compiled_filter()
+            self.assertIs(self.k0.get_compiled_filter(), filt)
+            self.assertEqual(filt['sos'].shape, (3, 6))
+            self.assertEqual(len(filt['fir']), 40 + 24)
+            self.k0.filter_model_02({})
+            self.assertEqual(len(self.k0.get_compiled_filter()['fir']), 40)
+        finally:
+            self.k0.reset_kernels()
+            self.k0.cfg_gain_correction(1)
+
     def test_get_first_empty_kernel(self):
         first_empty = self.k0.get_first_empty_filter()
         self.assertEqual(first_empty, 2)
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from pycqed.analysis import analysis_toolbox as a_tools
+from pycqed.utilities import measurement_catalogue as mcat
+
+
+class TestMeasurementCatalogue:
+
+    def setup_method(self):
+        self.datadir = tempfile.mkdtemp()
+        self.catalogue_path = os.path.join(tempfile.mkdtemp(), "cat.sqlite")
+        self.dirnames = {
+            "20200101": ["101010_Rabi_q0", "101011_Ramsey_q0", "120000_Rabi_q1"],
+            "20200102": ["090000_Ramsey_q1", "090000_Ramsey_q1_b", "091500_Rabi"],
+            "20200105": ["235959_Rabi_q0"],
+        }
+        for daystamp, dirnames in self.dirnames.items():
+            for dirname in dirnames:
+                os.makedirs(os.path.join(self.datadir, daystamp, dirname))
+        # not measurements
+        os.makedirs(os.path.join(self.datadir, "20200101", ".hidden"))
+        os.makedirs(os.path.join(self.datadir, "analysis_results"))
+        # day folders modified just before a refresh are always re-scanned
+        for daystamp in self.dirnames:
+            os.utime(os.path.join(self.datadir, daystamp), (1e9, 1e9))
+
+        self.old_datadir = a_tools.datadir
+        self.old_use_catalogue = a_tools.use_measurement_catalogue
+        a_tools.datadir = self.datadir
+        self.old_catalogues = dict(mcat._catalogues)
+        mcat._catalogues.clear()
+        self.catalogue = mcat.MeasurementCatalogue(
+            self.datadir, catalogue_path=self.catalogue_path)
+        mcat._catalogues[(mcat._datadir_key(self.datadir), self.datadir)] = \
+            self.catalogue
+
+    def teardown_method(self):
+        a_tools.datadir = self.old_datadir
+        a_tools.use_measurement_catalogue = self.old_use_catalogue
+        mcat._catalogues.clear()
+        mcat._catalogues.update(self.old_catalogues)
+        shutil.rmtree(self.datadir)
+
+    def compare_with_directory_scan(self, func, *args, **kw):
+        a_tools.use_measurement_catalogue = True
+        res = func(*args, **kw)
+        a_tools.use_measurement_catalogue = False
+        res_scan = func(*args, **kw)
+        assert res == res_scan
+        return res
+
+    def test_refresh(self):
+        assert self.catalogue.refresh() == ["20200101", "20200102", "20200105"]
+        assert len(self.catalogue) == 7
+        assert self.catalogue.refresh() == []
+
+        os.makedirs(os.path.join(self.datadir, "20200102", "100000_T1"))
+        shutil.rmtree(os.path.join(self.datadir, "20200105"))
+        assert self.catalogue.refresh() == ["20200102"]
+        assert len(self.catalogue) == 7
+        rows = self.catalogue.find(refresh=False, limit=1)
+        assert rows == [("20200102_100000", "20200102", "100000_T1")]
+
+    def test_add_measurement(self):
+        self.catalogue.refresh()
+        folder = os.path.join(self.datadir, "20200106", "080000_Echo")
+        os.makedirs(folder)
+        self.catalogue.add_measurement(folder)
+        assert self.catalogue.find("Echo", refresh=False) == [
+            ("20200106_080000", "20200106", "080000_Echo")]
+        with pytest.raises(ValueError):
+            self.catalogue.add_measurement(self.datadir)
+
+    def test_find(self):
+        rows = self.catalogue.find(["Rabi", "q0"], ascending=True)
+        assert [r[0] for r in rows] == ["20200101_101010", "20200105_235959"]
+        rows = self.catalogue.find("Ramsey_q1", exact_label_match=True)
+        assert rows == [("20200102_090000", "20200102", "090000_Ramsey_q1")]
+        rows = self.catalogue.find(older_than="20200102_090000", or_equal=True,
+                                   newer_than="20200101120000")
+        assert [r[2] for r in rows] == [
+            "090000_Ramsey_q1_b", "090000_Ramsey_q1", "120000_Rabi_q1"]
+
+    def test_latest_data(self):
+        self.compare_with_directory_scan(a_tools.latest_data, "Rabi")
+        self.compare_with_directory_scan(
+            a_tools.latest_data, "Ramsey", return_timestamp=True)
+        self.compare_with_directory_scan(
+            a_tools.latest_data, "Rabi", older_than="20200102_091500")
+        self.compare_with_directory_scan(
+            a_tools.latest_data, "Rabi", older_than="20200102_091500",
+            or_equal=True)
+        self.compare_with_directory_scan(
+            a_tools.latest_data, "", newer_than="20200101_101010",
+            older_than="20200102_090000")
+        self.compare_with_directory_scan(
+            a_tools.latest_data, "Ramsey", return_all=True)
+        res = self.compare_with_directory_scan(
+            a_tools.latest_data, "T1", raise_exc=False)
+        assert res is False
+        with pytest.raises(Exception):
+            a_tools.latest_data("T1")
+
+    def test_latest_data_picks_up_new_measurements(self):
+        a_tools.latest_data("Rabi")
+        folder = os.path.join(self.datadir, "20200105", "235959_Rabi_q2")
+        os.makedirs(folder)
+        assert a_tools.latest_data("Rabi") == folder
+
+    def test_return_last_n_timestamps(self):
+        res = self.compare_with_directory_scan(
+            a_tools.return_last_n_timestamps, 4)
+        assert res == ["20200105235959", "20200102091500", "20200102090000",
+                       "20200101120000"]
+        self.compare_with_directory_scan(
+            a_tools.return_last_n_timestamps, 2, contains="Ramsey")
+        a_tools.use_measurement_catalogue = True
+        with pytest.raises(Exception):
+            a_tools.return_last_n_timestamps(4, contains="Ramsey")
+
+    def test_get_timestamps_in_range(self):
+        res = self.compare_with_directory_scan(
+            a_tools.get_timestamps_in_range, "20200101_101011",
+            "20200102_090000", label="")
+        assert res == ["20200101_101011", "20200101_120000",
+                       "20200102_090000", "20200102_090000"]
+        self.compare_with_directory_scan(
+            a_tools.get_timestamps_in_range, "20200101_000000",
+            label=["Rabi", "q0"])
+        self.compare_with_directory_scan(
+            a_tools.get_timestamps_in_range, "20200101_000000",
+            label="Rabi", exact_label_match=True)
+        a_tools.use_measurement_catalogue = True
+        with pytest.raises(ValueError):
+            a_tools.get_timestamps_in_range("20200101_000000", label="T1")
+
+    def test_failing_catalogue_lists_folders(self, monkeypatch):
+        def failing_refresh():
+            raise AttributeError("failing refresh")
+        monkeypatch.setattr(self.catalogue, "refresh", failing_refresh)
+        a_tools.use_measurement_catalogue = True
+        assert a_tools._get_measurement_catalogue(self.datadir) is None
+        assert a_tools.latest_data("Rabi") == os.path.join(
+            self.datadir, "20200105", "235959_Rabi_q0")
@@ -0,0 +1,200 @@
+import os
+import time
+import tempfile
+import threading
+
+import h5py
+import numpy as np
+import pytest
+
+from pycqed.measurement import measurement_control_helpers as mch
+from pycqed.measurement import detector_functions as det
+
+
+class TestShotStatistics:
+
+    def setup_method(self):
+        rng = np.random.RandomState(0)
+        self.nr_segments = 4
+        self.shots = rng.randn(1001, 2) + [0, 1]
+        self.segments = np.arange(len(self.shots)) % self.nr_segments
+
+    def add_in_chunks(self, stream, chunk_size=97):
+        for start_idx in range(0, len(self.shots), chunk_size):
+            stream.add(start_idx, self.shots[start_idx:start_idx + chunk_size])
+
+    def test_counts(self):
+        stream = mch.ShotStatistics(thresholds=[0, 1.5],
+                                    nr_segments=self.nr_segments)
+        self.add_in_chunks(stream)
+
+        bitstrings = (2 * (self.shots[:, 0] > 0)
+                      + (self.shots[:, 1] > 1.5)).astype(int)
+        for seg in range(self.nr_segments):
+            sel = self.segments == seg
+            np.testing.assert_array_equal(
+                stream.counts[seg], np.bincount(bitstrings[sel], minlength=4))
+            assert stream.nr_shots[seg] == np.sum(sel)
+            np.testing.assert_allclose(stream.mean[seg],
+                                       np.mean(self.shots[sel], axis=0))
+            np.testing.assert_allclose(stream.std[seg],
+                                       np.std(self.shots[sel], axis=0))
+        np.testing.assert_allclose(np.sum(stream.probabilities, axis=1), 1)
+
+    def test_histograms(self):
+        stream = mch.ShotStatistics(nr_segments=self.nr_segments, nr_bins=20,
+                                    hist_range=(-2, 3))
+        self.add_in_chunks(stream)
+
+        assert stream.counts is None
+        for ch in range(2):
+            for seg in range(self.nr_segments):
+                h, edges = np.histogram(self.shots[self.segments == seg, ch],
+                                        bins=20, range=(-2, 3))
+                np.testing.assert_array_equal(stream.histograms[ch, seg], h)
+            np.testing.assert_allclose(stream.bin_edges[ch], edges)
+            assert stream.underflow[ch] == np.sum(self.shots[:, ch] < -2)
+            assert stream.overflow[ch] == np.sum(self.shots[:, ch] > 3)
+
+    def test_automatic_hist_range(self):
+        stream = mch.ShotStatistics()
+        stream.add(0, np.array([0., 1., 2.]))
+        np.testing.assert_allclose(stream.bin_edges[0, [0, -1]], [-1, 3])
+
+    def test_wrong_nr_of_thresholds(self):
+        stream = mch.ShotStatistics(thresholds=[0])
+        with pytest.raises(ValueError):
+            stream.add(0, self.shots)
+
+    def test_save_and_archive(self):
+        fn = os.path.join(tempfile.mkdtemp(), 'shots.hdf5')
+        stream = mch.ShotStatistics(thresholds=[0, 1], nr_segments=4,
+                                    archive_raw_shots=True,
+                                    archive_dtype='float64')
+        with h5py.File(fn, 'w') as f:
+            stream.open_archive(f, nr_channels=2, chunk_rows=100)
+            self.add_in_chunks(stream)
+            stream.save(f)
+
+        with h5py.File(fn, 'r') as f:
+            np.testing.assert_array_equal(f['Raw shots'][()], self.shots)
+            stats = f['Shot statistics']
+            assert stats.attrs['nr_segments'] == 4
+            np.testing.assert_array_equal(stats['counts'][()], stream.counts)
+            np.testing.assert_array_equal(stats['histograms'][()],
+                                          stream.histograms)
+
+
+class TestMinMaxDecimator:
+
+    @staticmethod
+    def expected_rows(data, bin_width, col):
+        rows = []
+        for start in range(0, len(data), bin_width):
+            vals = data[start:start + bin_width, col]
+            rows += sorted({start + np.nanargmin(vals),
+                            start + np.nanargmax(vals)})
+        return np.array(rows)
+
+    def test_no_decimation(self):
+        decimator = mch.MinMaxDecimator(max_bins=100)
+        decimator.update(np.zeros((100, 2)))
+        assert decimator.bin_width == 1
+        np.testing.assert_array_equal(decimator.rows(1), np.arange(100))
+
+    def test_incremental_updates(self):
+        rng = np.random.RandomState(0)
+        data = rng.randn(5000, 3)
+        data[rng.rand(5000) < 0.1, 2] = np.nan
+        decimator = mch.MinMaxDecimator(max_bins=50)
+        for stop in range(0, 5001, 97):
+            decimator.update(data[:stop])
+        decimator.update(data)
+        assert decimator.bin_width == 128
+        assert decimator.nr_bins == 40
+        for col in range(3):
+            rows = decimator.rows(col)
+            np.testing.assert_array_equal(
+                rows, self.expected_rows(data, 128, col))
+            assert np.nanmin(data[:, col]) == np.nanmin(data[rows, col])
+            assert np.nanmax(data[:, col]) == np.nanmax(data[rows, col])
+
+    def test_modified_rows(self):
+        rng = np.random.RandomState(1)
+        data = rng.randn(1000, 2)
+        decimator = mch.MinMaxDecimator(max_bins=10)
+        decimator.update(data)
+        # e.g., soft averaging, only the modified rows are updated
+        data[300:420] = 10 * rng.randn(120, 2)
+        decimator.update(data, (300, 420))
+        for col in range(2):
+            np.testing.assert_array_equal(
+                decimator.rows(col), self.expected_rows(data, 128, col))
+
+        # a new dataset with less rows resets the decimator
+        decimator.update(data[:50])
+        assert decimator.bin_width == 8
+        np.testing.assert_array_equal(
+            decimator.rows(0), self.expected_rows(data[:50], 8, 0))
+
+
+class TestBackgroundPublisher:
+
+    def test_coalescing(self):
+        publisher = mch.BackgroundPublisher()
+        published = []
+        block = threading.Event()
+        publisher.submit("block", block.wait)
+        for i in range(10):
+            publisher.submit("plot", published.append, i)
+        publisher.submit("monitor", published.append, "monitor")
+        block.set()
+        assert publisher.wait(timeout=5)
+        # only the latest update of a key is published
+        assert published == [9, "monitor"]
+        assert publisher.stats["submitted"] == 12
+        assert publisher.stats["coalesced"] == 9
+        assert publisher.stats["executed"] == 3
+        publisher.stop()
+        assert not publisher.is_alive
+
+    def test_bounded_queue(self):
+        publisher = mch.BackgroundPublisher(max_pending=2)
+        published = []
+        block = threading.Event()
+        publisher.submit("block", block.wait)
+        # wait until the blocking task is running
+        while not publisher._busy:
+            time.sleep(0.001)
+        for key in ["a", "b", "c"]:
+            publisher.submit(key, published.append, key)
+        block.set()
+        assert publisher.wait(timeout=5)
+        assert published == ["b", "c"]
+        assert publisher.stats["dropped"] == 1
+        publisher.stop()
+
+    def test_failing_task(self):
+        publisher = mch.BackgroundPublisher()
+        published = []
+        publisher.submit("fail", lambda: 1 / 0)
+        publisher.submit("plot", published.append, 1)
+        assert publisher.wait(timeout=5)
+        assert published == [1]
+        assert publisher.stats["failed"] == 1
+        # stopping executes the pending tasks
+        publisher.submit("plot", published.append, 2)
+        publisher.stop(timeout=5)
+        assert published == [1, 2]
+
+
+def test_logging_det_streaming():
+    d = det.UHFQC_integration_logging_det(
+        UHFQC=None, channels=(0, 1, 2), result_logging_mode='digitized',
+        streaming=True, nr_segments=8)
+    assert isinstance(d.shot_stream, mch.ShotStatistics)
+    np.testing.assert_array_equal(d.shot_stream.thresholds, [0.5] * 3)
+    assert d.shot_stream.nr_segments == 8
+
+    d = det.UHFQC_integration_logging_det(UHFQC=None)
+    assert d.shot_stream is None
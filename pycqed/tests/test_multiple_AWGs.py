@@ -54,6 +54,14 @@ default_sequencer_config = {
     'slave_AWG_trig_channels': [],
 }
 
+def played_wf(awg_file, seg, cid):
+    """
+    Returns the packed waveform played by channel group cid in segment seg,
+    identical waveforms are shared by the segments.
+    """
+    return awg_file['p_wfs'][awg_file['names'][int(cid[2])-1][seg]]
+
+
 class TestMultipleAWGs(unittest.TestCase):
 
     def test_with_single_AWG(self):
@@ -86,23 +94,23 @@ class TestMultipleAWGs(unittest.TestCase):
 
         sqs.Rabi_seq([0.3, 0.6], self.pulse_pars, self.RO_pars)
 
-        pwfs = self.AWG.file['p_wfs']
-        self.assertEqual(max(pwfs['2-pulse-elt_0_ch1']), 10286)
-        self.assertEqual(min(pwfs['2-pulse-elt_0_ch1']), 6384)
-        self.assertEqual(max(pwfs['2-pulse-elt_0_ch2']), 10211)
-        self.assertEqual(min(pwfs['2-pulse-elt_0_ch2']), 6171)
-        self.assertEqual(max(pwfs['2-pulse-elt_0_ch3']), 24575)
-        self.assertEqual(min(pwfs['2-pulse-elt_0_ch3']), 8191)
-        self.assertEqual(max(pwfs['2-pulse-elt_0_ch4']), 40959)
-        self.assertEqual(min(pwfs['2-pulse-elt_0_ch4']), 8191)
-        self.assertEqual(max(pwfs['2-pulse-elt_1_ch1']), 12382)
-        self.assertEqual(min(pwfs['2-pulse-elt_1_ch1']), 4578)
-        self.assertEqual(max(pwfs['2-pulse-elt_1_ch2']), 12231)
-        self.assertEqual(min(pwfs['2-pulse-elt_1_ch2']), 4151)
-        self.assertEqual(max(pwfs['2-pulse-elt_1_ch3']), 24575)
-        self.assertEqual(min(pwfs['2-pulse-elt_1_ch3']), 8191)
-        self.assertEqual(max(pwfs['2-pulse-elt_1_ch4']), 40959)
-        self.assertEqual(min(pwfs['2-pulse-elt_1_ch4']), 8191)
+        awg_file = self.AWG.file
+        self.assertEqual(max(played_wf(awg_file, 0, 'ch1')), 10286)
+        self.assertEqual(min(played_wf(awg_file, 0, 'ch1')), 6384)
+        self.assertEqual(max(played_wf(awg_file, 0, 'ch2')), 10211)
+        self.assertEqual(min(played_wf(awg_file, 0, 'ch2')), 6171)
+        self.assertEqual(max(played_wf(awg_file, 0, 'ch3')), 24575)
+        self.assertEqual(min(played_wf(awg_file, 0, 'ch3')), 8191)
+        self.assertEqual(max(played_wf(awg_file, 0, 'ch4')), 40959)
+        self.assertEqual(min(played_wf(awg_file, 0, 'ch4')), 8191)
+        self.assertEqual(max(played_wf(awg_file, 1, 'ch1')), 12382)
+        self.assertEqual(min(played_wf(awg_file, 1, 'ch1')), 4578)
+        self.assertEqual(max(played_wf(awg_file, 1, 'ch2')), 12231)
+        self.assertEqual(min(played_wf(awg_file, 1, 'ch2')), 4151)
+        self.assertEqual(max(played_wf(awg_file, 1, 'ch3')), 24575)
+        self.assertEqual(min(played_wf(awg_file, 1, 'ch3')), 8191)
+        self.assertEqual(max(played_wf(awg_file, 1, 'ch4')), 40959)
+        self.assertEqual(min(played_wf(awg_file, 1, 'ch4')), 8191)
 
     def test_with_multiple_AWGs(self):
         self.station = qc.Station()
@@ -145,38 +153,38 @@ class TestMultipleAWGs(unittest.TestCase):
 
         sqs.Rabi_seq([0.3, 0.6], self.pulse_pars, self.RO_pars)
 
-        pwfs1 = self.AWG1.file['p_wfs']
-        self.assertEqual(max(pwfs1['2-pulse-elt_0_ch1']), 10286)
-        self.assertEqual(min(pwfs1['2-pulse-elt_0_ch1']), 6384)
-        self.assertEqual(max(pwfs1['2-pulse-elt_0_ch2']), 8191)
-        self.assertEqual(min(pwfs1['2-pulse-elt_0_ch2']), 8191)
-        self.assertEqual(max(pwfs1['2-pulse-elt_0_ch3']), 24575)
-        self.assertEqual(min(pwfs1['2-pulse-elt_0_ch3']), 8191)
-        self.assertEqual(max(pwfs1['2-pulse-elt_0_ch4']), 8191)
-        self.assertEqual(min(pwfs1['2-pulse-elt_0_ch4']), 8191)
-        self.assertEqual(max(pwfs1['2-pulse-elt_1_ch1']), 12382)
-        self.assertEqual(min(pwfs1['2-pulse-elt_1_ch1']), 4578)
-        self.assertEqual(max(pwfs1['2-pulse-elt_1_ch2']), 8191)
-        self.assertEqual(min(pwfs1['2-pulse-elt_1_ch2']), 8191)
-        self.assertEqual(max(pwfs1['2-pulse-elt_1_ch3']), 24575)
-        self.assertEqual(min(pwfs1['2-pulse-elt_1_ch3']), 8191)
-        self.assertEqual(max(pwfs1['2-pulse-elt_1_ch4']), 8191)
-        self.assertEqual(min(pwfs1['2-pulse-elt_1_ch4']), 8191)
-
-        pwfs2 = self.AWG2.file['p_wfs']
-        self.assertEqual(max(pwfs2['2-pulse-elt_0_ch1']), 8191)
-        self.assertEqual(min(pwfs2['2-pulse-elt_0_ch1']), 8191)
-        self.assertEqual(max(pwfs2['2-pulse-elt_0_ch2']), 10211)
-        self.assertEqual(min(pwfs2['2-pulse-elt_0_ch2']), 6171)
-        self.assertEqual(max(pwfs2['2-pulse-elt_0_ch3']), 8191)
-        self.assertEqual(min(pwfs2['2-pulse-elt_0_ch3']), 8191)
-        self.assertEqual(max(pwfs2['2-pulse-elt_0_ch4']), 40959)
-        self.assertEqual(min(pwfs2['2-pulse-elt_0_ch4']), 8191)
-        self.assertEqual(max(pwfs2['2-pulse-elt_1_ch1']), 8191)
-        self.assertEqual(min(pwfs2['2-pulse-elt_1_ch1']), 8191)
-        self.assertEqual(max(pwfs2['2-pulse-elt_1_ch2']), 12231)
-        self.assertEqual(min(pwfs2['2-pulse-elt_1_ch2']), 4151)
-        self.assertEqual(max(pwfs2['2-pulse-elt_1_ch3']), 8191)
-        self.assertEqual(min(pwfs2['2-pulse-elt_1_ch3']), 8191)
-        self.assertEqual(max(pwfs2['2-pulse-elt_1_ch4']), 40959)
-        self.assertEqual(min(pwfs2['2-pulse-elt_1_ch4']), 8191)
+        awg_file1 = self.AWG1.file
+        self.assertEqual(max(played_wf(awg_file1, 0, 'ch1')), 10286)
+        self.assertEqual(min(played_wf(awg_file1, 0, 'ch1')), 6384)
+        self.assertEqual(max(played_wf(awg_file1, 0, 'ch2')), 8191)
+        self.assertEqual(min(played_wf(awg_file1, 0, 'ch2')), 8191)
+        self.assertEqual(max(played_wf(awg_file1, 0, 'ch3')), 24575)
+        self.assertEqual(min(played_wf(awg_file1, 0, 'ch3')), 8191)
+        self.assertEqual(max(played_wf(awg_file1, 0, 'ch4')), 8191)
+        self.assertEqual(min(played_wf(awg_file1, 0, 'ch4')), 8191)
+        self.assertEqual(max(played_wf(awg_file1, 1, 'ch1')), 12382)
+        self.assertEqual(min(played_wf(awg_file1, 1, 'ch1')), 4578)
+        self.assertEqual(max(played_wf(awg_file1, 1, 'ch2')), 8191)
+        self.assertEqual(min(played_wf(awg_file1, 1, 'ch2')), 8191)
+        self.assertEqual(max(played_wf(awg_file1, 1, 'ch3')), 24575)
+        self.assertEqual(min(played_wf(awg_file1, 1, 'ch3')), 8191)
+        self.assertEqual(max(played_wf(awg_file1, 1, 'ch4')), 8191)
+        self.assertEqual(min(played_wf(awg_file1, 1, 'ch4')), 8191)
+
+        awg_file2 = self.AWG2.file
+        self.assertEqual(max(played_wf(awg_file2, 0, 'ch1')), 8191)
+        self.assertEqual(min(played_wf(awg_file2, 0, 'ch1')), 8191)
+        self.assertEqual(max(played_wf(awg_file2, 0, 'ch2')), 10211)
+        self.assertEqual(min(played_wf(awg_file2, 0, 'ch2')), 6171)
+        self.assertEqual(max(played_wf(awg_file2, 0, 'ch3')), 8191)
+        self.assertEqual(min(played_wf(awg_file2, 0, 'ch3')), 8191)
+        self.assertEqual(max(played_wf(awg_file2, 0, 'ch4')), 40959)
+        self.assertEqual(min(played_wf(awg_file2, 0, 'ch4')), 8191)
+        self.assertEqual(max(played_wf(awg_file2, 1, 'ch1')), 8191)
+        self.assertEqual(min(played_wf(awg_file2, 1, 'ch1')), 8191)
+        self.assertEqual(max(played_wf(awg_file2, 1, 'ch2')), 12231)
+        self.assertEqual(min(played_wf(awg_file2, 1, 'ch2')), 4151)
+        self.assertEqual(max(played_wf(awg_file2, 1, 'ch3')), 8191)
+        self.assertEqual(min(played_wf(awg_file2, 1, 'ch3')), 8191)
+        self.assertEqual(max(played_wf(awg_file2, 1, 'ch4')), 40959)
+        self.assertEqual(min(played_wf(awg_file2, 1, 'ch4')), 8191)
@@ -3,6 +3,7 @@ import unittest
 import qcodes as qc
 from pycqed.measurement.waveform_control.pulsar import Pulsar
 from pycqed.measurement.waveform_control import element
+from pycqed.measurement.waveform_control import sequence
 from pycqed.measurement.waveform_control.pulse import SquarePulse
 from pycqed.measurement.pulse_sequences.standard_elements import multi_pulse_elt
 from pycqed.instrument_drivers.virtual_instruments.virtual_awg5014 import \
@@ -148,6 +149,74 @@ class Test_Element(unittest.TestCase):
 
         np.testing.assert_array_almost_equal(ch1_wf, expected_wf)
 
+    def test_waveform_cache(self):
+        element.clear_waveform_cache()
+        pulse = SquarePulse(name='dummy_square', channel='ch1',
+                            amplitude=.3, length=20e-9)
+        test_elt = element.Element('test_elt', pulsar=self.pulsar)
+        test_elt.add(pulse)
+        ch1_wf = test_elt.waveforms()[1]['ch1']
+        self.assertEqual(len(element._waveform_cache), 1)
+
+        # an identical element uses the cached waveform of the pulse
+        test_elt_2 = element.Element('test_elt_2', pulsar=self.pulsar)
+        test_elt_2.add(pulse)
+        np.testing.assert_array_equal(test_elt_2.waveforms()[1]['ch1'],
+                                      ch1_wf)
+        self.assertEqual(len(element._waveform_cache), 1)
+        self.assertEqual(test_elt.content_key(), test_elt_2.content_key())
+
+        # changing a parameter or the timing results in a new waveform
+        test_elt_3 = element.Element('test_elt_3', pulsar=self.pulsar)
+        test_elt_3.add(SquarePulse(name='dummy_square', channel='ch1',
+                                   amplitude=.5, length=20e-9))
+        test_elt_3.add(pulse, start=100e-9)
+        expected_wf = np.zeros(960)
+        expected_wf[:20] = .5
+        expected_wf[100:120] = .3
+        np.testing.assert_array_almost_equal(
+            test_elt_3.waveforms()[1]['ch1'], expected_wf)
+        self.assertEqual(len(element._waveform_cache), 3)
+        self.assertNotEqual(test_elt.content_key(), test_elt_3.content_key())
+
+        # element waveforms are not affected by modifying cached waveforms
+        test_elt.waveforms()[1]['ch1'][:] = 0
+        np.testing.assert_array_equal(test_elt_2.waveforms()[1]['ch1'],
+                                      ch1_wf)
+
+    def test_content_key(self):
+        self.assertEqual(element.content_key({'a': [1, np.arange(3)]}),
+                         element.content_key({'a': [1, np.arange(3)]}))
+        self.assertNotEqual(element.content_key([1]),
+                            element.content_key([1.]))
+        self.assertNotEqual(element.content_key(np.arange(3)),
+                            element.content_key(np.arange(4)))
+        with self.assertRaises(TypeError):
+            element.content_key([object()])
+
+    def test_program_identical_elements_once(self):
+        seq = sequence.Sequence('identical_elements')
+        el_list = []
+        for i, amp in enumerate([.1, .2, .1, .1, .2]):
+            el = element.Element('el_{}'.format(i), pulsar=self.pulsar)
+            el.add(SquarePulse(name='dummy_square', channel='ch1',
+                               amplitude=amp, length=20e-9))
+            el_list.append(el)
+            seq.append(name=el.name, wfname=el.name, trigger_wait=True)
+        self.pulsar.program_awgs(seq, *el_list)
+
+        awg_file = self.AWG.file
+        # el_0, el_1 and the all zero waveforms of the other channels
+        self.assertEqual(len(awg_file['p_wfs']), 3)
+        np.testing.assert_array_equal(
+            awg_file['names'][0],
+            ['el_0_ch1', 'el_1_ch1', 'el_0_ch1', 'el_0_ch1', 'el_1_ch1'])
+        for i, el in enumerate(el_list):
+            wf = awg_file['p_wfs'][awg_file['names'][0][i]]
+            expected_wf = el.normalized_waveforms()[1]['ch1']
+            np.testing.assert_array_equal(
+                wf, np.round(expected_wf * 8191) + 8191)
+
     # def test_distorted_attribute(self):
 
     #     test_elt = element.Element('test_elt', pulsar=self.pulsar)
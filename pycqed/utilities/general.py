@@ -7,7 +7,7 @@ import h5py
 import string
 import json
 import datetime
-from pycqed.measurement.hdf5_data import read_dict_from_hdf5
+from pycqed.measurement.hdf5_data import read_snapshot_subtrees
 from pycqed.analysis import analysis_toolbox as a_tools
 import errno
 import pycqed as pq
@@ -234,6 +234,7 @@ def load_settings_onto_instrument_v2(
     filepath: str = None,
     timestamp: str = None,
     ignore_pars: set = None,
+    only_changed: bool = False,
 ):
     """
     Loads settings from an hdf5 file onto the instrument handed to the
@@ -251,56 +252,209 @@ def load_settings_onto_instrument_v2(
             if filepath is specified, this takes precedence over the file
             locating options (label, timestamp etc.).
         timestamp (str)       : timestamp of file in the datadir
+        ignore_pars (set)     : names of parameters that are not loaded
+        only_changed (bool)   : if True, parameters of which the cached
+            value equals the value in the file are not set.
 
+    See also `load_settings_onto_instruments` to load the settings of many
+    instruments at once.
+    """
+    instrument_name = instrument.name
+    if load_from_instr is None:
+        load_from_instr = instrument_name
+    snapshots, _ = _read_instrument_snapshots(
+        [load_from_instr], label=label, filepath=filepath, timestamp=timestamp
+    )
+    if load_from_instr not in snapshots:
+        logging.warning(
+            'Could not open settings for instrument "%s"' % (instrument_name)
+        )
+        return False
+
+    _set_parameters_from_snapshot(
+        instrument,
+        snapshots[load_from_instr],
+        ignore_pars=ignore_pars,
+        only_changed=only_changed,
+    )
+    return True
+
+
+def load_settings_onto_instruments(
+    instruments: list,
+    label: str = "",
+    filepath: str = None,
+    timestamp: str = None,
+    load_from_instr: dict = None,
+    ignore_pars: set = None,
+    only_changed: bool = True,
+):
+    """
+    Loads settings from an hdf5 file onto several instruments, e.g. all the
+    qubits, LutMans and AWGs of a device. The file is located as in
+    `load_settings_onto_instrument_v2` and opened once, only the snapshots
+    of the requested instruments are read from it.
+    By default only the parameters of which the cached value differs from
+    the value in the file are set.
+
+    Args:
+        instruments (list)    : instruments onto which settings are loaded
+        label (str)           : label used for finding the last datafile
+        filepath (str)        : exact filepath of the hdf5 file to load.
+        timestamp (str)       : timestamp of file in the datadir
+        load_from_instr (dict): optional, name of the instrument in the file
+            from which to load the settings per instrument name.
+        ignore_pars (set)     : names of parameters that are not loaded
+        only_changed (bool)   : if False all parameters are set.
 
+    The snapshot of each instrument is resolved separately: instruments
+    that are not in the file are looked up in (at most two) older files.
+
+    Returns:
+        report (dict) with
+            filepath: the (first) file from which settings were loaded,
+            filepaths: per instrument name, the file from which its
+                settings were loaded,
+            missing: names of the instruments that were not found in any
+                of the files, their settings are not loaded,
+            instruments: per instrument name, the names of the parameters
+                that were "set", "unchanged" (not set) and "failed",
+            timing: time in seconds spent reading the file ("read"), setting
+                parameters ("set") and an estimate of the time saved by not
+                setting the unchanged parameters ("saved"), based on the
+                mean time per parameter that was set.
+        or False if the settings of none of the instruments could be read.
     """
+    if load_from_instr is None:
+        load_from_instr = {}
+    sources = [load_from_instr.get(ins.name, ins.name) for ins in instruments]
+
+    t0 = time.perf_counter()
+    snapshots, filepaths = _read_instrument_snapshots(
+        sources, label=label, filepath=filepath, timestamp=timestamp)
+    t_read = time.perf_counter() - t0
+    if len(snapshots) == 0:
+        logging.warning(
+            "Could not open settings for instruments {}".format(
+                [ins.name for ins in instruments])
+        )
+        return False
 
+    report = {
+        "filepath": filepaths[next(s for s in sources if s in snapshots)],
+        "filepaths": {},
+        "missing": [],
+        "instruments": {},
+    }
+    t0 = time.perf_counter()
+    for ins, source in zip(instruments, sources):
+        if source not in snapshots:
+            report["missing"].append(ins.name)
+            continue
+        report["filepaths"][ins.name] = filepaths[source]
+        report["instruments"][ins.name] = _set_parameters_from_snapshot(
+            ins, snapshots[source], ignore_pars=ignore_pars,
+            only_changed=only_changed)
+    t_set = time.perf_counter() - t0
+
+    nr_set = sum(len(r["set"]) for r in report["instruments"].values())
+    nr_unchanged = sum(
+        len(r["unchanged"]) for r in report["instruments"].values())
+    t_saved = nr_unchanged * t_set / nr_set if nr_set > 0 else 0.0
+    report["timing"] = {"read": t_read, "set": t_set, "saved": t_saved}
+    logging.info(
+        "Loaded settings of {} instruments from {} in {:.2f} s: set {} "
+        "parameters, {} unchanged (~{:.2f} s saved)".format(
+            len(report["instruments"]), report["filepath"], t_read + t_set,
+            nr_set, nr_unchanged, t_saved))
+    older = {name: fp for name, fp in report["filepaths"].items()
+             if fp != report["filepath"]}
+    if older:
+        logging.warning(
+            "Settings of {} loaded from older files: {}".format(
+                list(older), older))
+    if report["missing"]:
+        logging.warning(
+            "Could not find settings for instruments {}".format(
+                report["missing"]))
+    return report
+
+
+def _read_instrument_snapshots(
+    instrument_names: list,
+    label: str = "",
+    filepath: str = None,
+    timestamp: str = None,
+):
+    """
+    Reads the snapshots of the instruments from a datafile, see
+    `load_settings_onto_instrument_v2`. Instruments that are not in the
+    file (or if the file can not be read) are looked up in older files.
+
+    Returns:
+        snapshots (dict): the snapshot per instrument name that was found.
+        filepaths (dict): the file of the snapshot per instrument name.
+    """
+    snapshots = {}
+    filepaths = {}
     older_than = None
     folder = None
-    instrument_name = instrument.name
-    success = False
     count = 0
     # Will try multiple times in case the last measurements failed and
-    # created corrupt data files.
-    while success is False and count < 3:
+    # created corrupt data files or did not include all instruments.
+    while count < 3:
         if filepath is None:
-            folder = a_tools.get_folder(
-                timestamp=timestamp, label=label, older_than=older_than
-            )
+            try:
+                folder = a_tools.get_folder(
+                    timestamp=timestamp, label=label, older_than=older_than
+                )
+            except Exception:
+                if count == 0:
+                    raise
+                break  # no older files
             filepath = a_tools.measurement_filename(folder)
         try:
-
-            f = h5py.File(filepath, "r")
-            snapshot = {}
-            read_dict_from_hdf5(snapshot, h5_group=f["Snapshot"])
-
-            if load_from_instr is None:
-                ins_group = snapshot["instruments"][instrument_name]
-            else:
-                ins_group = snapshot["instruments"][load_from_instr]
-            success = True
+            with h5py.File(filepath, "r") as f:
+                for name in instrument_names:
+                    if name in snapshots:
+                        continue
+                    path = "instruments/{}".format(name)
+                    try:
+                        snapshot = read_snapshot_subtrees(f["Snapshot"], [path])
+                    except KeyError:
+                        continue
+                    snapshots[name] = snapshot[path]
+                    filepaths[name] = filepath
         except Exception as e:
             logging.warning("Exception occured reading from {}".format(folder))
             logging.warning(e)
-            # This check makes this snippet a bit more robust
-            if folder is not None:
-                older_than = (
-                    os.path.split(folder)[0][-8:] + "_" + os.path.split(folder)[1][:6]
-                )
-            # important to set all to None, otherwise the try except loop
-            # will not look for an earlier data file
-            folder = None
-            filepath = None
-            success = False
+        if len(snapshots) == len(set(instrument_names)):
+            break
+        # This check makes this snippet a bit more robust
+        if folder is not None:
+            older_than = (
+                os.path.split(folder)[0][-8:] + "_" + os.path.split(folder)[1][:6]
+            )
+        # important to set all to None, otherwise the try except loop
+        # will not look for an earlier data file
+        folder = None
+        filepath = None
         count += 1
+    return snapshots, filepaths
 
-    if not success:
-        logging.warning(
-            'Could not open settings for instrument "%s"' % (instrument_name)
-        )
-        return False
 
-    for parname, par in ins_group["parameters"].items():
+def _set_parameters_from_snapshot(
+    instrument, ins_snapshot: dict, ignore_pars: set = None, only_changed: bool = False
+):
+    """
+    Sets the parameters of the instrument to the values in its snapshot.
+
+    Returns:
+        dict with the names of the parameters that were "set", "unchanged"
+        (only_changed) and "failed".
+    """
+    result = {"set": [], "unchanged": [], "failed": []}
+    for parname, par in ins_snapshot["parameters"].items():
         try:
             if hasattr(instrument.parameters[parname], "set") and (
                 par["value"] is not None
@@ -314,15 +468,55 @@ def load_settings_onto_instrument_v2(
                             # This detects that in the hdf5 file the parameter
                             # was saved as string due to type incompatibility
                             par_value = eval(par_value)
+                    if only_changed and _is_cached_value(
+                        instrument.parameters[parname], par_value
+                    ):
+                        result["unchanged"].append(parname)
+                        continue
                     instrument.set(parname, par_value)
+                    result["set"].append(parname)
         except Exception as e:
             print(
                 'Could not set parameter: "{}" to "{}" '
-                'for instrument "{}"'.format(parname, par["value"], instrument_name)
+                'for instrument "{}"'.format(
+                    parname, par.get("value"), instrument.name)
             )
             logging.warning(e)
-    f.close()
-    return True
+            result["failed"].append(parname)
+    return result
+
+
+def _is_cached_value(parameter, value):
+    """
+    True if the parameter has a valid cached value equal to value.
+    """
+    cache = parameter.cache
+    if cache.timestamp is None or not cache.valid:
+        return False
+    return _values_equal(cache.get(get_if_invalid=False), value)
+
+
+def _values_equal(a, b):
+    try:
+        if isinstance(a, dict) or isinstance(b, dict):
+            return (
+                isinstance(a, dict)
+                and isinstance(b, dict)
+                and a.keys() == b.keys()
+                and all(_values_equal(a[key], b[key]) for key in a)
+            )
+        if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+            return len(a) == len(b) and all(map(_values_equal, a, b))
+        if isinstance(a, (list, tuple, np.ndarray)) or isinstance(
+            b, (list, tuple, np.ndarray)
+        ):
+            a, b = np.asarray(a), np.asarray(b)
+            return a.shape == b.shape and bool(np.all(a == b))
+        if isinstance(a, str) != isinstance(b, str):
+            return False
+        return bool(a == b)
+    except Exception:
+        return False
 
 
 def send_email(subject="PycQED needs your attention!", body="", email=None):
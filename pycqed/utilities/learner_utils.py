@@ -9,7 +9,7 @@ log = logging.getLogger(__name__)
 # ######################################################################
 # Utilities for evaluating points before starting the runner
 # ######################################################################
-def evaluate_X(learner, X, x_scale=None):
+def evaluate_X(learner, X, x_scale=None, batch_function=None):
     """
     Evaluates the learner's sampling function at the given point
     or points.
@@ -21,18 +21,21 @@ def evaluate_X(learner, X, x_scale=None):
         X: single point or iterable of points
             A tuple is considered single point for a multi-variable
             domain.
+        batch_function: function that evaluates a list of points at once,
+            used instead of the learner's function, see `runner_batch`
     """
     if type(X) is tuple or not isinstance(X, Iterable):
         # A single-variable domain single point or
         # a multi-variable domain single point is given
-        X_scaled = scale_X(X, x_scale)
-        learner.tell(X_scaled, learner.function(X_scaled))
+        X = [X]
+    # Several points are to be evaluated
+    X_scaled = [scale_X(Xi, x_scale) for Xi in X]
+    if batch_function is not None:
+        Y = batch_function(X_scaled)
     else:
-        # Several points are to be evaluated
-        X_scaled = [scale_X(Xi, x_scale) for Xi in X]
         Y = (learner.function(Xi) for Xi in X_scaled)
 
-        learner.tell_many(X_scaled, Y)
+    learner.tell_many(X_scaled, Y)
 
 
 def scale_X(X, x_scale=None):
@@ -78,6 +81,34 @@ def tell_X_Y(learner, X, Y, x_scale=None):
         learner.tell_many(X_scaled, Y)
 
 
+# ######################################################################
+# Runners
+# ######################################################################
+
+
+def runner_batch(learner, goal, batch_function, batch_size: int):
+    """
+    Runs the learner until the goal is reached, asking the learner for
+    `batch_size` points at a time that are evaluated together.
+
+    Equivalent to `adaptive.runner.simple` (which asks for a single point at
+    a time), for sampling functions that measure several points in one go,
+    e.g. in a single hardware sweep.
+
+    Arguments:
+        learner: (BaseLearner) an instance of the learner
+        goal: function of the learner that returns True when done
+        batch_function: function that takes a list of points and returns
+            the list of values of the learner's function at these points
+        batch_size: number of points evaluated at once
+    """
+    while not goal(learner):
+        X, _ = learner.ask(batch_size)
+        if len(X) == 0:
+            break
+        learner.tell_many(X, batch_function(X))
+
+
 # ######################################################################
 # pycqed especific
 # ######################################################################
@@ -0,0 +1,303 @@
+"""
+Persistent index of the measurements in a datadir.
+
+The datadir contains a folder per day ("YYYYMMDD") containing a folder per
+measurement ("hhmmss_<measurement name>"). Finding the latest measurement
+with a certain label requires listing these folders, which becomes slow for
+datadirs containing years of data, in particular on network drives.
+
+The `MeasurementCatalogue` keeps a SQLite database with one row per
+measurement folder. Measurements are added by the MeasurementControl when a
+datafile is created, measurements written by other processes are found by
+an incremental re-scan: only the day folders whose modification time
+changed since the last scan are listed again.
+
+The database is stored outside of the datadir (the datadir can be read-only
+or on a network drive on which SQLite locking is unreliable) in
+`catalogue_dir`, one file per datadir.
+"""
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Location of the database files, can be changed using the environment
+# variable PYCQED_CATALOGUE_DIR
+catalogue_dir = os.environ.get(
+    'PYCQED_CATALOGUE_DIR',
+    os.path.join(os.path.expanduser('~'), '.pycqed', 'catalogues'))
+
+# Day folders modified less than this (in ns) before a scan are scanned
+# again on the next refresh
+_recent_mtime_ns = 2e9
+
+_schema = """
+CREATE TABLE IF NOT EXISTS measurements (
+    daystamp TEXT NOT NULL,
+    dirname TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (daystamp, dirname)
+);
+CREATE INDEX IF NOT EXISTS measurements_timestamp
+    ON measurements (timestamp);
+CREATE TABLE IF NOT EXISTS days (
+    daystamp TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _is_daystamp(name: str):
+    return len(name) == 8 and name.isdigit()
+
+
+def _is_measurement_dirname(name: str):
+    return len(name) >= 6 and name[:6].isdigit()
+
+
+class MeasurementCatalogue:
+    """
+    Index of the measurement folders in a datadir.
+
+    Timestamps are returned as "YYYYMMDD_hhmmss", the folder of a
+    measurement is os.path.join(datadir, daystamp, dirname).
+    """
+
+    def __init__(self, datadir: str, catalogue_path: str = None):
+        """
+        Args:
+            datadir (str): the data directory to index.
+            catalogue_path (str): location of the database, defaults to a
+                file in `catalogue_dir` based on the path of the datadir.
+        """
+        self.datadir = datadir
+        if catalogue_path is None:
+            digest = hashlib.sha1(_datadir_key(datadir).encode('utf-8'))
+            digest = digest.hexdigest()
+            catalogue_path = os.path.join(
+                catalogue_dir, 'catalogue_{}.sqlite'.format(digest[:16]))
+        self.catalogue_path = catalogue_path
+        os.makedirs(os.path.dirname(self.catalogue_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_schema)
+            conn.execute("INSERT OR REPLACE INTO info VALUES ('datadir', ?)",
+                         (os.path.abspath(datadir), ))
+
+    @contextmanager
+    def _connect(self):
+        # A new connection is used for every operation, such that the
+        # catalogue can be used from multiple threads and forked processes
+        conn = sqlite3.connect(self.catalogue_path, timeout=30)
+        try:
+            with conn:  # commits, or rolls back on an exception
+                yield conn
+        finally:
+            conn.close()
+
+    def get_folder(self, daystamp: str, dirname: str):
+        return os.path.join(self.datadir, daystamp, dirname)
+
+    ##########################################################################
+    # Updating the catalogue
+    ##########################################################################
+
+    def refresh(self):
+        """
+        Updates the catalogue for all day folders that were created,
+        modified or removed since the last refresh.
+
+        Returns:
+            list of the daystamps that were (re-)scanned.
+        """
+        day_mtimes = {}
+        with os.scandir(self.datadir) as it:
+            for entry in it:
+                if _is_daystamp(entry.name) and entry.is_dir():
+                    day_mtimes[entry.name] = entry.stat().st_mtime_ns
+
+        with self._connect() as conn:
+            known_mtimes = dict(conn.execute(
+                'SELECT daystamp, mtime_ns FROM days'))
+            removed_days = set(known_mtimes) - set(day_mtimes)
+            for daystamp in removed_days:
+                conn.execute('DELETE FROM measurements WHERE daystamp = ?',
+                             (daystamp, ))
+                conn.execute('DELETE FROM days WHERE daystamp = ?',
+                             (daystamp, ))
+
+            changed_days = sorted(
+                daystamp for daystamp, mtime in day_mtimes.items()
+                if known_mtimes.get(daystamp) != mtime)
+            for daystamp in changed_days:
+                self._scan_day(conn, daystamp, day_mtimes[daystamp])
+        return changed_days
+
+    def _scan_day(self, conn, daystamp: str, mtime_ns: int):
+        try:
+            with os.scandir(os.path.join(self.datadir, daystamp)) as it:
+                dirnames = [entry.name for entry in it
+                            if _is_measurement_dirname(entry.name)
+                            and entry.is_dir()]
+        except FileNotFoundError:
+            # removed in the mean time, picked up on the next refresh
+            return
+        conn.execute('DELETE FROM measurements WHERE daystamp = ?',
+                     (daystamp, ))
+        conn.executemany(
+            'INSERT OR REPLACE INTO measurements VALUES (?, ?, ?, ?)',
+            [self._row(daystamp, d) for d in dirnames])
+        if int(time.time() * 1e9) - mtime_ns < _recent_mtime_ns:
+            # A folder created right after the scan can leave the mtime
+            # unchanged (coarse mtime resolution), scan again next time
+            mtime_ns = -1
+        conn.execute('INSERT OR REPLACE INTO days VALUES (?, ?)',
+                     (daystamp, mtime_ns))
+
+    @staticmethod
+    def _row(daystamp: str, dirname: str):
+        return (daystamp, dirname, '{}_{}'.format(daystamp, dirname[:6]),
+                dirname[7:])
+
+    def add_measurement(self, folder: str):
+        """
+        Adds the measurement stored in `folder` (a folder inside a day
+        folder of the datadir) to the catalogue.
+        """
+        daydir, dirname = os.path.split(os.path.abspath(folder))
+        daystamp = os.path.basename(daydir)
+        if not (_is_daystamp(daystamp) and _is_measurement_dirname(dirname)):
+            raise ValueError(
+                '"{}" is not a measurement folder'.format(folder))
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO measurements VALUES (?, ?, ?, ?)',
+                self._row(daystamp, dirname))
+
+    ##########################################################################
+    # Queries
+    ##########################################################################
+
+    def find(self, contains='', older_than: str = None,
+             newer_than: str = None, or_equal: bool = False,
+             exact_label_match: bool = False, daystamp: str = None,
+             ascending: bool = False, limit: int = None,
+             refresh: bool = True):
+        """
+        Finds the measurements matching the arguments.
+
+        Args:
+            contains (str or list of str): label(s) that should all be part
+                of the name of the measurement folder ("hhmmss_name").
+            older_than (str): only return measurements older than this
+                timestamp ("YYYYMMDD_hhmmss" or "YYYYMMDDhhmmss").
+            newer_than (str): only return measurements newer than this
+                timestamp.
+            or_equal (bool): include measurements at exactly older_than or
+                newer_than.
+            exact_label_match (bool): the label(s) should be equal to the
+                name of the measurement (excluding the timestamp).
+            daystamp (str): only return measurements of this day.
+            ascending (bool): order of the results, by default the latest
+                measurement comes first.
+            limit (int): maximum number of measurements to return.
+            refresh (bool): re-scan modified day folders first.
+
+        Returns:
+            list of (timestamp, daystamp, dirname) tuples, see
+            `get_folder` for the corresponding folder.
+        """
+        if refresh:
+            self.refresh()
+
+        labels = [contains] if isinstance(contains, str) else list(contains)
+        conditions = []
+        params = []
+        for label in labels:
+            if exact_label_match:
+                conditions.append('name = ?')
+                params.append(label)
+            elif label != '':
+                conditions.append('instr(dirname, ?) > 0')
+                params.append(label)
+        compare = '=' if or_equal else ''
+        if older_than is not None:
+            conditions.append('timestamp <{} ?'.format(compare))
+            params.append(_normalize_timestamp(older_than))
+        if newer_than is not None:
+            conditions.append('timestamp >{} ?'.format(compare))
+            params.append(_normalize_timestamp(newer_than))
+        if daystamp is not None:
+            conditions.append('daystamp = ?')
+            params.append(daystamp)
+
+        query = 'SELECT timestamp, daystamp, dirname FROM measurements'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        order = 'ASC' if ascending else 'DESC'
+        query += ' ORDER BY daystamp {0}, dirname {0}'.format(order)
+        if limit is not None:
+            query += ' LIMIT {:d}'.format(limit)
+
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM measurements').fetchone()[0]
+
+
+def _normalize_timestamp(timestamp: str):
+    """
+    Converts a "YYYYMMDDhhmmss", "YYYYMMDD_hhmmss" or "hhmmss" (today)
+    timestamp to the "YYYYMMDD_hhmmss" format used in the catalogue.
+    """
+    if len(timestamp) == 6:
+        return '{}_{}'.format(time.strftime('%Y%m%d'), timestamp)
+    elif len(timestamp) == 14:
+        return '{}_{}'.format(timestamp[:8], timestamp[8:])
+    elif len(timestamp) == 15:
+        return '{}_{}'.format(timestamp[:8], timestamp[9:])
+    raise ValueError("Cannot interpret timestamp '{}'".format(timestamp))
+
+
+def _datadir_key(datadir: str):
+    return os.path.normcase(os.path.abspath(datadir))
+
+
+_catalogues = {}
+
+
+def get_catalogue(datadir: str):
+    """
+    Returns the catalogue of `datadir`, one instance per datadir is kept.
+    """
+    key = (_datadir_key(datadir), datadir)
+    catalogue = _catalogues.get(key)
+    if catalogue is None:
+        catalogue = MeasurementCatalogue(datadir)
+        _catalogues[key] = catalogue
+    return catalogue
+
+
+def register_measurement(folder: str, datadir: str):
+    """
+    Adds a new measurement folder to the catalogue of `datadir`.
+
+    Failures are logged and not raised, the catalogue is an index only and
+    picks up missing measurements when re-scanning.
+    """
+    try:
+        get_catalogue(datadir).add_measurement(folder)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        log.warning('Could not add "{}" to the measurement catalogue: '
+                    '{}'.format(folder, e))